@@ -3,24 +3,118 @@ Aplicación Flask para Calculadora de Impuestos
 Patrón MVC con Blueprints
 """
 
+import os
+
 from flask import Flask
 from src.db.database import BaseDatos
+from src.db.instrumentacion import Instrumentacion
 
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'views')
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# Tipos de contenido que se comprimen por defecto (COMPRESION_TIPOS los reemplaza)
+TIPOS_COMPRIMIBLES = 'text/html,application/json,text/plain,text/css,application/javascript,text/csv'
 
-def create_app(config_name='development'):
-    """Factory para crear la aplicación Flask"""
-    import os
-    template_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'views')
-    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
-    
-    app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
+
+def _configurar(app, config=None):
+    """Configuración común de las aplicaciones WSGI y ASGI"""
     app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
-    app.config['DATABASE'] = 'calculadora_impuestos.db'
+    app.config['DATABASE'] = os.environ.get('DATABASE', 'calculadora_impuestos.db')
+    app.config['DB_UMBRAL_LENTO'] = float(os.environ.get('DB_UMBRAL_LENTO', 0.1))
+    app.config['DB_LOG_LENTAS'] = os.environ.get('DB_LOG_LENTAS')
+    app.config['METRICAS_DIR'] = os.environ.get('METRICAS_DIR')
+    app.config['PERFILADO_HABILITADO'] = os.environ.get('PERFILADO_HABILITADO') == '1'
+    app.config['PERFILADO_CABECERA'] = os.environ.get('PERFILADO_CABECERA') == '1'
+    app.config['PERFILADO_DIR'] = os.environ.get('PERFILADO_DIR', 'perfiles')
+    app.config['ESCRITURA_DIFERIDA'] = os.environ.get('ESCRITURA_DIFERIDA') == '1'
+    app.config['ESCRITURA_DIFERIDA_MS'] = float(os.environ.get('ESCRITURA_DIFERIDA_MS', 50))
+    app.config['ESCRITURA_DIFERIDA_FILAS'] = int(os.environ.get('ESCRITURA_DIFERIDA_FILAS', 500))
+    app.config['ESCRITURA_DIFERIDA_CAPACIDAD'] = int(os.environ.get('ESCRITURA_DIFERIDA_CAPACIDAD', 10000))
+    app.config['IDEMPOTENCIA_CAPACIDAD'] = int(os.environ.get('IDEMPOTENCIA_CAPACIDAD', 10000))
+    app.config['REPORTES_HILOS'] = int(os.environ.get('REPORTES_HILOS', 4))
+    app.config['TRABAJOS_DB'] = os.environ.get('TRABAJOS_DB')
+    app.config['TRABAJOS_HILOS'] = int(os.environ.get('TRABAJOS_HILOS', 2))
+    app.config['CACHE_VISTAS'] = os.environ.get('CACHE_VISTAS', '1') == '1'
+    app.config['CACHE_VISTAS_CAPACIDAD'] = int(os.environ.get('CACHE_VISTAS_CAPACIDAD', 256))
+    app.config['COMPRESION'] = os.environ.get('COMPRESION', '1') == '1'
+    app.config['COMPRESION_MINIMO'] = int(os.environ.get('COMPRESION_MINIMO', 1024))
+    app.config['COMPRESION_NIVEL'] = int(os.environ.get('COMPRESION_NIVEL', 6))
+    app.config['COMPRESION_NIVEL_BROTLI'] = int(os.environ.get('COMPRESION_NIVEL_BROTLI', 4))
+    app.config['COMPRESION_CACHE'] = int(os.environ.get('COMPRESION_CACHE', 128))
+    app.config['COMPRESION_TIPOS'] = tuple(os.environ.get('COMPRESION_TIPOS', TIPOS_COMPRIMIBLES).split(','))
+    app.config['REPLICA_ANALITICA'] = os.environ.get('REPLICA_ANALITICA') == '1'
+    app.config['REPLICA_DB'] = os.environ.get('REPLICA_DB')
+    app.config['REPLICA_ANTIGUEDAD'] = float(os.environ.get('REPLICA_ANTIGUEDAD', 60))
+    app.config['ACTIVOS_DIR'] = os.environ.get('ACTIVOS_DIR', os.path.join(STATIC_DIR, 'dist'))
+    app.config.update(config or {})
+    
+    from app_web.idempotencia import nueva_clave
+    app.jinja_env.globals['nueva_clave_idempotencia'] = nueva_clave
+    
+    # Activos con hash y precomprimidos si existe una construcción; si no, los de static/
+    from app_web.activos import ManifiestoActivos
+    app.activos = ManifiestoActivos(app.config['ACTIVOS_DIR'], app.static_url_path)
+    app.jinja_env.globals['url_activo'] = app.activos.url
+    
+    # Copia periódica de la base para los reportes, para que no compitan con las ventas
+    app.replica = None
+    if app.config['REPLICA_ANALITICA']:
+        from src.db.replica import ReplicaLectura
+        app.replica = ReplicaLectura(app.config['DATABASE'], app.config['REPLICA_DB'],
+                                     antiguedad_maxima=app.config['REPLICA_ANTIGUEDAD'])
+
+
+def create_app(config_name='development', config=None):
+    """Factory para crear la aplicación Flask
+
+    ``config`` permite sobrescribir valores de configuración (por ejemplo en pruebas).
+    """
+    app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
+    _configurar(app, config)
+    
+    # Instrumentación de la capa de datos compartida por todas las solicitudes
+    app.instrumentacion = Instrumentacion(umbral_lento=app.config['DB_UMBRAL_LENTO'],
+                                          ruta_log_lento=app.config['DB_LOG_LENTAS'])
     
     # Inicializar base de datos
-    db = BaseDatos(app.config['DATABASE'])
+    db = BaseDatos(app.config['DATABASE'], instrumentacion=app.instrumentacion)
     app.db = db
     
+    # Claves de idempotencia recientes de /transacciones/crear
+    from app_web.idempotencia import CacheIdempotencia
+    app.idempotencia = CacheIdempotencia(app.config['IDEMPOTENCIA_CAPACIDAD'])
+    
+    # Consultas del panel de estadísticas en paralelo, cada una con su conexión de sólo lectura
+    import atexit
+    from src.db.reportes import MotorReportes
+    app.reportes = MotorReportes(app.config['DATABASE'], hilos=app.config['REPORTES_HILOS'],
+                                 replica=app.replica)
+    atexit.register(app.reportes.cerrar)
+    
+    # Trabajos largos (crear tablas, datos de ejemplo, recálculos) fuera de la solicitud
+    from app_web.trabajos import iniciar_trabajos
+    iniciar_trabajos(app)
+    app.before_request(app.trabajos.iniciar)
+    atexit.register(app.trabajos.detener)
+    
+    # Páginas renderizadas por generación de las tablas que muestran (ETag y 304)
+    from src.db.estampas import EstampasTablas
+    app.estampas = EstampasTablas(app.config['DATABASE'])
+    app.cache_vistas = None
+    if app.config['CACHE_VISTAS']:
+        from app_web.cache_vistas import CacheVistas, version_plantillas
+        app.cache_vistas = CacheVistas(app.config['CACHE_VISTAS_CAPACIDAD'],
+                                       version_plantillas(TEMPLATE_DIR) + app.activos.version)
+    
+    # Escritura diferida opcional de transacciones (diario local + commits agrupados)
+    app.cola_escritura = None
+    if app.config['ESCRITURA_DIFERIDA']:
+        from src.db.cola_escritura import ColaEscritura
+        app.cola_escritura = ColaEscritura(app.config['DATABASE'],
+                                           capacidad=app.config['ESCRITURA_DIFERIDA_CAPACIDAD'],
+                                           intervalo=app.config['ESCRITURA_DIFERIDA_MS'] / 1000.0,
+                                           max_filas=app.config['ESCRITURA_DIFERIDA_FILAS'])
+        atexit.register(app.cola_escritura.detener)
+    
     # Registrar Blueprints
     from app_web.controllers.home_controller import home_bp
     from app_web.controllers.productos_controller import productos_bp
@@ -28,6 +122,9 @@ def create_app(config_name='development'):
     from app_web.controllers.transacciones_controller import transacciones_bp
     from app_web.controllers.calculadora_controller import calculadora_bp
     from app_web.controllers.estadisticas_controller import estadisticas_bp
+    from app_web.controllers.trabajos_controller import trabajos_bp
+    from app_web.controllers.activos_controller import activos_bp
+    from app_web.activos import PREFIJO_URL as PREFIJO_ACTIVOS
     
     app.register_blueprint(home_bp)
     app.register_blueprint(productos_bp, url_prefix='/productos')
@@ -35,6 +132,73 @@ def create_app(config_name='development'):
     app.register_blueprint(transacciones_bp, url_prefix='/transacciones')
     app.register_blueprint(calculadora_bp, url_prefix='/calculadora')
     app.register_blueprint(estadisticas_bp, url_prefix='/estadisticas')
+    app.register_blueprint(trabajos_bp, url_prefix='/trabajos')
+    app.register_blueprint(activos_bp, url_prefix=PREFIJO_ACTIVOS)
+    
+    # Compresión gzip/brotli de HTML y JSON (COMPRESION=0 la desactiva, p. ej. detrás de un proxy que comprime)
+    from app_web.compresion import iniciar_compresion
+    iniciar_compresion(app)
+    
+    # Métricas de Prometheus en /metrics
+    from app_web.metricas import iniciar_metricas
+    iniciar_metricas(app)
+    
+    # Perfilado opcional por solicitud en /_perfiles (desactivado no se importa ni registra nada)
+    if app.config['PERFILADO_HABILITADO'] or app.config['PERFILADO_CABECERA']:
+        from app_web.perfilado import iniciar_perfilado
+        iniciar_perfilado(app)
     
     return app
 
+
+def create_asgi_app(config_name='development', config=None):
+    """Factory para crear la aplicación ASGI (Quart)
+
+    Sirve las mismas rutas y plantillas que ``create_app`` con controladores
+    asíncronos y BaseDatosAsync, de modo que un solo proceso atiende muchas
+    solicitudes concurrentes mientras esperan a SQLite. Requiere quart y aiosqlite.
+    """
+    from quart import Quart
+    from src.db.database_async import BaseDatosAsync
+    from src.db.reportes import MotorReportes
+    
+    app = Quart(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
+    _configurar(app, config)
+    app.db = BaseDatosAsync(app.config['DATABASE'])
+    app.reportes = MotorReportes(app.config['DATABASE'], hilos=app.config['REPORTES_HILOS'],
+                                 replica=app.replica)
+    from app_web.trabajos import iniciar_trabajos
+    iniciar_trabajos(app)
+    
+    @app.before_serving
+    async def _iniciar_trabajos():
+        app.trabajos.iniciar()
+    
+    @app.after_serving
+    async def _cerrar_db():
+        await app.db.desconectar()
+        app.reportes.cerrar()
+        app.trabajos.detener()
+    
+    from app_web.controllers_async.home_controller import home_bp
+    from app_web.controllers_async.productos_controller import productos_bp
+    from app_web.controllers_async.categorias_controller import categorias_bp
+    from app_web.controllers_async.transacciones_controller import transacciones_bp
+    from app_web.controllers_async.calculadora_controller import calculadora_bp
+    from app_web.controllers_async.estadisticas_controller import estadisticas_bp
+    from app_web.controllers_async.trabajos_controller import trabajos_bp
+    from app_web.controllers_async.activos_controller import activos_bp
+    from app_web.activos import PREFIJO_URL as PREFIJO_ACTIVOS
+    from app_web.controllers_async.metricas_controller import iniciar_metricas as iniciar_metricas_asgi
+    
+    app.register_blueprint(home_bp)
+    app.register_blueprint(productos_bp, url_prefix='/productos')
+    app.register_blueprint(categorias_bp, url_prefix='/categorias')
+    app.register_blueprint(transacciones_bp, url_prefix='/transacciones')
+    app.register_blueprint(calculadora_bp, url_prefix='/calculadora')
+    app.register_blueprint(estadisticas_bp, url_prefix='/estadisticas')
+    app.register_blueprint(trabajos_bp, url_prefix='/trabajos')
+    app.register_blueprint(activos_bp, url_prefix=PREFIJO_ACTIVOS)
+    iniciar_metricas_asgi(app)
+    
+    return app
@@ -0,0 +1,165 @@
+"""
+Activos estáticos con huella de contenido y precompresión
+``python -m app_web.activos`` minifica los archivos de ``static/``, agrega el hash
+del contenido al nombre y guarda variantes .gz/.br en ``static/dist`` con un manifiesto
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+DIR_DESTINO = 'dist'
+MANIFIESTO = 'manifest.json'
+PREFIJO_URL = '/activos'
+
+# Un nombre con hash nunca cambia de contenido: el navegador no vuelve a pedirlo
+MAX_AGE_INMUTABLE = 365 * 24 * 3600
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+TAMANO_MINIMO_COMPRESION = 256
+# Orden de preferencia cuando el cliente acepta varias
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+_CADENAS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+_COMENTARIOS_CSS = re.compile(r'/\*.*?\*/', re.S)
+_ESPACIOS_CSS = re.compile(r'\s*([{};,>])\s*')
+
+
+def minificar_css(texto: str) -> str:
+    """Quita comentarios y espacios sobrantes sin tocar el contenido de las cadenas"""
+    partes = _CADENAS.split(_COMENTARIOS_CSS.sub('', texto))
+    for i in range(0, len(partes), 2):
+        fragmento = re.sub(r'\s+', ' ', partes[i])
+        # Antes de ':' el espacio cuenta en los selectores ("a :hover"), después no
+        fragmento = re.sub(r':\s+', ':', _ESPACIOS_CSS.sub(r'\1', fragmento))
+        partes[i] = fragmento.replace(';}', '}')
+    return ''.join(partes).strip()
+
+
+def minificar_js(texto: str) -> str:
+    """Minificación conservadora: sangría y líneas vacías (no reescribe el código)"""
+    return '\n'.join(linea.strip() for linea in texto.splitlines() if linea.strip())
+
+
+MINIFICADORES = {'.css': minificar_css, '.js': minificar_js}
+
+
+def _comprimir(datos: bytes) -> Dict[str, bytes]:
+    """Variantes comprimidas que efectivamente ahorran bytes"""
+    variantes = {'.gz': gzip.compress(datos, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes['.br'] = brotli.compress(datos, quality=11)
+    return {extension: comprimido for extension, comprimido in variantes.items()
+            if len(comprimido) < len(datos)}
+
+
+def construir_activos(origen: str, destino: Optional[str] = None) -> Dict[str, str]:
+    """Genera los activos de ``origen`` en ``destino`` y devuelve el manifiesto {original: con hash}
+
+    Los archivos de construcciones anteriores se conservan, para que las
+    páginas servidas antes de un despliegue sigan encontrando sus activos.
+    """
+    destino = destino or os.path.join(origen, DIR_DESTINO)
+    manifiesto = {}
+    for raiz, carpetas, archivos in os.walk(origen):
+        carpetas[:] = sorted(c for c in carpetas if os.path.join(raiz, c) != destino)
+        for archivo in sorted(archivos):
+            ruta = os.path.join(raiz, archivo)
+            relativa = os.path.relpath(ruta, origen).replace(os.sep, '/')
+            base, extension = os.path.splitext(relativa)
+            with open(ruta, 'rb') as f:
+                datos = f.read()
+            if extension in MINIFICADORES:
+                datos = MINIFICADORES[extension](datos.decode('utf-8')).encode('utf-8')
+
+            huella = hashlib.blake2s(datos, digest_size=6).hexdigest()
+            nombre = f"{base}.{huella}{extension}"
+            salida = os.path.join(destino, *nombre.split('/'))
+            os.makedirs(os.path.dirname(salida), exist_ok=True)
+            with open(salida, 'wb') as f:
+                f.write(datos)
+            if extension in EXTENSIONES_COMPRIMIBLES and len(datos) >= TAMANO_MINIMO_COMPRESION:
+                for sufijo, comprimido in _comprimir(datos).items():
+                    with open(salida + sufijo, 'wb') as f:
+                        f.write(comprimido)
+            manifiesto[relativa] = nombre
+
+    with open(os.path.join(destino, MANIFIESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, sort_keys=True)
+    return manifiesto
+
+
+class ManifiestoActivos:
+    """Manifiesto de la última construcción, cargado una vez al crear la aplicación
+
+    Sin construcción (desarrollo) ``url`` devuelve la ruta normal de ``static``.
+    """
+
+    def __init__(self, directorio: str, url_static: str = '/static'):
+        self.directorio = directorio
+        self.url_static = url_static
+        self.archivos: Dict[str, str] = {}
+        self.version = ''
+        try:
+            with open(os.path.join(directorio, MANIFIESTO), 'rb') as f:
+                contenido = f.read()
+            self.archivos = json.loads(contenido)
+            self.version = hashlib.blake2s(contenido, digest_size=4).hexdigest()
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            print(f"Manifiesto de activos inválido: {e}")
+        self._servibles = set(self.archivos.values())
+
+    def url(self, nombre: str) -> str:
+        """URL con hash de un archivo de ``static`` (global ``url_activo`` de las plantillas)"""
+        con_hash = self.archivos.get(nombre)
+        if con_hash is None:
+            return f"{self.url_static}/{nombre}"
+        return f"{PREFIJO_URL}/{con_hash}"
+
+    def variante(self, nombre: str, aceptadas) -> Tuple[Optional[str], Optional[str]]:
+        """(ruta del archivo a enviar, Content-Encoding) según ``Accept-Encoding``; (None, None) si no existe
+
+        Sólo se sirven nombres del manifiesto, así que una ruta externa a ``dist`` no es alcanzable.
+        """
+        if nombre not in self._servibles:
+            return None, None
+        ruta = os.path.join(self.directorio, *nombre.split('/'))
+        for codificacion, sufijo in CODIFICACIONES:
+            if aceptadas[codificacion] and os.path.exists(ruta + sufijo):
+                return ruta + sufijo, codificacion
+        return ruta, None
+
+
+def tipo_activo(nombre: str) -> str:
+    """Tipo de contenido del archivo original (no el de su variante comprimida)"""
+    return mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+
+
+def cabeceras_inmutables(respuesta, codificacion: Optional[str]):
+    """Cache-Control de un año e immutable; Vary porque el cuerpo depende de Accept-Encoding"""
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = MAX_AGE_INMUTABLE
+    respuesta.cache_control.immutable = True
+    respuesta.vary.add('Accept-Encoding')
+    if codificacion:
+        respuesta.headers['Content-Encoding'] = codificacion
+    return respuesta
+
+
+if __name__ == '__main__':
+    from app_web import STATIC_DIR
+    origen = sys.argv[1] if len(sys.argv) > 1 else STATIC_DIR
+    generados = construir_activos(origen)
+    print(f"✅ {len(generados)} activos en {os.path.join(origen, DIR_DESTINO)}"
+          f"{'' if brotli else ' (sin brotli: sólo .gz)'}")
@@ -0,0 +1,151 @@
+"""
+Caché de páginas renderizadas y GET condicional por generación de los datos
+Una página se vuelve a renderizar sólo cuando cambió alguna de las tablas que muestra
+"""
+
+import collections
+import functools
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from flask import Response, current_app, g, make_response, request, session
+
+from app_web.metricas import contar_cache
+
+# Páginas sin datos de la base que no son destino de redirecciones (que podrían traer mensajes)
+MAX_AGE_PAGINAS_FIJAS = 300
+
+
+def version_plantillas(directorio: str) -> str:
+    """Huella de las plantillas: un despliegue que cambia una vista invalida las ETag anteriores"""
+    huella = hashlib.blake2s(digest_size=4)
+    for raiz, _, archivos in sorted(os.walk(directorio)):
+        for archivo in sorted(archivos):
+            ruta = os.path.join(raiz, archivo)
+            huella.update(f"{ruta}:{os.path.getmtime(ruta)}".encode())
+    return huella.hexdigest()
+
+
+class CacheVistas:
+    """LRU de respuestas renderizadas: ruta con parámetros -> (etag, cuerpo, tipo de contenido)
+
+    Es local a cada proceso. La ETag se calcula con la ruta, la generación de las
+    tablas de la vista y la ``version`` de las plantillas, así que todos los
+    workers responden la misma ETag para los mismos datos.
+    """
+
+    def __init__(self, capacidad: int = 256, version: str = ''):
+        self.capacidad = capacidad
+        self.version = version
+        self._entradas = collections.OrderedDict()
+        self._candado = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def etag(self, ruta: str, generaciones: tuple) -> str:
+        huella = hashlib.blake2s(f"{ruta}|{generaciones}".encode(), digest_size=8).hexdigest()
+        return f"{self.version}-{huella}"
+
+    def obtener(self, ruta: str, etag: str) -> Optional[Tuple[bytes, str]]:
+        """(cuerpo, tipo) guardado para la ruta si corresponde a la misma ETag"""
+        with self._candado:
+            entrada = self._entradas.get(ruta)
+            if entrada is None or entrada[0] != etag:
+                return None
+            self._entradas.move_to_end(ruta)
+            return entrada[1], entrada[2]
+
+    def guardar(self, ruta: str, etag: str, cuerpo: bytes, tipo: str):
+        with self._candado:
+            self._entradas[ruta] = (etag, cuerpo, tipo)
+            self._entradas.move_to_end(ruta)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._candado:
+            self._entradas.clear()
+
+
+def fecha_estampa(fecha: str) -> datetime:
+    """Fecha de una estampa (UTC, con milisegundos) como datetime para ``Last-Modified``"""
+    return datetime.fromisoformat(fecha).replace(tzinfo=timezone.utc)
+
+
+def _no_modificada(etag: str, ultima_modificacion: Optional[datetime]) -> bool:
+    """Validación condicional: ``If-None-Match`` tiene prioridad sobre ``If-Modified-Since``
+
+    La comparación es débil: con la compresión activa la ETag se envía como ``W/"..."``.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and ultima_modificacion is not None:
+        # Las fechas HTTP no tienen fracciones de segundo
+        return ultima_modificacion.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def cache_vista(*tablas: str, max_age: int = 0, analitica: bool = False):
+    """Decorador de vistas GET cuyo contenido depende sólo de ``tablas`` y de los parámetros de la URL
+
+    La respuesta lleva ``ETag``, ``Last-Modified`` (la última escritura en esas
+    tablas) y ``Cache-Control``: ``no-cache`` para que navegador y proxy
+    revaliden en cada visita, o ``public, max-age`` para páginas que no dependen
+    de tablas. Si el cliente ya tiene la versión actual responde 304 sin
+    consultar la base ni renderizar; si la tiene la caché del proceso, la sirve
+    desde memoria. Con mensajes flash pendientes la vista se ejecuta normalmente,
+    porque la página los mostraría, y también en una solicitud perfilada.
+
+    Con ``analitica`` y la réplica de lectura activa, la vista lee la copia: la
+    ETag y ``Last-Modified`` salen de la versión de la copia y no de las
+    estampas, para no guardar datos de la copia con la generación más nueva.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            cache: Optional[CacheVistas] = getattr(current_app, 'cache_vistas', None)
+            if cache is None or request.method != 'GET' or '_flashes' in session or 'perfil' in g:
+                return vista(*args, **kwargs)
+            ruta = request.full_path
+            replica = getattr(current_app, 'replica', None) if analitica else None
+            version = replica.vigente() if replica is not None else None
+            if version is not None:
+                etag = cache.etag(ruta, ('replica', version))
+                ultima_modificacion = replica.fecha(version)
+            else:
+                estampas = current_app.estampas.de(tablas)
+                if estampas is None:
+                    return vista(*args, **kwargs)
+                etag = cache.etag(ruta, tuple(estampas[tabla][0] for tabla in tablas))
+                ultima_modificacion = max((fecha_estampa(estampas[tabla][1]) for tabla in tablas), default=None)
+
+            def con_validadores(respuesta: Response) -> Response:
+                respuesta.set_etag(etag)
+                if ultima_modificacion is not None:
+                    respuesta.last_modified = ultima_modificacion
+                if max_age:
+                    respuesta.cache_control.public = True
+                    respuesta.cache_control.max_age = max_age
+                else:
+                    respuesta.cache_control.no_cache = True
+                return respuesta
+
+            if _no_modificada(etag, ultima_modificacion):
+                contar_cache('vistas', True)
+                return con_validadores(Response(status=304))
+
+            guardada = cache.obtener(ruta, etag)
+            contar_cache('vistas', guardada is not None)
+            if guardada is not None:
+                return con_validadores(Response(guardada[0], mimetype=guardada[1]))
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code != 200:
+                return respuesta
+            cache.guardar(ruta, etag, respuesta.get_data(), respuesta.mimetype)
+            return con_validadores(respuesta)
+        return envoltura
+    return decorador
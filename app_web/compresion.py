@@ -0,0 +1,174 @@
+"""
+Compresión gzip/brotli de las respuestas HTML y JSON
+Se aplica después de la vista, con umbral de tamaño y lista de tipos de contenido
+"""
+
+import collections
+import threading
+import time
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import current_app, request
+
+from app_web.metricas import contar_cache, contar_compresion
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+
+class Compresor:
+    """Compresión incremental: cada parte sale completa (flush) para no retener un flujo"""
+
+    def __init__(self, codificacion: str, nivel: int):
+        self.codificacion = codificacion
+        if codificacion == 'br':
+            self._brotli = brotli.Compressor(quality=nivel)
+        else:
+            # wbits=31: formato gzip (cabecera y CRC) en lugar de zlib
+            self._zlib = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def parte(self, datos: bytes) -> bytes:
+        if self.codificacion == 'br':
+            return self._brotli.process(datos) + self._brotli.flush()
+        return self._zlib.compress(datos) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self) -> bytes:
+        if self.codificacion == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def comprimir(datos: bytes, codificacion: str, nivel: int) -> bytes:
+    """Cuerpo completo comprimido en un solo paso"""
+    if codificacion == 'br':
+        return brotli.compress(datos, quality=nivel)
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+    return compresor.compress(datos) + compresor.flush()
+
+
+class CacheComprimidas:
+    """LRU de cuerpos comprimidos por (ETag, codificación)
+
+    Las páginas de ``cache_vista`` salen de memoria sin renderizar; sin esta caché
+    comprimirlas sería casi todo el costo de la solicitud. La ETag identifica la
+    ruta y los datos, así que basta como clave.
+    """
+
+    def __init__(self, capacidad: int = 128):
+        self.capacidad = capacidad
+        self._entradas = collections.OrderedDict()
+        self._candado = threading.Lock()
+
+    def obtener(self, clave: tuple) -> Optional[bytes]:
+        with self._candado:
+            cuerpo = self._entradas.get(clave)
+            if cuerpo is not None:
+                self._entradas.move_to_end(clave)
+            return cuerpo
+
+    def guardar(self, clave: tuple, cuerpo: bytes):
+        with self._candado:
+            self._entradas[clave] = cuerpo
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+
+def elegir_codificacion(aceptadas) -> Optional[str]:
+    """Codificación a usar según ``Accept-Encoding``: brotli si está instalado y se acepta, si no gzip"""
+    if brotli is not None and aceptadas['br']:
+        return 'br'
+    if aceptadas['gzip']:
+        return 'gzip'
+    return None
+
+
+def _comprimir_flujo(partes: Iterable, compresor: Compresor, ruta: str) -> Iterator[bytes]:
+    """Comprime una respuesta en flujo parte por parte; las métricas se registran al terminar"""
+    original = enviado = 0
+    segundos = 0.0
+    try:
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode('utf-8')
+            inicio = time.perf_counter()
+            comprimida = compresor.parte(parte)
+            segundos += time.perf_counter() - inicio
+            original += len(parte)
+            enviado += len(comprimida)
+            if comprimida:
+                yield comprimida
+        final = compresor.terminar()
+        enviado += len(final)
+        yield final
+        contar_compresion(ruta, compresor.codificacion, original, enviado, segundos)
+    finally:
+        if hasattr(partes, 'close'):
+            partes.close()
+
+
+def _etag_debil(respuesta):
+    etag, debil = respuesta.get_etag()
+    if etag and not debil:
+        respuesta.set_etag(etag, weak=True)
+
+
+def comprimir_respuesta(respuesta):
+    """Gancho after_request: comprime si el tipo está permitido, supera el umbral y el cliente lo acepta
+
+    Se omiten respuestas ya codificadas (activos precomprimidos), archivos enviados
+    con ``send_file`` y estados distintos de 200. Las ETag pasan a débiles, también
+    en los 304, porque el cuerpo comprimido no es idéntico byte a byte al original;
+    ``If-None-Match`` las compara igual.
+    """
+    config = current_app.config
+    if respuesta.status_code == 304:
+        _etag_debil(respuesta)
+        return respuesta
+    if (respuesta.status_code != 200 or respuesta.direct_passthrough
+            or 'Content-Encoding' in respuesta.headers
+            or respuesta.mimetype not in config['COMPRESION_TIPOS']):
+        return respuesta
+
+    respuesta.vary.add('Accept-Encoding')
+    etag, _ = respuesta.get_etag()
+    _etag_debil(respuesta)
+    codificacion = elegir_codificacion(request.accept_encodings)
+    if codificacion is None:
+        return respuesta
+    nivel = config['COMPRESION_NIVEL_BROTLI'] if codificacion == 'br' else config['COMPRESION_NIVEL']
+    ruta = request.endpoint or 'desconocida'
+
+    if respuesta.is_streamed:
+        respuesta.response = _comprimir_flujo(respuesta.response, Compresor(codificacion, nivel), ruta)
+        respuesta.headers.pop('Content-Length', None)
+    else:
+        datos = respuesta.get_data()
+        if len(datos) < config['COMPRESION_MINIMO']:
+            return respuesta
+        cache: Optional[CacheComprimidas] = current_app.extensions.get('compresion_cache')
+        comprimidos = None
+        if cache is not None and etag:
+            comprimidos = cache.obtener((etag, codificacion))
+            contar_cache('compresion', comprimidos is not None)
+        inicio = time.perf_counter()
+        if comprimidos is None:
+            comprimidos = comprimir(datos, codificacion, nivel)
+            if cache is not None and etag:
+                cache.guardar((etag, codificacion), comprimidos)
+        contar_compresion(ruta, codificacion, len(datos), len(comprimidos), time.perf_counter() - inicio)
+        respuesta.set_data(comprimidos)
+
+    respuesta.headers['Content-Encoding'] = codificacion
+    return respuesta
+
+
+def iniciar_compresion(app):
+    """Registra la compresión de respuestas si ``COMPRESION`` está activa"""
+    if app.config['COMPRESION']:
+        if app.config['COMPRESION_CACHE']:
+            app.extensions['compresion_cache'] = CacheComprimidas(app.config['COMPRESION_CACHE'])
+        app.after_request(comprimir_respuesta)
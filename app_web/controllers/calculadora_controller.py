@@ -4,11 +4,14 @@ Controlador para la Calculadora de Impuestos
 
 from flask import Blueprint, render_template, request, jsonify
 from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+from app_web.metricas import contar_calculo
+from app_web.cache_vistas import MAX_AGE_PAGINAS_FIJAS, cache_vista
 
 calculadora_bp = Blueprint('calculadora', __name__)
 
 
 @calculadora_bp.route('/')
+@cache_vista(max_age=MAX_AGE_PAGINAS_FIJAS)
 def index():
     """Página principal de la calculadora"""
     calculadora = CalculadoraImpuestos()
@@ -42,6 +45,7 @@ def calcular():
         
         calculadora = CalculadoraImpuestos()
         resultado = calculadora.calcular_impuestos(valor_base, categoria_enum)
+        contar_calculo(categoria_enum.value)
         
         return jsonify(resultado)
     except ValueError as e:
@@ -3,27 +3,30 @@ Controlador para gestionar Categorías (CRUD)
 """
 
 from flask import Blueprint, render_template, redirect, url_for, flash, request
-from src.db.database import BaseDatos
+from app_web.db import obtener_db
+from app_web.cache_vistas import MAX_AGE_PAGINAS_FIJAS, cache_vista
 
 categorias_bp = Blueprint('categorias', __name__)
 
 
 @categorias_bp.route('/')
+@cache_vista('categorias')
 def listar():
     """Listar todas las categorías"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     categorias = db.consultar_todas_categorias()
     return render_template('categorias/listar.html', categorias=categorias)
 
 
 @categorias_bp.route('/buscar', methods=['GET', 'POST'])
+@cache_vista(max_age=MAX_AGE_PAGINAS_FIJAS)
 def buscar():
     """Buscar categoría por ID"""
     if request.method == 'POST':
         categoria_id = request.form.get('categoria_id')
         if categoria_id:
             try:
-                db = BaseDatos('calculadora_impuestos.db')
+                db = obtener_db()
                 categorias = db.consultar_todas_categorias()
                 categoria = next((cat for cat in categorias if cat['id'] == int(categoria_id)), None)
                 if categoria:
@@ -37,6 +40,7 @@ def buscar():
 
 
 @categorias_bp.route('/crear', methods=['GET', 'POST'])
+@cache_vista(max_age=MAX_AGE_PAGINAS_FIJAS)
 def crear():
     """Crear nueva categoría"""
     if request.method == 'POST':
@@ -54,7 +58,7 @@ def crear():
                 flash('La tasa de IVA debe estar entre 0.0 y 1.0', 'error')
                 return render_template('categorias/crear.html')
             
-            db = BaseDatos('calculadora_impuestos.db')
+            db = obtener_db()
             if db.insertar_categoria(nombre, descripcion, tasa_iva):
                 flash('✅ Categoría creada exitosamente', 'success')
                 return redirect(url_for('categorias.listar'))
@@ -67,9 +71,10 @@ def crear():
 
 
 @categorias_bp.route('/editar/<int:categoria_id>', methods=['GET', 'POST'])
+@cache_vista('categorias')
 def editar(categoria_id):
     """Editar categoría existente"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     categorias = db.consultar_todas_categorias()
     categoria = next((cat for cat in categorias if cat['id'] == categoria_id), None)
     
@@ -108,7 +113,7 @@ def editar(categoria_id):
 @categorias_bp.route('/eliminar/<int:categoria_id>', methods=['POST'])
 def eliminar(categoria_id):
     """Eliminar categoría"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     categorias = db.consultar_todas_categorias()
     categoria = next((cat for cat in categorias if cat['id'] == categoria_id), None)
     
@@ -2,24 +2,26 @@
 Controlador para Estadísticas y Consultas Avanzadas
 """
 
-from flask import Blueprint, render_template
-from src.db.database import BaseDatos
+from flask import Blueprint, current_app, render_template, request
+from app_web.db import obtener_db
+from app_web.cache_vistas import cache_vista
 
 estadisticas_bp = Blueprint('estadisticas', __name__)
 
 
 @estadisticas_bp.route('/')
+@cache_vista('categorias', 'productos', 'transacciones', analitica=True)
 def index():
     """Página principal de estadísticas"""
-    db = BaseDatos('calculadora_impuestos.db')
-    estadisticas = db.obtener_estadisticas()
+    estadisticas = current_app.reportes.obtener_estadisticas()
     return render_template('estadisticas/index.html', estadisticas=estadisticas)
 
 
 @estadisticas_bp.route('/productos_mas_caros')
+@cache_vista('productos', 'categorias')
 def productos_mas_caros():
     """Top 5 productos más caros"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     productos = db.consultar_todos_productos()
     productos_ordenados = sorted(productos, key=lambda x: x['precio_base'], reverse=True)
     return render_template('estadisticas/productos_mas_caros.html', 
@@ -27,9 +29,10 @@ def productos_mas_caros():
 
 
 @estadisticas_bp.route('/productos_mas_baratos')
+@cache_vista('productos', 'categorias')
 def productos_mas_baratos():
     """Top 5 productos más baratos"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     productos = db.consultar_todos_productos()
     productos_ordenados = sorted(productos, key=lambda x: x['precio_base'])
     return render_template('estadisticas/productos_mas_baratos.html', 
@@ -37,27 +40,34 @@ def productos_mas_baratos():
 
 
 @estadisticas_bp.route('/ventas_por_categoria')
+@cache_vista('transacciones', analitica=True)
 def ventas_por_categoria():
     """Ventas agrupadas por categoría"""
-    db = BaseDatos('calculadora_impuestos.db')
-    transacciones = db.consultar_transacciones_recientes(1000)
-    
-    ventas_por_categoria = {}
-    for trans in transacciones:
-        categoria = trans['categoria_nombre']
-        if categoria not in ventas_por_categoria:
-            ventas_por_categoria[categoria] = {'cantidad': 0, 'total': 0}
-        ventas_por_categoria[categoria]['cantidad'] += trans['cantidad']
-        ventas_por_categoria[categoria]['total'] += trans['total_final']
+    db = obtener_db()
+    ventas_por_categoria = {
+        fila['categoria_nombre']: fila for fila in db.consultar_ventas_por_categoria()
+    }
     
     return render_template('estadisticas/ventas_por_categoria.html', 
                          ventas_por_categoria=ventas_por_categoria)
 
 
+@estadisticas_bp.route('/impuestos_mensuales')
+@cache_vista('transacciones', analitica=True)
+def impuestos_mensuales():
+    """Totales por impuesto y mes para las declaraciones"""
+    db = obtener_db()
+    desde = request.args.get('desde') or "0000-00"
+    hasta = request.args.get('hasta') or "9999-12"
+    return render_template('estadisticas/impuestos_mensuales.html',
+                         impuestos=db.consultar_impuestos_mensuales(desde, hasta))
+
+
 @estadisticas_bp.route('/productos_por_estado')
+@cache_vista('productos', 'categorias')
 def productos_por_estado():
     """Productos agrupados por estado"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     productos = db.consultar_todos_productos()
     
     productos_por_estado = {}
@@ -2,13 +2,14 @@
 Controlador para el Home/Menú Principal
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
-from src.db.database import BaseDatos
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash
+from app_web.cache_vistas import cache_vista
 
 home_bp = Blueprint('home', __name__)
 
 
 @home_bp.route('/')
+@cache_vista()
 def index():
     """Página principal con menú de opciones"""
     return render_template('home/index.html')
@@ -16,37 +17,20 @@ def index():
 
 @home_bp.route('/crear_tablas', methods=['POST'])
 def crear_tablas():
-    """Crear las tablas de la base de datos"""
-    try:
-        db = BaseDatos('calculadora_impuestos.db')
-        if db.crear_tablas():
-            flash('✅ Tablas creadas exitosamente', 'success')
-        else:
-            flash('❌ Error al crear las tablas', 'error')
-    except Exception as e:
-        flash(f'❌ Error: {str(e)}', 'error')
-    
-    return redirect(url_for('home.index'))
+    """Encolar la creación de las tablas de la base de datos"""
+    return _encolar('crear_tablas')
 
 
 @home_bp.route('/inicializar_datos', methods=['POST'])
 def inicializar_datos():
-    """Inicializar datos de ejemplo"""
-    try:
-        db = BaseDatos('calculadora_impuestos.db')
-        
-        # Verificar si ya hay datos
-        categorias_existentes = db.consultar_todas_categorias()
-        if len(categorias_existentes) > 0:
-            flash('ℹ️ Las tablas ya contienen datos. Si desea reinicializar, primero elimine los datos existentes.', 'info')
-        else:
-            # Intentar inicializar solo si no hay datos
-            if db.inicializar_datos_ejemplo():
-                flash('✅ Datos de ejemplo inicializados exitosamente', 'success')
-            else:
-                flash('❌ Error al inicializar los datos de ejemplo', 'error')
-    except Exception as e:
-        flash(f'❌ Error: {str(e)}', 'error')
-    
-    return redirect(url_for('home.index'))
+    """Encolar la carga de datos de ejemplo"""
+    return _encolar('inicializar_datos')
 
+
+def _encolar(tipo: str):
+    trabajo_id = current_app.trabajos.encolar(tipo)
+    if trabajo_id is None:
+        flash('❌ No se pudo encolar el trabajo', 'error')
+        return redirect(url_for('home.index'))
+    flash(f'⏳ Trabajo #{trabajo_id} en cola; su avance se ve en esta página', 'info')
+    return redirect(url_for('trabajos.index'))
@@ -3,28 +3,31 @@ Controlador para gestionar Productos (CRUD)
 """
 
 from flask import Blueprint, render_template, redirect, url_for, flash, request
-from src.db.database import BaseDatos
+from app_web.db import obtener_db
 from src.model.producto import Producto
+from app_web.cache_vistas import MAX_AGE_PAGINAS_FIJAS, cache_vista
 
 productos_bp = Blueprint('productos', __name__)
 
 
 @productos_bp.route('/')
+@cache_vista('productos', 'categorias')
 def listar():
     """Listar todos los productos"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     productos = db.consultar_todos_productos()
     return render_template('productos/listar.html', productos=productos)
 
 
 @productos_bp.route('/buscar', methods=['GET', 'POST'])
+@cache_vista(max_age=MAX_AGE_PAGINAS_FIJAS)
 def buscar():
     """Buscar producto por ID"""
     if request.method == 'POST':
         producto_id = request.form.get('producto_id')
         if producto_id:
             try:
-                db = BaseDatos('calculadora_impuestos.db')
+                db = obtener_db()
                 producto = db.consultar_producto_por_id(int(producto_id))
                 if producto:
                     return render_template('productos/buscar.html', producto=producto, encontrado=True)
@@ -37,9 +40,10 @@ def buscar():
 
 
 @productos_bp.route('/crear', methods=['GET', 'POST'])
+@cache_vista('categorias')
 def crear():
     """Crear nuevo producto"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     
     if request.method == 'POST':
         nombre = request.form.get('nombre', '').strip()
@@ -75,9 +79,10 @@ def crear():
 
 
 @productos_bp.route('/editar/<int:producto_id>', methods=['GET', 'POST'])
+@cache_vista('productos', 'categorias')
 def editar(producto_id):
     """Editar producto existente"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     producto = db.consultar_producto_por_id(producto_id)
     
     if not producto:
@@ -114,7 +119,7 @@ def editar(producto_id):
 @productos_bp.route('/eliminar/<int:producto_id>', methods=['POST'])
 def eliminar(producto_id):
     """Eliminar producto"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     
     producto = db.consultar_producto_por_id(producto_id)
     if not producto:
@@ -130,9 +135,10 @@ def eliminar(producto_id):
 
 
 @productos_bp.route('/por_categoria')
+@cache_vista('productos', 'categorias')
 def por_categoria():
     """Listar productos agrupados por categoría"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     categorias = db.consultar_todas_categorias()
     
     productos_por_categoria = {}
@@ -0,0 +1,46 @@
+"""
+Controlador de Trabajos en segundo plano
+"""
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, url_for
+
+trabajos_bp = Blueprint('trabajos', __name__)
+
+
+@trabajos_bp.route('/')
+def index():
+    """Trabajos recientes con su estado y avance"""
+    trabajos = current_app.trabajos.consultar_recientes()
+    return render_template('trabajos/index.html', trabajos=trabajos,
+                           hay_activos=any(trabajo['activo'] for trabajo in trabajos))
+
+
+@trabajos_bp.route('/<int:trabajo_id>')
+def detalle(trabajo_id):
+    """Estado de un trabajo en JSON (para consultarlo periódicamente)"""
+    trabajo = current_app.trabajos.consultar(trabajo_id)
+    if trabajo is None:
+        abort(404)
+    return jsonify(trabajo)
+
+
+@trabajos_bp.route('/<int:trabajo_id>/cancelar', methods=['POST'])
+def cancelar(trabajo_id):
+    """Cancelar un trabajo pendiente o en curso"""
+    if current_app.trabajos.cancelar(trabajo_id):
+        flash(f'Cancelación del trabajo #{trabajo_id} solicitada', 'info')
+    else:
+        flash(f'❌ El trabajo #{trabajo_id} ya terminó', 'error')
+    return redirect(url_for('trabajos.index'))
+
+
+@trabajos_bp.route('/recalcular_impuestos', methods=['POST'])
+def recalcular_impuestos():
+    """Encolar el recálculo de impuestos de las transacciones históricas"""
+    simular = request.form.get('simular') == '1'
+    trabajo_id = current_app.trabajos.encolar('recalcular_impuestos', simular=simular)
+    if trabajo_id is None:
+        flash('❌ No se pudo encolar el trabajo', 'error')
+    else:
+        flash(f'⏳ Trabajo #{trabajo_id} en cola', 'info')
+    return redirect(url_for('trabajos.index'))
@@ -2,17 +2,32 @@
 Controlador para gestionar Transacciones
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
-from src.db.database import BaseDatos
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request
+from app_web.db import obtener_db
 from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+from src.model.transaccion import desglose_de_venta
+from app_web.idempotencia import clave_de_solicitud
+from app_web.metricas import contar_cache, contar_calculo, contar_rechazo_cola
+from app_web.cache_vistas import cache_vista
 
 transacciones_bp = Blueprint('transacciones', __name__)
 
 
+def _venta_con_clave(db, clave: str):
+    """(producto_id, cantidad) de la venta guardada con la clave, o None; queda en la caché"""
+    previa = db.consultar_transaccion_por_clave(clave)
+    if previa is None:
+        return None
+    huella = (previa['producto_id'], previa['cantidad'])
+    current_app.idempotencia.guardar(clave, huella)
+    return huella
+
+
 @transacciones_bp.route('/')
+@cache_vista('transacciones')
 def listar():
     """Listar transacciones recientes"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     limite = request.args.get('limite', 10, type=int)
     transacciones = db.consultar_transacciones_recientes(limite)
     return render_template('transacciones/listar.html', transacciones=transacciones, limite=limite)
@@ -21,7 +36,7 @@ def listar():
 @transacciones_bp.route('/crear', methods=['GET', 'POST'])
 def crear():
     """Registrar nueva transacción"""
-    db = BaseDatos('calculadora_impuestos.db')
+    db = obtener_db()
     calculadora = CalculadoraImpuestos()
     
     if request.method == 'POST':
@@ -44,6 +59,24 @@ def crear():
                 productos_activos = [p for p in productos if p['estado'] == 'Activo']
                 return render_template('transacciones/crear.html', productos=productos_activos)
             
+            # Un reintento con la misma clave se responde desde la caché, sin tocar la base
+            clave = clave_de_solicitud()
+            huella = (producto_id, cantidad)
+            if clave:
+                previa = current_app.idempotencia.obtener(clave)
+                contar_cache('idempotencia', previa is not None)
+                if previa is None and current_app.cola_escritura is not None:
+                    # Encolar no avisa si otro worker ya guardó la clave: se mira la base
+                    previa = _venta_con_clave(db, clave)
+                if previa is not None:
+                    if previa != huella:
+                        flash('La clave de idempotencia ya se usó para otra venta', 'error')
+                        productos = db.consultar_todos_productos()
+                        productos_activos = [p for p in productos if p['estado'] == 'Activo']
+                        return render_template('transacciones/crear.html', productos=productos_activos), 422
+                    flash('✅ Transacción registrada exitosamente', 'success')
+                    return redirect(url_for('transacciones.listar'))
+            
             producto = db.consultar_producto_por_id(producto_id)
             if not producto or producto['estado'] != 'Activo':
                 flash('Producto no encontrado o no está activo', 'error')
@@ -68,13 +101,38 @@ def crear():
             
             if categoria_enum:
                 resultado_impuestos = calculadora.calcular_impuestos(precio_unitario, categoria_enum)
+                contar_calculo(categoria_enum.value)
                 total_impuestos = resultado_impuestos['total_impuestos'] * cantidad
                 total_final = subtotal + total_impuestos
+                desglose = desglose_de_venta(resultado_impuestos['impuestos'], cantidad)
+                
+                # Escritura diferida: se confirma al quedar en el diario, el commit llega después
+                cola = current_app.cola_escritura
+                if cola is not None:
+                    if cola.encolar(producto_id, cantidad, precio_unitario,
+                                    subtotal, total_impuestos, total_final, clave, desglose):
+                        if clave:
+                            current_app.idempotencia.guardar(clave, huella)
+                        flash('✅ Transacción registrada exitosamente', 'success')
+                        return redirect(url_for('transacciones.listar'))
+                    contar_rechazo_cola()
+                    flash('⏳ Hay demasiadas ventas en espera, intente de nuevo', 'warning')
+                    productos = db.consultar_todos_productos()
+                    productos_activos = [p for p in productos if p['estado'] == 'Activo']
+                    return render_template('transacciones/crear.html', productos=productos_activos), 503
                 
+                # Con una clave ya registrada (otro worker) la base no inserta un duplicado
                 if db.insertar_transaccion(producto_id, cantidad, precio_unitario,
-                                         subtotal, total_impuestos, total_final):
+                                         subtotal, total_impuestos, total_final, clave, desglose):
+                    if clave:
+                        current_app.idempotencia.guardar(clave, huella)
                     flash('✅ Transacción registrada exitosamente', 'success')
                     return redirect(url_for('transacciones.listar'))
+                elif clave and _venta_con_clave(db, clave) not in (None, huella):
+                    flash('La clave de idempotencia ya se usó para otra venta', 'error')
+                    productos = db.consultar_todos_productos()
+                    productos_activos = [p for p in productos if p['estado'] == 'Activo']
+                    return render_template('transacciones/crear.html', productos=productos_activos), 422
                 else:
                     flash('❌ Error al registrar la transacción', 'error')
             else:
@@ -0,0 +1,13 @@
+"""
+Controladores asíncronos (Blueprints de Quart) para la aplicación ASGI
+Mismas rutas, endpoints y plantillas que app_web.controllers
+"""
+
+from quart import current_app
+
+from src.db.database_async import BaseDatosAsync
+
+
+def obtener_db() -> BaseDatosAsync:
+    """BaseDatosAsync compartida por la aplicación (una conexión aiosqlite por proceso)"""
+    return current_app.db
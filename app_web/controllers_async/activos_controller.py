@@ -0,0 +1,18 @@
+"""
+Controlador asíncrono de activos estáticos con hash
+"""
+
+from quart import Blueprint, abort, current_app, request, send_file
+from app_web.activos import cabeceras_inmutables, tipo_activo
+
+activos_bp = Blueprint('activos', __name__)
+
+
+@activos_bp.route('/<path:nombre>')
+async def servir(nombre):
+    """Variante precomprimida que acepte el cliente, cacheable para siempre"""
+    ruta, codificacion = current_app.activos.variante(nombre, request.accept_encodings)
+    if ruta is None:
+        abort(404)
+    respuesta = await send_file(ruta, mimetype=tipo_activo(nombre), conditional=True)
+    return cabeceras_inmutables(respuesta, codificacion)
@@ -0,0 +1,45 @@
+"""
+Controlador asíncrono para la Calculadora de Impuestos
+No accede a la base de datos
+"""
+
+from quart import Blueprint, render_template, request, jsonify
+from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+from app_web.metricas import contar_calculo
+
+calculadora_bp = Blueprint('calculadora', __name__)
+
+calculadora = CalculadoraImpuestos()
+mapeo_categoria = {categoria.value: categoria for categoria in CategoriaProducto}
+
+
+@calculadora_bp.route('/')
+async def index():
+    """Página principal de la calculadora"""
+    categorias = calculadora.obtener_categorias_disponibles()
+    return await render_template('calculadora/index.html', categorias=categorias)
+
+
+@calculadora_bp.route('/calcular', methods=['POST'])
+async def calcular():
+    """Calcular impuestos (AJAX)"""
+    try:
+        formulario = await request.form
+        valor_base = float(formulario.get('valor_base', 0))
+        categoria_nombre = formulario.get('categoria', '')
+        
+        if valor_base <= 0:
+            return jsonify({'error': 'El valor base debe ser mayor a 0'}), 400
+        
+        categoria_enum = mapeo_categoria.get(categoria_nombre)
+        if not categoria_enum:
+            return jsonify({'error': 'Categoría no válida'}), 400
+        
+        resultado = calculadora.calcular_impuestos(valor_base, categoria_enum)
+        contar_calculo(categoria_enum.value)
+        
+        return jsonify(resultado)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error inesperado: {str(e)}'}), 500
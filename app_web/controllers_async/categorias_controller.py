@@ -0,0 +1,121 @@
+"""
+Controlador asíncrono para gestionar Categorías (CRUD)
+"""
+
+from quart import Blueprint, render_template, redirect, url_for, flash, request
+from app_web.controllers_async import obtener_db
+
+categorias_bp = Blueprint('categorias', __name__)
+
+
+async def _buscar_categoria(categoria_id: int):
+    categorias = await obtener_db().consultar_todas_categorias()
+    return next((cat for cat in categorias if cat['id'] == categoria_id), None)
+
+
+@categorias_bp.route('/')
+async def listar():
+    """Listar todas las categorías"""
+    categorias = await obtener_db().consultar_todas_categorias()
+    return await render_template('categorias/listar.html', categorias=categorias)
+
+
+@categorias_bp.route('/buscar', methods=['GET', 'POST'])
+async def buscar():
+    """Buscar categoría por ID"""
+    if request.method == 'POST':
+        categoria_id = (await request.form).get('categoria_id')
+        if categoria_id:
+            try:
+                categoria = await _buscar_categoria(int(categoria_id))
+                if categoria:
+                    return await render_template('categorias/buscar.html', categoria=categoria, encontrada=True)
+                else:
+                    await flash('Categoría no encontrada', 'warning')
+            except ValueError:
+                await flash('ID inválido', 'error')
+    
+    return await render_template('categorias/buscar.html', encontrada=False)
+
+
+@categorias_bp.route('/crear', methods=['GET', 'POST'])
+async def crear():
+    """Crear nueva categoría"""
+    if request.method == 'POST':
+        formulario = await request.form
+        nombre = formulario.get('nombre', '').strip()
+        descripcion = formulario.get('descripcion', '').strip()
+        tasa_iva = formulario.get('tasa_iva', '0.19')
+        
+        if not nombre:
+            await flash('El nombre es obligatorio', 'error')
+            return await render_template('categorias/crear.html')
+        
+        try:
+            tasa_iva = float(tasa_iva)
+            if tasa_iva < 0 or tasa_iva > 1:
+                await flash('La tasa de IVA debe estar entre 0.0 y 1.0', 'error')
+                return await render_template('categorias/crear.html')
+            
+            if await obtener_db().insertar_categoria(nombre, descripcion, tasa_iva):
+                await flash('✅ Categoría creada exitosamente', 'success')
+                return redirect(url_for('categorias.listar'))
+            else:
+                await flash('❌ Error al crear la categoría', 'error')
+        except ValueError:
+            await flash('Error en los datos ingresados', 'error')
+    
+    return await render_template('categorias/crear.html')
+
+
+@categorias_bp.route('/editar/<int:categoria_id>', methods=['GET', 'POST'])
+async def editar(categoria_id):
+    """Editar categoría existente"""
+    categoria = await _buscar_categoria(categoria_id)
+    
+    if not categoria:
+        await flash('Categoría no encontrada', 'error')
+        return redirect(url_for('categorias.listar'))
+    
+    if request.method == 'POST':
+        formulario = await request.form
+        nombre = formulario.get('nombre', '').strip()
+        descripcion = formulario.get('descripcion', '').strip()
+        tasa_iva = formulario.get('tasa_iva')
+        
+        nuevo_nombre = nombre if nombre else None
+        nueva_descripcion = descripcion if descripcion else None
+        nueva_tasa = None
+        
+        if tasa_iva:
+            try:
+                nueva_tasa = float(tasa_iva) / 100 if float(tasa_iva) > 1 else float(tasa_iva)
+                if nueva_tasa < 0 or nueva_tasa > 1:
+                    await flash('La tasa debe estar entre 0% y 100%', 'error')
+                    return await render_template('categorias/editar.html', categoria=categoria)
+            except ValueError:
+                await flash('Tasa de IVA inválida', 'error')
+                return await render_template('categorias/editar.html', categoria=categoria)
+        
+        if await obtener_db().actualizar_categoria(categoria_id, nuevo_nombre, nueva_descripcion, nueva_tasa):
+            await flash('✅ Categoría actualizada exitosamente', 'success')
+            return redirect(url_for('categorias.listar'))
+        else:
+            await flash('❌ Error al actualizar la categoría', 'error')
+    
+    return await render_template('categorias/editar.html', categoria=categoria)
+
+
+@categorias_bp.route('/eliminar/<int:categoria_id>', methods=['POST'])
+async def eliminar(categoria_id):
+    """Eliminar categoría"""
+    if not await _buscar_categoria(categoria_id):
+        await flash('Categoría no encontrada', 'error')
+        return redirect(url_for('categorias.listar'))
+    
+    if await obtener_db().eliminar_categoria(categoria_id):
+        await flash('✅ Categoría eliminada exitosamente', 'success')
+    else:
+        await flash('❌ Error al eliminar la categoría. Puede tener productos asociados.', 'error')
+    
+    return redirect(url_for('categorias.listar'))
@@ -0,0 +1,66 @@
+"""
+Controlador asíncrono para Estadísticas y Consultas Avanzadas
+"""
+
+import asyncio
+
+from quart import Blueprint, current_app, render_template, request
+from app_web.controllers_async import obtener_db
+
+estadisticas_bp = Blueprint('estadisticas', __name__)
+
+
+@estadisticas_bp.route('/')
+async def index():
+    """Página principal de estadísticas"""
+    estadisticas = await asyncio.to_thread(current_app.reportes.obtener_estadisticas)
+    return await render_template('estadisticas/index.html', estadisticas=estadisticas)
+
+
+@estadisticas_bp.route('/productos_mas_caros')
+async def productos_mas_caros():
+    """Top 5 productos más caros"""
+    productos = await obtener_db().consultar_todos_productos()
+    productos_ordenados = sorted(productos, key=lambda x: x['precio_base'], reverse=True)
+    return await render_template('estadisticas/productos_mas_caros.html', productos=productos_ordenados[:5])
+
+
+@estadisticas_bp.route('/productos_mas_baratos')
+async def productos_mas_baratos():
+    """Top 5 productos más baratos"""
+    productos = await obtener_db().consultar_todos_productos()
+    productos_ordenados = sorted(productos, key=lambda x: x['precio_base'])
+    return await render_template('estadisticas/productos_mas_baratos.html', productos=productos_ordenados[:5])
+
+
+@estadisticas_bp.route('/ventas_por_categoria')
+async def ventas_por_categoria():
+    """Ventas agrupadas por categoría"""
+    ventas_por_categoria = {
+        fila['categoria_nombre']: fila for fila in await obtener_db().consultar_ventas_por_categoria()
+    }
+    
+    return await render_template('estadisticas/ventas_por_categoria.html',
+                                 ventas_por_categoria=ventas_por_categoria)
+
+
+@estadisticas_bp.route('/impuestos_mensuales')
+async def impuestos_mensuales():
+    """Totales por impuesto y mes para las declaraciones"""
+    desde = request.args.get('desde') or "0000-00"
+    hasta = request.args.get('hasta') or "9999-12"
+    return await render_template('estadisticas/impuestos_mensuales.html',
+                                 impuestos=await obtener_db().consultar_impuestos_mensuales(desde, hasta))
+
+
+@estadisticas_bp.route('/productos_por_estado')
+async def productos_por_estado():
+    """Productos agrupados por estado"""
+    productos = await obtener_db().consultar_todos_productos()
+    
+    productos_por_estado = {}
+    for producto in productos:
+        productos_por_estado.setdefault(producto['estado'], []).append(producto)
+    
+    return await render_template('estadisticas/productos_por_estado.html',
+                                 productos_por_estado=productos_por_estado)
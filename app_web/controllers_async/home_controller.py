@@ -0,0 +1,36 @@
+"""
+Controlador asíncrono para el Home/Menú Principal
+"""
+
+import asyncio
+
+from quart import Blueprint, current_app, render_template, redirect, url_for, flash
+
+home_bp = Blueprint('home', __name__)
+
+
+@home_bp.route('/')
+async def index():
+    """Página principal con menú de opciones"""
+    return await render_template('home/index.html')
+
+
+@home_bp.route('/crear_tablas', methods=['POST'])
+async def crear_tablas():
+    """Encolar la creación de las tablas de la base de datos"""
+    return await _encolar('crear_tablas')
+
+
+@home_bp.route('/inicializar_datos', methods=['POST'])
+async def inicializar_datos():
+    """Encolar la carga de datos de ejemplo"""
+    return await _encolar('inicializar_datos')
+
+
+async def _encolar(tipo: str):
+    trabajo_id = await asyncio.to_thread(current_app.trabajos.encolar, tipo)
+    if trabajo_id is None:
+        await flash('❌ No se pudo encolar el trabajo', 'error')
+        return redirect(url_for('home.index'))
+    await flash(f'⏳ Trabajo #{trabajo_id} en cola; su avance se ve en esta página', 'info')
+    return redirect(url_for('trabajos.index'))
@@ -0,0 +1,50 @@
+"""
+Métricas de la aplicación ASGI
+Comparte el registro y el formato de app_web.metricas; mide cada solicitud con ganchos de Quart
+"""
+
+import time
+
+from quart import Blueprint, Response, g, request
+
+from app_web.metricas import (registro_metricas, texto_prometheus, duracion_solicitudes,
+                              solicitudes_en_curso, solicitudes_total)
+
+metricas_bp = Blueprint('metricas', __name__)
+
+
+@metricas_bp.route('/metrics')
+async def exponer():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(texto_prometheus(registro_metricas.exportar()), mimetype='text/plain; version=0.0.4')
+
+
+async def _antes_de_solicitud():
+    if request.endpoint == 'metricas.exponer':
+        return
+    g.metricas_activa = True
+    g.metricas_inicio = time.perf_counter()
+    solicitudes_en_curso.inc()
+
+
+async def _despues_de_solicitud(respuesta):
+    inicio = g.pop('metricas_inicio', None)
+    if inicio is None:
+        return respuesta
+    ruta = request.endpoint or 'desconocida'
+    duracion_solicitudes.observar(time.perf_counter() - inicio, ruta, request.method)
+    solicitudes_total.inc(ruta, request.method, respuesta.status_code)
+    return respuesta
+
+
+async def _al_cerrar_solicitud(error=None):
+    if g.pop('metricas_activa', False):
+        solicitudes_en_curso.dec()
+
+
+def iniciar_metricas(app):
+    """Registra /metrics y los ganchos de medición en la aplicación ASGI"""
+    app.before_request(_antes_de_solicitud)
+    app.after_request(_despues_de_solicitud)
+    app.teardown_request(_al_cerrar_solicitud)
+    app.register_blueprint(metricas_bp)
@@ -0,0 +1,140 @@
+"""
+Controlador asíncrono para gestionar Productos (CRUD)
+"""
+
+from quart import Blueprint, render_template, redirect, url_for, flash, request
+from app_web.controllers_async import obtener_db
+
+productos_bp = Blueprint('productos', __name__)
+
+
+@productos_bp.route('/')
+async def listar():
+    """Listar todos los productos"""
+    productos = await obtener_db().consultar_todos_productos()
+    return await render_template('productos/listar.html', productos=productos)
+
+
+@productos_bp.route('/buscar', methods=['GET', 'POST'])
+async def buscar():
+    """Buscar producto por ID"""
+    if request.method == 'POST':
+        producto_id = (await request.form).get('producto_id')
+        if producto_id:
+            try:
+                producto = await obtener_db().consultar_producto_por_id(int(producto_id))
+                if producto:
+                    return await render_template('productos/buscar.html', producto=producto, encontrado=True)
+                else:
+                    await flash('Producto no encontrado', 'warning')
+            except ValueError:
+                await flash('ID inválido', 'error')
+    
+    return await render_template('productos/buscar.html', encontrado=False)
+
+
+@productos_bp.route('/crear', methods=['GET', 'POST'])
+async def crear():
+    """Crear nuevo producto"""
+    db = obtener_db()
+    
+    if request.method == 'POST':
+        formulario = await request.form
+        nombre = formulario.get('nombre', '').strip()
+        descripcion = formulario.get('descripcion', '').strip()
+        precio_base = formulario.get('precio_base')
+        categoria_id = formulario.get('categoria_id')
+        estado = formulario.get('estado', 'Activo')
+        
+        if not nombre or not precio_base or not categoria_id:
+            await flash('Todos los campos requeridos deben ser completados', 'error')
+            return await render_template('productos/crear.html', categorias=await db.consultar_todas_categorias())
+        
+        try:
+            precio_base = float(precio_base)
+            categoria_id = int(categoria_id)
+            
+            if precio_base <= 0:
+                await flash('El precio debe ser mayor a 0', 'error')
+                return await render_template('productos/crear.html', categorias=await db.consultar_todas_categorias())
+            
+            if await db.insertar_producto(nombre, precio_base, categoria_id, descripcion, estado):
+                await flash('✅ Producto creado exitosamente', 'success')
+                return redirect(url_for('productos.listar'))
+            else:
+                await flash('❌ Error al crear el producto', 'error')
+        except ValueError:
+            await flash('Error en los datos ingresados', 'error')
+    
+    return await render_template('productos/crear.html', categorias=await db.consultar_todas_categorias())
+
+
+@productos_bp.route('/editar/<int:producto_id>', methods=['GET', 'POST'])
+async def editar(producto_id):
+    """Editar producto existente"""
+    db = obtener_db()
+    producto = await db.consultar_producto_por_id(producto_id)
+    
+    if not producto:
+        await flash('Producto no encontrado', 'error')
+        return redirect(url_for('productos.listar'))
+    
+    if request.method == 'POST':
+        formulario = await request.form
+        nombre = formulario.get('nombre', '').strip()
+        descripcion = formulario.get('descripcion', '').strip()
+        precio_base = formulario.get('precio_base')
+        estado = formulario.get('estado')
+        
+        nuevo_nombre = nombre if nombre else None
+        nueva_descripcion = descripcion if descripcion else None
+        nuevo_precio = float(precio_base) if precio_base else None
+        nuevo_estado = estado if estado else None
+        
+        if nuevo_precio and nuevo_precio <= 0:
+            await flash('El precio debe ser mayor a 0', 'error')
+            return await render_template('productos/editar.html', producto=producto,
+                                         categorias=await db.consultar_todas_categorias())
+        
+        if await db.actualizar_producto(producto_id, nuevo_nombre, nuevo_precio,
+                                        None, nueva_descripcion, nuevo_estado):
+            await flash('✅ Producto actualizado exitosamente', 'success')
+            return redirect(url_for('productos.listar'))
+        else:
+            await flash('❌ Error al actualizar el producto', 'error')
+    
+    return await render_template('productos/editar.html', producto=producto,
+                                 categorias=await db.consultar_todas_categorias())
+
+
+@productos_bp.route('/eliminar/<int:producto_id>', methods=['POST'])
+async def eliminar(producto_id):
+    """Eliminar producto"""
+    db = obtener_db()
+    
+    if not await db.consultar_producto_por_id(producto_id):
+        await flash('Producto no encontrado', 'error')
+        return redirect(url_for('productos.listar'))
+    
+    if await db.eliminar_producto(producto_id):
+        await flash('✅ Producto eliminado exitosamente', 'success')
+    else:
+        await flash('❌ Error al eliminar el producto. Puede tener transacciones asociadas.', 'error')
+    
+    return redirect(url_for('productos.listar'))
+
+
+@productos_bp.route('/por_categoria')
+async def por_categoria():
+    """Listar productos agrupados por categoría"""
+    db = obtener_db()
+    categorias = await db.consultar_todas_categorias()
+    
+    productos_por_categoria = {}
+    for categoria in categorias:
+        productos = await db.consultar_productos_por_categoria(categoria['id'])
+        if productos:  # Solo agregar categorías que tengan productos
+            productos_por_categoria[categoria['nombre']] = productos
+    
+    return await render_template('productos/por_categoria.html',
+                                 productos_por_categoria=productos_por_categoria)
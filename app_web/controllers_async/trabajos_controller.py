@@ -0,0 +1,48 @@
+"""
+Controlador asíncrono de Trabajos en segundo plano
+"""
+
+import asyncio
+
+from quart import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, url_for
+
+trabajos_bp = Blueprint('trabajos', __name__)
+
+
+@trabajos_bp.route('/')
+async def index():
+    """Trabajos recientes con su estado y avance"""
+    trabajos = await asyncio.to_thread(current_app.trabajos.consultar_recientes)
+    return await render_template('trabajos/index.html', trabajos=trabajos,
+                                 hay_activos=any(trabajo['activo'] for trabajo in trabajos))
+
+
+@trabajos_bp.route('/<int:trabajo_id>')
+async def detalle(trabajo_id):
+    """Estado de un trabajo en JSON (para consultarlo periódicamente)"""
+    trabajo = await asyncio.to_thread(current_app.trabajos.consultar, trabajo_id)
+    if trabajo is None:
+        abort(404)
+    return jsonify(trabajo)
+
+
+@trabajos_bp.route('/<int:trabajo_id>/cancelar', methods=['POST'])
+async def cancelar(trabajo_id):
+    """Cancelar un trabajo pendiente o en curso"""
+    if await asyncio.to_thread(current_app.trabajos.cancelar, trabajo_id):
+        await flash(f'Cancelación del trabajo #{trabajo_id} solicitada', 'info')
+    else:
+        await flash(f'❌ El trabajo #{trabajo_id} ya terminó', 'error')
+    return redirect(url_for('trabajos.index'))
+
+
+@trabajos_bp.route('/recalcular_impuestos', methods=['POST'])
+async def recalcular_impuestos():
+    """Encolar el recálculo de impuestos de las transacciones históricas"""
+    simular = (await request.form).get('simular') == '1'
+    trabajo_id = await asyncio.to_thread(current_app.trabajos.encolar, 'recalcular_impuestos', simular=simular)
+    if trabajo_id is None:
+        await flash('❌ No se pudo encolar el trabajo', 'error')
+    else:
+        await flash(f'⏳ Trabajo #{trabajo_id} en cola', 'info')
+    return redirect(url_for('trabajos.index'))
@@ -0,0 +1,86 @@
+"""
+Controlador asíncrono para gestionar Transacciones
+"""
+
+from quart import Blueprint, render_template, redirect, url_for, flash, request
+from app_web.controllers_async import obtener_db
+from app_web.controllers_async.calculadora_controller import calculadora, mapeo_categoria
+from app_web.idempotencia import CABECERA_CLAVE, CAMPO_CLAVE, validar_clave
+from app_web.metricas import contar_calculo
+from src.model.transaccion import desglose_de_venta
+
+transacciones_bp = Blueprint('transacciones', __name__)
+
+
+async def _productos_activos() -> list:
+    productos = await obtener_db().consultar_todos_productos()
+    return [p for p in productos if p['estado'] == 'Activo']
+
+
+@transacciones_bp.route('/')
+async def listar():
+    """Listar transacciones recientes"""
+    limite = request.args.get('limite', 10, type=int)
+    transacciones = await obtener_db().consultar_transacciones_recientes(limite)
+    return await render_template('transacciones/listar.html', transacciones=transacciones, limite=limite)
+
+
+@transacciones_bp.route('/crear', methods=['GET', 'POST'])
+async def crear():
+    """Registrar nueva transacción"""
+    db = obtener_db()
+    
+    if request.method == 'POST':
+        formulario = await request.form
+        producto_id = formulario.get('producto_id')
+        cantidad = formulario.get('cantidad')
+        
+        if not producto_id or not cantidad:
+            await flash('Todos los campos son requeridos', 'error')
+            return await render_template('transacciones/crear.html', productos=await _productos_activos())
+        
+        try:
+            producto_id = int(producto_id)
+            cantidad = int(cantidad)
+            
+            if cantidad <= 0:
+                await flash('La cantidad debe ser mayor a 0', 'error')
+                return await render_template('transacciones/crear.html', productos=await _productos_activos())
+            
+            producto = await db.consultar_producto_por_id(producto_id)
+            if not producto or producto['estado'] != 'Activo':
+                await flash('Producto no encontrado o no está activo', 'error')
+                return await render_template('transacciones/crear.html', productos=await _productos_activos())
+            
+            precio_unitario = producto['precio_base']
+            subtotal = precio_unitario * cantidad
+            categoria_enum = mapeo_categoria.get(producto['categoria_nombre'])
+            
+            if categoria_enum:
+                resultado_impuestos = calculadora.calcular_impuestos(precio_unitario, categoria_enum)
+                contar_calculo(categoria_enum.value)
+                total_impuestos = resultado_impuestos['total_impuestos'] * cantidad
+                total_final = subtotal + total_impuestos
+                desglose = desglose_de_venta(resultado_impuestos['impuestos'], cantidad)
+                
+                # El índice único de clave_idempotencia descarta los reintentos
+                clave = validar_clave(formulario.get(CAMPO_CLAVE) or request.headers.get(CABECERA_CLAVE))
+                if await db.insertar_transaccion(producto_id, cantidad, precio_unitario,
+                                                 subtotal, total_impuestos, total_final, clave,
+                                                 desglose):
+                    await flash('✅ Transacción registrada exitosamente', 'success')
+                    return redirect(url_for('transacciones.listar'))
+                previa = await db.consultar_transaccion_por_clave(clave) if clave else None
+                if previa is not None and (previa['producto_id'], previa['cantidad']) != (producto_id, cantidad):
+                    await flash('La clave de idempotencia ya se usó para otra venta', 'error')
+                    return await render_template('transacciones/crear.html',
+                                                 productos=await _productos_activos()), 422
+                else:
+                    await flash('❌ Error al registrar la transacción', 'error')
+            else:
+                await flash('No se pudo calcular los impuestos para esta categoría', 'error')
+                
+        except ValueError:
+            await flash('Error en los datos ingresados', 'error')
+    
+    return await render_template('transacciones/crear.html', productos=await _productos_activos())
@@ -0,0 +1,16 @@
+"""
+Acceso a la base de datos desde los controladores
+"""
+
+from flask import current_app, g
+
+from src.db.database import BaseDatos
+
+
+def obtener_db() -> BaseDatos:
+    """BaseDatos de la solicitud actual, con la instrumentación y la réplica de lectura de la aplicación"""
+    if 'db' not in g:
+        g.db = BaseDatos(current_app.config['DATABASE'],
+                         instrumentacion=getattr(current_app, 'instrumentacion', None),
+                         replica=getattr(current_app, 'replica', None))
+    return g.db
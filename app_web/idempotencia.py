@@ -0,0 +1,75 @@
+"""
+Claves de idempotencia para el registro de ventas
+Caché en memoria de claves recientes para responder reintentos sin tocar la base de datos
+"""
+
+import collections
+import threading
+import time
+import uuid
+from typing import Optional
+
+from flask import request
+
+# Campo de formulario y cabecera HTTP con la clave de idempotencia
+CAMPO_CLAVE = 'clave_idempotencia'
+CABECERA_CLAVE = 'Idempotency-Key'
+LONGITUD_MAXIMA_CLAVE = 128
+
+
+def nueva_clave() -> str:
+    """Clave para el formulario de venta: un doble envío o reintento del navegador repite la misma"""
+    return uuid.uuid4().hex
+
+
+def validar_clave(valor: Optional[str]) -> Optional[str]:
+    """Clave recibida sin espacios alrededor, o None si falta o es demasiado larga
+
+    La usan los controladores WSGI y ASGI, que leen el formulario de forma distinta.
+    """
+    clave = (valor or '').strip()
+    if not clave or len(clave) > LONGITUD_MAXIMA_CLAVE:
+        return None
+    return clave
+
+
+def clave_de_solicitud() -> Optional[str]:
+    """Clave de idempotencia de la solicitud actual (formulario o cabecera), o None"""
+    return validar_clave(request.form.get(CAMPO_CLAVE) or request.headers.get(CABECERA_CLAVE))
+
+
+class CacheIdempotencia:
+    """LRU con vencimiento de las claves ya procesadas y el resultado que se respondió
+
+    Es local a cada proceso; el índice único de ``transacciones.clave_idempotencia``
+    descarta los duplicados que lleguen a otro worker.
+    """
+
+    def __init__(self, capacidad: int = 10000, vigencia: float = 24 * 3600):
+        self.capacidad = capacidad
+        self.vigencia = vigencia
+        self._claves = collections.OrderedDict()
+        self._candado = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._claves)
+
+    def obtener(self, clave: str):
+        """Resultado guardado para la clave, o None si no está o venció"""
+        with self._candado:
+            entrada = self._claves.get(clave)
+            if entrada is None:
+                return None
+            vence, resultado = entrada
+            if vence < time.monotonic():
+                del self._claves[clave]
+                return None
+            self._claves.move_to_end(clave)
+            return resultado
+
+    def guardar(self, clave: str, resultado):
+        with self._candado:
+            self._claves[clave] = (time.monotonic() + self.vigencia, resultado)
+            self._claves.move_to_end(clave)
+            while len(self._claves) > self.capacidad:
+                self._claves.popitem(last=False)
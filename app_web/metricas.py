@@ -0,0 +1,510 @@
+"""
+Métricas de la aplicación web en formato de texto de Prometheus
+Latencia por ruta, solicitudes en curso, uso de la base de datos, calculadora, cachés y ventas
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from typing import IO, Dict, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin workers por fork no hay otro proceso que acumule a la vez
+    fcntl = None
+
+from flask import Blueprint, Response, current_app, g, has_request_context, request
+
+from src.db.instrumentacion import Histograma, LIMITES_HISTOGRAMA, RegistroOperacion
+
+
+class Metrica:
+    """Base común: nombre, ayuda, nombres de etiquetas y muestras por combinación de etiquetas"""
+
+    tipo = 'untyped'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 candado: Optional[threading.Lock] = None):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._muestras: Dict[tuple, object] = {}
+        self._candado = candado or threading.Lock()
+
+    def _clave(self, valores_etiquetas: Sequence) -> tuple:
+        if len(valores_etiquetas) != len(self.etiquetas):
+            raise ValueError(f"{self.nombre} espera las etiquetas {self.etiquetas}")
+        return tuple(str(valor) for valor in valores_etiquetas)
+
+    def exportar(self) -> dict:
+        with self._candado:
+            return {
+                'tipo': self.tipo,
+                'ayuda': self.ayuda,
+                'etiquetas': list(self.etiquetas),
+                'muestras': [[list(clave), self._exportar_valor(valor)]
+                             for clave, valor in self._muestras.items()]
+            }
+
+    def _exportar_valor(self, valor):
+        return valor
+
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def inc(self, *valores_etiquetas, cantidad: float = 1.0):
+        clave = self._clave(valores_etiquetas)
+        with self._candado:
+            self._muestras[clave] = self._muestras.get(clave, 0.0) + cantidad
+
+
+class Medidor(Metrica):
+    tipo = 'gauge'
+
+    def inc(self, *valores_etiquetas, cantidad: float = 1.0):
+        clave = self._clave(valores_etiquetas)
+        with self._candado:
+            self._muestras[clave] = self._muestras.get(clave, 0.0) + cantidad
+
+    def dec(self, *valores_etiquetas, cantidad: float = 1.0):
+        self.inc(*valores_etiquetas, cantidad=-cantidad)
+
+    def fijar(self, valor: float, *valores_etiquetas):
+        clave = self._clave(valores_etiquetas)
+        with self._candado:
+            self._muestras[clave] = float(valor)
+
+
+class HistogramaMetrica(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 limites: Sequence[float] = LIMITES_HISTOGRAMA, candado: Optional[threading.Lock] = None):
+        super().__init__(nombre, ayuda, etiquetas, candado)
+        self.limites = tuple(limites)
+
+    def observar(self, valor: float, *valores_etiquetas):
+        clave = self._clave(valores_etiquetas)
+        with self._candado:
+            histograma = self._muestras.get(clave)
+            if histograma is None:
+                histograma = self._muestras[clave] = Histograma(self.limites)
+            histograma.observar(valor)
+
+    def _exportar_valor(self, valor: Histograma):
+        return {'limites': list(valor.limites), 'conteos': list(valor.conteos),
+                'suma': valor.suma, 'cantidad': valor.cantidad}
+
+
+class RegistroMetricas:
+    """Conjunto de métricas de un proceso"""
+
+    def __init__(self):
+        self._metricas: Dict[str, Metrica] = {}
+
+    def _agregar(self, metrica: Metrica) -> Metrica:
+        if metrica.nombre in self._metricas:
+            raise ValueError(f"Métrica duplicada: {metrica.nombre}")
+        self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        return self._agregar(Contador(nombre, ayuda, etiquetas))
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Medidor:
+        return self._agregar(Medidor(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                   limites: Sequence[float] = LIMITES_HISTOGRAMA) -> HistogramaMetrica:
+        return self._agregar(HistogramaMetrica(nombre, ayuda, etiquetas, limites))
+
+    def exportar(self) -> dict:
+        """Instantánea serializable a JSON de todas las métricas"""
+        return {nombre: metrica.exportar() for nombre, metrica in self._metricas.items()}
+
+    def reiniciar(self):
+        """Descarta todas las muestras (p. ej. las del calentamiento en el maestro antes del fork)"""
+        for metrica in self._metricas.values():
+            with metrica._candado:
+                metrica._muestras.clear()
+
+
+def fusionar(instantaneas: List[dict]) -> dict:
+    """Suma las instantáneas de varios procesos (contadores, medidores e histogramas)"""
+    resultado: Dict[str, dict] = {}
+    for instantanea in instantaneas:
+        for nombre, datos in instantanea.items():
+            destino = resultado.setdefault(nombre, {
+                'tipo': datos['tipo'], 'ayuda': datos['ayuda'],
+                'etiquetas': datos['etiquetas'], 'muestras': {}
+            })
+            for etiquetas, valor in datos['muestras']:
+                clave = tuple(etiquetas)
+                actual = destino['muestras'].get(clave)
+                if datos['tipo'] == 'histogram':
+                    if actual is None:
+                        destino['muestras'][clave] = {
+                            'limites': valor['limites'], 'conteos': list(valor['conteos']),
+                            'suma': valor['suma'], 'cantidad': valor['cantidad']
+                        }
+                    else:
+                        actual['conteos'] = [a + b for a, b in zip(actual['conteos'], valor['conteos'])]
+                        actual['suma'] += valor['suma']
+                        actual['cantidad'] += valor['cantidad']
+                else:
+                    destino['muestras'][clave] = (actual or 0.0) + valor
+    for datos in resultado.values():
+        datos['muestras'] = [[list(clave), valor] for clave, valor in datos['muestras'].items()]
+    return resultado
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas_texto(nombres: Sequence[str], valores: Sequence[str], extra: Optional[tuple] = None) -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    if valor == float('inf'):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+def texto_prometheus(instantanea: dict) -> str:
+    """Formato de exposición de texto de Prometheus (versión 0.0.4)"""
+    lineas = []
+    for nombre, datos in sorted(instantanea.items()):
+        lineas.append(f"# HELP {nombre} {datos['ayuda']}")
+        lineas.append(f"# TYPE {nombre} {datos['tipo']}")
+        for etiquetas, valor in datos['muestras']:
+            if datos['tipo'] == 'histogram':
+                acumulado = 0
+                for limite, conteo in zip(valor['limites'] + [float('inf')], valor['conteos']):
+                    acumulado += conteo
+                    texto = _etiquetas_texto(datos['etiquetas'], etiquetas, ('le', _numero(limite)))
+                    lineas.append(f"{nombre}_bucket{texto} {acumulado}")
+                texto = _etiquetas_texto(datos['etiquetas'], etiquetas)
+                lineas.append(f"{nombre}_sum{texto} {_numero(valor['suma'])}")
+                lineas.append(f"{nombre}_count{texto} {valor['cantidad']}")
+            else:
+                texto = _etiquetas_texto(datos['etiquetas'], etiquetas)
+                lineas.append(f"{nombre}{texto} {_numero(valor)}")
+    return "\n".join(lineas) + "\n"
+
+
+def _inicio_proceso(pid: int) -> Optional[str]:
+    """Instante de arranque del proceso según el kernel (campo 22 de /proc/<pid>/stat), si se puede leer"""
+    try:
+        with open(f"/proc/{pid}/stat", encoding='ascii') as archivo:
+            return archivo.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError, UnicodeDecodeError):
+        return None
+
+
+class AlmacenMultiproceso:
+    """Comparte las métricas entre los workers de gunicorn a través de un directorio
+
+    Cada proceso vuelca su instantánea en ``metricas_<pid>_<arranque>.json`` como
+    máximo una vez por ``intervalo`` segundos (y siempre al atender /metrics); el
+    instante de arranque evita que un PID reutilizado pise los contadores de un
+    worker muerto. Al exponer se suman los archivos de todos los procesos. Los de
+    procesos que ya no existen se acumulan, bajo un candado, en ``finalizados.json``
+    y se borran; sus medidores se descartan porque describen estado vivo (p. ej.
+    solicitudes en curso). ``limpiar`` vacía el directorio al arrancar un despliegue.
+    """
+
+    ACUMULADO = "finalizados.json"
+
+    def __init__(self, directorio: str, intervalo: float = 1.0):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self._ultimo_volcado = 0.0
+        self._identidad: Optional[tuple] = None
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, pid: int, inicio: str) -> str:
+        return os.path.join(self.directorio, f"metricas_{pid}_{inicio}.json")
+
+    def _propia(self) -> tuple:
+        """(pid, arranque) de este proceso; se recalcula tras un fork"""
+        pid = os.getpid()
+        if self._identidad is None or self._identidad[0] != pid:
+            # Sin /proc basta con que no se repita dentro de este directorio
+            self._identidad = (pid, _inicio_proceso(pid) or f"t{time.time_ns()}")
+        return self._identidad
+
+    @staticmethod
+    def _escribir(ruta: str, datos: dict):
+        temporal = ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo)
+        os.replace(temporal, ruta)
+
+    def volcar(self, registro: RegistroMetricas, forzar: bool = False):
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo_volcado < self.intervalo:
+            return
+        self._ultimo_volcado = ahora
+        try:
+            self._escribir(self._ruta(*self._propia()), registro.exportar())
+        except OSError as e:
+            print(f"Error al guardar métricas: {e}")
+
+    @staticmethod
+    def _proceso_vivo(pid: int, inicio: Optional[str] = None) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        if inicio is None or inicio.startswith('t'):
+            return True
+        actual = _inicio_proceso(pid)
+        return actual is None or actual == inicio
+
+    @staticmethod
+    def _identidad_archivo(ruta: str) -> Optional[tuple]:
+        """(pid, arranque) a partir del nombre; ``metricas_<pid>.json`` antiguos no traen arranque"""
+        partes = os.path.basename(ruta)[len("metricas_"):-len(".json")].split('_', 1)
+        try:
+            return int(partes[0]), (partes[1] if len(partes) > 1 else None)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _leer_json(ruta: str) -> Optional[dict]:
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return None
+
+    def _bloquear(self) -> Optional[IO]:
+        if fcntl is None:
+            return None
+        candado = open(os.path.join(self.directorio, "metricas.lock"), 'a')
+        fcntl.flock(candado.fileno(), fcntl.LOCK_EX)
+        return candado
+
+    def leer(self) -> List[dict]:
+        propia = self._propia()
+        candado = self._bloquear()
+        try:
+            vivas, muertas = [], []
+            for ruta in glob.glob(os.path.join(self.directorio, "metricas_*.json")):
+                identidad = self._identidad_archivo(ruta)
+                if identidad is None:
+                    continue
+                pid, inicio = identidad
+                vivo = (pid, inicio) == propia or (pid != propia[0] and self._proceso_vivo(pid, inicio))
+                (vivas if vivo else muertas).append(ruta)
+
+            ruta_acumulado = os.path.join(self.directorio, self.ACUMULADO)
+            acumulado = self._leer_json(ruta_acumulado) or {}
+            if muertas:
+                instantaneas = [acumulado]
+                for ruta in muertas:
+                    instantanea = self._leer_json(ruta)
+                    if instantanea is not None:
+                        instantaneas.append({nombre: datos for nombre, datos in instantanea.items()
+                                             if datos['tipo'] != 'gauge'})
+                acumulado = fusionar(instantaneas)
+                try:
+                    # Primero el acumulado: si algo falla a medias los archivos siguen ahí
+                    self._escribir(ruta_acumulado, acumulado)
+                    for ruta in muertas:
+                        os.remove(ruta)
+                except OSError as e:
+                    print(f"Error al acumular métricas de procesos terminados: {e}")
+
+            resultado = [acumulado] if acumulado else []
+            for ruta in vivas:
+                instantanea = self._leer_json(ruta)
+                if instantanea is not None:
+                    resultado.append(instantanea)
+            return resultado
+        finally:
+            if candado is not None:
+                candado.close()
+
+    def limpiar(self):
+        """Borra las métricas de despliegues anteriores (en el maestro, antes de crear workers)"""
+        candado = self._bloquear()
+        try:
+            for ruta in glob.glob(os.path.join(self.directorio, "metricas_*.json*")) + \
+                    [os.path.join(self.directorio, self.ACUMULADO)]:
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Error al limpiar métricas: {e}")
+        finally:
+            if candado is not None:
+                candado.close()
+
+
+# ==================== MÉTRICAS DE LA APLICACIÓN ====================
+
+registro_metricas = RegistroMetricas()
+
+solicitudes_total = registro_metricas.contador(
+    'impuestos_http_solicitudes_total', 'Solicitudes HTTP atendidas', ('ruta', 'metodo', 'estado'))
+duracion_solicitudes = registro_metricas.histograma(
+    'impuestos_http_duracion_segundos', 'Latencia de las solicitudes HTTP por ruta', ('ruta', 'metodo'))
+solicitudes_en_curso = registro_metricas.medidor(
+    'impuestos_http_solicitudes_en_curso', 'Solicitudes HTTP en curso')
+db_operaciones_total = registro_metricas.contador(
+    'impuestos_db_operaciones_total', 'Operaciones de BaseDatos ejecutadas', ('operacion',))
+db_llamadas_por_solicitud = registro_metricas.histograma(
+    'impuestos_db_llamadas_por_solicitud', 'Sentencias SQL ejecutadas por solicitud', ('ruta',),
+    limites=(0, 1, 2, 5, 10, 20, 50, 100, 500))
+db_segundos_por_solicitud = registro_metricas.histograma(
+    'impuestos_db_segundos_por_solicitud', 'Tiempo en la base de datos por solicitud', ('ruta',))
+calculos_total = registro_metricas.contador(
+    'impuestos_calculos_total', 'Cálculos de impuestos realizados', ('categoria',))
+cache_aciertos_total = registro_metricas.contador(
+    'impuestos_cache_aciertos_total', 'Aciertos de caché', ('cache',))
+cache_fallos_total = registro_metricas.contador(
+    'impuestos_cache_fallos_total', 'Fallos de caché', ('cache',))
+transacciones_insertadas_total = registro_metricas.contador(
+    'impuestos_transacciones_insertadas_total', 'Transacciones insertadas en la base de datos')
+cola_pendientes = registro_metricas.medidor(
+    'impuestos_cola_escritura_pendientes', 'Transacciones aceptadas aún no escritas en la base de datos')
+cola_rechazadas_total = registro_metricas.contador(
+    'impuestos_cola_escritura_rechazadas_total', 'Transacciones rechazadas por cola de escritura llena')
+cola_retraso = registro_metricas.histograma(
+    'impuestos_cola_escritura_retraso_segundos', 'Tiempo entre aceptar una venta y su commit agrupado')
+cola_lote_filas = registro_metricas.histograma(
+    'impuestos_cola_escritura_lote_filas', 'Filas por commit agrupado',
+    limites=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000))
+http_bytes_total = registro_metricas.contador(
+    'impuestos_http_bytes_total', 'Bytes de respuestas comprimibles antes y después de comprimir',
+    ('ruta', 'etapa'))
+compresion_segundos = registro_metricas.histograma(
+    'impuestos_compresion_segundos', 'Tiempo en comprimir el cuerpo de las respuestas', ('ruta', 'codificacion'),
+    limites=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+
+
+def contar_calculo(categoria: str):
+    """Registra un cálculo de impuestos (la tasa por segundo se obtiene con rate())"""
+    calculos_total.inc(categoria)
+
+
+def contar_cache(cache: str, acierto: bool):
+    """Registra un acceso a una caché para el cálculo del ratio de aciertos"""
+    (cache_aciertos_total if acierto else cache_fallos_total).inc(cache)
+
+
+def contar_compresion(ruta: str, codificacion: str, original: int, enviado: int, segundos: float):
+    """Registra los bytes ahorrados y el costo de comprimir una respuesta"""
+    http_bytes_total.inc(ruta, 'original', cantidad=original)
+    http_bytes_total.inc(ruta, 'enviado', cantidad=enviado)
+    compresion_segundos.observar(segundos, ruta, codificacion)
+
+
+def contar_rechazo_cola():
+    """Registra una venta rechazada por contrapresión de la cola de escritura"""
+    cola_rechazadas_total.inc()
+
+
+def al_escribir_lote(lote):
+    """Gancho de ColaEscritura: filas por commit, retraso de escritura y pendientes"""
+    transacciones_insertadas_total.inc(cantidad=lote.filas)
+    cola_lote_filas.observar(lote.filas + lote.errores)
+    cola_retraso.observar(lote.retraso)
+    cola_pendientes.fijar(lote.pendientes)
+
+
+def al_terminar_operacion(operacion: RegistroOperacion):
+    """Gancho de instrumentación de BaseDatos: acumula el uso de la base de datos por solicitud"""
+    db_operaciones_total.inc(operacion.nombre)
+    # Un reintento con una clave ya registrada no inserta filas
+    insertadas = sum(sentencia.filas for sentencia in operacion.sentencias
+                     if sentencia.nombre == 'transaccion_insertar' and not sentencia.error)
+    if insertadas:
+        transacciones_insertadas_total.inc(cantidad=insertadas)
+    if has_request_context():
+        g.db_llamadas = g.get('db_llamadas', 0) + len(operacion.sentencias)
+        g.db_segundos = g.get('db_segundos', 0.0) + operacion.duracion
+
+
+# ==================== INTEGRACIÓN CON FLASK ====================
+
+metricas_bp = Blueprint('metricas', __name__)
+
+
+@metricas_bp.route('/metrics')
+def exponer():
+    """Métricas en formato de texto de Prometheus"""
+    cola = getattr(current_app, 'cola_escritura', None)
+    if cola is not None:
+        cola_pendientes.fijar(cola.estado()['pendientes'])
+    almacen = current_app.extensions.get('metricas_almacen')
+    if almacen is None:
+        instantanea = registro_metricas.exportar()
+    else:
+        almacen.volcar(registro_metricas, forzar=True)
+        instantanea = fusionar(almacen.leer())
+    return Response(texto_prometheus(instantanea), mimetype='text/plain; version=0.0.4')
+
+
+def _ruta_actual() -> str:
+    return request.endpoint or 'desconocida'
+
+
+def _antes_de_solicitud():
+    if request.endpoint == 'metricas.exponer':
+        return
+    g.metricas_activa = True
+    g.metricas_inicio = time.perf_counter()
+    solicitudes_en_curso.inc()
+
+
+def _despues_de_solicitud(respuesta):
+    inicio = g.pop('metricas_inicio', None)
+    if inicio is None:
+        return respuesta
+    ruta = _ruta_actual()
+    duracion_solicitudes.observar(time.perf_counter() - inicio, ruta, request.method)
+    solicitudes_total.inc(ruta, request.method, respuesta.status_code)
+    db_llamadas_por_solicitud.observar(g.get('db_llamadas', 0), ruta)
+    db_segundos_por_solicitud.observar(g.get('db_segundos', 0.0), ruta)
+    return respuesta
+
+
+def _al_cerrar_solicitud(error=None):
+    if g.pop('metricas_activa', False):
+        solicitudes_en_curso.dec()
+    almacen = current_app.extensions.get('metricas_almacen')
+    if almacen is not None:
+        almacen.volcar(registro_metricas)
+
+
+def iniciar_metricas(app):
+    """Registra /metrics y los ganchos de medición en la aplicación"""
+    directorio = app.config.get('METRICAS_DIR')
+    if directorio:
+        almacen = AlmacenMultiproceso(directorio, app.config.get('METRICAS_INTERVALO_VOLCADO', 1.0))
+        app.extensions['metricas_almacen'] = almacen
+        atexit.register(almacen.volcar, registro_metricas, True)
+
+    if getattr(app, 'instrumentacion', None) is not None:
+        app.instrumentacion.agregar_gancho(al_terminar_operacion)
+    if getattr(app, 'cola_escritura', None) is not None:
+        app.cola_escritura.agregar_gancho(al_escribir_lote)
+
+    app.before_request(_antes_de_solicitud)
+    app.after_request(_despues_de_solicitud)
+    app.teardown_request(_al_cerrar_solicitud)
+    app.register_blueprint(metricas_bp)
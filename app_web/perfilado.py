@@ -0,0 +1,148 @@
+"""
+Perfilado por solicitud para la aplicación web
+Captura el árbol de llamadas (cProfile) y las consultas a la base de datos de una solicitud
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+from datetime import datetime
+
+from flask import Blueprint, abort, current_app, g, render_template, request
+
+from src.db.instrumentacion import RegistroOperacion
+
+CABECERA_PERFILADO = 'X-Perfilar'
+
+perfiles_bp = Blueprint('perfiles', __name__)
+
+
+def _directorio() -> str:
+    return current_app.config['PERFILADO_DIR']
+
+
+def _debe_perfilar() -> bool:
+    if request.blueprint == 'perfiles':
+        return False
+    if current_app.config.get('PERFILADO_HABILITADO'):
+        return True
+    return bool(current_app.config.get('PERFILADO_CABECERA') and request.headers.get(CABECERA_PERFILADO))
+
+
+def _iniciar_perfil():
+    if not _debe_perfilar():
+        return
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        # Ya hay otro perfilador activo en este hilo
+        return
+    g.perfil = perfil
+    g.perfil_consultas = []
+    g.perfil_inicio = time.perf_counter()
+
+
+def _finalizar_perfil(respuesta):
+    perfil = g.pop('perfil', None)
+    if perfil is None:
+        return respuesta
+    perfil.disable()
+    duracion = time.perf_counter() - g.pop('perfil_inicio')
+    consultas = g.pop('perfil_consultas', [])
+    try:
+        nombre = guardar_perfil(perfil, consultas, duracion, respuesta.status_code)
+        respuesta.headers['X-Perfil'] = nombre
+    except OSError as e:
+        print(f"Error al guardar perfil: {e}")
+    return respuesta
+
+
+def _registrar_consulta(operacion: RegistroOperacion):
+    """Gancho de instrumentación: guarda las operaciones de BaseDatos de la solicitud perfilada"""
+    if 'perfil_consultas' in g:
+        g.perfil_consultas.append(operacion.a_dict())
+
+
+def guardar_perfil(perfil: cProfile.Profile, consultas: list, duracion: float, estado: int) -> str:
+    """Guarda el perfil (.prof), su informe de texto y las consultas; devuelve el nombre base"""
+    directorio = _directorio()
+    os.makedirs(directorio, exist_ok=True)
+    marca = datetime.now()
+    ruta_segura = re.sub(r'[^A-Za-z0-9_.-]+', '_', request.path.strip('/')) or 'inicio'
+    nombre = f"{marca.strftime('%Y%m%d_%H%M%S_%f')}_{ruta_segura}"
+
+    perfil.dump_stats(os.path.join(directorio, nombre + '.prof'))
+
+    salida = io.StringIO()
+    estadisticas = pstats.Stats(perfil, stream=salida).strip_dirs().sort_stats('cumulative')
+    estadisticas.print_stats(40)
+    estadisticas.print_callees(20)
+    with open(os.path.join(directorio, nombre + '.txt'), 'w', encoding='utf-8') as archivo:
+        archivo.write(salida.getvalue())
+
+    metadatos = {
+        'nombre': nombre,
+        'fecha': marca.isoformat(timespec='seconds'),
+        'metodo': request.method,
+        'ruta': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'estado': estado,
+        'duracion': duracion,
+        'tiempo_db': sum(consulta['duracion'] for consulta in consultas),
+        'sentencias_db': sum(len(consulta['sentencias']) for consulta in consultas),
+        'consultas': consultas
+    }
+    with open(os.path.join(directorio, nombre + '.json'), 'w', encoding='utf-8') as archivo:
+        json.dump(metadatos, archivo, ensure_ascii=False, indent=2)
+    return nombre
+
+
+def _leer_metadatos(nombre: str) -> dict:
+    if not re.fullmatch(r'[A-Za-z0-9_.-]+', nombre):
+        abort(404)
+    ruta = os.path.join(_directorio(), nombre + '.json')
+    if not os.path.exists(ruta):
+        abort(404)
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+@perfiles_bp.route('/')
+def index():
+    """Índice de perfiles guardados, del más reciente al más antiguo"""
+    perfiles = []
+    directorio = _directorio()
+    if os.path.isdir(directorio):
+        for archivo in sorted(os.listdir(directorio), reverse=True):
+            if archivo.endswith('.json'):
+                datos = _leer_metadatos(archivo[:-len('.json')])
+                datos.pop('consultas', None)
+                perfiles.append(datos)
+    return render_template('perfiles/index.html', perfiles=perfiles)
+
+
+@perfiles_bp.route('/<nombre>')
+def detalle(nombre):
+    """Árbol de llamadas y consultas de un perfil"""
+    datos = _leer_metadatos(nombre)
+    with open(os.path.join(_directorio(), nombre + '.txt'), encoding='utf-8') as archivo:
+        informe = archivo.read()
+    return render_template('perfiles/detalle.html', perfil=datos, informe=informe)
+
+
+def iniciar_perfilado(app):
+    """Registra los ganchos de perfilado y el índice /_perfiles
+
+    ``create_app`` sólo lo llama con ``PERFILADO_HABILITADO`` (todas las solicitudes)
+    o ``PERFILADO_CABECERA`` (las que envían ``X-Perfilar``) activos.
+    """
+    if getattr(app, 'instrumentacion', None) is not None:
+        app.instrumentacion.agregar_gancho(_registrar_consulta)
+    app.before_request(_iniciar_perfil)
+    app.after_request(_finalizar_perfil)
+    app.register_blueprint(perfiles_bp, url_prefix='/_perfiles')
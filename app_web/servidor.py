@@ -0,0 +1,89 @@
+"""
+Arranque en producción con gunicorn y ``preload_app`` (ver ``gunicorn.conf.py``)
+El maestro crea y calienta la aplicación una vez; los workers heredan sus páginas
+de memoria por copy-on-write. Al hacer fork no debe quedar abierta ninguna
+conexión SQLite ni ningún hilo: cada worker los abre de nuevo.
+"""
+
+import gc
+import os
+from typing import Optional
+
+from app_web.metricas import registro_metricas
+from src.db.database import conexiones_por_hilo
+from src.db.sentencias import registro_sentencias
+
+# Páginas de la caché de vistas que se renderizan antes de servir
+RUTAS_CALENTAMIENTO = ('/', '/productos/', '/productos/por_categoria', '/categorias/',
+                       '/transacciones/', '/calculadora/', '/estadisticas/')
+# Todos los workers comparten un solo escritor de SQLite: más procesos sólo agregan espera
+MAXIMO_TRABAJADORES = 8
+
+
+def cpus_disponibles() -> int:
+    """Núcleos que este proceso puede usar (respeta la afinidad del contenedor si existe)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def trabajadores_sugeridos(cpus: Optional[int] = None, maximo: int = MAXIMO_TRABAJADORES) -> int:
+    """(2 x núcleos) + 1 workers, con tope ``maximo``"""
+    return max(1, min(2 * (cpus or cpus_disponibles()) + 1, maximo))
+
+
+def calentar(app) -> dict:
+    """Compila las plantillas y llena la caché de páginas; devuelve cuántas de cada una
+
+    Las vistas se ejecutan directamente en un contexto de solicitud, sin los
+    ganchos before/after_request, para no arrancar los trabajos en segundo plano
+    en el maestro. Un error en una página no impide arrancar.
+    """
+    plantillas = 0
+    for nombre in app.jinja_env.list_templates():
+        app.jinja_env.get_template(nombre)
+        plantillas += 1
+
+    paginas = 0
+    if app.cache_vistas is not None:
+        for ruta in RUTAS_CALENTAMIENTO:
+            try:
+                with app.test_request_context(ruta) as contexto:
+                    regla = contexto.request.url_rule
+                    app.view_functions[regla.endpoint](**contexto.request.view_args)
+            except Exception as e:
+                print(f"Error al calentar {ruta}: {e}")
+        paginas = len(app.cache_vistas)
+    return {'plantillas': plantillas, 'paginas': paginas}
+
+
+def antes_de_fork(app):
+    """En el maestro: cierra conexiones e hilos, descarta métricas del calentamiento y congela el GC
+
+    ``gc.freeze`` deja los objetos existentes fuera de las recolecciones, así
+    los workers no tocan (ni copian) las páginas de memoria que heredan.
+    """
+    if app.replica is not None:
+        app.replica.cerrar()
+    app.reportes.cerrar()
+    app.estampas.cerrar()
+    app.db.desconectar()
+    conexiones_por_hilo.cerrar()
+    registro_metricas.reiniciar()
+    registro_sentencias.reiniciar_estadisticas()
+    app.instrumentacion.reiniciar()
+    almacen = app.extensions.get('metricas_almacen')
+    if almacen is not None:
+        almacen.volcar(registro_metricas, forzar=True)
+    gc.freeze()
+
+
+def despues_de_fork(app):
+    """En cada worker: arranca los hilos propios del proceso antes de la primera solicitud
+
+    Las conexiones de reportes y estampas se abren solas en el primer uso.
+    """
+    app.trabajos.iniciar()
+    if app.cola_escritura is not None:
+        app.cola_escritura.iniciar()
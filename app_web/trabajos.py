@@ -0,0 +1,63 @@
+"""
+Trabajos en segundo plano de la aplicación web
+Las operaciones largas de la interfaz se encolan en GestorTrabajos y se siguen en /trabajos/
+"""
+
+import functools
+import os
+
+from src.db.database import BaseDatos
+from src.db.trabajos import GestorTrabajos
+
+
+def crear_tablas(contexto, nombre_db: str) -> str:
+    contexto.progreso(0, 1, "Aplicando migraciones")
+    if not BaseDatos(nombre_db).crear_tablas():
+        raise RuntimeError("No se pudieron crear las tablas")
+    contexto.progreso(1, 1, "Tablas creadas")
+    return "Tablas creadas exitosamente"
+
+
+def inicializar_datos(contexto, nombre_db: str) -> str:
+    db = BaseDatos(nombre_db)
+    if db.consultar_todas_categorias():
+        return "Las tablas ya contienen datos; no se cargaron los datos de ejemplo"
+    contexto.progreso(0, 1, "Cargando datos de ejemplo")
+    if not db.inicializar_datos_ejemplo():
+        raise RuntimeError("No se pudieron inicializar los datos de ejemplo")
+    contexto.progreso(1, 1, "Datos cargados")
+    return "Datos de ejemplo inicializados exitosamente"
+
+
+def recalcular_impuestos(contexto, nombre_db: str, simular: bool = False) -> dict:
+    # multiprocessing (ProcessPoolExecutor) se carga sólo cuando se ejecuta un recálculo
+    from src.db.recalculo import RecalculoImpuestos
+
+    def progreso(etapa: str, hechos: int, total: int):
+        contexto.progreso(hechos, total, f"{etapa}: {hechos:,}/{total:,}")
+
+    # Con el mismo nombre de ejecución, un trabajo reanudado salta los rangos ya aplicados
+    # Un error de la base llega al trabajo con su mensaje y queda registrado en /trabajos
+    resultado = RecalculoImpuestos(nombre_db, simular=simular, ejecucion=f"trabajo-{contexto.trabajo_id}",
+                                   progreso=progreso).ejecutar()
+    return resultado.a_dict()
+
+
+def ruta_db_trabajos(nombre_db: str) -> str:
+    """Archivo de la cola junto a la base principal: ``datos.db`` -> ``datos.trabajos.db``"""
+    base, extension = os.path.splitext(nombre_db)
+    return f"{base}.trabajos{extension or '.db'}"
+
+
+def iniciar_trabajos(app) -> GestorTrabajos:
+    """Crea la cola de trabajos de la aplicación y registra los tipos de trabajo"""
+    nombre_db = app.config['DATABASE']
+    gestor = GestorTrabajos(app.config['TRABAJOS_DB'] or ruta_db_trabajos(nombre_db),
+                            hilos=app.config['TRABAJOS_HILOS'])
+    gestor.registrar('crear_tablas', functools.partial(crear_tablas, nombre_db=nombre_db), "Crear tablas")
+    gestor.registrar('inicializar_datos', functools.partial(inicializar_datos, nombre_db=nombre_db),
+                     "Cargar datos de ejemplo")
+    gestor.registrar('recalcular_impuestos', functools.partial(recalcular_impuestos, nombre_db=nombre_db),
+                     "Recalcular impuestos")
+    app.trabajos = gestor
+    return gestor
@@ -0,0 +1,3 @@
+"""
+Suite de benchmarks (pytest-benchmark) para la calculadora, la capa de datos y la web.
+"""
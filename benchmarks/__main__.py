@@ -0,0 +1,80 @@
+"""
+Ejecución y comparación de benchmarks
+
+    python -m benchmarks ejecutar [--tamanos 1000,100000,1000000] [--guardar NOMBRE] [-k FILTRO]
+    python -m benchmarks comparar BASE.json ACTUAL.json [--umbral 10] [--estadistica median]
+
+Los resultados se guardan en benchmarks/lineas_base/NOMBRE.json. ``comparar``
+termina con código 1 si algún benchmark empeora más del umbral.
+"""
+
+import argparse
+import os
+import sys
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_LINEAS_BASE = os.path.join(DIRECTORIO, 'lineas_base')
+ARCHIVOS = ['bench_calculadora.py', 'bench_database.py', 'bench_web.py']
+
+
+def _ruta_resultado(nombre: str) -> str:
+    if os.path.exists(nombre):
+        return nombre
+    return os.path.join(DIRECTORIO_LINEAS_BASE, nombre if nombre.endswith('.json') else nombre + '.json')
+
+
+def ejecutar(argumentos) -> int:
+    import pytest
+
+    if argumentos.tamanos:
+        os.environ['BENCH_TAMANOS'] = argumentos.tamanos
+    opciones = [os.path.join(DIRECTORIO, archivo) for archivo in (argumentos.archivos or ARCHIVOS)]
+    opciones += ['-q', '-p', 'no:cacheprovider', '--benchmark-warmup=on',
+                 '--benchmark-disable-gc', '--benchmark-sort=fullname']
+    if argumentos.guardar:
+        os.makedirs(DIRECTORIO_LINEAS_BASE, exist_ok=True)
+        opciones.append(f"--benchmark-json={_ruta_resultado(argumentos.guardar)}")
+    if argumentos.k:
+        opciones += ['-k', argumentos.k]
+    return pytest.main(opciones)
+
+
+def comparar(argumentos) -> int:
+    from benchmarks.comparar import cargar, comparar as comparar_resultados, informe
+
+    filas = comparar_resultados(cargar(_ruta_resultado(argumentos.base)),
+                                cargar(_ruta_resultado(argumentos.actual)),
+                                argumentos.umbral, argumentos.estadistica)
+    print(informe(filas))
+    regresiones = [fila for fila in filas if fila['regresion']]
+    if regresiones:
+        print(f"\n{len(regresiones)} benchmark(s) empeoraron más de {argumentos.umbral}%")
+        return 1
+    print("\nSin regresiones")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks de la calculadora de impuestos')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    parser_ejecutar = subcomandos.add_parser('ejecutar', help='Ejecuta los benchmarks')
+    parser_ejecutar.add_argument('--tamanos', help='Filas de prueba separadas por comas (por defecto 1000)')
+    parser_ejecutar.add_argument('--guardar', help='Nombre de la línea base a guardar en benchmarks/lineas_base')
+    parser_ejecutar.add_argument('-k', help='Filtro de pytest para elegir benchmarks')
+    parser_ejecutar.add_argument('archivos', nargs='*', help='Archivos bench_*.py a ejecutar (por defecto todos)')
+    parser_ejecutar.set_defaults(funcion=ejecutar)
+
+    parser_comparar = subcomandos.add_parser('comparar', help='Compara dos resultados guardados')
+    parser_comparar.add_argument('base')
+    parser_comparar.add_argument('actual')
+    parser_comparar.add_argument('--umbral', type=float, default=10.0, help='Porcentaje de empeoramiento tolerado')
+    parser_comparar.add_argument('--estadistica', default='median', choices=['min', 'mean', 'median', 'max'])
+    parser_comparar.set_defaults(funcion=comparar)
+
+    argumentos = parser.parse_args(argv)
+    return argumentos.funcion(argumentos)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
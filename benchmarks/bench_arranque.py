@@ -0,0 +1,45 @@
+"""
+Benchmarks de arranque en frío: cada ronda es un intérprete nuevo
+Los módulos con más tiempo propio de importación (``-X importtime``) quedan en ``extra_info``
+"""
+
+import os
+import subprocess
+import sys
+from typing import List
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código que ejecuta cada entrada; 'interprete' es la referencia sin nada del proyecto
+ENTRADAS = {
+    'interprete': "pass",
+    'web': "import run_web; run_web.app",
+    'web_sin_app': "import run_web",
+    'cli': "import src.app.main",
+    'cli_database': "import src.app.main_database",
+}
+
+
+def tiempos_importacion(codigo: str, entorno: dict, limite: int = 10) -> List[list]:
+    """[[módulo, microsegundos propios], ...] de los ``limite`` módulos más lentos de importar"""
+    salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=RAIZ, env=entorno,
+                            capture_output=True, text=True).stderr
+    tiempos = []
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        propio, _, modulo = linea[len('import time:'):].split('|')
+        if propio.strip().isdigit():
+            tiempos.append([modulo.strip(), int(propio)])
+    return sorted(tiempos, key=lambda tiempo: tiempo[1], reverse=True)[:limite]
+
+
+@pytest.mark.parametrize('entrada', list(ENTRADAS))
+def test_arranque(benchmark, directorio_temporal, entrada):
+    entorno = dict(os.environ, DATABASE=os.path.join(directorio_temporal, "arranque.db"))
+    comando = [sys.executable, '-c', ENTRADAS[entrada]]
+    benchmark.pedantic(subprocess.run, args=(comando,), kwargs={'cwd': RAIZ, 'env': entorno, 'check': True},
+                       rounds=10, warmup_rounds=1)
+    benchmark.extra_info['importaciones'] = tiempos_importacion(ENTRADAS[entrada], entorno)
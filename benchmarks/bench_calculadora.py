@@ -0,0 +1,36 @@
+"""
+Benchmarks de CalculadoraImpuestos
+"""
+
+import random
+
+from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+
+from benchmarks.conftest import SEMILLA
+
+
+def _lote(cantidad: int):
+    aleatorio = random.Random(SEMILLA)
+    categorias = list(CategoriaProducto)
+    return [(round(aleatorio.uniform(1, 1000000), 2), aleatorio.choice(categorias)) for _ in range(cantidad)]
+
+
+def test_calcular_impuestos_individual(benchmark):
+    calculadora = CalculadoraImpuestos()
+    resultado = benchmark(calculadora.calcular_impuestos, 12345.67, CategoriaProducto.LICORES)
+    assert resultado['total_impuestos'] > 0
+
+
+def test_calcular_impuestos_lote_1000(benchmark):
+    calculadora = CalculadoraImpuestos()
+    lote = _lote(1000)
+
+    def calcular_lote():
+        return [calculadora.calcular_impuestos(valor, categoria) for valor, categoria in lote]
+
+    resultados = benchmark(calcular_lote)
+    assert len(resultados) == 1000
+
+
+def test_crear_calculadora(benchmark):
+    benchmark(CalculadoraImpuestos)
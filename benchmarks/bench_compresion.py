@@ -0,0 +1,45 @@
+"""
+Benchmarks de la compresión de respuestas: costo por ruta y bytes ahorrados
+Los bytes quedan en ``extra_info`` de cada resultado (original, enviado, ahorro)
+"""
+
+import gzip
+
+import pytest
+
+from app_web import create_app
+from app_web.compresion import brotli, comprimir
+
+RUTAS = ['/productos/', '/productos/por_categoria', '/transacciones/?limite=500', '/estadisticas/']
+CODIFICACIONES = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+
+
+@pytest.fixture(params=[128, 0], ids=['con_cache', 'sin_cache'])
+def app(request, db_poblada):
+    """Con y sin la caché de cuerpos comprimidos (``COMPRESION_CACHE``)"""
+    app = create_app(config={'DATABASE': db_poblada.nombre_db, 'TESTING': True,
+                             'COMPRESION_CACHE': request.param})
+    yield app
+    app.reportes.cerrar()
+    app.estampas.cerrar()
+
+
+@pytest.mark.parametrize('codificacion', CODIFICACIONES)
+@pytest.mark.parametrize('ruta', RUTAS)
+def test_get_comprimido(benchmark, app, ruta, codificacion):
+    """Solicitud completa; la página sale de la caché de vistas, así que sin caché domina la compresión"""
+    cliente = app.test_client()
+    original = len(cliente.get(ruta).get_data())
+    respuesta = benchmark(cliente.get, ruta, headers={'Accept-Encoding': codificacion})
+    assert respuesta.status_code == 200
+    enviado = len(respuesta.get_data())
+    benchmark.extra_info.update(original=original, enviado=enviado, ahorro=round(1 - enviado / original, 3))
+
+
+@pytest.mark.parametrize('nivel', [1, 6, 9])
+def test_nivel_gzip(benchmark, app, nivel):
+    """Sólo la compresión del listado de transacciones por nivel de gzip"""
+    datos = app.test_client().get('/transacciones/?limite=500').get_data()
+    comprimido = benchmark(comprimir, datos, 'gzip', nivel)
+    assert gzip.decompress(comprimido) == datos
+    benchmark.extra_info.update(original=len(datos), enviado=len(comprimido))
@@ -0,0 +1,56 @@
+"""
+Benchmarks de BaseDatos: inserción, consulta y actualización sobre bases de distinto tamaño
+"""
+
+import itertools
+
+from src.db.reportes import MotorReportes
+
+
+def test_insertar_transaccion(benchmark, db_poblada):
+    assert benchmark(db_poblada.insertar_transaccion, 1, 2, 1000.0, 2000.0, 380.0, 2380.0)
+
+
+def test_insertar_producto(benchmark, db_poblada):
+    nombres = (f"Nuevo {i}" for i in itertools.count())
+    benchmark(lambda: db_poblada.insertar_producto(next(nombres), 1500.0, 1))
+
+
+def test_consultar_producto_por_id(benchmark, db_poblada):
+    producto = benchmark(db_poblada.consultar_producto_por_id, db_poblada.filas // 2)
+    assert producto is not None
+
+
+def test_consultar_productos_por_categoria(benchmark, db_poblada):
+    benchmark(db_poblada.consultar_productos_por_categoria, 1)
+
+
+def test_consultar_todas_categorias(benchmark, db_poblada):
+    assert benchmark(db_poblada.consultar_todas_categorias)
+
+
+def test_consultar_transacciones_recientes(benchmark, db_poblada):
+    assert len(benchmark(db_poblada.consultar_transacciones_recientes, 100)) == min(100, db_poblada.filas)
+
+
+def test_obtener_estadisticas(benchmark, db_poblada):
+    estadisticas = benchmark(db_poblada.obtener_estadisticas)
+    assert estadisticas['total_productos'] == db_poblada.filas
+
+
+def test_estadisticas_en_paralelo(benchmark, db_poblada):
+    motor = MotorReportes(db_poblada.nombre_db)
+    try:
+        estadisticas = benchmark(motor.obtener_estadisticas)
+    finally:
+        motor.cerrar()
+    assert estadisticas['total_productos'] == db_poblada.filas
+
+
+def test_consultar_todos_productos(benchmark, db_poblada):
+    assert len(benchmark(db_poblada.consultar_todos_productos)) == db_poblada.filas
+
+
+def test_actualizar_producto(benchmark, db_poblada):
+    precios = (1000.0 + i for i in itertools.count())
+    assert benchmark(lambda: db_poblada.actualizar_producto(1, precio_base=next(precios)))
@@ -0,0 +1,40 @@
+"""
+Benchmarks de las rutas principales de la aplicación Flask a través del cliente de pruebas
+"""
+
+import pytest
+
+from app_web import create_app
+
+
+@pytest.fixture
+def cliente(db_poblada):
+    app = create_app(config={'DATABASE': db_poblada.nombre_db, 'TESTING': True})
+    return app.test_client()
+
+
+@pytest.mark.parametrize('ruta', [
+    '/',
+    '/calculadora/',
+    '/productos/',
+    '/productos/por_categoria',
+    '/categorias/',
+    '/transacciones/',
+    '/estadisticas/',
+    '/estadisticas/ventas_por_categoria',
+])
+def test_get(benchmark, cliente, ruta):
+    respuesta = benchmark(cliente.get, ruta)
+    assert respuesta.status_code == 200
+
+
+def test_post_calcular(benchmark, cliente):
+    datos = {'valor_base': '25000', 'categoria': 'Licores'}
+    respuesta = benchmark(cliente.post, '/calculadora/calcular', data=datos)
+    assert respuesta.status_code == 200
+
+
+def test_post_crear_transaccion(benchmark, cliente):
+    datos = {'producto_id': '1', 'cantidad': '1'}
+    respuesta = benchmark(cliente.post, '/transacciones/crear', data=datos)
+    assert respuesta.status_code in (200, 302)
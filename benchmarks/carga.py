@@ -0,0 +1,264 @@
+"""
+Generador de carga HTTP para la aplicación web
+Escenarios asíncronos (asyncio + httpx) con concurrencia configurable y reporte de latencias
+
+Uso:
+    python -m benchmarks.carga --url http://127.0.0.1:8000 --escenario mixto --concurrencia 50 --duracion 30
+    python -m benchmarks.carga --iniciar-servidor --workers 4 --datos-ejemplo --escenario calcular
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - dependencia opcional
+    httpx = None
+
+
+CATEGORIAS = ["Alimentos Básicos", "Licores", "Bolsas Plásticas", "Combustibles", "Servicios Públicos", "Otros"]
+
+
+class Peticion:
+    """Solicitud HTTP que genera un escenario"""
+
+    def __init__(self, nombre: str, metodo: str, ruta: str, datos: Optional[dict] = None):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.ruta = ruta
+        self.datos = datos
+
+
+def _calcular(aleatorio: random.Random, opciones) -> Peticion:
+    return Peticion('calcular', 'POST', '/calculadora/calcular', {
+        'valor_base': f"{aleatorio.uniform(100, 2000000):.2f}",
+        'categoria': aleatorio.choice(CATEGORIAS)
+    })
+
+
+def _crear_transaccion(aleatorio: random.Random, opciones) -> Peticion:
+    return Peticion('crear_transaccion', 'POST', '/transacciones/crear', {
+        'producto_id': str(aleatorio.randint(1, opciones.productos_max)),
+        'cantidad': str(aleatorio.randint(1, 5))
+    })
+
+
+def _listar_productos(aleatorio: random.Random, opciones) -> Peticion:
+    return Peticion('listar_productos', 'GET', '/productos/')
+
+
+def _estadisticas(aleatorio: random.Random, opciones) -> Peticion:
+    return Peticion('estadisticas', 'GET', '/estadisticas/')
+
+
+# Mezcla aproximada de un punto de venta: muchas consultas de impuestos y ventas, pocos reportes
+ESCENARIOS: Dict[str, List[tuple]] = {
+    'calcular': [(_calcular, 1)],
+    'crear_transaccion': [(_crear_transaccion, 1)],
+    'listar_productos': [(_listar_productos, 1)],
+    'estadisticas': [(_estadisticas, 1)],
+    'mixto': [(_calcular, 50), (_crear_transaccion, 30), (_listar_productos, 15), (_estadisticas, 5)],
+}
+
+
+def percentil(valores_ordenados: List[float], p: float) -> float:
+    """Percentil p (0-100) por el método del rango más cercano"""
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, min(len(valores_ordenados) - 1, math.ceil(p / 100.0 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+
+class Resultados:
+    """Latencias y errores por tipo de solicitud"""
+
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = {}
+        self.errores: Dict[str, int] = {}
+        self.estados: Dict[str, Dict[int, int]] = {}
+        self.duracion = 0.0
+
+    def registrar(self, nombre: str, latencia: float, estado: Optional[int]):
+        self.latencias.setdefault(nombre, []).append(latencia)
+        estados = self.estados.setdefault(nombre, {})
+        estados[estado or 0] = estados.get(estado or 0, 0) + 1
+        # Las redirecciones (p. ej. tras registrar una venta) cuentan como éxito
+        if estado is None or estado >= 400:
+            self.errores[nombre] = self.errores.get(nombre, 0) + 1
+
+    def resumen(self) -> Dict[str, dict]:
+        resumen = {}
+        nombres = list(self.latencias) + (['total'] if len(self.latencias) > 1 else [])
+        for nombre in nombres:
+            if nombre == 'total':
+                latencias = sorted(l for lista in self.latencias.values() for l in lista)
+                errores = sum(self.errores.values())
+            else:
+                latencias = sorted(self.latencias[nombre])
+                errores = self.errores.get(nombre, 0)
+            resumen[nombre] = {
+                'solicitudes': len(latencias),
+                'errores': errores,
+                'tasa_error': errores / len(latencias) if latencias else 0.0,
+                'por_segundo': len(latencias) / self.duracion if self.duracion else 0.0,
+                'p50_ms': percentil(latencias, 50) * 1000,
+                'p95_ms': percentil(latencias, 95) * 1000,
+                'p99_ms': percentil(latencias, 99) * 1000,
+                'max_ms': (latencias[-1] if latencias else 0.0) * 1000,
+            }
+        return resumen
+
+
+async def _usuario(cliente, generadores: List[Callable], pesos: List[int], aleatorio: random.Random,
+                   opciones, resultados: Resultados, fin: float, restantes: Optional[list]):
+    while time.perf_counter() < fin:
+        if restantes is not None:
+            if restantes[0] <= 0:
+                return
+            restantes[0] -= 1
+        peticion = aleatorio.choices(generadores, weights=pesos)[0](aleatorio, opciones)
+        inicio = time.perf_counter()
+        try:
+            respuesta = await cliente.request(peticion.metodo, peticion.ruta, data=peticion.datos)
+            estado = respuesta.status_code
+        except httpx.HTTPError:
+            estado = None
+        resultados.registrar(peticion.nombre, time.perf_counter() - inicio, estado)
+
+
+async def ejecutar_carga(url: str, escenario: str = 'mixto', concurrencia: int = 10, duracion: float = 10.0,
+                         solicitudes: Optional[int] = None, semilla: int = 42, productos_max: int = 6,
+                         tiempo_espera: float = 30.0) -> Resultados:
+    """Lanza ``concurrencia`` clientes en bucle cerrado durante ``duracion`` segundos
+    (o hasta completar ``solicitudes``) y devuelve los resultados"""
+    if httpx is None:
+        raise RuntimeError("El generador de carga requiere httpx: pip install httpx")
+    if escenario not in ESCENARIOS:
+        raise ValueError(f"Escenario no válido: {escenario}")
+
+    opciones = argparse.Namespace(productos_max=productos_max)
+    generadores = [generador for generador, _ in ESCENARIOS[escenario]]
+    pesos = [peso for _, peso in ESCENARIOS[escenario]]
+    resultados = Resultados()
+    restantes = [solicitudes] if solicitudes else None
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=tiempo_espera,
+                                 follow_redirects=False) as cliente:
+        inicio = time.perf_counter()
+        fin = inicio + duracion
+        await asyncio.gather(*[
+            _usuario(cliente, generadores, pesos, random.Random(semilla + indice), opciones,
+                     resultados, fin, restantes)
+            for indice in range(concurrencia)
+        ])
+        resultados.duracion = time.perf_counter() - inicio
+    return resultados
+
+
+def informe(resumen: Dict[str, dict]) -> str:
+    """Tabla de texto con latencias, rendimiento y errores"""
+    lineas = [f"{'Solicitud':<20} {'Total':>8} {'Req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Errores':>8}"]
+    for nombre, datos in resumen.items():
+        lineas.append(f"{nombre:<20} {datos['solicitudes']:>8} {datos['por_segundo']:>9.1f} "
+                      f"{datos['p50_ms']:>9.2f} {datos['p95_ms']:>9.2f} {datos['p99_ms']:>9.2f} "
+                      f"{datos['tasa_error'] * 100:>7.1f}%")
+    return "\n".join(lineas)
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def iniciar_servidor(workers: int, nombre_db: str, datos_ejemplo: bool) -> tuple:
+    """Arranca gunicorn con run_web:app en un puerto local libre; devuelve (proceso, url)"""
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, raiz)
+    from src.db.database import BaseDatos
+
+    db = BaseDatos(nombre_db)
+    db.crear_tablas()
+    if datos_ejemplo:
+        db.inicializar_datos_ejemplo()
+
+    puerto = _puerto_libre()
+    entorno = dict(os.environ, DATABASE=os.path.abspath(nombre_db))
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'run_web:app', '--bind', f'127.0.0.1:{puerto}',
+         '--workers', str(workers), '--timeout', '120', '--log-level', 'warning'],
+        cwd=raiz, env=entorno)
+
+    url = f"http://127.0.0.1:{puerto}"
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        try:
+            with socket.create_connection(('127.0.0.1', puerto), timeout=0.5):
+                return proceso, url
+        except OSError:
+            if proceso.poll() is not None:
+                break
+            time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError("No se pudo iniciar gunicorn")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.carga', description='Prueba de carga HTTP')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='URL base del servidor')
+    parser.add_argument('--escenario', default='mixto', choices=sorted(ESCENARIOS))
+    parser.add_argument('--concurrencia', type=int, default=10, help='Clientes simultáneos')
+    parser.add_argument('--duracion', type=float, default=10.0, help='Segundos de prueba')
+    parser.add_argument('--solicitudes', type=int, help='Detener tras este número de solicitudes')
+    parser.add_argument('--productos-max', type=int, default=6, help='Mayor id de producto para las ventas')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--json', help='Guardar el resumen en este archivo')
+    parser.add_argument('--iniciar-servidor', action='store_true', help='Arrancar gunicorn localmente')
+    parser.add_argument('--workers', type=int, default=2, help='Workers de gunicorn con --iniciar-servidor')
+    parser.add_argument('--db', help='Base de datos para --iniciar-servidor (por defecto una temporal)')
+    parser.add_argument('--datos-ejemplo', action='store_true', help='Inicializar datos de ejemplo en la base')
+    argumentos = parser.parse_args(argv)
+
+    proceso = None
+    url = argumentos.url
+    if argumentos.iniciar_servidor:
+        nombre_db = argumentos.db or os.path.join(tempfile.mkdtemp(), 'carga.db')
+        proceso, url = iniciar_servidor(argumentos.workers, nombre_db, argumentos.datos_ejemplo)
+        print(f"Servidor local en {url} ({argumentos.workers} workers, base {nombre_db})")
+
+    try:
+        resultados = asyncio.run(ejecutar_carga(
+            url, argumentos.escenario, argumentos.concurrencia, argumentos.duracion,
+            argumentos.solicitudes, argumentos.semilla, argumentos.productos_max))
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait(timeout=10)
+
+    resumen = resultados.resumen()
+    print(f"Escenario {argumentos.escenario}, concurrencia {argumentos.concurrencia}, "
+          f"{resultados.duracion:.1f} s")
+    print(informe(resumen))
+    if argumentos.json:
+        with open(argumentos.json, 'w', encoding='utf-8') as archivo:
+            json.dump({'escenario': argumentos.escenario, 'concurrencia': argumentos.concurrencia,
+                       'duracion': resultados.duracion, 'resumen': resumen}, archivo, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
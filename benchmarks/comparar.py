@@ -0,0 +1,57 @@
+"""
+Comparación de resultados de pytest-benchmark contra una línea base
+"""
+
+import json
+from typing import Dict, List
+
+
+def cargar(ruta: str) -> Dict[str, dict]:
+    """Lee un JSON de pytest-benchmark y devuelve las estadísticas por nombre completo"""
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    return {benchmark['fullname']: benchmark['stats'] for benchmark in datos.get('benchmarks', [])}
+
+
+def comparar(base: Dict[str, dict], actual: Dict[str, dict], umbral: float = 10.0,
+             estadistica: str = 'median') -> List[dict]:
+    """Compara ``estadistica`` de cada benchmark común
+
+    Devuelve una fila por benchmark con la variación porcentual; ``regresion`` es
+    True cuando el resultado actual es más lento que la base en más de ``umbral`` %.
+    """
+    filas = []
+    for nombre in sorted(set(base) | set(actual)):
+        if nombre not in base or nombre not in actual:
+            filas.append({'nombre': nombre, 'base': base.get(nombre, {}).get(estadistica),
+                          'actual': actual.get(nombre, {}).get(estadistica),
+                          'variacion': None, 'regresion': False})
+            continue
+        valor_base = base[nombre][estadistica]
+        valor_actual = actual[nombre][estadistica]
+        variacion = (valor_actual - valor_base) / valor_base * 100 if valor_base else 0.0
+        filas.append({'nombre': nombre, 'base': valor_base, 'actual': valor_actual,
+                      'variacion': variacion, 'regresion': variacion > umbral})
+    return filas
+
+
+def _formatear_tiempo(segundos) -> str:
+    if segundos is None:
+        return "-"
+    if segundos < 1e-3:
+        return f"{segundos * 1e6:.1f} µs"
+    if segundos < 1:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos:.3f} s"
+
+
+def informe(filas: List[dict]) -> str:
+    """Tabla de texto con el resultado de la comparación"""
+    ancho = max([len(fila['nombre']) for fila in filas] + [10])
+    lineas = [f"{'Benchmark':<{ancho}}  {'Base':>12}  {'Actual':>12}  {'Variación':>10}"]
+    for fila in filas:
+        variacion = "nuevo/quitado" if fila['variacion'] is None else f"{fila['variacion']:+.1f}%"
+        marca = "  <-- REGRESIÓN" if fila['regresion'] else ""
+        lineas.append(f"{fila['nombre']:<{ancho}}  {_formatear_tiempo(fila['base']):>12}  "
+                      f"{_formatear_tiempo(fila['actual']):>12}  {variacion:>10}{marca}")
+    return "\n".join(lineas)
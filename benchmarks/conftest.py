@@ -0,0 +1,64 @@
+"""
+Fixtures compartidas por los benchmarks
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.db.database import BaseDatos
+from src.db.datos_sinteticos import GeneradorDatosSinteticos
+
+# Tamaños (filas de productos y de transacciones) a medir; los grandes se activan con BENCH_TAMANOS
+TAMANOS = [int(tamano) for tamano in os.environ.get('BENCH_TAMANOS', '1000').split(',') if tamano]
+
+SEMILLA = 20240101
+
+
+def poblar(ruta_db: str, filas: int, categorias: int = 50):
+    """Llena la base con ``filas`` productos y ``filas`` transacciones de forma determinista"""
+    GeneradorDatosSinteticos(ruta_db, semilla=SEMILLA).generar(categorias, filas, filas)
+
+
+@pytest.fixture
+def directorio_temporal():
+    directorio = tempfile.mkdtemp()
+    yield directorio
+    shutil.rmtree(directorio)
+
+
+@pytest.fixture
+def db_vacia(directorio_temporal):
+    db = BaseDatos(os.path.join(directorio_temporal, "bench.db"))
+    assert db.crear_tablas()
+    return db
+
+
+@pytest.fixture(scope='session')
+def plantillas():
+    """Genera una sola vez por sesión la base poblada de cada tamaño"""
+    directorio = tempfile.mkdtemp()
+    generadas = {}
+
+    def obtener(tamano: int) -> str:
+        if tamano not in generadas:
+            ruta = os.path.join(directorio, f"plantilla_{tamano}.db")
+            assert BaseDatos(ruta).crear_tablas()
+            poblar(ruta, tamano)
+            generadas[tamano] = ruta
+        return generadas[tamano]
+
+    yield obtener
+    shutil.rmtree(directorio)
+
+
+@pytest.fixture(params=TAMANOS, ids=lambda tamano: f"{tamano}filas")
+def db_poblada(request, plantillas, directorio_temporal):
+    """Copia privada de la base poblada con el tamaño del parámetro"""
+    ruta = os.path.join(directorio_temporal, "bench.db")
+    shutil.copyfile(plantillas(request.param), ruta)
+    db = BaseDatos(ruta)
+    db.filas = request.param
+    return db
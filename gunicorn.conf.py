@@ -0,0 +1,55 @@
+"""
+Configuración de gunicorn para producción (se lee sola al ejecutar ``gunicorn run_web:app`` desde la raíz)
+
+Con ``preload_app`` el maestro crea la aplicación y la calienta (plantillas
+compiladas y caché de páginas) antes de hacer fork; los workers la heredan y
+la primera solicitud no paga ese costo. ``WEB_CONCURRENCY`` fija el número de
+workers; si no, se calcula con los núcleos disponibles.
+"""
+
+import gc
+import os
+
+from app_web.servidor import trabajadores_sugeridos
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY') or trabajadores_sugeridos())
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+if preload_app:
+    # Sin recolecciones mientras se crea la aplicación: menos huecos en las páginas que se comparten
+    gc.disable()
+
+
+def on_starting(server):
+    """Maestro, al arrancar: las métricas de un despliegue anterior no se suman a las nuevas"""
+    directorio = os.environ.get('METRICAS_DIR')
+    if directorio:
+        from app_web.metricas import AlmacenMultiproceso
+        AlmacenMultiproceso(directorio).limpiar()
+
+
+def when_ready(server):
+    """Maestro, después de cargar la aplicación y antes del primer fork
+
+    El GC se reactiva aquí siempre, haya o no precarga: ``--no-preload`` la
+    desactiva después de leer este archivo, y los workers heredan el estado
+    del maestro.
+    """
+    try:
+        if server.cfg.preload_app:
+            from app_web.servidor import antes_de_fork, calentar
+            app = server.app.wsgi()
+            calentado = calentar(app)
+            antes_de_fork(app)
+            server.log.info("Aplicación precargada: %(plantillas)s plantillas, %(paginas)s páginas en caché",
+                            calentado)
+    finally:
+        gc.enable()
+
+
+def post_worker_init(worker):
+    """Worker recién creado por fork, con la aplicación ya cargada"""
+    from app_web.servidor import despues_de_fork
+    despues_de_fork(worker.wsgi)
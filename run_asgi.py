@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+"""
+Script para ejecutar la aplicación web ASGI (Quart)
+
+Producción: hypercorn run_asgi:app --bind 0.0.0.0:8000
+"""
+
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_web import create_asgi_app
+
+app = create_asgi_app()
+
+if __name__ == '__main__':
+    app.run(debug=True, host='0.0.0.0', port=5001)
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 """
 Script para ejecutar la aplicación web Flask
+
+``gunicorn run_web:app`` obtiene ``app`` con getattr; se crea en ese momento
+(PEP 562), así que importar este módulo no carga Flask ni la aplicación.
 """
 
 import sys
@@ -9,13 +12,19 @@ import os
 # Agregar el directorio raíz al path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app_web import create_app
+
+def __getattr__(nombre):
+    if nombre == 'app':
+        from app_web import create_app
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
 
 if __name__ == '__main__':
+    from app_web import create_app
     app = create_app()
     
     # Configuración para desarrollo
     app.run(debug=True, host='0.0.0.0', port=5000)
-else:
-    app = create_app()
-
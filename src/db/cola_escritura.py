@@ -0,0 +1,396 @@
+"""
+Escritura diferida de transacciones con commits agrupados
+Las ventas aceptadas se anotan en un diario local y un hilo las escribe en lotes
+"""
+
+import collections
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import IO, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin workers por fork no hay recuperaciones simultáneas
+    fcntl = None
+
+from src.db.sentencias import RegistroSentencias, registro_sentencias, TAMANO_CACHE_SENTENCIAS
+from src.model.transaccion import desglose_a_json
+
+# Tamaño a partir del cual el diario se trunca cuando no queda nada pendiente
+TAMANO_MAXIMO_DIARIO = 1024 * 1024
+
+# producto, cantidad, precio, subtotal, impuestos, total, fecha, clave de idempotencia, desglose
+CAMPOS_FILA = 9
+
+
+class LoteEscrito:
+    """Resultado de un commit agrupado"""
+
+    def __init__(self, filas: int, errores: int, duracion: float, retraso: float, pendientes: int):
+        self.filas = filas
+        self.errores = errores
+        self.duracion = duracion
+        # Tiempo entre la aceptación de la venta más antigua del lote y su commit
+        self.retraso = retraso
+        self.pendientes = pendientes
+
+
+def _proceso_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _reclamar_diario(ruta: str) -> Optional[IO]:
+    """Abre el diario con un candado exclusivo; None si otro proceso lo está recuperando o ya no existe
+
+    ``flock`` se libera solo si el proceso que lo tiene muere: un diario nunca
+    queda reclamado por un worker que ya no existe.
+    """
+    try:
+        archivo = open(ruta, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # Quien lo tenía pudo terminar de recuperarlo y borrarlo entre open y flock
+        if os.path.samestat(os.fstat(archivo.fileno()), os.stat(ruta)):
+            return archivo
+    except (BlockingIOError, FileNotFoundError):
+        pass
+    archivo.close()
+    return None
+
+
+def _leer_diario(ruta: str, desde_secuencia: int) -> List[dict]:
+    """Entradas del diario posteriores a ``desde_secuencia``; ignora una última línea incompleta"""
+    entradas = []
+    if not os.path.exists(ruta):
+        return entradas
+    with open(ruta, encoding='utf-8') as archivo:
+        for linea in archivo:
+            try:
+                entrada = json.loads(linea)
+            except ValueError:
+                continue
+            if entrada['seq'] > desde_secuencia:
+                entradas.append(entrada)
+    return entradas
+
+
+def _fila_diario(datos: list) -> tuple:
+    """Parámetros de ``transaccion_insertar_con_fecha``; los diarios anteriores no traen el desglose"""
+    return tuple(datos) + (None,) * (CAMPOS_FILA - len(datos))
+
+
+class ColaEscritura:
+    """Cola acotada de transacciones con diario durable y escritor en segundo plano
+
+    ``encolar`` anota la venta en el diario (``<db>.diario.<pid>``) y la deja en
+    memoria; el hilo escritor la inserta en ``transacciones`` junto con las demás
+    pendientes cada ``intervalo`` segundos o al juntar ``max_filas``, en una sola
+    transacción que también guarda la última secuencia aplicada del diario. Tras
+    una caída, las entradas del diario posteriores a esa secuencia se reaplican,
+    incluidas las de diarios de procesos que ya no existen.
+
+    Cuando la cola está llena ``encolar`` espera hasta ``espera_maxima`` segundos y
+    devuelve False (contrapresión) para que el cliente reintente.
+    """
+
+    def __init__(self, nombre_db: str, capacidad: int = 10000, intervalo: float = 0.05,
+                 max_filas: int = 500, espera_maxima: float = 0.5, directorio_diario: Optional[str] = None,
+                 sincronizar_diario: bool = True, sentencias: Optional[RegistroSentencias] = None):
+        self.nombre_db = nombre_db
+        self.capacidad = capacidad
+        self.intervalo = intervalo
+        self.max_filas = max_filas
+        self.espera_maxima = espera_maxima
+        self.directorio_diario = directorio_diario or os.path.dirname(os.path.abspath(nombre_db))
+        self.sincronizar_diario = sincronizar_diario
+        self.sentencias = sentencias or registro_sentencias
+
+        self._ganchos: List[Callable[[LoteEscrito], None]] = []
+        self._condicion = threading.Condition()
+        self._pendientes = collections.deque()
+        self._huecos = threading.BoundedSemaphore(capacidad)
+        self._secuencia = 0
+        self._pid = None
+        self._diario = None
+        self._hilo = None
+        self._detener = False
+        self._en_vuelo = 0
+
+        self.aceptadas = 0
+        self.rechazadas = 0
+        self.escritas = 0
+        self.errores = 0
+        self.lotes = 0
+        self.retraso_maximo = 0.0
+
+    # ==================== CICLO DE VIDA ====================
+
+    @property
+    def ruta_diario(self) -> str:
+        return os.path.join(self.directorio_diario, f"{os.path.basename(self.nombre_db)}.diario.{os.getpid()}")
+
+    def agregar_gancho(self, funcion: Callable[[LoteEscrito], None]):
+        """Registra una función que recibe cada LoteEscrito (métricas)"""
+        self._ganchos.append(funcion)
+
+    def iniciar(self):
+        """Recupera diarios pendientes y arranca el escritor en este proceso
+
+        Es idempotente y se llama desde ``encolar``: tras un fork (workers de
+        gunicorn) el proceso hijo abre su propio diario y su propio hilo.
+        """
+        if self._pid == os.getpid() and self._hilo is not None and self._hilo.is_alive():
+            return
+        if self._pid is not None and self._pid != os.getpid():
+            # El candado pudo quedar tomado por un hilo que no existe en el proceso hijo
+            self._condicion = threading.Condition()
+        with self._condicion:
+            if self._pid == os.getpid() and self._hilo is not None and self._hilo.is_alive():
+                return
+            self._pid = os.getpid()
+            self._pendientes.clear()
+            self._huecos = threading.BoundedSemaphore(self.capacidad)
+            self._detener = False
+            os.makedirs(self.directorio_diario, exist_ok=True)
+            self.recuperar()
+            self._diario = open(self.ruta_diario, 'a', encoding='utf-8')
+            self._hilo = threading.Thread(target=self._escritor, name='cola-escritura', daemon=True)
+            self._hilo.start()
+
+    def detener(self, tiempo_espera: float = 10.0):
+        """Escribe lo pendiente y detiene el escritor"""
+        hilo = self._hilo
+        if hilo is None or self._pid != os.getpid():
+            return
+        with self._condicion:
+            self._detener = True
+            self._condicion.notify_all()
+        hilo.join(tiempo_espera)
+        self._hilo = None
+        if self._diario is not None:
+            self._diario.close()
+            self._diario = None
+
+    def vaciar(self, tiempo_espera: float = 10.0) -> bool:
+        """Espera a que todo lo encolado esté escrito; devuelve False si vence el plazo"""
+        limite = time.monotonic() + tiempo_espera
+        with self._condicion:
+            self._condicion.notify_all()
+            while self._pendientes or self._en_vuelo:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._condicion.wait(restante)
+        return True
+
+    # ==================== PRODUCTOR ====================
+
+    def encolar(self, producto_id: int, cantidad: int, precio_unitario: float,
+                subtotal: float, total_impuestos: float, total_final: float,
+                clave_idempotencia: Optional[str] = None,
+                desglose_impuestos: Optional[Dict[str, float]] = None) -> bool:
+        """Acepta una transacción para escritura diferida; False si la cola sigue llena"""
+        self.iniciar()
+        if not self._huecos.acquire(timeout=self.espera_maxima):
+            with self._condicion:
+                self.rechazadas += 1
+            return False
+
+        fecha = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        datos = [producto_id, cantidad, precio_unitario, subtotal, total_impuestos, total_final, fecha,
+                 clave_idempotencia, desglose_a_json(desglose_impuestos)]
+        with self._condicion:
+            try:
+                self._secuencia += 1
+                self._diario.write(json.dumps({'seq': self._secuencia, 'datos': datos}) + "\n")
+                self._diario.flush()
+                if self.sincronizar_diario:
+                    os.fsync(self._diario.fileno())
+            except OSError as e:
+                print(f"Error al escribir en el diario de transacciones: {e}")
+                self._huecos.release()
+                self.rechazadas += 1
+                return False
+            self._pendientes.append((self._secuencia, time.monotonic(), tuple(datos)))
+            self.aceptadas += 1
+            if len(self._pendientes) >= self.max_filas:
+                self._condicion.notify_all()
+        return True
+
+    # ==================== ESCRITOR ====================
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.nombre_db, cached_statements=TAMANO_CACHE_SENTENCIAS)
+        conexion.execute("PRAGMA foreign_keys = ON")
+        return conexion
+
+    def _aplicar(self, conexion: sqlite3.Connection, diario: str, filas: List[tuple], ultima_secuencia: int) -> int:
+        """Inserta las filas y avanza la secuencia del diario en una sola transacción; devuelve los errores"""
+        cursor = conexion.cursor()
+        try:
+            self.sentencias.ejecutar_muchos(cursor, 'transaccion_insertar_con_fecha', filas)
+            self.sentencias.ejecutar(cursor, 'cola_control_guardar', (diario, ultima_secuencia))
+            conexion.commit()
+            return 0
+        except sqlite3.IntegrityError:
+            conexion.rollback()
+
+        # Una fila inválida no debe bloquear al resto: se reintenta fila por fila
+        errores = 0
+        for fila in filas:
+            try:
+                self.sentencias.ejecutar(cursor, 'transaccion_insertar_con_fecha', fila)
+            except sqlite3.IntegrityError as e:
+                print(f"Transacción diferida descartada {fila}: {e}")
+                errores += 1
+        self.sentencias.ejecutar(cursor, 'cola_control_guardar', (diario, ultima_secuencia))
+        conexion.commit()
+        return errores
+
+    def recuperar(self) -> int:
+        """Reaplica diarios de este proceso y de procesos terminados; devuelve las filas recuperadas"""
+        recuperadas = 0
+        patron = os.path.join(self.directorio_diario, f"{os.path.basename(self.nombre_db)}.diario.*")
+        conexion = self._conectar()
+        try:
+            for ruta in glob.glob(patron):
+                try:
+                    pid = int(ruta.rsplit('.', 1)[1])
+                except ValueError:
+                    continue
+                if pid != os.getpid() and _proceso_vivo(pid):
+                    continue
+                recuperadas += self._recuperar_diario(conexion, ruta)
+            # Una fila de control que sobrevivió a su diario no debe saltarse las entradas del nuevo
+            if not os.path.exists(self.ruta_diario):
+                self.sentencias.ejecutar(conexion.cursor(), 'cola_control_eliminar',
+                                         (os.path.basename(self.ruta_diario),))
+                conexion.commit()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error al recuperar diarios de transacciones: {e}")
+        finally:
+            conexion.close()
+        return recuperadas
+
+    def _recuperar_diario(self, conexion: sqlite3.Connection, ruta: str) -> int:
+        """Reaplica un diario si este proceso gana el candado; devuelve las filas recuperadas
+
+        Todo ocurre con el candado tomado y la fila de control se lee dentro de
+        él, así que dos workers que arrancan a la vez no aplican el mismo diario.
+        El archivo se borra antes de confirmar el borrado de su fila de control:
+        tras una caída nunca queda un diario sin la secuencia ya aplicada.
+        """
+        reclamado = _reclamar_diario(ruta)
+        if reclamado is None:
+            return 0
+        try:
+            diario = os.path.basename(ruta)
+            fila = conexion.execute(self.sentencias.sql('cola_control_leer'), (diario,)).fetchone()
+            entradas = _leer_diario(ruta, fila[0] if fila else 0)
+            if entradas:
+                self._aplicar(conexion, diario, [_fila_diario(e['datos']) for e in entradas], entradas[-1]['seq'])
+            self.sentencias.ejecutar(conexion.cursor(), 'cola_control_eliminar', (diario,))
+            os.remove(ruta)
+            conexion.commit()
+            return len(entradas)
+        finally:
+            reclamado.close()
+
+    def _tomar_lote(self) -> list:
+        """Espera hasta tener ``max_filas`` o hasta que la más antigua cumpla ``intervalo``"""
+        with self._condicion:
+            while True:
+                if self._pendientes:
+                    espera = self._pendientes[0][1] + self.intervalo - time.monotonic()
+                    if self._detener or len(self._pendientes) >= self.max_filas or espera <= 0:
+                        break
+                    self._condicion.wait(espera)
+                elif self._detener:
+                    return []
+                else:
+                    self._condicion.wait()
+            lote = [self._pendientes.popleft() for _ in range(min(self.max_filas, len(self._pendientes)))]
+            self._en_vuelo = len(lote)
+            return lote
+
+    def _escritor(self):
+        diario = os.path.basename(self.ruta_diario)
+        conexion = self._conectar()
+        try:
+            while True:
+                lote = self._tomar_lote()
+                if not lote:
+                    break
+                inicio = time.perf_counter()
+                try:
+                    errores = self._aplicar(conexion, diario, [fila for _, _, fila in lote], lote[-1][0])
+                except sqlite3.Error as e:
+                    # La base no está disponible: el lote vuelve a la cola y queda en el diario
+                    print(f"Error en la escritura diferida, se reintentará: {e}")
+                    conexion.rollback()
+                    with self._condicion:
+                        self._pendientes.extendleft(reversed(lote))
+                        self._en_vuelo = 0
+                        self._condicion.wait(min(1.0, self.intervalo * 10))
+                    continue
+                fin = time.monotonic()
+                self._despues_de_lote(lote, errores, time.perf_counter() - inicio, fin - lote[0][1])
+        finally:
+            conexion.close()
+
+    def _despues_de_lote(self, lote: list, errores: int, duracion: float, retraso: float):
+        for _ in lote:
+            self._huecos.release()
+        with self._condicion:
+            self._en_vuelo = 0
+            self.escritas += len(lote) - errores
+            self.errores += errores
+            self.lotes += 1
+            self.retraso_maximo = max(self.retraso_maximo, retraso)
+            pendientes = len(self._pendientes)
+            # Todo lo anotado ya está en la base: el diario puede empezar de cero
+            if not pendientes and self._diario is not None and self._diario.tell() > TAMANO_MAXIMO_DIARIO:
+                self._diario.truncate(0)
+                self._diario.seek(0)
+            self._condicion.notify_all()
+
+        registro = LoteEscrito(len(lote) - errores, errores, duracion, retraso, pendientes)
+        for gancho in self._ganchos:
+            try:
+                gancho(registro)
+            except Exception as e:
+                print(f"Error en gancho de escritura diferida: {e}")
+
+    # ==================== ESTADO ====================
+
+    def estado(self) -> Dict:
+        """Contadores de la cola para métricas y diagnóstico"""
+        with self._condicion:
+            pendientes = len(self._pendientes) + self._en_vuelo
+            antiguedad = time.monotonic() - self._pendientes[0][1] if self._pendientes else 0.0
+            return {
+                'pendientes': pendientes,
+                'capacidad': self.capacidad,
+                'ocupacion': pendientes / self.capacidad if self.capacidad else 0.0,
+                'antiguedad_pendiente': antiguedad,
+                'aceptadas': self.aceptadas,
+                'rechazadas': self.rechazadas,
+                'escritas': self.escritas,
+                'errores': self.errores,
+                'lotes': self.lotes,
+                'retraso_maximo': self.retraso_maximo,
+            }
@@ -5,13 +5,82 @@ Implementa un ORM simple para gestionar productos, categorías e impuestos
 
 import sqlite3
 import os
-from typing import List, Dict, Optional, Tuple, Union
+import threading
+import time
+import urllib.parse
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Union
 from datetime import datetime
 from enum import Enum
 
 from src.model.producto import Producto
 from src.model.categoria import Categoria
-from src.model.transaccion import Transaccion
+from src.model.transaccion import Transaccion, desglose_a_json, desglose_desde_json
+from src.model.tasas import IndiceTasas, normalizar_fecha
+from src.db.sentencias import RegistroSentencias, registro_sentencias, TAMANO_CACHE_SENTENCIAS
+from src.db.instrumentacion import Instrumentacion, instrumentado
+from src.db.migraciones import Migrador
+
+if TYPE_CHECKING:
+    from src.db.replica import ReplicaLectura
+
+def conectar_solo_lectura(nombre_db: str, inmutable: bool = False, **opciones) -> sqlite3.Connection:
+    """Conexión de sólo lectura (``mode=ro``); en WAL no bloquea ni espera a los escritores
+
+    ``inmutable`` (``immutable=1``) omite bloqueos y detección de cambios: sólo
+    para archivos que nadie modifica, como la réplica de lectura.
+    """
+    uri = f"file:{urllib.parse.quote(os.path.abspath(nombre_db))}?mode=ro"
+    if inmutable:
+        uri += "&immutable=1"
+    return sqlite3.connect(uri, uri=True, **opciones)
+
+class ConexionesPorHilo:
+    """Una conexión por hilo y por archivo, reutilizada por todas las operaciones de ``BaseDatos``
+
+    La caché de sentencias (``cached_statements``) es de cada conexión: abrir una
+    por operación la dejaba vacía. Se vuelve a abrir si el archivo cambió (se
+    borró o se reemplazó) o si el proceso es otro tras un fork. Las conexiones
+    de un hilo se cierran cuando el hilo termina.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @staticmethod
+    def _identidad(ruta: str) -> Optional[tuple]:
+        try:
+            estado = os.stat(ruta)
+        except OSError:
+            return None
+        return estado.st_dev, estado.st_ino
+
+    def obtener(self, nombre_db: str) -> sqlite3.Connection:
+        conexiones = self._local.__dict__.setdefault('conexiones', {})
+        ruta = os.path.abspath(nombre_db)
+        entrada = conexiones.pop(ruta, None)
+        if entrada is not None:
+            conexion, pid, identidad = entrada
+            if pid == os.getpid() and identidad == self._identidad(ruta):
+                conexiones[ruta] = entrada
+                return conexion
+            if pid == os.getpid():
+                conexion.close()
+        conexion = sqlite3.connect(nombre_db, cached_statements=TAMANO_CACHE_SENTENCIAS)
+        conexion.execute("PRAGMA foreign_keys = ON")
+        conexiones[ruta] = (conexion, os.getpid(), self._identidad(ruta))
+        return conexion
+
+    def cerrar(self):
+        """Cierra las conexiones de este hilo (en el maestro de gunicorn, antes del fork)"""
+        conexiones = self._local.__dict__.get('conexiones', {})
+        for conexion, pid, _ in conexiones.values():
+            if pid == os.getpid():
+                conexion.close()
+        conexiones.clear()
+
+
+# Compartidas por todas las instancias de BaseDatos del proceso
+conexiones_por_hilo = ConexionesPorHilo()
 
 class EstadoProducto(Enum):
     ACTIVO = "Activo"
@@ -21,16 +90,33 @@ class EstadoProducto(Enum):
 class BaseDatos:
     """Clase principal para manejar la base de datos SQLite"""
     
-    def __init__(self, nombre_db: str = "calculadora_impuestos.db"):
+    def __init__(self, nombre_db: str = "calculadora_impuestos.db",
+                 sentencias: Optional[RegistroSentencias] = None,
+                 instrumentacion: Optional[Instrumentacion] = None,
+                 replica: Optional['ReplicaLectura'] = None):
         self.nombre_db = nombre_db
         self.conexion = None
         self.cursor = None
+        self.sentencias = sentencias or registro_sentencias
+        self.instrumentacion = instrumentacion
+        # Copia para las consultas analíticas (src.db.replica); sin ella leen la base principal
+        self.replica = replica
+        self._operacion = None
+        self._compartida = False
     
-    def conectar(self):
+    def conectar(self, analitica: bool = False):
+        """Toma la conexión del hilo para la operación; ``analitica`` abre una sobre la réplica si hay una vigente"""
         try:
-            self.conexion = sqlite3.connect(self.nombre_db)
+            inicio = time.perf_counter()
+            if analitica and self.replica is not None and self.replica.vigente() is not None:
+                self.conexion = self.replica.conectar(cached_statements=TAMANO_CACHE_SENTENCIAS)
+                self._compartida = False
+            else:
+                self.conexion = conexiones_por_hilo.obtener(self.nombre_db)
+                self._compartida = True
             self.cursor = self.conexion.cursor()
-            self.conexion.execute("PRAGMA foreign_keys = ON")
+            if self.instrumentacion is not None:
+                self.instrumentacion.medir_conexion(self._operacion, time.perf_counter() - inicio)
             return True
         except sqlite3.Error as e:
             print(f"Error al conectar con la base de datos: {e}")
@@ -46,116 +132,148 @@ class BaseDatos:
         
         try:
             if self.conexion:
-                self.conexion.close()
+                if not self._compartida:
+                    self.conexion.close()
+                elif self.conexion.in_transaction:
+                    # Como al cerrarla: lo que la operación no confirmó se descarta
+                    self.conexion.rollback()
                 self.conexion = None
         except:
-            pass
+            self.conexion = None
+    
+    def _medir(self, nombre: str, parametros: tuple, inicio: float, filas: int,
+               error: Optional[str] = None):
+        self.instrumentacion.medir_sentencia(self._operacion, self.conexion, nombre,
+                                             self.sentencias.sql(nombre), parametros,
+                                             time.perf_counter() - inicio, filas, error)
     
+    def _ejecutar(self, nombre: str, parametros: tuple = ()) -> sqlite3.Cursor:
+        """Ejecuta una sentencia del catálogo sobre el cursor actual"""
+        if self.instrumentacion is None:
+            return self.sentencias.ejecutar(self.cursor, nombre, parametros)
+        
+        inicio = time.perf_counter()
+        try:
+            cursor = self.sentencias.ejecutar(self.cursor, nombre, parametros)
+        except sqlite3.Error as e:
+            self._medir(nombre, parametros, inicio, 0, str(e))
+            raise
+        self._medir(nombre, parametros, inicio, max(cursor.rowcount, 0))
+        return cursor
+    
+    def _consultar_filas(self, nombre: str, parametros: tuple = ()) -> Tuple[List[str], List[tuple]]:
+        if self.instrumentacion is None:
+            return self.sentencias.consultar(self.cursor, nombre, parametros)
+        
+        inicio = time.perf_counter()
+        try:
+            columnas, filas = self.sentencias.consultar(self.cursor, nombre, parametros)
+        except sqlite3.Error as e:
+            self._medir(nombre, parametros, inicio, 0, str(e))
+            raise
+        self._medir(nombre, parametros, inicio, len(filas))
+        return columnas, filas
+    
+    def _consultar(self, nombre: str, parametros: tuple = ()) -> List[Dict]:
+        """Ejecuta una consulta del catálogo y devuelve las filas como diccionarios"""
+        columnas, filas = self._consultar_filas(nombre, parametros)
+        return [dict(zip(columnas, fila)) for fila in filas]
+    
+    def _consultar_valor(self, nombre: str, parametros: tuple = ()):
+        """Ejecuta una consulta del catálogo y devuelve la primera columna de la primera fila"""
+        _, filas = self._consultar_filas(nombre, parametros)
+        return filas[0][0]
+    
+    @instrumentado
     def crear_tablas(self) -> bool:
+        """Crea o actualiza el esquema aplicando las migraciones pendientes (src.db.migraciones)"""
+        return Migrador(self.nombre_db).aplicar()
+    
+    @instrumentado
+    def insertar_categoria(self, nombre: str, descripcion: str = "", tasa_iva: float = 0.19) -> bool:
         try:
+            if tasa_iva < 0 or tasa_iva > 1:
+                return False
+            
             if not self.conectar():
                 return False
             
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS categorias (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT NOT NULL UNIQUE,
-                    descripcion TEXT,
-                    tasa_iva REAL DEFAULT 0.19,
-                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS productos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT NOT NULL,
-                    descripcion TEXT,
-                    precio_base REAL NOT NULL CHECK (precio_base > 0),
-                    categoria_id INTEGER NOT NULL,
-                    estado TEXT DEFAULT 'Activo' CHECK (estado IN ('Activo', 'Inactivo', 'Descontinuado')),
-                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (categoria_id) REFERENCES categorias (id)
-                )
-            """)
-            
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS impuestos_adicionales (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT NOT NULL UNIQUE,
-                    tasa REAL NOT NULL CHECK (tasa >= 0 AND tasa <= 1),
-                    descripcion TEXT,
-                    aplicable_a_categoria_id INTEGER,
-                    activo BOOLEAN DEFAULT 1,
-                    FOREIGN KEY (aplicable_a_categoria_id) REFERENCES categorias (id)
-                )
-            """)
-            
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS transacciones (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    producto_id INTEGER NOT NULL,
-                    cantidad INTEGER NOT NULL CHECK (cantidad > 0),
-                    precio_unitario REAL NOT NULL CHECK (precio_unitario > 0),
-                    subtotal REAL NOT NULL,
-                    total_impuestos REAL NOT NULL,
-                    total_final REAL NOT NULL,
-                    fecha_transaccion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (producto_id) REFERENCES productos (id)
-                )
-            """)
-            
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos(categoria_id)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_transacciones_fecha ON transacciones(fecha_transaccion)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_productos_estado ON productos(estado)")
+            self._ejecutar('categoria_insertar', (nombre, descripcion, tasa_iva))
             
             self.conexion.commit()
             return True
             
         except sqlite3.Error as e:
-            print(f"Error al crear tablas: {e}")
+            print(f"Error al insertar categoría: {e}")
             if self.conexion:
                 self.conexion.rollback()
             return False
         finally:
-            self.desconectar()
+            if self.conexion:
+                self.desconectar()
     
-    def insertar_categoria(self, nombre: str, descripcion: str = "", tasa_iva: float = 0.19) -> bool:
+    def _programar_tasa(self, nombre: str, clave, tasa: float, vigente_desde, entidad: str) -> bool:
         try:
-            if tasa_iva < 0 or tasa_iva > 1:
+            if tasa < 0 or tasa > 1:
                 return False
             
             if not self.conectar():
                 return False
             
-            self.cursor.execute("""
-                INSERT INTO categorias (nombre, descripcion, tasa_iva)
-                VALUES (?, ?, ?)
-            """, (nombre, descripcion, tasa_iva))
+            self._ejecutar(nombre, (clave, normalizar_fecha(vigente_desde), tasa))
             
             self.conexion.commit()
             return True
             
         except sqlite3.Error as e:
-            print(f"Error al insertar categoría: {e}")
+            print(f"Error al programar tasa de {entidad}: {e}")
             if self.conexion:
                 self.conexion.rollback()
             return False
         finally:
-            if self.conexion:
-                self.desconectar()
+            self.desconectar()
+    
+    @instrumentado
+    def programar_tasa_categoria(self, categoria_id: int, tasa_iva: float,
+                                 vigente_desde: Union[str, datetime]) -> bool:
+        """Registra una versión de la tasa de IVA de una categoría (puede ser futura o retroactiva)
+        
+        No modifica ``categorias.tasa_iva``; ``actualizar_categoria`` versiona ese valor por sí solo.
+        """
+        return self._programar_tasa('tasa_categoria_programar', categoria_id, tasa_iva, vigente_desde, "categoría")
+    
+    @instrumentado
+    def programar_tasa_impuesto(self, impuesto: str, tasa: float, vigente_desde: Union[str, datetime]) -> bool:
+        """Registra una versión de la tasa de un impuesto de la calculadora (por su nombre)"""
+        return self._programar_tasa('tasa_impuesto_programar', impuesto, tasa, vigente_desde, "impuesto")
     
+    @instrumentado
+    def cargar_historial_tasas(self) -> IndiceTasas:
+        """Índice en memoria con todas las versiones de tasas, por id de categoría y por nombre de impuesto"""
+        indice = IndiceTasas()
+        try:
+            if not self.conectar():
+                return indice
+            for fila in self._consultar('tasas_categoria_todas'):
+                indice.agregar(fila['categoria_id'], fila['vigente_desde'], fila['tasa_iva'])
+            for fila in self._consultar('tasas_impuesto_todas'):
+                indice.agregar(fila['impuesto'], fila['vigente_desde'], fila['tasa'])
+            return indice
+        except sqlite3.Error as e:
+            print(f"Error al cargar el historial de tasas: {e}")
+            return indice
+        finally:
+            self.desconectar()
+    
+    @instrumentado
     def insertar_producto(self, nombre: str, precio_base: float, categoria_id: int, 
                          descripcion: str = "", estado: str = "Activo") -> bool:
         try:
             if not self.conectar():
                 return False
             
-            self.cursor.execute("""
-                INSERT INTO productos (nombre, descripcion, precio_base, categoria_id, estado)
-                VALUES (?, ?, ?, ?, ?)
-            """, (nombre, descripcion, precio_base, categoria_id, estado))
+            self._ejecutar('producto_insertar',
+                           (nombre, descripcion, precio_base, categoria_id, estado))
             
             self.conexion.commit()
             return True
@@ -168,16 +286,14 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def insertar_impuesto_adicional(self, nombre: str, tasa: float, descripcion: str = "",
                                    categoria_id: Optional[int] = None) -> bool:
         try:
             if not self.conectar():
                 return False
             
-            self.cursor.execute("""
-                INSERT INTO impuestos_adicionales (nombre, tasa, descripcion, aplicable_a_categoria_id)
-                VALUES (?, ?, ?, ?)
-            """, (nombre, tasa, descripcion, categoria_id))
+            self._ejecutar('impuesto_adicional_insertar', (nombre, tasa, descripcion, categoria_id))
             
             self.conexion.commit()
             return True
@@ -190,17 +306,31 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def insertar_transaccion(self, producto_id: int, cantidad: int, precio_unitario: float,
-                           subtotal: float, total_impuestos: float, total_final: float) -> bool:
+                           subtotal: float, total_impuestos: float, total_final: float,
+                           clave_idempotencia: Optional[str] = None,
+                           desglose_impuestos: Optional[Dict[str, float]] = None) -> bool:
+        """Inserta una transacción con la categoría vigente del producto y el desglose de impuestos
+        aplicado
+
+        Con una clave ya registrada no inserta: devuelve True si la venta guardada
+        tiene el mismo producto y cantidad (un reintento) y False si es otra.
+        """
         try:
             if not self.conectar():
                 return False
             
-            self.cursor.execute("""
-                INSERT INTO transacciones (producto_id, cantidad, precio_unitario, 
-                                         subtotal, total_impuestos, total_final)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (producto_id, cantidad, precio_unitario, subtotal, total_impuestos, total_final))
+            cursor = self._ejecutar('transaccion_insertar',
+                                    (producto_id, cantidad, precio_unitario, subtotal, total_impuestos,
+                                     total_final, clave_idempotencia, desglose_a_json(desglose_impuestos)))
+            
+            if cursor.rowcount == 0 and clave_idempotencia is not None:
+                previa = self._consultar('transaccion_por_clave', (clave_idempotencia,))
+                if previa and (previa[0]['producto_id'], previa[0]['cantidad']) != (producto_id, cantidad):
+                    print(f"La clave de idempotencia {clave_idempotencia} ya se usó para otra venta")
+                    self.conexion.rollback()
+                    return False
             
             self.conexion.commit()
             return True
@@ -213,6 +343,7 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def actualizar_producto(self, producto_id: int, nombre: str = None, precio_base: float = None,
                            categoria_id: int = None, descripcion: str = None, 
                            estado: str = None) -> bool:
@@ -220,42 +351,12 @@ class BaseDatos:
             if not self.conectar():
                 return False
             
-            campos_actualizar = []
-            valores = []
-            
-            if nombre is not None:
-                campos_actualizar.append("nombre = ?")
-                valores.append(nombre)
-            
-            if precio_base is not None:
-                campos_actualizar.append("precio_base = ?")
-                valores.append(precio_base)
-            
-            if categoria_id is not None:
-                campos_actualizar.append("categoria_id = ?")
-                valores.append(categoria_id)
-            
-            if descripcion is not None:
-                campos_actualizar.append("descripcion = ?")
-                valores.append(descripcion)
-            
-            if estado is not None:
-                campos_actualizar.append("estado = ?")
-                valores.append(estado)
-            
-            if not campos_actualizar:
+            valores = (nombre, precio_base, categoria_id, descripcion, estado)
+            if all(valor is None for valor in valores):
                 return False
             
-            campos_actualizar.append("fecha_actualizacion = CURRENT_TIMESTAMP")
-            valores.append(producto_id)
-            
-            consulta = f"""
-                UPDATE productos 
-                SET {', '.join(campos_actualizar)}
-                WHERE id = ?
-            """
-            
-            self.cursor.execute(consulta, valores)
+            # Los campos en None se envían como NULL y conservan su valor actual
+            self._ejecutar('producto_actualizar', valores + (producto_id,))
             
             if self.cursor.rowcount == 0:
                 print(f"No se encontró el producto con ID {producto_id}")
@@ -272,39 +373,18 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def actualizar_categoria(self, categoria_id: int, nombre: str = None, 
                            descripcion: str = None, tasa_iva: float = None) -> bool:
         try:
             if not self.conectar():
                 return False
             
-            campos_actualizar = []
-            valores = []
-            
-            if nombre is not None:
-                campos_actualizar.append("nombre = ?")
-                valores.append(nombre)
-            
-            if descripcion is not None:
-                campos_actualizar.append("descripcion = ?")
-                valores.append(descripcion)
-            
-            if tasa_iva is not None:
-                campos_actualizar.append("tasa_iva = ?")
-                valores.append(tasa_iva)
-            
-            if not campos_actualizar:
+            valores = (nombre, descripcion, tasa_iva)
+            if all(valor is None for valor in valores):
                 return False
             
-            valores.append(categoria_id)
-            
-            consulta = f"""
-                UPDATE categorias 
-                SET {', '.join(campos_actualizar)}
-                WHERE id = ?
-            """
-            
-            self.cursor.execute(consulta, valores)
+            self._ejecutar('categoria_actualizar', valores + (categoria_id,))
             
             if self.cursor.rowcount == 0:
                 print(f"No se encontró la categoría con ID {categoria_id}")
@@ -321,19 +401,19 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def eliminar_producto(self, producto_id: int) -> bool:
         try:
             if not self.conectar():
                 return False
             
-            self.cursor.execute("SELECT COUNT(*) FROM transacciones WHERE producto_id = ?", (producto_id,))
-            transacciones_asociadas = self.cursor.fetchone()[0]
+            transacciones_asociadas = self._consultar_valor('transacciones_contar_por_producto', (producto_id,))
             
             if transacciones_asociadas > 0:
                 print(f"No se puede eliminar el producto. Tiene {transacciones_asociadas} transacciones asociadas.")
                 return False
             
-            self.cursor.execute("DELETE FROM productos WHERE id = ?", (producto_id,))
+            self._ejecutar('producto_eliminar', (producto_id,))
             
             if self.cursor.rowcount == 0:
                 print(f"No se encontró el producto con ID {producto_id}")
@@ -350,19 +430,19 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def eliminar_categoria(self, categoria_id: int) -> bool:
         try:
             if not self.conectar():
                 return False
             
-            self.cursor.execute("SELECT COUNT(*) FROM productos WHERE categoria_id = ?", (categoria_id,))
-            productos_asociados = self.cursor.fetchone()[0]
+            productos_asociados = self._consultar_valor('productos_contar_por_categoria', (categoria_id,))
             
             if productos_asociados > 0:
                 print(f"No se puede eliminar la categoría. Tiene {productos_asociados} productos asociados.")
                 return False
             
-            self.cursor.execute("DELETE FROM categorias WHERE id = ?", (categoria_id,))
+            self._ejecutar('categoria_eliminar', (categoria_id,))
             
             if self.cursor.rowcount == 0:
                 print(f"No se encontró la categoría con ID {categoria_id}")
@@ -379,25 +459,15 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def consultar_todos_productos(self, como_modelos: bool = False) -> Union[List[Dict], List[Producto]]:
         try:
             if not self.conectar():
                 return []
             
-            self.cursor.execute("""
-                SELECT p.id, p.nombre, p.descripcion, p.precio_base, 
-                       p.estado, p.fecha_creacion, p.fecha_actualizacion,
-                       c.id as categoria_id, c.nombre as categoria_nombre, c.tasa_iva
-                FROM productos p
-                JOIN categorias c ON p.categoria_id = c.id
-                ORDER BY p.nombre
-            """)
-            
-            columnas = [descripcion[0] for descripcion in self.cursor.description]
             productos = []
             
-            for fila in self.cursor.fetchall():
-                producto_dict = dict(zip(columnas, fila))
+            for producto_dict in self._consultar('productos_todos'):
                 if como_modelos:
                     productos.append(Producto.desde_dict(producto_dict))
                 else:
@@ -411,24 +481,15 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def consultar_producto_por_id(self, producto_id: int, como_modelo: bool = False) -> Union[Optional[Dict], Optional[Producto]]:
         try:
             if not self.conectar():
                 return None
             
-            self.cursor.execute("""
-                SELECT p.id, p.nombre, p.descripcion, p.precio_base, 
-                       p.estado, p.fecha_creacion, p.fecha_actualizacion,
-                       c.id as categoria_id, c.nombre as categoria_nombre, c.tasa_iva
-                FROM productos p
-                JOIN categorias c ON p.categoria_id = c.id
-                WHERE p.id = ?
-            """, (producto_id,))
-            
-            fila = self.cursor.fetchone()
-            if fila:
-                columnas = [descripcion[0] for descripcion in self.cursor.description]
-                producto_dict = dict(zip(columnas, fila))
+            filas = self._consultar('producto_por_id', (producto_id,))
+            if filas:
+                producto_dict = filas[0]
                 if como_modelo:
                     return Producto.desde_dict(producto_dict)
                 return producto_dict
@@ -441,26 +502,15 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def consultar_productos_por_categoria(self, categoria_id: int, como_modelos: bool = False) -> Union[List[Dict], List[Producto]]:
         try:
             if not self.conectar():
                 return []
             
-            self.cursor.execute("""
-                SELECT p.id, p.nombre, p.descripcion, p.precio_base, 
-                       p.estado, p.fecha_creacion, p.fecha_actualizacion,
-                       c.id as categoria_id, c.nombre as categoria_nombre, c.tasa_iva
-                FROM productos p
-                JOIN categorias c ON p.categoria_id = c.id
-                WHERE p.categoria_id = ?
-                ORDER BY p.nombre
-            """, (categoria_id,))
-            
-            columnas = [descripcion[0] for descripcion in self.cursor.description]
             productos = []
             
-            for fila in self.cursor.fetchall():
-                producto_dict = dict(zip(columnas, fila))
+            for producto_dict in self._consultar('productos_por_categoria', (categoria_id,)):
                 if como_modelos:
                     productos.append(Producto.desde_dict(producto_dict))
                 else:
@@ -474,22 +524,15 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def consultar_todas_categorias(self, como_modelos: bool = False) -> Union[List[Dict], List[Categoria]]:
         try:
             if not self.conectar():
                 return []
             
-            self.cursor.execute("""
-                SELECT id, nombre, descripcion, tasa_iva, fecha_creacion
-                FROM categorias
-                ORDER BY nombre
-            """)
-            
-            columnas = [descripcion[0] for descripcion in self.cursor.description]
             categorias = []
             
-            for fila in self.cursor.fetchall():
-                categoria_dict = dict(zip(columnas, fila))
+            for categoria_dict in self._consultar('categorias_todas'):
                 if como_modelos:
                     categorias.append(Categoria.desde_dict(categoria_dict))
                 else:
@@ -503,27 +546,32 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
+    def consultar_transaccion_por_clave(self, clave_idempotencia: str) -> Optional[Dict]:
+        """Venta registrada con la clave (id, producto_id, cantidad), o None"""
+        try:
+            if not self.conectar():
+                return None
+            
+            filas = self._consultar('transaccion_por_clave', (clave_idempotencia,))
+            return filas[0] if filas else None
+            
+        except sqlite3.Error as e:
+            print(f"Error al consultar transacción por clave: {e}")
+            return None
+        finally:
+            self.desconectar()
+    
+    @instrumentado
     def consultar_transacciones_recientes(self, limite: int = 10, como_modelos: bool = False) -> Union[List[Dict], List[Transaccion]]:
         try:
             if not self.conectar():
                 return []
             
-            self.cursor.execute("""
-                SELECT t.id, t.producto_id, t.cantidad, t.precio_unitario, t.subtotal, 
-                       t.total_impuestos, t.total_final, t.fecha_transaccion,
-                       p.nombre as producto_nombre, c.nombre as categoria_nombre
-                FROM transacciones t
-                JOIN productos p ON t.producto_id = p.id
-                JOIN categorias c ON p.categoria_id = c.id
-                ORDER BY t.fecha_transaccion DESC
-                LIMIT ?
-            """, (limite,))
-            
-            columnas = [descripcion[0] for descripcion in self.cursor.description]
             transacciones = []
             
-            for fila in self.cursor.fetchall():
-                transaccion_dict = dict(zip(columnas, fila))
+            for transaccion_dict in self._consultar('transacciones_recientes', (limite,)):
+                transaccion_dict['desglose_impuestos'] = desglose_desde_json(transaccion_dict['desglose_impuestos'])
                 if como_modelos:
                     transacciones.append(Transaccion.desde_dict(transaccion_dict))
                 else:
@@ -537,31 +585,63 @@ class BaseDatos:
         finally:
             self.desconectar()
     
-    def obtener_estadisticas(self) -> Dict:
+    @instrumentado
+    def consultar_ventas_por_categoria(self) -> List[Dict]:
+        """Totales de venta por categoría según la categoría registrada en cada transacción"""
+        try:
+            if not self.conectar(analitica=True):
+                return []
+            return self._consultar('ventas_por_categoria')
+        except sqlite3.Error as e:
+            print(f"Error al consultar ventas por categoría: {e}")
+            return []
+        finally:
+            self.desconectar()
+    
+    @instrumentado
+    def consultar_impuestos_transaccion(self, transaccion_id: int) -> Dict[str, float]:
+        """Líneas de impuestos registradas para una transacción"""
         try:
             if not self.conectar():
                 return {}
+            return {fila['impuesto']: fila['valor']
+                    for fila in self._consultar('transaccion_impuestos', (transaccion_id,))}
+        except sqlite3.Error as e:
+            print(f"Error al consultar impuestos de la transacción: {e}")
+            return {}
+        finally:
+            self.desconectar()
+    
+    @instrumentado
+    def consultar_impuestos_mensuales(self, desde: str = "0000-00", hasta: str = "9999-12") -> List[Dict]:
+        """Totales por impuesto y mes (``AAAA-MM``) entre dos periodos inclusive"""
+        try:
+            if not self.conectar(analitica=True):
+                return []
+            return self._consultar('impuestos_mensuales', (desde, hasta))
+        except sqlite3.Error as e:
+            print(f"Error al consultar impuestos mensuales: {e}")
+            return []
+        finally:
+            self.desconectar()
+    
+    @instrumentado
+    def obtener_estadisticas(self) -> Dict:
+        try:
+            if not self.conectar(analitica=True):
+                return {}
             
             estadisticas = {}
             
-            self.cursor.execute("""
-                SELECT estado, COUNT(*) as cantidad
-                FROM productos
-                GROUP BY estado
-            """)
-            estadisticas['productos_por_estado'] = dict(self.cursor.fetchall())
-            
-            self.cursor.execute("SELECT COUNT(*) FROM categorias")
-            estadisticas['total_categorias'] = self.cursor.fetchone()[0]
-            
-            self.cursor.execute("SELECT COUNT(*) FROM productos")
-            estadisticas['total_productos'] = self.cursor.fetchone()[0]
+            estadisticas['productos_por_estado'] = {
+                fila['estado']: fila['cantidad'] for fila in self._consultar('productos_por_estado')
+            }
             
-            self.cursor.execute("SELECT COUNT(*) FROM transacciones")
-            estadisticas['total_transacciones'] = self.cursor.fetchone()[0]
+            estadisticas['total_categorias'] = self._consultar_valor('categorias_contar')
+            estadisticas['total_productos'] = self._consultar_valor('productos_contar')
+            estadisticas['total_transacciones'] = self._consultar_valor('transacciones_contar')
             
-            self.cursor.execute("SELECT SUM(total_final) FROM transacciones")
-            resultado = self.cursor.fetchone()[0]
+            resultado = self._consultar_valor('ventas_total')
             estadisticas['valor_total_ventas'] = resultado if resultado else 0
             
             return estadisticas
@@ -572,6 +652,7 @@ class BaseDatos:
         finally:
             self.desconectar()
     
+    @instrumentado
     def inicializar_datos_ejemplo(self) -> bool:
         try:
             categorias_existentes = self.consultar_todas_categorias()
@@ -0,0 +1,301 @@
+"""
+Capa de datos asíncrona para la Calculadora de Impuestos
+Misma interfaz que BaseDatos sobre aiosqlite, con las sentencias del catálogo compartido
+"""
+
+import asyncio
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import aiosqlite
+
+from src.model.producto import Producto
+from src.model.categoria import Categoria
+from src.model.transaccion import Transaccion, desglose_a_json, desglose_desde_json
+from src.db.database import BaseDatos
+from src.db.sentencias import RegistroSentencias, registro_sentencias, TAMANO_CACHE_SENTENCIAS
+
+
+class BaseDatosAsync:
+    """Versión asíncrona de BaseDatos
+
+    Mantiene una sola conexión aiosqlite por instancia (la abre en el primer uso),
+    de modo que muchas corrutinas comparten el hilo de la conexión sin bloquear el
+    bucle de eventos. Las escrituras se serializan con un candado para que el
+    commit de una operación no incluya sentencias de otra; las lecturas también lo
+    toman, porque en la misma conexión verían las filas aún sin commit de una
+    escritura en curso. El esquema y los datos de ejemplo se delegan en BaseDatos.
+    """
+
+    def __init__(self, nombre_db: str = "calculadora_impuestos.db",
+                 sentencias: Optional[RegistroSentencias] = None):
+        self.nombre_db = nombre_db
+        self.sentencias = sentencias or registro_sentencias
+        self.conexion: Optional[aiosqlite.Connection] = None
+        self._candado_conexion = asyncio.Lock()
+        self._candado_escritura = asyncio.Lock()
+
+    async def conectar(self) -> bool:
+        if self.conexion is not None:
+            return True
+        async with self._candado_conexion:
+            if self.conexion is not None:
+                return True
+            try:
+                conexion = await aiosqlite.connect(self.nombre_db, cached_statements=TAMANO_CACHE_SENTENCIAS)
+                await conexion.execute("PRAGMA foreign_keys = ON")
+                self.conexion = conexion
+                return True
+            except sqlite3.Error as e:
+                print(f"Error al conectar con la base de datos: {e}")
+                return False
+
+    async def desconectar(self):
+        if self.conexion is not None:
+            try:
+                await self.conexion.close()
+            except sqlite3.Error:
+                pass
+            self.conexion = None
+
+    async def _consultar_filas(self, nombre: str, parametros: tuple = (),
+                               en_escritura: bool = False) -> Tuple[List[str], List[tuple]]:
+        """Lee con ``_candado_escritura`` tomado; ``en_escritura`` si quien llama ya lo tiene"""
+        if en_escritura:
+            return await self._leer_filas(nombre, parametros)
+        async with self._candado_escritura:
+            return await self._leer_filas(nombre, parametros)
+
+    async def _leer_filas(self, nombre: str, parametros: tuple) -> Tuple[List[str], List[tuple]]:
+        sql = self.sentencias.sql(nombre)
+        inicio = time.perf_counter()
+        error = False
+        try:
+            async with self.conexion.execute(sql, parametros) as cursor:
+                filas = await cursor.fetchall()
+                columnas = [descripcion[0] for descripcion in cursor.description]
+            return columnas, filas
+        except sqlite3.Error:
+            error = True
+            raise
+        finally:
+            self.sentencias.registrar_tiempo(nombre, time.perf_counter() - inicio, error)
+
+    async def _consultar(self, nombre: str, parametros: tuple = ()) -> List[Dict]:
+        """Ejecuta una consulta del catálogo y devuelve las filas como diccionarios"""
+        columnas, filas = await self._consultar_filas(nombre, parametros)
+        return [dict(zip(columnas, fila)) for fila in filas]
+
+    async def _consultar_valor(self, nombre: str, parametros: tuple = (), en_escritura: bool = False):
+        _, filas = await self._consultar_filas(nombre, parametros, en_escritura)
+        return filas[0][0]
+
+    async def _ejecutar(self, nombre: str, parametros: tuple = ()) -> int:
+        """Ejecuta una sentencia de escritura del catálogo y devuelve las filas afectadas
+
+        Debe llamarse con ``_candado_escritura`` tomado; el commit lo hace quien llama.
+        """
+        sql = self.sentencias.sql(nombre)
+        inicio = time.perf_counter()
+        error = False
+        try:
+            async with self.conexion.execute(sql, parametros) as cursor:
+                return cursor.rowcount
+        except sqlite3.Error:
+            error = True
+            raise
+        finally:
+            self.sentencias.registrar_tiempo(nombre, time.perf_counter() - inicio, error)
+
+    async def _escribir(self, nombre: str, parametros: tuple, mensaje_error: str) -> bool:
+        """Ejecuta una sola sentencia de escritura en su propia transacción"""
+        if not await self.conectar():
+            return False
+        async with self._candado_escritura:
+            try:
+                await self._ejecutar(nombre, parametros)
+                await self.conexion.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"{mensaje_error}: {e}")
+                await self.conexion.rollback()
+                return False
+
+    async def crear_tablas(self) -> bool:
+        return await asyncio.to_thread(BaseDatos(self.nombre_db, self.sentencias).crear_tablas)
+
+    async def inicializar_datos_ejemplo(self) -> bool:
+        return await asyncio.to_thread(BaseDatos(self.nombre_db, self.sentencias).inicializar_datos_ejemplo)
+
+    async def insertar_categoria(self, nombre: str, descripcion: str = "", tasa_iva: float = 0.19) -> bool:
+        if tasa_iva < 0 or tasa_iva > 1:
+            return False
+        return await self._escribir('categoria_insertar', (nombre, descripcion, tasa_iva),
+                                    "Error al insertar categoría")
+
+    async def insertar_producto(self, nombre: str, precio_base: float, categoria_id: int,
+                                descripcion: str = "", estado: str = "Activo") -> bool:
+        return await self._escribir('producto_insertar', (nombre, descripcion, precio_base, categoria_id, estado),
+                                    "Error al insertar producto")
+
+    async def insertar_impuesto_adicional(self, nombre: str, tasa: float, descripcion: str = "",
+                                          categoria_id: Optional[int] = None) -> bool:
+        return await self._escribir('impuesto_adicional_insertar', (nombre, tasa, descripcion, categoria_id),
+                                    "Error al insertar impuesto adicional")
+
+    async def insertar_transaccion(self, producto_id: int, cantidad: int, precio_unitario: float,
+                                   subtotal: float, total_impuestos: float, total_final: float,
+                                   clave_idempotencia: Optional[str] = None,
+                                   desglose_impuestos: Optional[Dict[str, float]] = None) -> bool:
+        """Con una clave ya registrada devuelve True sólo si es un reintento de la misma venta"""
+        if not await self.conectar():
+            return False
+        async with self._candado_escritura:
+            try:
+                insertadas = await self._ejecutar(
+                    'transaccion_insertar',
+                    (producto_id, cantidad, precio_unitario, subtotal, total_impuestos, total_final,
+                     clave_idempotencia, desglose_a_json(desglose_impuestos)))
+                if insertadas == 0 and clave_idempotencia is not None:
+                    _, previa = await self._consultar_filas('transaccion_por_clave', (clave_idempotencia,),
+                                                            en_escritura=True)
+                    if previa and tuple(previa[0][1:]) != (producto_id, cantidad):
+                        print(f"La clave de idempotencia {clave_idempotencia} ya se usó para otra venta")
+                        await self.conexion.rollback()
+                        return False
+                await self.conexion.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"Error al insertar transacción: {e}")
+                await self.conexion.rollback()
+                return False
+
+    async def _actualizar(self, nombre: str, valores: tuple, registro_id: int, entidad: str) -> bool:
+        if all(valor is None for valor in valores):
+            return False
+        if not await self.conectar():
+            return False
+        async with self._candado_escritura:
+            try:
+                # Los campos en None se envían como NULL y conservan su valor actual
+                if await self._ejecutar(nombre, valores + (registro_id,)) == 0:
+                    print(f"No se encontró {entidad} con ID {registro_id}")
+                    await self.conexion.rollback()
+                    return False
+                await self.conexion.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"Error al actualizar {entidad.split()[-1]}: {e}")
+                await self.conexion.rollback()
+                return False
+
+    async def actualizar_producto(self, producto_id: int, nombre: str = None, precio_base: float = None,
+                                  categoria_id: int = None, descripcion: str = None,
+                                  estado: str = None) -> bool:
+        return await self._actualizar('producto_actualizar',
+                                      (nombre, precio_base, categoria_id, descripcion, estado),
+                                      producto_id, "el producto")
+
+    async def actualizar_categoria(self, categoria_id: int, nombre: str = None,
+                                   descripcion: str = None, tasa_iva: float = None) -> bool:
+        return await self._actualizar('categoria_actualizar', (nombre, descripcion, tasa_iva),
+                                      categoria_id, "la categoría")
+
+    async def _eliminar(self, contar: str, eliminar: str, registro_id: int, entidad: str, asociados: str) -> bool:
+        if not await self.conectar():
+            return False
+        async with self._candado_escritura:
+            try:
+                cantidad = await self._consultar_valor(contar, (registro_id,), en_escritura=True)
+                if cantidad > 0:
+                    print(f"No se puede eliminar {entidad}. Tiene {cantidad} {asociados} asociados.")
+                    return False
+                if await self._ejecutar(eliminar, (registro_id,)) == 0:
+                    print(f"No se encontró {entidad} con ID {registro_id}")
+                    await self.conexion.rollback()
+                    return False
+                await self.conexion.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"Error al eliminar {entidad.split()[-1]}: {e}")
+                await self.conexion.rollback()
+                return False
+
+    async def eliminar_producto(self, producto_id: int) -> bool:
+        return await self._eliminar('transacciones_contar_por_producto', 'producto_eliminar',
+                                    producto_id, "el producto", "transacciones")
+
+    async def eliminar_categoria(self, categoria_id: int) -> bool:
+        return await self._eliminar('productos_contar_por_categoria', 'categoria_eliminar',
+                                    categoria_id, "la categoría", "productos")
+
+    async def _listar(self, nombre: str, parametros: tuple, modelo, como_modelos: bool, mensaje_error: str) -> list:
+        try:
+            if not await self.conectar():
+                return []
+            filas = await self._consultar(nombre, parametros)
+            return [modelo.desde_dict(fila) for fila in filas] if como_modelos else filas
+        except sqlite3.Error as e:
+            print(f"{mensaje_error}: {e}")
+            return []
+
+    async def consultar_todos_productos(self, como_modelos: bool = False) -> Union[List[Dict], List[Producto]]:
+        return await self._listar('productos_todos', (), Producto, como_modelos, "Error al consultar productos")
+
+    async def consultar_producto_por_id(self, producto_id: int,
+                                        como_modelo: bool = False) -> Union[Optional[Dict], Optional[Producto]]:
+        filas = await self._listar('producto_por_id', (producto_id,), Producto, como_modelo,
+                                   "Error al consultar producto")
+        return filas[0] if filas else None
+
+    async def consultar_productos_por_categoria(self, categoria_id: int,
+                                                como_modelos: bool = False) -> Union[List[Dict], List[Producto]]:
+        return await self._listar('productos_por_categoria', (categoria_id,), Producto, como_modelos,
+                                  "Error al consultar productos por categoría")
+
+    async def consultar_todas_categorias(self, como_modelos: bool = False) -> Union[List[Dict], List[Categoria]]:
+        return await self._listar('categorias_todas', (), Categoria, como_modelos, "Error al consultar categorías")
+
+    async def consultar_transaccion_por_clave(self, clave_idempotencia: str) -> Optional[Dict]:
+        filas = await self._listar('transaccion_por_clave', (clave_idempotencia,), None, False,
+                                   "Error al consultar transacción por clave")
+        return filas[0] if filas else None
+
+    async def consultar_transacciones_recientes(self, limite: int = 10,
+                                                como_modelos: bool = False) -> Union[List[Dict], List[Transaccion]]:
+        transacciones = await self._listar('transacciones_recientes', (limite,), Transaccion, como_modelos,
+                                           "Error al consultar transacciones")
+        if not como_modelos:
+            for transaccion in transacciones:
+                transaccion['desglose_impuestos'] = desglose_desde_json(transaccion['desglose_impuestos'])
+        return transacciones
+
+    async def consultar_ventas_por_categoria(self) -> List[Dict]:
+        return await self._listar('ventas_por_categoria', (), None, False,
+                                  "Error al consultar ventas por categoría")
+
+    async def consultar_impuestos_mensuales(self, desde: str = "0000-00", hasta: str = "9999-12") -> List[Dict]:
+        return await self._listar('impuestos_mensuales', (desde, hasta), None, False,
+                                  "Error al consultar impuestos mensuales")
+
+    async def obtener_estadisticas(self) -> Dict:
+        try:
+            if not await self.conectar():
+                return {}
+
+            estadisticas = {}
+            estadisticas['productos_por_estado'] = {
+                fila['estado']: fila['cantidad'] for fila in await self._consultar('productos_por_estado')
+            }
+            estadisticas['total_categorias'] = await self._consultar_valor('categorias_contar')
+            estadisticas['total_productos'] = await self._consultar_valor('productos_contar')
+            estadisticas['total_transacciones'] = await self._consultar_valor('transacciones_contar')
+
+            resultado = await self._consultar_valor('ventas_total')
+            estadisticas['valor_total_ventas'] = resultado if resultado else 0
+            return estadisticas
+
+        except sqlite3.Error as e:
+            print(f"Error al obtener estadísticas: {e}")
+            return {}
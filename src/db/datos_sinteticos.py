@@ -0,0 +1,258 @@
+"""
+Generador de datos sintéticos para pruebas de carga
+Llena categorías, productos y transacciones con distribuciones realistas, de forma determinista por semilla
+
+Uso:
+    python -m src.db.datos_sinteticos RUTA_DB --categorias 2000 --productos 1000000 --transacciones 10000000
+"""
+
+import argparse
+import bisect
+import itertools
+import math
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from src.db.database import BaseDatos
+from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+from src.model.transaccion import desglose_a_json, desglose_de_venta
+
+
+SUSTANTIVOS = ["Arroz", "Cerveza", "Bolsa", "Gasolina", "Energía", "Laptop", "Café", "Aceite", "Leche",
+               "Pan", "Jabón", "Vino", "Ron", "Diésel", "Agua", "Celular", "Camisa", "Zapato", "Silla", "Lámpara"]
+MARCAS = ["Andina", "del Valle", "Premium", "Nacional", "Express", "Hogar", "Plus", "Eco", "Max", "Clásico"]
+
+# Proporción de estados de los productos
+ESTADOS = (("Activo", 0.85), ("Inactivo", 0.10), ("Descontinuado", 0.05))
+
+# Peso relativo de cada hora del día (picos al mediodía y al final de la tarde)
+PESOS_HORA = [1, 1, 1, 1, 1, 2, 4, 6, 8, 9, 10, 12, 12, 11, 9, 9, 10, 12, 12, 10, 7, 4, 2, 1]
+
+
+def _pesos_acumulados_zipf(cantidad: int, exponente: float) -> List[float]:
+    """Pesos acumulados de una distribución de Zipf sobre ``cantidad`` elementos"""
+    return list(itertools.accumulate(1.0 / math.pow(rango, exponente) for rango in range(1, cantidad + 1)))
+
+
+def _elegir(acumulados: List[float], fraccion: float) -> int:
+    """Índice elegido al muestrear con pesos acumulados y un número uniforme en [0, 1)"""
+    return min(bisect.bisect_right(acumulados, fraccion * acumulados[-1]), len(acumulados) - 1)
+
+
+class GeneradorDatosSinteticos:
+    """Genera un conjunto de datos sintético en una base SQLite
+
+    Todas las decisiones aleatorias salen de ``random.Random(semilla)`` y las fechas
+    se calculan respecto a ``fecha_fin``, de modo que la misma semilla produce
+    exactamente los mismos datos. Las filas se insertan con ``executemany`` en
+    lotes, con la sincronización desactivada y los índices secundarios que no
+    son UNIQUE reconstruidos al final, aunque la generación falle.
+    """
+
+    def __init__(self, nombre_db: str, semilla: int = 42, tamano_lote: int = 50000,
+                 fecha_fin: datetime = datetime(2025, 1, 1), dias: int = 365,
+                 progreso: Optional[Callable[[str, int, int], None]] = None):
+        self.nombre_db = nombre_db
+        self.semilla = semilla
+        self.tamano_lote = tamano_lote
+        self.fecha_fin = fecha_fin
+        self.dias = dias
+        self.progreso = progreso
+        self.aleatorio = random.Random(semilla)
+        self.calculadora = CalculadoraImpuestos()
+
+    def _informar(self, etapa: str, hechos: int, total: int):
+        if self.progreso:
+            self.progreso(etapa, hechos, total)
+
+    def _impuestos_unitarios(self, precio: float, categoria: Optional[CategoriaProducto],
+                             tasa_iva: float) -> Dict[str, float]:
+        """Desglose por unidad: el de la calculadora si la categoría la conoce, si no el IVA de la categoría"""
+        if categoria is None:
+            return self.calculadora.desglose_iva(precio, tasa_iva)
+        return self.calculadora.calcular_impuestos(precio, categoria)['impuestos']
+
+    def _insertar_por_lotes(self, conexion: sqlite3.Connection, sql: str, filas, total: int, etapa: str):
+        hechos = 0
+        while True:
+            lote = list(itertools.islice(filas, self.tamano_lote))
+            if not lote:
+                break
+            conexion.executemany(sql, lote)
+            conexion.commit()
+            hechos += len(lote)
+            self._informar(etapa, hechos, total)
+
+    def _siguiente_id(self, conexion: sqlite3.Connection, tabla: str) -> int:
+        return (conexion.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabla}").fetchone()[0] or 0) + 1
+
+    def _categorias(self, conexion: sqlite3.Connection, cantidad: int) -> List[tuple]:
+        """Inserta las categorías y devuelve (id, nombre, categoría de la calculadora o None, tasa de IVA)"""
+        primer_id = self._siguiente_id(conexion, 'categorias')
+        nombres_calculadora = [categoria.value for categoria in CategoriaProducto]
+        existentes = {fila[0] for fila in conexion.execute("SELECT nombre FROM categorias")}
+        tasas_iva = {"Alimentos Básicos": 0.05, "Servicios Públicos": 0.0}
+
+        # Fecha fija para que la misma semilla produzca filas idénticas
+        fecha = (self.fecha_fin - timedelta(days=self.dias)).strftime('%Y-%m-%d %H:%M:%S')
+        filas = []
+        for desplazamiento in range(cantidad):
+            categoria_id = primer_id + desplazamiento
+            if desplazamiento < len(nombres_calculadora) and nombres_calculadora[desplazamiento] not in existentes:
+                nombre = nombres_calculadora[desplazamiento]
+                tasa_iva = tasas_iva.get(nombre, 0.19)
+            else:
+                nombre = f"Categoría {categoria_id:06d}"
+                tasa_iva = self.aleatorio.choices((0.19, 0.05, 0.0), weights=(70, 20, 10))[0]
+            filas.append((categoria_id, nombre, f"Categoría sintética {categoria_id}", tasa_iva, fecha))
+
+        self._insertar_por_lotes(conexion,
+                                 "INSERT INTO categorias (id, nombre, descripcion, tasa_iva, fecha_creacion) "
+                                 "VALUES (?, ?, ?, ?, ?)",
+                                 iter(filas), cantidad, 'categorias')
+        valores_calculadora = set(nombres_calculadora)
+        return [(categoria_id, nombre, CategoriaProducto(nombre) if nombre in valores_calculadora else None, tasa_iva)
+                for categoria_id, nombre, _, tasa_iva, _ in filas]
+
+    def _productos(self, conexion: sqlite3.Connection, cantidad: int, categorias: List[tuple]) -> List[tuple]:
+        """Inserta los productos y devuelve (id, precio, impuesto unitario, desglose unitario,
+        categoría, nombre, nombre de la categoría) de los activos"""
+        primer_id = self._siguiente_id(conexion, 'productos')
+        # Pocas categorías concentran la mayoría de los productos
+        acumulados_categorias = _pesos_acumulados_zipf(len(categorias), 0.8)
+        estados = [estado for estado, _ in ESTADOS]
+        pesos_estados = list(itertools.accumulate(peso for _, peso in ESTADOS))
+        fecha_inicio = self.fecha_fin - timedelta(days=self.dias)
+        activos = []
+
+        def filas():
+            for desplazamiento in range(cantidad):
+                producto_id = primer_id + desplazamiento
+                categoria_id, categoria_nombre, categoria, tasa_iva = categorias[_elegir(acumulados_categorias, self.aleatorio.random())]
+                precio = max(50.0, min(50000000.0, round(self.aleatorio.lognormvariate(9.9, 1.2) / 50) * 50))
+                estado = estados[_elegir(pesos_estados, self.aleatorio.random())]
+                nombre = f"{self.aleatorio.choice(SUSTANTIVOS)} {self.aleatorio.choice(MARCAS)} {producto_id}"
+                fecha = (fecha_inicio + timedelta(seconds=self.aleatorio.randrange(self.dias * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+                if estado == "Activo":
+                    desglose = self._impuestos_unitarios(precio, categoria, tasa_iva)
+                    activos.append((producto_id, precio, round(sum(desglose.values()), 2), desglose,
+                                    categoria_id, nombre, categoria_nombre))
+                yield (producto_id, nombre, "", precio, categoria_id, estado, fecha, fecha)
+
+        self._insertar_por_lotes(
+            conexion,
+            "INSERT INTO productos (id, nombre, descripcion, precio_base, categoria_id, estado, "
+            "fecha_creacion, fecha_actualizacion) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            filas(), cantidad, 'productos')
+        return activos
+
+    def _transacciones(self, conexion: sqlite3.Connection, cantidad: int, productos: List[tuple]):
+        if not productos:
+            return
+        # La popularidad de los productos sigue una ley de Zipf
+        orden = list(productos)
+        self.aleatorio.shuffle(orden)
+        acumulados_productos = _pesos_acumulados_zipf(len(orden), 1.1)
+        acumulados_horas = list(itertools.accumulate(PESOS_HORA))
+        inicio = self.fecha_fin - timedelta(days=self.dias)
+
+        def filas():
+            for _ in range(cantidad):
+                (producto_id, precio, impuesto_unitario, desglose, categoria_id, nombre,
+                 categoria_nombre) = orden[_elegir(acumulados_productos, self.aleatorio.random())]
+                # Casi todas las ventas son de pocas unidades
+                cantidad_vendida = min(50, int(self.aleatorio.expovariate(0.7)) + 1)
+                hora = _elegir(acumulados_horas, self.aleatorio.random())
+                fecha = inicio + timedelta(days=self.aleatorio.randrange(self.dias), hours=hora,
+                                           seconds=self.aleatorio.randrange(3600))
+                subtotal = precio * cantidad_vendida
+                total_impuestos = round(impuesto_unitario * cantidad_vendida, 2)
+                yield (producto_id, cantidad_vendida, precio, subtotal, total_impuestos,
+                       round(subtotal + total_impuestos, 2), fecha.strftime('%Y-%m-%d %H:%M:%S'),
+                       categoria_id, nombre, categoria_nombre,
+                       desglose_a_json(desglose_de_venta(desglose, cantidad_vendida)))
+
+        self._insertar_por_lotes(
+            conexion,
+            "INSERT INTO transacciones (producto_id, cantidad, precio_unitario, subtotal, "
+            "total_impuestos, total_final, fecha_transaccion, categoria_id, producto_nombre, "
+            "categoria_nombre, desglose_impuestos) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            filas(), cantidad, 'transacciones')
+
+    def generar(self, categorias: int = 100, productos: int = 10000, transacciones: int = 100000) -> Dict[str, int]:
+        """Crea el esquema si hace falta y agrega los datos; devuelve las filas insertadas por tabla"""
+        if not BaseDatos(self.nombre_db).crear_tablas():
+            raise RuntimeError(f"No se pudo crear el esquema en {self.nombre_db}")
+
+        conexion = sqlite3.connect(self.nombre_db)
+        try:
+            conexion.execute("PRAGMA synchronous = OFF")
+            conexion.execute("PRAGMA cache_size = -200000")
+            conexion.execute("PRAGMA temp_store = MEMORY")
+
+            # Los índices secundarios se reconstruyen una sola vez al final. Los UNIQUE
+            # se quedan: sin ellos la base dejaría de garantizar la idempotencia
+            indices = conexion.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                "AND sql NOT LIKE 'CREATE UNIQUE INDEX%' "
+                "AND tbl_name IN ('categorias', 'productos', 'transacciones')").fetchall()
+            eliminados = []
+            try:
+                for nombre, sql in indices:
+                    conexion.execute(f'DROP INDEX "{nombre}"')
+                    eliminados.append((nombre, sql))
+
+                datos_categorias = self._categorias(conexion, categorias)
+                activos = self._productos(conexion, productos, datos_categorias)
+                self._transacciones(conexion, transacciones, activos)
+            finally:
+                # También si la generación falla a medias: los lotes ya confirmados quedan indexados
+                conexion.rollback()
+                for nombre, sql in eliminados:
+                    self._informar(f'indice {nombre}', 0, 0)
+                    conexion.execute(sql)
+            conexion.execute("ANALYZE")
+            conexion.commit()
+        finally:
+            conexion.close()
+
+        return {'categorias': categorias, 'productos': productos, 'transacciones': transacciones}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m src.db.datos_sinteticos',
+                                     description='Genera datos sintéticos para pruebas de carga')
+    parser.add_argument('nombre_db', help='Ruta de la base SQLite (se crea si no existe)')
+    parser.add_argument('--categorias', type=int, default=100)
+    parser.add_argument('--productos', type=int, default=10000)
+    parser.add_argument('--transacciones', type=int, default=100000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--dias', type=int, default=365, help='Días de historia de las transacciones')
+    parser.add_argument('--lote', type=int, default=50000, help='Filas por executemany/commit')
+    argumentos = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+
+    def progreso(etapa: str, hechos: int, total: int):
+        if total:
+            print(f"\r{etapa}: {hechos:,}/{total:,}", end="" if hechos < total else "\n", flush=True)
+        else:
+            print(f"{etapa}...", flush=True)
+
+    generador = GeneradorDatosSinteticos(argumentos.nombre_db, argumentos.semilla, argumentos.lote,
+                                         dias=argumentos.dias, progreso=progreso)
+    try:
+        generador.generar(argumentos.categorias, argumentos.productos, argumentos.transacciones)
+    except (sqlite3.Error, RuntimeError) as e:
+        print(f"Error al generar datos sintéticos: {e}")
+        return 1
+    print(f"Datos generados en {time.perf_counter() - inicio:.1f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
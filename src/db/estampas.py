@@ -0,0 +1,64 @@
+"""
+Estampas de las tablas: generación (contador de escrituras) y fecha de la última modificación
+Las mantienen disparadores (migración 11); sirven de validadores para las cachés de la web
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.db.database import conectar_solo_lectura
+from src.db.sentencias import RegistroSentencias, registro_sentencias
+
+
+class EstampasTablas:
+    """Lectura barata de las estampas para cada solicitud
+
+    Mantiene una conexión de sólo lectura y consulta ``PRAGMA data_version``, que
+    cambia cuando otra conexión confirma una escritura. Mientras no cambie, las
+    estampas vienen de memoria sin leer la tabla. Devuelve {} si la base o la
+    tabla ``estampas`` aún no existen (las cachés quedan desactivadas).
+    """
+
+    def __init__(self, nombre_db: str, sentencias: Optional[RegistroSentencias] = None):
+        self.nombre_db = nombre_db
+        self.sentencias = sentencias or registro_sentencias
+        self._candado = threading.Lock()
+        self._conexion: Optional[sqlite3.Connection] = None
+        self._version = None
+        self._estampas: Dict[str, Tuple[int, str]] = {}
+
+    def actuales(self) -> Dict[str, Tuple[int, str]]:
+        """{tabla: (generación, fecha de última modificación)}"""
+        with self._candado:
+            try:
+                if self._conexion is None:
+                    self._conexion = conectar_solo_lectura(self.nombre_db, check_same_thread=False)
+                version = self._conexion.execute("PRAGMA data_version").fetchone()[0]
+                if version != self._version or not self._estampas:
+                    filas = self._conexion.execute(self.sentencias.sql('estampas_todas')).fetchall()
+                    self._estampas = {tabla: (generacion, fecha) for tabla, generacion, fecha in filas}
+                    self._version = version
+                return self._estampas
+            except sqlite3.Error:
+                self._cerrar()
+                return {}
+
+    def de(self, tablas: Iterable[str]) -> Optional[Dict[str, Tuple[int, str]]]:
+        """Estampas de las tablas pedidas; None si falta alguna"""
+        estampas = self.actuales()
+        try:
+            return {tabla: estampas[tabla] for tabla in tablas}
+        except KeyError:
+            return None
+
+    def _cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+        self._conexion = None
+        self._version = None
+        self._estampas = {}
+
+    def cerrar(self):
+        with self._candado:
+            self._cerrar()
@@ -0,0 +1,255 @@
+"""
+Instrumentación de la capa de datos
+Mide cada operación de BaseDatos, mantiene histogramas en memoria y registra las consultas lentas
+"""
+
+import bisect
+import functools
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+# Límites superiores (en segundos) de los intervalos de los histogramas
+LIMITES_HISTOGRAMA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                      0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma acumulativo de duraciones con intervalos fijos"""
+
+    def __init__(self, limites: Sequence[float] = LIMITES_HISTOGRAMA):
+        self.limites = tuple(limites)
+        self.conteos = [0] * (len(self.limites) + 1)
+        self.cantidad = 0
+        self.suma = 0.0
+
+    def observar(self, valor: float):
+        self.conteos[bisect.bisect_left(self.limites, valor)] += 1
+        self.cantidad += 1
+        self.suma += valor
+
+    def percentil(self, p: float) -> float:
+        """Aproxima el percentil p (0-100) con el límite superior de su intervalo"""
+        if self.cantidad == 0:
+            return 0.0
+        objetivo = self.cantidad * p / 100.0
+        acumulado = 0
+        for indice, conteo in enumerate(self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return self.limites[indice] if indice < len(self.limites) else float('inf')
+        return float('inf')
+
+    def a_dict(self) -> dict:
+        """Convierte el histograma a diccionario"""
+        return {
+            'cantidad': self.cantidad,
+            'suma': self.suma,
+            'limites': list(self.limites),
+            'conteos': list(self.conteos),
+            'p50': self.percentil(50),
+            'p95': self.percentil(95),
+            'p99': self.percentil(99)
+        }
+
+
+class RegistroSentencia:
+    """Medición de una sentencia ejecutada dentro de una operación"""
+
+    def __init__(self, nombre: str, sql: str, duracion: float, filas: int,
+                 error: Optional[str] = None, plan: Optional[List[str]] = None):
+        self.nombre = nombre
+        self.sql = sql
+        self.duracion = duracion
+        self.filas = filas
+        self.error = error
+        self.plan = plan
+
+    def a_dict(self) -> dict:
+        """Convierte el registro a diccionario"""
+        return {
+            'nombre': self.nombre,
+            'sql': self.sql,
+            'duracion': self.duracion,
+            'filas': self.filas,
+            'error': self.error,
+            'plan': self.plan
+        }
+
+
+class RegistroOperacion:
+    """Medición de una llamada pública a BaseDatos"""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.inicio = time.perf_counter()
+        self.duracion = 0.0
+        self.tiempo_conexion = 0.0
+        self.sentencias: List[RegistroSentencia] = []
+        self.error: Optional[str] = None
+
+    @property
+    def filas(self) -> int:
+        return sum(sentencia.filas for sentencia in self.sentencias)
+
+    def a_dict(self) -> dict:
+        """Convierte el registro a diccionario"""
+        return {
+            'operacion': self.nombre,
+            'duracion': self.duracion,
+            'tiempo_conexion': self.tiempo_conexion,
+            'filas': self.filas,
+            'error': self.error,
+            'sentencias': [sentencia.a_dict() for sentencia in self.sentencias]
+        }
+
+
+class Instrumentacion:
+    """Gancho de medición para BaseDatos
+
+    Mantiene histogramas por operación y por sentencia, avisa a los ganchos
+    registrados al terminar cada operación y escribe en un archivo JSON Lines las
+    sentencias que superan ``umbral_lento`` segundos, opcionalmente con su
+    ``EXPLAIN QUERY PLAN``.
+    """
+
+    def __init__(self, umbral_lento: float = 0.1, ruta_log_lento: Optional[str] = None,
+                 capturar_plan: bool = False):
+        self.umbral_lento = umbral_lento
+        self.ruta_log_lento = ruta_log_lento
+        self.capturar_plan = capturar_plan
+        self._ganchos: List[Callable[[RegistroOperacion], None]] = []
+        self._histogramas_operaciones: Dict[str, Histograma] = {}
+        self._histogramas_sentencias: Dict[str, Histograma] = {}
+        self._histograma_conexion = Histograma()
+        self._errores: Dict[str, int] = {}
+        self._lentas: List[dict] = []
+        self._candado = threading.Lock()
+
+    def agregar_gancho(self, gancho: Callable[[RegistroOperacion], None]):
+        """Registra una función que recibe cada RegistroOperacion terminado"""
+        self._ganchos.append(gancho)
+
+    def quitar_gancho(self, gancho: Callable[[RegistroOperacion], None]):
+        if gancho in self._ganchos:
+            self._ganchos.remove(gancho)
+
+    def iniciar_operacion(self, nombre: str) -> RegistroOperacion:
+        return RegistroOperacion(nombre)
+
+    def medir_sentencia(self, operacion: Optional[RegistroOperacion], conexion: Optional[sqlite3.Connection],
+                        nombre: str, sql: str, parametros: Sequence, duracion: float,
+                        filas: int, error: Optional[str] = None):
+        """Registra una sentencia y, si fue lenta, la escribe en el log de consultas lentas"""
+        plan = None
+        lenta = duracion >= self.umbral_lento
+        if lenta and self.capturar_plan and conexion is not None:
+            plan = self.explicar(conexion, sql, parametros)
+
+        registro = RegistroSentencia(nombre, sql, duracion, filas, error, plan)
+        if operacion is not None:
+            operacion.sentencias.append(registro)
+            if error and not operacion.error:
+                operacion.error = error
+
+        with self._candado:
+            self._histogramas_sentencias.setdefault(nombre, Histograma()).observar(duracion)
+
+        if lenta:
+            entrada = registro.a_dict()
+            entrada['operacion'] = operacion.nombre if operacion else None
+            entrada['fecha'] = datetime.now().isoformat(timespec='seconds')
+            self._escribir_lenta(entrada)
+
+    def medir_conexion(self, operacion: Optional[RegistroOperacion], duracion: float):
+        if operacion is not None:
+            operacion.tiempo_conexion += duracion
+        with self._candado:
+            self._histograma_conexion.observar(duracion)
+
+    def finalizar_operacion(self, operacion: RegistroOperacion):
+        operacion.duracion = time.perf_counter() - operacion.inicio
+        with self._candado:
+            self._histogramas_operaciones.setdefault(operacion.nombre, Histograma()).observar(operacion.duracion)
+            if operacion.error:
+                self._errores[operacion.nombre] = self._errores.get(operacion.nombre, 0) + 1
+
+        for gancho in list(self._ganchos):
+            try:
+                gancho(operacion)
+            except Exception as e:
+                print(f"Error en gancho de instrumentación: {e}")
+
+    @staticmethod
+    def explicar(conexion: sqlite3.Connection, sql: str, parametros: Sequence = ()) -> List[str]:
+        """Devuelve las líneas de EXPLAIN QUERY PLAN de una sentencia"""
+        try:
+            filas = conexion.execute("EXPLAIN QUERY PLAN " + sql, tuple(parametros)).fetchall()
+            return [fila[-1] for fila in filas]
+        except sqlite3.Error as e:
+            return [f"(sin plan: {e})"]
+
+    def _escribir_lenta(self, entrada: dict):
+        with self._candado:
+            self._lentas.append(entrada)
+            if len(self._lentas) > 1000:
+                del self._lentas[:len(self._lentas) - 1000]
+            if self.ruta_log_lento:
+                try:
+                    with open(self.ruta_log_lento, 'a', encoding='utf-8') as archivo:
+                        archivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    print(f"Error al escribir log de consultas lentas: {e}")
+
+    def consultas_lentas(self) -> List[dict]:
+        """Últimas consultas lentas registradas en memoria"""
+        with self._candado:
+            return list(self._lentas)
+
+    def resumen(self) -> dict:
+        """Histogramas de operaciones, sentencias y tiempo de conexión"""
+        with self._candado:
+            return {
+                'operaciones': {nombre: h.a_dict() for nombre, h in self._histogramas_operaciones.items()},
+                'sentencias': {nombre: h.a_dict() for nombre, h in self._histogramas_sentencias.items()},
+                'conexion': self._histograma_conexion.a_dict(),
+                'errores': dict(self._errores)
+            }
+
+    def reiniciar(self):
+        with self._candado:
+            self._histogramas_operaciones.clear()
+            self._histogramas_sentencias.clear()
+            self._histograma_conexion = Histograma()
+            self._errores.clear()
+            self._lentas.clear()
+
+
+def instrumentado(metodo):
+    """Decorador para las operaciones públicas de BaseDatos
+
+    Sin instrumentación configurada sólo añade una comprobación de atributo. Las
+    operaciones anidadas (por ejemplo las que llama ``inicializar_datos_ejemplo``)
+    se acumulan en la operación exterior.
+    """
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        instrumentacion = self.instrumentacion
+        if instrumentacion is None or self._operacion is not None:
+            return metodo(self, *args, **kwargs)
+
+        operacion = instrumentacion.iniciar_operacion(metodo.__name__)
+        self._operacion = operacion
+        try:
+            return metodo(self, *args, **kwargs)
+        except Exception as e:
+            operacion.error = operacion.error or str(e)
+            raise
+        finally:
+            self._operacion = None
+            instrumentacion.finalizar_operacion(operacion)
+    return envoltura
@@ -0,0 +1,516 @@
+"""
+Migraciones versionadas del esquema de la Calculadora de Impuestos
+La versión aplicada se guarda en PRAGMA user_version
+
+Uso:
+    python -m src.db.migraciones RUTA_DB estado
+    python -m src.db.migraciones RUTA_DB aplicar [--hasta N]
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+from src.model.transaccion import desglose_a_json, desglose_de_venta
+
+
+class Migracion:
+    """Cambio de esquema con número de versión
+
+    ``pasos`` es una lista de sentencias SQL o una función que recibe la conexión.
+    Una migración normal se aplica en una sola transacción junto con el cambio de
+    ``user_version``. Una migración ``en_linea`` (construcción de índices) ejecuta
+    cada paso en su propia transacción corta con la base en modo WAL: las lecturas
+    siguen sirviéndose y las escrituras sólo esperan al índice en construcción.
+    Sus pasos deben ser idempotentes (``IF NOT EXISTS``) para poder reanudarse.
+    """
+
+    def __init__(self, version: int, descripcion: str,
+                 pasos: Union[Sequence[str], Callable[[sqlite3.Connection], None]],
+                 en_linea: bool = False):
+        self.version = version
+        self.descripcion = descripcion
+        self.pasos = pasos
+        self.en_linea = en_linea
+
+    def ejecutar(self, conexion: sqlite3.Connection, paso: Optional[int] = None):
+        if callable(self.pasos):
+            self.pasos(conexion)
+        elif paso is None:
+            for sentencia in self.pasos:
+                conexion.execute(sentencia)
+        else:
+            conexion.execute(self.pasos[paso])
+
+
+def _agregar_clave_idempotencia(conexion: sqlite3.Connection):
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(transacciones)")}
+    if 'clave_idempotencia' not in columnas:
+        conexion.execute("ALTER TABLE transacciones ADD COLUMN clave_idempotencia TEXT")
+    conexion.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transacciones_idempotencia
+        ON transacciones(clave_idempotencia) WHERE clave_idempotencia IS NOT NULL
+    """)
+
+
+def _agregar_instantanea_categoria(conexion: sqlite3.Connection):
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(transacciones)")}
+    for columna, tipo in (('categoria_id', 'INTEGER'), ('producto_nombre', 'TEXT'),
+                          ('categoria_nombre', 'TEXT'), ('desglose_impuestos', 'TEXT')):
+        if columna not in columnas:
+            conexion.execute(f"ALTER TABLE transacciones ADD COLUMN {columna} {tipo}")
+    # Las ventas anteriores toman la categoría actual de su producto
+    conexion.execute("""
+        UPDATE transacciones AS t
+        SET categoria_id = p.categoria_id, producto_nombre = p.nombre, categoria_nombre = c.nombre
+        FROM productos p JOIN categorias c ON c.id = p.categoria_id
+        WHERE p.id = t.producto_id AND t.categoria_id IS NULL
+    """)
+    # Antes de la migración 7, que arma las líneas y los totales mensuales a partir del desglose
+    _completar_desglose(conexion)
+    conexion.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transacciones_categoria_fecha
+        ON transacciones(categoria_id, fecha_transaccion)
+    """)
+
+
+def _repartir_total(desglose: Dict[str, float], total: float) -> Optional[Dict[str, float]]:
+    """Desglose ajustado para que sume ``total``, o None si no hay impuestos entre los que repartirlo"""
+    calculado = round(sum(desglose.values()), 2)
+    if abs(calculado - total) < 0.005:
+        return desglose
+    if calculado <= 0:
+        return None
+    repartido = {impuesto: round(valor * total / calculado, 2) for impuesto, valor in desglose.items()}
+    # La diferencia de redondeo queda en el impuesto mayor
+    mayor = max(repartido, key=repartido.get)
+    repartido[mayor] = round(repartido[mayor] + total - sum(repartido.values()), 2)
+    return repartido
+
+
+def _completar_desglose(conexion: sqlite3.Connection):
+    """Desglose de las ventas guardadas sin él, con los impuestos de su categoría
+
+    Las tasas de entonces no se conocen: el ``total_impuestos`` guardado se reparte
+    en la proporción que dan las reglas actuales, así las líneas por impuesto suman
+    lo que se cobró. Las ventas de una categoría sin reglas ni tasa se dejan igual.
+    """
+    calculadora = CalculadoraImpuestos()
+    categorias = {categoria.value: categoria for categoria in CategoriaProducto}
+    cambios = []
+    for transaccion_id, cantidad, precio_unitario, total, categoria_nombre, tasa_iva in conexion.execute("""
+        SELECT t.id, t.cantidad, t.precio_unitario, t.total_impuestos, t.categoria_nombre, c.tasa_iva
+        FROM transacciones t LEFT JOIN categorias c ON c.id = t.categoria_id
+        WHERE t.desglose_impuestos IS NULL
+    """).fetchall():
+        categoria = categorias.get(categoria_nombre)
+        try:
+            if categoria is not None:
+                unitarios = calculadora.calcular_impuestos(precio_unitario, categoria)['impuestos']
+            elif tasa_iva is not None:
+                unitarios = calculadora.desglose_iva(precio_unitario, tasa_iva)
+            else:
+                continue
+        except (ValueError, TypeError):
+            continue
+        desglose = _repartir_total(desglose_de_venta(unitarios, cantidad), total)
+        if desglose:
+            cambios.append((desglose_a_json(desglose), transaccion_id))
+    conexion.executemany("UPDATE transacciones SET desglose_impuestos = ? WHERE id = ?", cambios)
+
+
+# Tablas cuya generación (contador de escrituras) y última modificación se guardan en ``estampas``
+TABLAS_CON_ESTAMPA = ('categorias', 'productos', 'impuestos_adicionales', 'transacciones')
+
+
+def _crear_estampas(conexion: sqlite3.Connection):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS estampas (
+            tabla TEXT PRIMARY KEY,
+            generacion INTEGER NOT NULL DEFAULT 0,
+            fecha_actualizacion TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    for tabla in TABLAS_CON_ESTAMPA:
+        conexion.execute("INSERT OR IGNORE INTO estampas (tabla, generacion, fecha_actualizacion) "
+                         "VALUES (?, 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))", (tabla,))
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            conexion.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_estampa_{tabla}_{evento.lower()}
+                AFTER {evento} ON {tabla}
+                BEGIN
+                    UPDATE estampas
+                    SET generacion = generacion + 1, fecha_actualizacion = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                    WHERE tabla = '{tabla}';
+                END
+            """)
+
+
+MIGRACIONES: List[Migracion] = [
+    # Esquema original: en bases anteriores a las migraciones no cambia nada
+    Migracion(1, "Esquema base", [
+        """
+        CREATE TABLE IF NOT EXISTS categorias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL UNIQUE,
+            descripcion TEXT,
+            tasa_iva REAL DEFAULT 0.19,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS productos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            precio_base REAL NOT NULL CHECK (precio_base > 0),
+            categoria_id INTEGER NOT NULL,
+            estado TEXT DEFAULT 'Activo' CHECK (estado IN ('Activo', 'Inactivo', 'Descontinuado')),
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS impuestos_adicionales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL UNIQUE,
+            tasa REAL NOT NULL CHECK (tasa >= 0 AND tasa <= 1),
+            descripcion TEXT,
+            aplicable_a_categoria_id INTEGER,
+            activo BOOLEAN DEFAULT 1,
+            FOREIGN KEY (aplicable_a_categoria_id) REFERENCES categorias (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transacciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL CHECK (cantidad > 0),
+            precio_unitario REAL NOT NULL CHECK (precio_unitario > 0),
+            subtotal REAL NOT NULL,
+            total_impuestos REAL NOT NULL,
+            total_final REAL NOT NULL,
+            fecha_transaccion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (producto_id) REFERENCES productos (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos(categoria_id)",
+        "CREATE INDEX IF NOT EXISTS idx_transacciones_fecha ON transacciones(fecha_transaccion)",
+        "CREATE INDEX IF NOT EXISTS idx_productos_estado ON productos(estado)",
+    ]),
+    Migracion(2, "Control de diarios de la escritura diferida", [
+        """
+        CREATE TABLE IF NOT EXISTS cola_escritura_control (
+            diario TEXT PRIMARY KEY,
+            ultima_secuencia INTEGER NOT NULL
+        )
+        """,
+    ]),
+    Migracion(3, "Clave de idempotencia de transacciones", _agregar_clave_idempotencia),
+    Migracion(4, "Índices de transacciones por producto y productos por estado", [
+        "CREATE INDEX IF NOT EXISTS idx_transacciones_producto_fecha ON transacciones(producto_id, fecha_transaccion)",
+        "CREATE INDEX IF NOT EXISTS idx_productos_estado_nombre ON productos(estado, nombre)",
+        "ANALYZE",
+    ], en_linea=True),
+    # Un índice por consulta del catálogo: sin recorridos completos de tabla ni ordenamientos
+    # temporales (ver tests/test_planes_consulta.py). Los de una sola columna quedan cubiertos.
+    Migracion(5, "Índices para ordenar productos y cubrir agregados de ventas", [
+        "CREATE INDEX IF NOT EXISTS idx_productos_categoria_nombre ON productos(categoria_id, nombre)",
+        "CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre)",
+        "CREATE INDEX IF NOT EXISTS idx_transacciones_total ON transacciones(total_final)",
+        "DROP INDEX IF EXISTS idx_productos_categoria",
+        "DROP INDEX IF EXISTS idx_productos_estado",
+        "ANALYZE",
+    ], en_linea=True),
+    Migracion(6, "Instantánea de categoría, nombres y desglose en transacciones",
+              _agregar_instantanea_categoria),
+    # Líneas por impuesto y totales mensuales para las declaraciones. Los disparadores las
+    # mantienen en la misma transacción que la venta, sea cual sea el camino de escritura.
+    Migracion(7, "Líneas de impuestos por transacción y totales mensuales por impuesto", [
+        """
+        CREATE TABLE IF NOT EXISTS transacciones_impuestos (
+            transaccion_id INTEGER NOT NULL REFERENCES transacciones (id),
+            impuesto TEXT NOT NULL,
+            valor REAL NOT NULL,
+            PRIMARY KEY (transaccion_id, impuesto)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS impuestos_mensuales (
+            periodo TEXT NOT NULL,
+            impuesto TEXT NOT NULL,
+            transacciones INTEGER NOT NULL,
+            base REAL NOT NULL,
+            valor REAL NOT NULL,
+            PRIMARY KEY (periodo, impuesto)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_transacciones_impuestos_insertar
+        AFTER INSERT ON transacciones WHEN NEW.desglose_impuestos IS NOT NULL
+        BEGIN
+            INSERT INTO transacciones_impuestos (transaccion_id, impuesto, valor)
+            SELECT NEW.id, key, value FROM json_each(NEW.desglose_impuestos);
+            INSERT INTO impuestos_mensuales (periodo, impuesto, transacciones, base, valor)
+            SELECT strftime('%Y-%m', NEW.fecha_transaccion), key, 1, NEW.subtotal, value
+            FROM json_each(NEW.desglose_impuestos) WHERE true
+            ON CONFLICT (periodo, impuesto) DO UPDATE
+            SET transacciones = transacciones + 1, base = base + excluded.base, valor = valor + excluded.valor;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_transacciones_impuestos_eliminar
+        AFTER DELETE ON transacciones WHEN OLD.desglose_impuestos IS NOT NULL
+        BEGIN
+            DELETE FROM transacciones_impuestos WHERE transaccion_id = OLD.id;
+            UPDATE impuestos_mensuales
+            SET transacciones = transacciones - 1, base = base - OLD.subtotal,
+                valor = valor - (SELECT value FROM json_each(OLD.desglose_impuestos) WHERE key = impuesto)
+            WHERE periodo = strftime('%Y-%m', OLD.fecha_transaccion)
+              AND impuesto IN (SELECT key FROM json_each(OLD.desglose_impuestos));
+        END
+        """,
+        # Un cambio de desglose o de fecha equivale a quitar la venta y volver a agregarla
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_transacciones_impuestos_actualizar
+        AFTER UPDATE OF desglose_impuestos, fecha_transaccion, subtotal ON transacciones
+        BEGIN
+            DELETE FROM transacciones_impuestos WHERE transaccion_id = OLD.id;
+            UPDATE impuestos_mensuales
+            SET transacciones = transacciones - 1, base = base - OLD.subtotal,
+                valor = valor - (SELECT value FROM json_each(OLD.desglose_impuestos) WHERE key = impuesto)
+            WHERE OLD.desglose_impuestos IS NOT NULL
+              AND periodo = strftime('%Y-%m', OLD.fecha_transaccion)
+              AND impuesto IN (SELECT key FROM json_each(OLD.desglose_impuestos));
+            INSERT INTO transacciones_impuestos (transaccion_id, impuesto, valor)
+            SELECT NEW.id, key, value FROM json_each(NEW.desglose_impuestos)
+            WHERE NEW.desglose_impuestos IS NOT NULL;
+            INSERT INTO impuestos_mensuales (periodo, impuesto, transacciones, base, valor)
+            SELECT strftime('%Y-%m', NEW.fecha_transaccion), key, 1, NEW.subtotal, value
+            FROM json_each(NEW.desglose_impuestos) WHERE NEW.desglose_impuestos IS NOT NULL
+            ON CONFLICT (periodo, impuesto) DO UPDATE
+            SET transacciones = transacciones + 1, base = base + excluded.base, valor = valor + excluded.valor;
+        END
+        """,
+        """
+        INSERT OR IGNORE INTO transacciones_impuestos (transaccion_id, impuesto, valor)
+        SELECT t.id, j.key, j.value
+        FROM transacciones t, json_each(t.desglose_impuestos) j
+        WHERE t.desglose_impuestos IS NOT NULL
+        """,
+        """
+        INSERT OR REPLACE INTO impuestos_mensuales (periodo, impuesto, transacciones, base, valor)
+        SELECT strftime('%Y-%m', t.fecha_transaccion), l.impuesto, COUNT(*), SUM(t.subtotal), SUM(l.valor)
+        FROM transacciones_impuestos l
+        JOIN transacciones t ON t.id = l.transaccion_id
+        GROUP BY 1, 2
+        """,
+    ]),
+    # Historial de tasas: cada versión rige desde ``vigente_desde`` hasta la siguiente
+    Migracion(8, "Versiones de tasas con fecha de vigencia", [
+        """
+        CREATE TABLE IF NOT EXISTS tasas_categoria (
+            categoria_id INTEGER NOT NULL REFERENCES categorias (id) ON DELETE CASCADE,
+            vigente_desde TIMESTAMP NOT NULL,
+            tasa_iva REAL NOT NULL CHECK (tasa_iva >= 0 AND tasa_iva <= 1),
+            PRIMARY KEY (categoria_id, vigente_desde)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tasas_impuesto (
+            impuesto TEXT NOT NULL,
+            vigente_desde TIMESTAMP NOT NULL,
+            tasa REAL NOT NULL CHECK (tasa >= 0 AND tasa <= 1),
+            PRIMARY KEY (impuesto, vigente_desde)
+        ) WITHOUT ROWID
+        """,
+        # Tasas de la calculadora al introducir el historial, vigentes desde siempre
+        """
+        INSERT OR IGNORE INTO tasas_impuesto (impuesto, vigente_desde, tasa) VALUES
+            ('IVA 5%', '0001-01-01 00:00:00', 0.05),
+            ('IVA 19%', '0001-01-01 00:00:00', 0.19),
+            ('Impuesto Nacional al Consumo', '0001-01-01 00:00:00', 0.08),
+            ('Impuesto de Rentas a los Licores', '0001-01-01 00:00:00', 0.25),
+            ('Impuesto de Bolsas Plásticas', '0001-01-01 00:00:00', 0.20)
+        """,
+        """
+        INSERT OR IGNORE INTO tasas_categoria (categoria_id, vigente_desde, tasa_iva)
+        SELECT id, '0001-01-01 00:00:00', tasa_iva FROM categorias WHERE tasa_iva IS NOT NULL
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_categorias_tasa_insertar
+        AFTER INSERT ON categorias WHEN NEW.tasa_iva IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO tasas_categoria (categoria_id, vigente_desde, tasa_iva)
+            VALUES (NEW.id, COALESCE(NEW.fecha_creacion, CURRENT_TIMESTAMP), NEW.tasa_iva);
+        END
+        """,
+        # actualizar_categoria sigue sobrescribiendo tasa_iva; la versión anterior queda en el historial
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_categorias_tasa_actualizar
+        AFTER UPDATE OF tasa_iva ON categorias WHEN NEW.tasa_iva IS NOT OLD.tasa_iva
+        BEGIN
+            INSERT OR REPLACE INTO tasas_categoria (categoria_id, vigente_desde, tasa_iva)
+            VALUES (NEW.id, strftime('%Y-%m-%d %H:%M:%f', 'now'), NEW.tasa_iva);
+        END
+        """,
+    ]),
+    Migracion(9, "Control de rangos aplicados por el recálculo de impuestos", [
+        """
+        CREATE TABLE IF NOT EXISTS recalculo_control (
+            ejecucion TEXT NOT NULL,
+            desde_id INTEGER NOT NULL,
+            hasta_id INTEGER NOT NULL,
+            cambiadas INTEGER NOT NULL,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (ejecucion, desde_id)
+        ) WITHOUT ROWID
+        """,
+    ]),
+    Migracion(10, "Índice de ventas por mes para el panel de estadísticas", [
+        "CREATE INDEX IF NOT EXISTS idx_transacciones_mes ON transacciones(substr(fecha_transaccion, 1, 7), total_final)",
+        "ANALYZE",
+    ], en_linea=True),
+    # Las cachés de la web comparan generaciones en lugar de volver a consultar las tablas
+    Migracion(11, "Estampas de generación y última modificación por tabla", _crear_estampas),
+    # El agregado por categoría lee todas las ventas: con el índice de la migración 6 buscaba
+    # cada fila en la tabla y era más lento que recorrerla. Este lo resuelve sin tocar la tabla.
+    Migracion(12, "Índice cubriente de ventas por categoría", [
+        """
+        CREATE INDEX IF NOT EXISTS idx_transacciones_categoria_totales
+        ON transacciones(categoria_id, categoria_nombre, cantidad, subtotal, total_impuestos, total_final)
+        """,
+        "DROP INDEX IF EXISTS idx_transacciones_categoria_fecha",
+        "ANALYZE",
+    ], en_linea=True),
+    # Bases que pasaron la migración 6 sin rellenar el desglose; los disparadores de la
+    # migración 7 agregan sus líneas y totales mensuales al actualizarlo
+    Migracion(13, "Desglose de impuestos de ventas anteriores a la instantánea", _completar_desglose),
+]
+
+
+class Migrador:
+    """Aplica las migraciones pendientes de una base SQLite en orden de versión"""
+
+    def __init__(self, nombre_db: str, migraciones: Optional[List[Migracion]] = None,
+                 progreso: Optional[Callable[[str], None]] = None, espera_bloqueo: float = 30.0):
+        self.nombre_db = nombre_db
+        self.migraciones = sorted(migraciones if migraciones is not None else MIGRACIONES,
+                                  key=lambda migracion: migracion.version)
+        self.progreso = progreso
+        self.espera_bloqueo = espera_bloqueo
+        versiones = [migracion.version for migracion in self.migraciones]
+        if len(set(versiones)) != len(versiones):
+            raise ValueError("Hay migraciones con la misma versión")
+
+    def _informar(self, mensaje: str):
+        if self.progreso:
+            self.progreso(mensaje)
+
+    def _conectar(self) -> sqlite3.Connection:
+        # Sin transacciones implícitas: cada migración controla su BEGIN/COMMIT
+        conexion = sqlite3.connect(self.nombre_db, timeout=self.espera_bloqueo, isolation_level=None)
+        conexion.execute("PRAGMA foreign_keys = ON")
+        return conexion
+
+    @property
+    def version_final(self) -> int:
+        return self.migraciones[-1].version if self.migraciones else 0
+
+    def version_actual(self) -> int:
+        conexion = self._conectar()
+        try:
+            return conexion.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conexion.close()
+
+    def pendientes(self) -> List[Migracion]:
+        actual = self.version_actual()
+        return [migracion for migracion in self.migraciones if migracion.version > actual]
+
+    def _aplicar_atomica(self, conexion: sqlite3.Connection, migracion: Migracion):
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            # Otro proceso pudo aplicarla mientras esperábamos el bloqueo
+            if conexion.execute("PRAGMA user_version").fetchone()[0] >= migracion.version:
+                conexion.execute("ROLLBACK")
+                return
+            migracion.ejecutar(conexion)
+            conexion.execute(f"PRAGMA user_version = {int(migracion.version)}")
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def _aplicar_en_linea(self, conexion: sqlite3.Connection, migracion: Migracion):
+        # En WAL los lectores no se bloquean mientras se construye cada índice
+        if self.nombre_db != ':memory:':
+            conexion.execute("PRAGMA journal_mode = WAL")
+        pasos = 1 if callable(migracion.pasos) else len(migracion.pasos)
+        for paso in range(pasos):
+            self._informar(f"  paso {paso + 1}/{pasos}")
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                migracion.ejecutar(conexion, None if callable(migracion.pasos) else paso)
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+        self._aplicar_atomica(conexion, Migracion(migracion.version, migracion.descripcion, []))
+
+    def aplicar(self, hasta: Optional[int] = None) -> bool:
+        """Aplica las migraciones pendientes (hasta la versión ``hasta`` inclusive)"""
+        conexion = None
+        migracion = None
+        try:
+            conexion = self._conectar()
+            actual = conexion.execute("PRAGMA user_version").fetchone()[0]
+            for migracion in self.migraciones:
+                if migracion.version <= actual or (hasta is not None and migracion.version > hasta):
+                    continue
+                inicio = time.perf_counter()
+                self._informar(f"Migración {migracion.version}: {migracion.descripcion}")
+                if migracion.en_linea:
+                    self._aplicar_en_linea(conexion, migracion)
+                else:
+                    self._aplicar_atomica(conexion, migracion)
+                self._informar(f"  aplicada en {time.perf_counter() - inicio:.2f} s")
+            return True
+        except sqlite3.Error as e:
+            version = f" {migracion.version}" if migracion else ""
+            print(f"Error al aplicar la migración{version}: {e}")
+            return False
+        finally:
+            if conexion:
+                conexion.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m src.db.migraciones',
+                                     description='Migraciones del esquema de la base de datos')
+    parser.add_argument('nombre_db', help='Ruta de la base SQLite')
+    parser.add_argument('accion', nargs='?', default='estado', choices=['estado', 'aplicar'])
+    parser.add_argument('--hasta', type=int, help='Aplicar sólo hasta esta versión')
+    argumentos = parser.parse_args(argv)
+
+    migrador = Migrador(argumentos.nombre_db, progreso=print)
+    if argumentos.accion == 'aplicar':
+        return 0 if migrador.aplicar(argumentos.hasta) else 1
+
+    actual = migrador.version_actual()
+    pendientes = migrador.pendientes()
+    print(f"Versión actual: {actual} (última disponible: {migrador.version_final})")
+    if not pendientes:
+        print("No hay migraciones pendientes")
+    for migracion in pendientes:
+        modo = " [en línea]" if migracion.en_linea else ""
+        print(f"  pendiente {migracion.version}: {migracion.descripcion}{modo}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
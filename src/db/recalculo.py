@@ -0,0 +1,266 @@
+"""
+Recálculo paralelo de impuestos de transacciones históricas
+Divide la tabla por rangos de id, calcula en varios procesos y aplica los cambios por lotes
+
+Uso:
+    python -m src.db.recalculo RUTA_DB --simular
+    python -m src.db.recalculo RUTA_DB --procesos 8 --rango 50000 [--ejecucion NOMBRE]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from src.db.database import BaseDatos, conectar_solo_lectura
+from src.db.sentencias import RegistroSentencias, registro_sentencias
+from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+from src.model.tasas import IndiceTasas
+from src.model.transaccion import desglose_a_json, desglose_de_venta, desglose_desde_json
+
+# Diferencias menores no se consideran cambio (redondeo a centavos)
+TOLERANCIA = 0.005
+
+CATEGORIAS_CALCULADORA = {categoria.value: categoria for categoria in CategoriaProducto}
+
+# El recálculo suele arrancar desde un hilo (la cola de trabajos de la aplicación): un fork
+# copiaría candados tomados por otros hilos. Los trabajadores parten de un proceso limpio.
+CONTEXTO_PROCESOS = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+# Estado de cada proceso trabajador (lo fija _iniciar_trabajador)
+_conexion_trabajador: Optional[sqlite3.Connection] = None
+_calculadora_trabajador: Optional[CalculadoraImpuestos] = None
+
+
+def recalcular_transaccion(calculadora: CalculadoraImpuestos, cantidad: int, precio_unitario: float,
+                           fecha: str, categoria_id: Optional[int],
+                           categoria_nombre: Optional[str]) -> Optional[Tuple[float, dict]]:
+    """Impuestos de una venta con las tasas vigentes en su fecha: (total, desglose) o None si no se puede"""
+    categoria = CATEGORIAS_CALCULADORA.get(categoria_nombre)
+    try:
+        if categoria is not None:
+            resultado = calculadora.calcular_impuestos(precio_unitario, categoria, fecha)
+            impuestos_unitarios = resultado['impuestos']
+        else:
+            tasa_iva = calculadora.historial.tasa(categoria_id, fecha) if calculadora.historial else None
+            if tasa_iva is None:
+                return None
+            impuestos_unitarios = calculadora.desglose_iva(precio_unitario, tasa_iva)
+    except (ValueError, TypeError):
+        return None
+    desglose = desglose_de_venta(impuestos_unitarios, cantidad)
+    return round(sum(desglose.values()), 2), desglose
+
+
+def desglose_distinto(guardado: Optional[str], desglose: dict) -> bool:
+    """El desglose guardado (JSON, o NULL en ventas anteriores a la instantánea) no coincide con el calculado"""
+    anterior = desglose_desde_json(guardado)
+    return (anterior.keys() != desglose.keys()
+            or any(abs(anterior[impuesto] - valor) > TOLERANCIA for impuesto, valor in desglose.items()))
+
+
+def _iniciar_trabajador(nombre_db: str, historial: IndiceTasas):
+    global _conexion_trabajador, _calculadora_trabajador
+    _conexion_trabajador = conectar_solo_lectura(nombre_db)
+    _calculadora_trabajador = CalculadoraImpuestos(historial)
+
+
+def _recalcular_rango(desde_id: int, hasta_id: int) -> tuple:
+    """Lee un rango en el trabajador y devuelve (desde, hasta, revisadas, omitidas, cambios)
+
+    Cada cambio es (id, total anterior, total nuevo, desglose JSON). Una venta cambia si
+    difiere el total o si el desglose guardado falta o es otro, aunque el total coincida.
+    """
+    filas = _conexion_trabajador.execute(registro_sentencias.sql('transacciones_rango'),
+                                         (desde_id, hasta_id)).fetchall()
+    cambios = []
+    omitidas = 0
+    for (transaccion_id, cantidad, precio_unitario, total_anterior, fecha, categoria_id, categoria_nombre,
+         desglose_guardado) in filas:
+        resultado = recalcular_transaccion(_calculadora_trabajador, cantidad, precio_unitario, fecha,
+                                           categoria_id, categoria_nombre)
+        if resultado is None:
+            omitidas += 1
+            continue
+        total, desglose = resultado
+        if abs(total - total_anterior) > TOLERANCIA or desglose_distinto(desglose_guardado, desglose):
+            cambios.append((transaccion_id, total_anterior, total, desglose_a_json(desglose)))
+    return desde_id, hasta_id, len(filas), omitidas, cambios
+
+
+class ResultadoRecalculo:
+    """Resumen de una ejecución (o de una simulación) del recálculo"""
+
+    def __init__(self, ejecucion: str, simulado: bool):
+        self.ejecucion = ejecucion
+        self.simulado = simulado
+        self.rangos = 0
+        self.rangos_reanudados = 0
+        self.revisadas = 0
+        self.omitidas = 0
+        self.cambiadas = 0
+        self.diferencia = 0.0
+        self.ejemplos: List[Tuple[int, float, float]] = []
+        self.duracion = 0.0
+
+    def a_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class RecalculoImpuestos:
+    """Recalcula ``total_impuestos``, ``total_final`` y el desglose de todas las transacciones
+
+    Cada proceso del pool abre su propia conexión de sólo lectura y calcula un
+    rango de ids con las tasas vigentes en la fecha de cada venta. El proceso
+    principal es el único que escribe: aplica los cambios de cada rango con
+    ``executemany`` en una transacción que también anota el rango en
+    ``recalculo_control``. Una ejecución interrumpida se reanuda con el mismo
+    nombre de ``ejecucion`` y salta los rangos ya anotados. En modo ``simular``
+    no escribe nada y sólo informa las diferencias.
+
+    Si ``progreso`` lanza una excepción, el recálculo se detiene sin calcular
+    los rangos pendientes; los ya aplicados quedan anotados para reanudar.
+    """
+
+    def __init__(self, nombre_db: str, procesos: Optional[int] = None, tamano_rango: int = 20000,
+                 simular: bool = False, ejecucion: Optional[str] = None, max_ejemplos: int = 20,
+                 progreso: Optional[Callable[[str, int, int], None]] = None,
+                 sentencias: Optional[RegistroSentencias] = None):
+        self.nombre_db = nombre_db
+        self.procesos = procesos or os.cpu_count() or 1
+        self.tamano_rango = tamano_rango
+        self.simular = simular
+        self.ejecucion = ejecucion or datetime.now().strftime('recalculo-%Y%m%d-%H%M%S')
+        self.max_ejemplos = max_ejemplos
+        self.progreso = progreso
+        self.sentencias = sentencias or registro_sentencias
+
+    def _informar(self, etapa: str, hechos: int, total: int):
+        if self.progreso:
+            self.progreso(etapa, hechos, total)
+
+    def _rangos(self, conexion: sqlite3.Connection) -> List[Tuple[int, int]]:
+        minimo, maximo = conexion.execute(self.sentencias.sql('transacciones_limites')).fetchone()
+        if minimo is None:
+            return []
+        return [(desde, min(desde + self.tamano_rango - 1, maximo))
+                for desde in range(minimo, maximo + 1, self.tamano_rango)]
+
+    def _aplicar(self, conexion: sqlite3.Connection, desde_id: int, hasta_id: int, cambios: list):
+        """Cambios del rango y su marca de control en una sola transacción"""
+        cursor = conexion.cursor()
+        try:
+            self.sentencias.ejecutar_muchos(cursor, 'transaccion_recalcular',
+                                            [(total, total, desglose, transaccion_id)
+                                             for transaccion_id, _, total, desglose in cambios])
+            self.sentencias.ejecutar(cursor, 'recalculo_rango_guardar',
+                                     (self.ejecucion, desde_id, hasta_id, len(cambios)))
+            conexion.commit()
+        except sqlite3.Error:
+            conexion.rollback()
+            raise
+
+    def ejecutar(self) -> ResultadoRecalculo:
+        """Recalcula (o simula) los rangos pendientes
+
+        Los errores se propagan (``sqlite3.Error``, o ``RuntimeError`` si no se
+        pudo preparar el esquema) para que quien lo llama, como la cola de
+        trabajos, los informe.
+        """
+        inicio = time.perf_counter()
+        resultado = ResultadoRecalculo(self.ejecucion, self.simular)
+        base = BaseDatos(self.nombre_db, self.sentencias)
+        if not base.crear_tablas():
+            raise RuntimeError(f"No se pudo preparar el esquema en {self.nombre_db}")
+        historial = base.cargar_historial_tasas()
+
+        conexion = sqlite3.connect(self.nombre_db, timeout=30)
+        try:
+            # Se escribe mientras los trabajadores siguen leyendo: sólo en WAL no se bloquean entre sí
+            modo = conexion.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            if modo != 'wal':
+                raise sqlite3.OperationalError(f"El recálculo necesita el modo WAL y la base está en {modo}")
+            rangos = self._rangos(conexion)
+            if not self.simular:
+                hechos = {fila[0] for fila in conexion.execute(self.sentencias.sql('recalculo_rangos_hechos'),
+                                                               (self.ejecucion,))}
+                pendientes = [rango for rango in rangos if rango[0] not in hechos]
+            else:
+                pendientes = rangos
+            resultado.rangos = len(rangos)
+            resultado.rangos_reanudados = len(rangos) - len(pendientes)
+            completados = resultado.rangos_reanudados
+            self._informar('rangos', completados, len(rangos))
+
+            with ProcessPoolExecutor(max_workers=self.procesos, mp_context=CONTEXTO_PROCESOS,
+                                     initializer=_iniciar_trabajador,
+                                     initargs=(self.nombre_db, historial)) as pool:
+                futuros = [pool.submit(_recalcular_rango, desde, hasta) for desde, hasta in pendientes]
+                try:
+                    for futuro in as_completed(futuros):
+                        desde_id, hasta_id, revisadas, omitidas, cambios = futuro.result()
+                        if not self.simular:
+                            self._aplicar(conexion, desde_id, hasta_id, cambios)
+                        resultado.revisadas += revisadas
+                        resultado.omitidas += omitidas
+                        resultado.cambiadas += len(cambios)
+                        for transaccion_id, anterior, nuevo, _ in cambios:
+                            resultado.diferencia += nuevo - anterior
+                            # Los ejemplos muestran diferencias de total, no sólo de desglose
+                            if abs(nuevo - anterior) > TOLERANCIA and len(resultado.ejemplos) < self.max_ejemplos:
+                                resultado.ejemplos.append((transaccion_id, anterior, nuevo))
+                        completados += 1
+                        self._informar('rangos', completados, len(rangos))
+                except BaseException:
+                    # Interrumpido (o cancelado desde ``progreso``): no esperar los rangos que faltan
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+        finally:
+            conexion.close()
+
+        resultado.ejemplos.sort()
+        resultado.duracion = time.perf_counter() - inicio
+        return resultado
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m src.db.recalculo',
+                                     description='Recalcula los impuestos de las transacciones históricas')
+    parser.add_argument('nombre_db', help='Ruta de la base SQLite')
+    parser.add_argument('--procesos', type=int, help='Procesos de cálculo (por defecto, uno por núcleo)')
+    parser.add_argument('--rango', type=int, default=20000, help='Ids por rango de trabajo')
+    parser.add_argument('--simular', action='store_true', help='Sólo mostrar diferencias, sin escribir')
+    parser.add_argument('--ejecucion', help='Nombre de la ejecución; repetirlo reanuda una interrumpida')
+    parser.add_argument('--ejemplos', type=int, default=10, help='Diferencias a mostrar')
+    argumentos = parser.parse_args(argv)
+
+    def progreso(etapa: str, hechos: int, total: int):
+        print(f"\r{etapa}: {hechos:,}/{total:,}", end="" if hechos < total else "\n", flush=True)
+
+    recalculo = RecalculoImpuestos(argumentos.nombre_db, argumentos.procesos, argumentos.rango,
+                                   argumentos.simular, argumentos.ejecucion, argumentos.ejemplos, progreso)
+    if not argumentos.simular:
+        print(f"Ejecución {recalculo.ejecucion} (para reanudarla: --ejecucion {recalculo.ejecucion})")
+    try:
+        resultado = recalculo.ejecutar()
+    except (sqlite3.Error, RuntimeError) as e:
+        print(f"Error al recalcular impuestos: {e}")
+        return 1
+
+    accion = "cambiarían" if resultado.simulado else "cambiadas"
+    print(f"Revisadas {resultado.revisadas:,}, {accion} {resultado.cambiadas:,}, "
+          f"sin tasa aplicable {resultado.omitidas:,}, rangos reanudados {resultado.rangos_reanudados}")
+    print(f"Diferencia total de impuestos: ${resultado.diferencia:,.2f} en {resultado.duracion:.1f} s")
+    for transaccion_id, anterior, nuevo in resultado.ejemplos:
+        print(f"  #{transaccion_id}: ${anterior:,.2f} -> ${nuevo:,.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
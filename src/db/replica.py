@@ -0,0 +1,117 @@
+"""
+Réplica de lectura para consultas analíticas
+Copia de la base hecha con la API de backup de SQLite y refrescada con una antigüedad máxima
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.db.database import conectar_solo_lectura
+
+
+def ruta_replica(nombre_db: str) -> str:
+    """Archivo de la copia junto a la base principal: ``datos.db`` -> ``datos.replica.db``"""
+    base, extension = os.path.splitext(nombre_db)
+    return f"{base}.replica{extension or '.db'}"
+
+
+class ReplicaLectura:
+    """Copia de la base para reportes que nunca compiten con las ventas
+
+    La copia se hace en un solo paso de ``backup`` desde una conexión de sólo
+    lectura: en WAL es una transacción de lectura que no bloquea a los
+    escritores. Se escribe en un archivo temporal y se reemplaza con
+    ``os.replace``, así que las conexiones abiertas siguen leyendo la copia
+    anterior completa. Las lecturas usan ``immutable=1``: sin bloqueos ni
+    comprobaciones de cambios.
+
+    La antigüedad se mide con la fecha de modificación de la copia, compartida
+    por todos los procesos. Pasada la mitad de ``antiguedad_maxima`` se refresca
+    en segundo plano; pasada entera, la solicitud espera el refresco.
+    """
+
+    def __init__(self, nombre_db: str, ruta: Optional[str] = None, antiguedad_maxima: float = 60.0):
+        self.nombre_db = nombre_db
+        self.ruta = ruta or ruta_replica(nombre_db)
+        self.antiguedad_maxima = antiguedad_maxima
+        self._candado = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+
+    def version(self) -> Optional[int]:
+        """Marca de la copia actual (mtime en ns); None si aún no existe"""
+        try:
+            return os.stat(self.ruta).st_mtime_ns
+        except OSError:
+            return None
+
+    def antiguedad(self) -> Optional[float]:
+        """Segundos desde el último refresco; None si aún no hay copia"""
+        version = self.version()
+        return None if version is None else time.time() - version / 1e9
+
+    def refrescar(self) -> bool:
+        """Copia la base principal ahora; False si falla (la copia anterior queda intacta)"""
+        temporal = f"{self.ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        origen = destino = None
+        try:
+            origen = conectar_solo_lectura(self.nombre_db)
+            destino = sqlite3.connect(temporal)
+            origen.backup(destino)
+            # La copia no tiene -wal propio: modo rollback para abrirla inmutable
+            destino.execute("PRAGMA journal_mode = DELETE")
+            destino.close()
+            destino = None
+            os.replace(temporal, self.ruta)
+            return True
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error al refrescar la réplica de lectura: {e}")
+            return False
+        finally:
+            if origen is not None:
+                origen.close()
+            if destino is not None:
+                destino.close()
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+    def _refrescar_en_segundo_plano(self):
+        with self._candado:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self.refrescar, name='replica-lectura', daemon=True)
+            self._hilo.start()
+
+    def vigente(self) -> Optional[int]:
+        """Versión de una copia dentro de la antigüedad máxima; None si no se pudo obtener
+
+        Con None el llamador lee la base principal.
+        """
+        antiguedad = self.antiguedad()
+        if antiguedad is None or antiguedad >= self.antiguedad_maxima:
+            with self._candado:
+                # Otro hilo pudo refrescarla mientras se esperaba el candado
+                antiguedad = self.antiguedad()
+                if (antiguedad is None or antiguedad >= self.antiguedad_maxima) and not self.refrescar():
+                    return None
+        elif antiguedad >= self.antiguedad_maxima / 2:
+            self._refrescar_en_segundo_plano()
+        return self.version()
+
+    def fecha(self, version: int) -> datetime:
+        """Fecha de una versión de la copia, para ``Last-Modified``"""
+        return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+    def conectar(self, **opciones) -> sqlite3.Connection:
+        """Conexión a la copia actual (no comprueba la antigüedad: llamar antes a ``vigente``)"""
+        return conectar_solo_lectura(self.ruta, inmutable=True, **opciones)
+
+    def cerrar(self):
+        """Espera un refresco en curso (antes de un fork o al detener la aplicación)"""
+        with self._candado:
+            hilo = self._hilo
+        if hilo is not None:
+            hilo.join()
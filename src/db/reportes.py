@@ -0,0 +1,142 @@
+"""
+Motor de reportes en paralelo para la Calculadora de Impuestos
+Cada sección de un reporte es una consulta independiente que se ejecuta en su propio hilo y conexión
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from src.db.database import conectar_solo_lectura
+from src.db.replica import ReplicaLectura
+from src.db.sentencias import RegistroSentencias, registro_sentencias, TAMANO_CACHE_SENTENCIAS
+
+
+class SeccionReporte:
+    """Consulta del catálogo que produce una sección: filas como diccionarios o un solo valor"""
+
+    def __init__(self, sentencia: str, parametros: tuple = (), valor_unico: bool = False):
+        self.sentencia = sentencia
+        self.parametros = parametros
+        self.valor_unico = valor_unico
+
+
+# Panel de /estadisticas/: los mismos datos de BaseDatos.obtener_estadisticas más los agregados pesados
+SECCIONES_ESTADISTICAS: Dict[str, SeccionReporte] = {
+    'total_categorias': SeccionReporte('categorias_contar', valor_unico=True),
+    'total_productos': SeccionReporte('productos_contar', valor_unico=True),
+    'total_transacciones': SeccionReporte('transacciones_contar', valor_unico=True),
+    'valor_total_ventas': SeccionReporte('ventas_total', valor_unico=True),
+    'productos_por_estado': SeccionReporte('productos_por_estado'),
+    'ventas_por_categoria': SeccionReporte('ventas_por_categoria'),
+    'ventas_por_mes': SeccionReporte('ventas_por_mes'),
+    'impuestos_mensuales': SeccionReporte('impuestos_mensuales', ('0000-00', '9999-12')),
+}
+
+
+class MotorReportes:
+    """Ejecuta las secciones de un reporte al mismo tiempo y junta los resultados
+
+    Cada hilo del pool mantiene su propia conexión de sólo lectura, abierta en el
+    primer uso y reutilizada entre solicitudes. Con la base en WAL las consultas
+    no se bloquean entre sí ni bloquean a los escritores, y sqlite3 libera el GIL
+    mientras ejecuta, así que un panel tarda lo que su consulta más lenta. Cada
+    sección ve su propia instantánea de la base: entre secciones puede haber
+    diferencias de las escrituras confirmadas en medio.
+
+    Con una ``replica`` (src.db.replica) todas las secciones de un reporte leen
+    la misma copia; cada hilo reabre su conexión cuando la copia se refresca.
+    """
+
+    def __init__(self, nombre_db: str, hilos: int = 4, sentencias: Optional[RegistroSentencias] = None,
+                 replica: Optional[ReplicaLectura] = None):
+        self.nombre_db = nombre_db
+        self.hilos = hilos
+        self.sentencias = sentencias or registro_sentencias
+        self.replica = replica
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._candado = threading.Lock()
+        self._local = threading.local()
+        self._conexiones: List[sqlite3.Connection] = []
+
+    def _conexion(self, version: Optional[int]) -> sqlite3.Connection:
+        """Conexión del hilo a la copia ``version`` de la réplica, o a la base principal si es None"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None and self._local.version != version:
+            with self._candado:
+                self._conexiones.remove(conexion)
+            conexion.close()
+            conexion = None
+        if conexion is None:
+            if version is None:
+                conexion = conectar_solo_lectura(self.nombre_db, cached_statements=TAMANO_CACHE_SENTENCIAS,
+                                                 check_same_thread=False)
+            else:
+                conexion = self.replica.conectar(cached_statements=TAMANO_CACHE_SENTENCIAS,
+                                                 check_same_thread=False)
+            self._local.conexion = conexion
+            self._local.version = version
+            with self._candado:
+                self._conexiones.append(conexion)
+        return conexion
+
+    def _ejecutar_seccion(self, seccion: SeccionReporte, version: Optional[int] = None):
+        sql = self.sentencias.sql(seccion.sentencia)
+        inicio = time.perf_counter()
+        error = False
+        try:
+            cursor = self._conexion(version).execute(sql, seccion.parametros)
+            if seccion.valor_unico:
+                return cursor.fetchone()[0]
+            columnas = [descripcion[0] for descripcion in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+        except sqlite3.Error:
+            error = True
+            raise
+        finally:
+            self.sentencias.registrar_tiempo(seccion.sentencia, time.perf_counter() - inicio, error)
+
+    def _obtener_pool(self) -> ThreadPoolExecutor:
+        with self._candado:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix='reportes')
+            return self._pool
+
+    def generar(self, secciones: Dict[str, SeccionReporte]) -> Dict[str, Any]:
+        """Resultados por nombre de sección; {} si alguna consulta falla"""
+        try:
+            version = self.replica.vigente() if self.replica is not None else None
+            pool = self._obtener_pool()
+            futuros = {nombre: pool.submit(self._ejecutar_seccion, seccion, version)
+                       for nombre, seccion in secciones.items()}
+            return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+        except sqlite3.Error as e:
+            print(f"Error al generar el reporte: {e}")
+            return {}
+
+    def obtener_estadisticas(self) -> Dict:
+        """Panel de estadísticas con la misma forma que BaseDatos.obtener_estadisticas"""
+        estadisticas = self.generar(SECCIONES_ESTADISTICAS)
+        if estadisticas:
+            estadisticas['productos_por_estado'] = {
+                fila['estado']: fila['cantidad'] for fila in estadisticas['productos_por_estado']
+            }
+            estadisticas['valor_total_ventas'] = estadisticas['valor_total_ventas'] or 0
+            impuestos_por_tipo: Dict[str, float] = {}
+            for fila in estadisticas['impuestos_mensuales']:
+                impuestos_por_tipo[fila['impuesto']] = impuestos_por_tipo.get(fila['impuesto'], 0) + fila['valor']
+            estadisticas['impuestos_por_tipo'] = impuestos_por_tipo
+        return estadisticas
+
+    def cerrar(self):
+        with self._candado:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        with self._candado:
+            for conexion in self._conexiones:
+                conexion.close()
+            self._conexiones = []
+        self._local = threading.local()
@@ -0,0 +1,388 @@
+"""
+Catálogo central de sentencias SQL para la Calculadora de Impuestos
+Registra las consultas canónicas de BaseDatos y lleva conteos y tiempos por sentencia
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Fragmento compartido por todas las consultas de productos con su categoría
+_SELECT_PRODUCTOS = """
+    SELECT p.id, p.nombre, p.descripcion, p.precio_base,
+           p.estado, p.fecha_creacion, p.fecha_actualizacion,
+           c.id as categoria_id, c.nombre as categoria_nombre, c.tasa_iva
+    FROM productos p
+    JOIN categorias c ON p.categoria_id = c.id
+"""
+
+
+def _insertar_transaccion(con_fecha: bool) -> str:
+    """Inserción de una venta con la instantánea de su producto y categoría
+
+    La categoría y los nombres se copian en la misma sentencia, de modo que los
+    reportes no dependen de cambios posteriores en productos o categorías. El
+    LEFT JOIN conserva la fila con un producto inexistente para que falle la
+    clave foránea en lugar de no insertar nada.
+    """
+    fecha = ["fecha_transaccion"] if con_fecha else []
+    columnas = (["producto_id", "cantidad", "precio_unitario", "subtotal", "total_impuestos", "total_final"]
+                + fecha + ["clave_idempotencia", "desglose_impuestos"])
+    return f"""
+        INSERT INTO transacciones ({", ".join(columnas)},
+                                   categoria_id, producto_nombre, categoria_nombre)
+        SELECT {", ".join("v." + columna for columna in columnas)},
+               p.categoria_id, p.nombre, c.nombre
+        FROM (SELECT {", ".join("? AS " + columna for columna in columnas)}) v
+        LEFT JOIN productos p ON p.id = v.producto_id
+        LEFT JOIN categorias c ON c.id = p.categoria_id
+        WHERE true
+        ON CONFLICT(clave_idempotencia) WHERE clave_idempotencia IS NOT NULL DO NOTHING
+    """
+
+
+SENTENCIAS = {
+    # Inserciones
+    'categoria_insertar': """
+        INSERT INTO categorias (nombre, descripcion, tasa_iva)
+        VALUES (?, ?, ?)
+    """,
+    'producto_insertar': """
+        INSERT INTO productos (nombre, descripcion, precio_base, categoria_id, estado)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'impuesto_adicional_insertar': """
+        INSERT INTO impuestos_adicionales (nombre, tasa, descripcion, aplicable_a_categoria_id)
+        VALUES (?, ?, ?, ?)
+    """,
+    # Un reintento con la misma clave de idempotencia no inserta nada (rowcount 0)
+    'transaccion_insertar': _insertar_transaccion(con_fecha=False),
+    'transaccion_insertar_con_fecha': _insertar_transaccion(con_fecha=True),
+
+    # Actualizaciones: una sola forma por tabla, los campos en NULL conservan su valor
+    'producto_actualizar': """
+        UPDATE productos
+        SET nombre = COALESCE(?, nombre),
+            precio_base = COALESCE(?, precio_base),
+            categoria_id = COALESCE(?, categoria_id),
+            descripcion = COALESCE(?, descripcion),
+            estado = COALESCE(?, estado),
+            fecha_actualizacion = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """,
+    'categoria_actualizar': """
+        UPDATE categorias
+        SET nombre = COALESCE(?, nombre),
+            descripcion = COALESCE(?, descripcion),
+            tasa_iva = COALESCE(?, tasa_iva)
+        WHERE id = ?
+    """,
+
+    # Eliminaciones
+    'transacciones_contar_por_producto': "SELECT COUNT(*) FROM transacciones WHERE producto_id = ?",
+    'producto_eliminar': "DELETE FROM productos WHERE id = ?",
+    'productos_contar_por_categoria': "SELECT COUNT(*) FROM productos WHERE categoria_id = ?",
+    'categoria_eliminar': "DELETE FROM categorias WHERE id = ?",
+
+    # Consultas
+    'productos_todos': _SELECT_PRODUCTOS + """
+        ORDER BY p.nombre
+    """,
+    'producto_por_id': _SELECT_PRODUCTOS + """
+        WHERE p.id = ?
+    """,
+    'productos_por_categoria': _SELECT_PRODUCTOS + """
+        WHERE p.categoria_id = ?
+        ORDER BY p.nombre
+    """,
+    'categorias_todas': """
+        SELECT id, nombre, descripcion, tasa_iva, fecha_creacion
+        FROM categorias
+        ORDER BY nombre
+    """,
+    # Venta ya registrada con una clave: un reintento debe repetir producto y cantidad
+    'transaccion_por_clave': """
+        SELECT id, producto_id, cantidad FROM transacciones WHERE clave_idempotencia = ?
+    """,
+    # Sin JOIN: la transacción guarda la categoría y los nombres vigentes al venderse
+    'transacciones_recientes': """
+        SELECT id, producto_id, cantidad, precio_unitario, subtotal,
+               total_impuestos, total_final, fecha_transaccion,
+               producto_nombre, categoria_id, categoria_nombre, desglose_impuestos
+        FROM transacciones
+        ORDER BY fecha_transaccion DESC
+        LIMIT ?
+    """,
+
+    # Estadísticas
+    'productos_por_estado': """
+        SELECT estado, COUNT(*) as cantidad
+        FROM productos
+        GROUP BY estado
+    """,
+    'categorias_contar': "SELECT COUNT(*) FROM categorias",
+    'productos_contar': "SELECT COUNT(*) FROM productos",
+    'transacciones_contar': "SELECT COUNT(*) FROM transacciones",
+    'ventas_total': "SELECT SUM(total_final) FROM transacciones",
+    # Mismo texto de la expresión que idx_transacciones_mes (migración 10)
+    'ventas_por_mes': """
+        SELECT substr(fecha_transaccion, 1, 7) as periodo, COUNT(*) as transacciones, SUM(total_final) as total
+        FROM transacciones
+        GROUP BY substr(fecha_transaccion, 1, 7)
+    """,
+    # Cubierta por idx_transacciones_categoria_totales (migración 12). Si la categoría se
+    # renombró entre ventas, MAX elige un nombre fijo en lugar de el de una fila cualquiera
+    'ventas_por_categoria': """
+        SELECT categoria_id, MAX(categoria_nombre) as categoria_nombre, COUNT(*) as transacciones,
+               SUM(cantidad) as cantidad, SUM(subtotal) as subtotal,
+               SUM(total_impuestos) as total_impuestos, SUM(total_final) as total
+        FROM transacciones
+        GROUP BY categoria_id
+    """,
+
+    # Declaraciones: líneas y totales mensuales mantenidos por disparadores (migración 7)
+    'transaccion_impuestos': """
+        SELECT impuesto, valor FROM transacciones_impuestos WHERE transaccion_id = ? ORDER BY impuesto
+    """,
+    'impuestos_mensuales': """
+        SELECT periodo, impuesto, transacciones, base, valor
+        FROM impuestos_mensuales
+        WHERE periodo BETWEEN ? AND ?
+        ORDER BY periodo, impuesto
+    """,
+
+    # Historial de tasas (migración 8)
+    'tasas_categoria_todas': """
+        SELECT categoria_id, vigente_desde, tasa_iva FROM tasas_categoria ORDER BY categoria_id, vigente_desde
+    """,
+    'tasas_impuesto_todas': """
+        SELECT impuesto, vigente_desde, tasa FROM tasas_impuesto ORDER BY impuesto, vigente_desde
+    """,
+    'tasa_categoria_programar': """
+        INSERT OR REPLACE INTO tasas_categoria (categoria_id, vigente_desde, tasa_iva) VALUES (?, ?, ?)
+    """,
+    'tasa_impuesto_programar': """
+        INSERT OR REPLACE INTO tasas_impuesto (impuesto, vigente_desde, tasa) VALUES (?, ?, ?)
+    """,
+
+    # Recálculo de impuestos por rangos de id (src/db/recalculo.py)
+    # Dos subconsultas: cada una lee un extremo de la clave primaria. MIN y MAX juntos recorren un índice
+    'transacciones_limites': "SELECT (SELECT MIN(id) FROM transacciones), (SELECT MAX(id) FROM transacciones)",
+    'transacciones_rango': """
+        SELECT id, cantidad, precio_unitario, total_impuestos, fecha_transaccion, categoria_id, categoria_nombre,
+               desglose_impuestos
+        FROM transacciones
+        WHERE id BETWEEN ? AND ?
+        ORDER BY id
+    """,
+    'transaccion_recalcular': """
+        UPDATE transacciones
+        SET total_impuestos = ?, total_final = subtotal + ?, desglose_impuestos = ?
+        WHERE id = ?
+    """,
+    'recalculo_rangos_hechos': "SELECT desde_id FROM recalculo_control WHERE ejecucion = ?",
+    'recalculo_rango_guardar': """
+        INSERT OR REPLACE INTO recalculo_control (ejecucion, desde_id, hasta_id, cambiadas)
+        VALUES (?, ?, ?, ?)
+    """,
+
+    # Generación y última modificación de cada tabla (migración 11)
+    'estampas_todas': "SELECT tabla, generacion, fecha_actualizacion FROM estampas",
+
+    # Escritura diferida: última secuencia aplicada de cada diario
+    'cola_control_leer': "SELECT ultima_secuencia FROM cola_escritura_control WHERE diario = ?",
+    'cola_control_guardar': """
+        INSERT INTO cola_escritura_control (diario, ultima_secuencia) VALUES (?, ?)
+        ON CONFLICT(diario) DO UPDATE SET ultima_secuencia = excluded.ultima_secuencia
+    """,
+    'cola_control_eliminar': "DELETE FROM cola_escritura_control WHERE diario = ?",
+}
+
+
+def normalizar_sql(sql: str) -> str:
+    """Colapsa espacios para que el mismo texto siempre produzca la misma clave de caché"""
+    return " ".join(sql.split())
+
+
+# Tablas de configuración con pocas filas: recorrerlas por un índice que no las cubre no cuesta
+TABLAS_PEQUENAS = frozenset({'categorias', 'impuestos_adicionales', 'tasas_categoria', 'tasas_impuesto',
+                             'impuestos_mensuales', 'estampas', 'cola_escritura_control', 'recalculo_control'})
+
+
+def problemas_plan(plan: List[str], tablas_pequenas: frozenset = TABLAS_PEQUENAS) -> List[str]:
+    """Pasos de un plan que recorren una tabla completa, sin índice o con uno que no la cubre,
+    u ordenan en un B-tree temporal
+
+    ``SCAN t USING INDEX`` sin ``COVERING`` busca cada fila en la tabla además de
+    leer el índice: sobre una tabla grande suele ser más lento que recorrerla. No
+    se marca en ``tablas_pequenas``; el plan muestra el alias, así que una tabla
+    pequeña con alias sí se marca. Recorrer una subconsulta propia (co-rutina o
+    materializada) no cuenta: no es una tabla.
+    """
+    subconsultas = {paso.split()[-1] for paso in plan if paso.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    return [paso for paso in plan
+            if paso.startswith("USE TEMP B-TREE")
+            or (re.fullmatch(r"SCAN \w+", paso) and paso.split()[1] not in subconsultas)
+            or (re.match(r"SCAN \w+ USING INDEX ", paso) and paso.split()[1] not in tablas_pequenas)]
+
+
+class EstadisticaSentencia:
+    """Conteo de ejecuciones y tiempos acumulados de una sentencia"""
+
+    def __init__(self):
+        self.ejecuciones = 0
+        self.errores = 0
+        self.tiempo_total = 0.0
+        self.tiempo_maximo = 0.0
+
+    def registrar(self, duracion: float, error: bool = False):
+        self.ejecuciones += 1
+        self.tiempo_total += duracion
+        if duracion > self.tiempo_maximo:
+            self.tiempo_maximo = duracion
+        if error:
+            self.errores += 1
+
+    def a_dict(self) -> dict:
+        """Convierte la estadística a diccionario"""
+        return {
+            'ejecuciones': self.ejecuciones,
+            'errores': self.errores,
+            'tiempo_total': self.tiempo_total,
+            'tiempo_medio': self.tiempo_total / self.ejecuciones if self.ejecuciones else 0.0,
+            'tiempo_maximo': self.tiempo_maximo
+        }
+
+
+class RegistroSentencias:
+    """Registro de sentencias con nombre
+
+    Cada sentencia se normaliza una sola vez al registrarse, de modo que el texto
+    enviado a sqlite3 es siempre idéntico y la caché de sentencias de la conexión
+    (``cached_statements``) reutiliza la versión compilada. Sólo sirve si la
+    conexión dura: ``BaseDatos`` usa una por hilo (``ConexionesPorHilo``).
+    """
+
+    def __init__(self, sentencias: Optional[Dict[str, str]] = None):
+        self._sentencias: Dict[str, str] = {}
+        self._estadisticas: Dict[str, EstadisticaSentencia] = {}
+        self._candado = threading.Lock()
+        for nombre, sql in (sentencias or {}).items():
+            self.registrar(nombre, sql)
+
+    def __contains__(self, nombre: str) -> bool:
+        return nombre in self._sentencias
+
+    def __len__(self) -> int:
+        return len(self._sentencias)
+
+    def registrar(self, nombre: str, sql: str):
+        """Registra (o reemplaza) una sentencia canónica"""
+        if not sqlite3.complete_statement(sql + ";"):
+            raise ValueError(f"Sentencia SQL incompleta: {nombre}")
+        self._sentencias[nombre] = normalizar_sql(sql)
+        with self._candado:
+            self._estadisticas.setdefault(nombre, EstadisticaSentencia())
+
+    def sql(self, nombre: str) -> str:
+        """Texto canónico de una sentencia"""
+        try:
+            return self._sentencias[nombre]
+        except KeyError:
+            raise KeyError(f"Sentencia no registrada: {nombre}") from None
+
+    def nombres(self) -> List[str]:
+        return list(self._sentencias)
+
+    def registrar_tiempo(self, nombre: str, duracion: float, error: bool):
+        """Suma una ejecución medida fuera del registro (reportes en hilos, capa asíncrona)"""
+        with self._candado:
+            self._estadisticas[nombre].registrar(duracion, error)
+
+    def ejecutar(self, cursor: sqlite3.Cursor, nombre: str,
+                 parametros: Sequence = ()) -> sqlite3.Cursor:
+        """Ejecuta una sentencia de escritura (o de una sola fila) por nombre"""
+        sql = self.sql(nombre)
+        inicio = time.perf_counter()
+        error = False
+        try:
+            return cursor.execute(sql, parametros)
+        except sqlite3.Error:
+            error = True
+            raise
+        finally:
+            self.registrar_tiempo(nombre, time.perf_counter() - inicio, error)
+
+    def ejecutar_muchos(self, cursor: sqlite3.Cursor, nombre: str,
+                        filas: Iterable[Sequence]) -> sqlite3.Cursor:
+        """Ejecuta una sentencia para varias filas con executemany"""
+        sql = self.sql(nombre)
+        inicio = time.perf_counter()
+        error = False
+        try:
+            return cursor.executemany(sql, filas)
+        except sqlite3.Error:
+            error = True
+            raise
+        finally:
+            self.registrar_tiempo(nombre, time.perf_counter() - inicio, error)
+
+    def consultar(self, cursor: sqlite3.Cursor, nombre: str,
+                  parametros: Sequence = ()) -> Tuple[List[str], List[tuple]]:
+        """Ejecuta una consulta y devuelve (columnas, filas), midiendo también la lectura"""
+        sql = self.sql(nombre)
+        inicio = time.perf_counter()
+        error = False
+        try:
+            cursor.execute(sql, parametros)
+            filas = cursor.fetchall()
+            columnas = [descripcion[0] for descripcion in cursor.description]
+            return columnas, filas
+        except sqlite3.Error:
+            error = True
+            raise
+        finally:
+            self.registrar_tiempo(nombre, time.perf_counter() - inicio, error)
+
+    def precompilar(self, conexion: sqlite3.Connection) -> List[str]:
+        """Compila todas las sentencias en la conexión dada para verificar el catálogo contra el esquema
+
+        Devuelve los nombres de las sentencias que no compilan. Usa ``EXPLAIN``,
+        cuyo texto es otro: no llena la caché de sentencias de la conexión.
+        """
+        fallidas = []
+        for nombre, sql in self._sentencias.items():
+            parametros = (None,) * sql.count("?")
+            try:
+                conexion.execute("EXPLAIN " + sql, parametros).fetchall()
+            except sqlite3.Error:
+                fallidas.append(nombre)
+        return fallidas
+
+    def planes(self, conexion: sqlite3.Connection) -> Dict[str, List[str]]:
+        """Plan de ejecución (EXPLAIN QUERY PLAN) de cada sentencia en la conexión dada"""
+        planes = {}
+        for nombre, sql in self._sentencias.items():
+            parametros = (None,) * sql.count("?")
+            planes[nombre] = [fila[3] for fila in conexion.execute("EXPLAIN QUERY PLAN " + sql, parametros)]
+        return planes
+
+    def estadisticas(self) -> Dict[str, dict]:
+        """Conteos y tiempos por sentencia"""
+        with self._candado:
+            return {nombre: est.a_dict() for nombre, est in self._estadisticas.items()}
+
+    def reiniciar_estadisticas(self):
+        with self._candado:
+            for nombre in self._estadisticas:
+                self._estadisticas[nombre] = EstadisticaSentencia()
+
+
+# Registro compartido por todas las instancias de BaseDatos del proceso
+registro_sentencias = RegistroSentencias(SENTENCIAS)
+
+# Espacio suficiente en la caché de la conexión para todo el catálogo
+TAMANO_CACHE_SENTENCIAS = max(128, 2 * len(registro_sentencias))
@@ -0,0 +1,370 @@
+"""
+Trabajos en segundo plano con cola en SQLite
+Las operaciones largas se encolan desde la web y las ejecutan hilos trabajadores fuera de la solicitud
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.db.cola_escritura import _proceso_vivo
+from src.db.migraciones import Migracion, Migrador
+from src.db.sentencias import RegistroSentencias
+
+PENDIENTE = 'pendiente'
+EN_CURSO = 'en_curso'
+COMPLETADO = 'completado'
+FALLIDO = 'fallido'
+CANCELADO = 'cancelado'
+ESTADOS_ACTIVOS = (PENDIENTE, EN_CURSO)
+
+# Esquema propio: la cola debe existir aunque la base de datos principal aún no tenga tablas
+MIGRACIONES_TRABAJOS = [
+    Migracion(1, "Cola de trabajos en segundo plano", [
+        f"""
+        CREATE TABLE IF NOT EXISTS trabajos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            parametros TEXT NOT NULL DEFAULT '{{}}',
+            estado TEXT NOT NULL DEFAULT '{PENDIENTE}'
+                CHECK (estado IN ('{PENDIENTE}', '{EN_CURSO}', '{COMPLETADO}', '{FALLIDO}', '{CANCELADO}')),
+            hechos INTEGER NOT NULL DEFAULT 0,
+            total INTEGER,
+            mensaje TEXT,
+            resultado TEXT,
+            cancelar INTEGER NOT NULL DEFAULT 0,
+            proceso INTEGER,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_inicio TIMESTAMP,
+            fecha_fin TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos(estado)",
+    ]),
+]
+
+COLUMNAS_TRABAJO = ("id, tipo, parametros, estado, hechos, total, mensaje, resultado, cancelar, proceso, "
+                    "fecha_creacion, fecha_inicio, fecha_fin")
+
+SENTENCIAS_TRABAJOS: Dict[str, str] = {
+    'trabajo_crear': "INSERT INTO trabajos (tipo, parametros) VALUES (?, ?)",
+    # Tomar el pendiente más antiguo es una sola escritura: dos trabajadores nunca toman el mismo
+    'trabajo_tomar': f"""
+        UPDATE trabajos SET estado = '{EN_CURSO}', proceso = ?, fecha_inicio = CURRENT_TIMESTAMP
+        WHERE id = (SELECT id FROM trabajos WHERE estado = '{PENDIENTE}' ORDER BY id LIMIT 1)
+        RETURNING id, tipo, parametros
+    """,
+    'trabajo_progreso': """
+        UPDATE trabajos SET hechos = ?, total = ?, mensaje = COALESCE(?, mensaje)
+        WHERE id = ?
+        RETURNING cancelar
+    """,
+    'trabajo_terminar': """
+        UPDATE trabajos SET estado = ?, mensaje = COALESCE(?, mensaje), resultado = ?, fecha_fin = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """,
+    'trabajo_reencolar': f"""
+        UPDATE trabajos SET estado = '{PENDIENTE}', proceso = NULL, fecha_inicio = NULL
+        WHERE id = ? AND estado = '{EN_CURSO}'
+    """,
+    'trabajo_cancelar': f"""
+        UPDATE trabajos
+        SET cancelar = 1,
+            estado = CASE estado WHEN '{PENDIENTE}' THEN '{CANCELADO}' ELSE estado END,
+            fecha_fin = CASE estado WHEN '{PENDIENTE}' THEN CURRENT_TIMESTAMP ELSE fecha_fin END
+        WHERE id = ? AND estado IN ('{PENDIENTE}', '{EN_CURSO}')
+    """,
+    'trabajo_interrumpido': f"""
+        UPDATE trabajos SET estado = '{FALLIDO}', mensaje = 'Interrumpido: el proceso que lo ejecutaba terminó',
+                            fecha_fin = CURRENT_TIMESTAMP
+        WHERE id = ? AND estado = '{EN_CURSO}'
+    """,
+    'trabajo_por_id': f"SELECT {COLUMNAS_TRABAJO} FROM trabajos WHERE id = ?",
+    'trabajos_recientes': f"SELECT {COLUMNAS_TRABAJO} FROM trabajos ORDER BY id DESC LIMIT ?",
+    'trabajos_en_curso': f"SELECT id, proceso FROM trabajos WHERE estado = '{EN_CURSO}'",
+}
+
+registro_sentencias_trabajos = RegistroSentencias(SENTENCIAS_TRABAJOS)
+
+
+class TrabajoCancelado(Exception):
+    """Lanzada por ``ContextoTrabajo.progreso`` cuando el trabajo debe detenerse"""
+
+
+class ContextoTrabajo:
+    """Lo que recibe la función de un trabajo para informar su avance
+
+    ``progreso`` guarda el avance como mucho cada ``intervalo`` segundos y en esa
+    misma escritura lee si alguien pidió cancelar; entonces lanza
+    ``TrabajoCancelado``. Una función larga debe llamarlo con frecuencia.
+    """
+
+    def __init__(self, gestor: 'GestorTrabajos', conexion: sqlite3.Connection, trabajo_id: int,
+                 intervalo: float = 0.5):
+        self.gestor = gestor
+        self.trabajo_id = trabajo_id
+        self.intervalo = intervalo
+        self._conexion = conexion
+        self._ultimo = 0.0
+        self.cancelado = False
+
+    def progreso(self, hechos: int, total: Optional[int] = None, mensaje: Optional[str] = None):
+        ahora = time.monotonic()
+        if self.gestor.deteniendo:
+            raise TrabajoCancelado("La aplicación se está deteniendo")
+        if ahora - self._ultimo < self.intervalo and (total is None or hechos < total):
+            return
+        self._ultimo = ahora
+        cursor = self.gestor.sentencias.ejecutar(self._conexion.cursor(), 'trabajo_progreso',
+                                                 (hechos, total, mensaje, self.trabajo_id))
+        filas = cursor.fetchall()
+        self._conexion.commit()
+        if filas and filas[0][0]:
+            self.cancelado = True
+            raise TrabajoCancelado("Cancelado a pedido del usuario")
+
+
+def _decodificar(columnas: List[str], fila: tuple) -> Dict[str, Any]:
+    trabajo = dict(zip(columnas, fila))
+    trabajo['parametros'] = json.loads(trabajo['parametros']) if trabajo['parametros'] else {}
+    trabajo['resultado'] = json.loads(trabajo['resultado']) if trabajo['resultado'] else None
+    trabajo['cancelar'] = bool(trabajo['cancelar'])
+    trabajo['activo'] = trabajo['estado'] in ESTADOS_ACTIVOS
+    total = trabajo['total']
+    trabajo['porcentaje'] = min(100, int(100 * trabajo['hechos'] / total)) if total else None
+    return trabajo
+
+
+class GestorTrabajos:
+    """Cola de trabajos persistente y sus hilos trabajadores
+
+    ``encolar`` guarda el trabajo en la tabla ``trabajos`` de ``nombre_db`` y
+    despierta a los trabajadores; la solicitud web responde de inmediato. Cada
+    hilo toma el pendiente más antiguo con una sola escritura, de modo que varios
+    procesos (workers de gunicorn) comparten la cola sin tomar dos veces el mismo
+    trabajo, y consulta la tabla cada ``intervalo`` segundos para ver los que
+    encolaron otros procesos.
+
+    Al detenerse, los trabajos en curso se cortan en su siguiente ``progreso`` y
+    vuelven a quedar pendientes. Los que quedaron en curso en un proceso que ya
+    no existe se marcan como fallidos al iniciar.
+    """
+
+    def __init__(self, nombre_db: str, hilos: int = 2, intervalo: float = 1.0,
+                 sentencias: Optional[RegistroSentencias] = None):
+        self.nombre_db = nombre_db
+        self.hilos = hilos
+        self.intervalo = intervalo
+        self.sentencias = sentencias or registro_sentencias_trabajos
+        self._tipos: Dict[str, Callable[..., Any]] = {}
+        self._titulos: Dict[str, str] = {}
+        self._condicion = threading.Condition()
+        self._hilos: List[threading.Thread] = []
+        self._pid = None
+        self._detener = False
+
+    # ==================== CICLO DE VIDA ====================
+
+    def registrar(self, tipo: str, funcion: Callable[..., Any], titulo: Optional[str] = None):
+        """Asocia un tipo de trabajo a ``funcion(contexto, **parametros)``; su retorno es el resultado"""
+        self._tipos[tipo] = funcion
+        self._titulos[tipo] = titulo or tipo
+
+    @property
+    def deteniendo(self) -> bool:
+        return self._detener
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.nombre_db, timeout=30)
+
+    def preparar(self) -> bool:
+        """Crea o actualiza la tabla de trabajos"""
+        if not Migrador(self.nombre_db, MIGRACIONES_TRABAJOS).aplicar():
+            return False
+        conexion = self._conectar()
+        try:
+            conexion.execute("PRAGMA journal_mode = WAL")
+            return True
+        except sqlite3.Error as e:
+            print(f"Error al preparar la cola de trabajos: {e}")
+            return False
+        finally:
+            conexion.close()
+
+    def iniciar(self):
+        """Prepara la cola y arranca los trabajadores en este proceso
+
+        Es idempotente y barata una vez iniciada, para llamarla antes de cada
+        solicitud: tras un fork (workers de gunicorn) el hijo arranca sus hilos.
+        """
+        if self._pid == os.getpid() and self._hilos:
+            return
+        if self._pid is not None and self._pid != os.getpid():
+            self._condicion = threading.Condition()
+            self._hilos = []
+        with self._condicion:
+            if self._pid == os.getpid() and self._hilos:
+                return
+            if not self.preparar():
+                return
+            self._pid = os.getpid()
+            self._detener = False
+            self.recuperar_interrumpidos()
+            for numero in range(self.hilos):
+                hilo = threading.Thread(target=self._trabajador, name=f'trabajos-{numero + 1}', daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+
+    def detener(self, tiempo_espera: float = 10.0):
+        """Detiene los trabajadores; los trabajos en curso vuelven a quedar pendientes"""
+        if not self._hilos or self._pid != os.getpid():
+            return
+        with self._condicion:
+            self._detener = True
+            self._condicion.notify_all()
+        for hilo in self._hilos:
+            hilo.join(tiempo_espera)
+        self._hilos = []
+
+    def recuperar_interrumpidos(self) -> int:
+        """Marca como fallidos los trabajos en curso de procesos que ya no existen"""
+        conexion = self._conectar()
+        try:
+            marcados = 0
+            for trabajo_id, proceso in conexion.execute(self.sentencias.sql('trabajos_en_curso')).fetchall():
+                if proceso is None or (proceso != os.getpid() and not _proceso_vivo(proceso)):
+                    marcados += self.sentencias.ejecutar(conexion.cursor(), 'trabajo_interrumpido',
+                                                         (trabajo_id,)).rowcount
+            conexion.commit()
+            return marcados
+        except sqlite3.Error as e:
+            print(f"Error al recuperar trabajos interrumpidos: {e}")
+            return 0
+        finally:
+            conexion.close()
+
+    # ==================== COLA ====================
+
+    def encolar(self, tipo: str, **parametros) -> Optional[int]:
+        """Guarda un trabajo pendiente y devuelve su id; None si no se pudo"""
+        if tipo not in self._tipos:
+            print(f"Tipo de trabajo no registrado: {tipo}")
+            return None
+        self.iniciar()
+        conexion = self._conectar()
+        try:
+            cursor = self.sentencias.ejecutar(conexion.cursor(), 'trabajo_crear', (tipo, json.dumps(parametros)))
+            conexion.commit()
+            trabajo_id = cursor.lastrowid
+        except (sqlite3.Error, TypeError) as e:
+            print(f"Error al encolar el trabajo {tipo}: {e}")
+            return None
+        finally:
+            conexion.close()
+        with self._condicion:
+            self._condicion.notify()
+        return trabajo_id
+
+    def cancelar(self, trabajo_id: int) -> bool:
+        """Cancela un trabajo pendiente o pide a uno en curso que se detenga"""
+        conexion = self._conectar()
+        try:
+            cursor = self.sentencias.ejecutar(conexion.cursor(), 'trabajo_cancelar', (trabajo_id,))
+            conexion.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Error al cancelar el trabajo {trabajo_id}: {e}")
+            return False
+        finally:
+            conexion.close()
+
+    def _consultar(self, nombre: str, parametros: tuple) -> List[Dict]:
+        conexion = self._conectar()
+        try:
+            columnas, filas = self.sentencias.consultar(conexion.cursor(), nombre, parametros)
+            trabajos = [_decodificar(columnas, fila) for fila in filas]
+            for trabajo in trabajos:
+                trabajo['titulo'] = self._titulos.get(trabajo['tipo'], trabajo['tipo'])
+            return trabajos
+        except sqlite3.Error as e:
+            print(f"Error al consultar trabajos: {e}")
+            return []
+        finally:
+            conexion.close()
+
+    def consultar(self, trabajo_id: int) -> Optional[Dict]:
+        trabajos = self._consultar('trabajo_por_id', (trabajo_id,))
+        return trabajos[0] if trabajos else None
+
+    def consultar_recientes(self, limite: int = 50) -> List[Dict]:
+        return self._consultar('trabajos_recientes', (limite,))
+
+    def esperar(self, trabajo_id: int, tiempo_espera: float = 30.0) -> Optional[Dict]:
+        """Espera a que el trabajo termine y lo devuelve (pruebas y línea de comandos)"""
+        limite = time.monotonic() + tiempo_espera
+        while True:
+            trabajo = self.consultar(trabajo_id)
+            if trabajo is None or not trabajo['activo'] or time.monotonic() >= limite:
+                return trabajo
+            time.sleep(0.05)
+
+    # ==================== TRABAJADORES ====================
+
+    def _tomar(self, conexion: sqlite3.Connection) -> Optional[tuple]:
+        cursor = self.sentencias.ejecutar(conexion.cursor(), 'trabajo_tomar', (os.getpid(),))
+        filas = cursor.fetchall()
+        conexion.commit()
+        return filas[0] if filas else None
+
+    def _terminar(self, conexion: sqlite3.Connection, trabajo_id: int, estado: str,
+                  mensaje: Optional[str] = None, resultado: Any = None):
+        resultado = json.dumps(resultado, default=str) if resultado is not None else None
+        self.sentencias.ejecutar(conexion.cursor(), 'trabajo_terminar', (estado, mensaje, resultado, trabajo_id))
+        conexion.commit()
+
+    def _ejecutar(self, conexion: sqlite3.Connection, trabajo_id: int, tipo: str, parametros: str):
+        funcion = self._tipos.get(tipo)
+        if funcion is None:
+            self._terminar(conexion, trabajo_id, FALLIDO, f"Tipo de trabajo no registrado: {tipo}")
+            return
+        contexto = ContextoTrabajo(self, conexion, trabajo_id)
+        try:
+            resultado = funcion(contexto, **json.loads(parametros))
+        except TrabajoCancelado as e:
+            if contexto.cancelado:
+                self._terminar(conexion, trabajo_id, CANCELADO, str(e))
+            else:
+                self.sentencias.ejecutar(conexion.cursor(), 'trabajo_reencolar', (trabajo_id,))
+                conexion.commit()
+            return
+        except Exception as e:
+            print(f"Error en el trabajo {trabajo_id} ({tipo}): {e}")
+            self._terminar(conexion, trabajo_id, FALLIDO, f"Error: {e}")
+            return
+        self._terminar(conexion, trabajo_id, COMPLETADO, resultado=resultado)
+
+    def _trabajador(self):
+        conexion = self._conectar()
+        try:
+            while not self._detener:
+                try:
+                    trabajo = self._tomar(conexion)
+                except sqlite3.Error as e:
+                    print(f"Error al tomar un trabajo, se reintentará: {e}")
+                    conexion.rollback()
+                    trabajo = None
+                if trabajo is None:
+                    with self._condicion:
+                        if not self._detener:
+                            self._condicion.wait(self.intervalo)
+                    continue
+                try:
+                    self._ejecutar(conexion, *trabajo)
+                except sqlite3.Error as e:
+                    print(f"Error al guardar el estado del trabajo {trabajo[0]}: {e}")
+                    conexion.rollback()
+        finally:
+            conexion.close()
@@ -1,18 +1,41 @@
 """
 Modelos y lógica de negocio.
+
+Los nombres se importan al usarse por primera vez (PEP 562): ``import src.model.tasas``
+o una entrada de consola no cargan los demás modelos.
 """
 
-from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto, TipoImpuesto
-from src.model.producto import Producto
-from src.model.categoria import Categoria
-from src.model.transaccion import Transaccion
+import importlib
+from typing import TYPE_CHECKING
+
+_MODULOS = {
+    'CalculadoraImpuestos': 'src.model.calculadora_impuestos',
+    'CategoriaProducto': 'src.model.calculadora_impuestos',
+    'TipoImpuesto': 'src.model.calculadora_impuestos',
+    'Producto': 'src.model.producto',
+    'Categoria': 'src.model.categoria',
+    'Transaccion': 'src.model.transaccion',
+    'IndiceTasas': 'src.model.tasas',
+}
+
+__all__ = list(_MODULOS)
+
+if TYPE_CHECKING:
+    from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto, TipoImpuesto
+    from src.model.producto import Producto
+    from src.model.categoria import Categoria
+    from src.model.transaccion import Transaccion
+    from src.model.tasas import IndiceTasas
+
+
+def __getattr__(nombre: str):
+    modulo = _MODULOS.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(modulo), nombre)
+    globals()[nombre] = valor
+    return valor
 
-__all__ = [
-    'CalculadoraImpuestos',
-    'CategoriaProducto',
-    'TipoImpuesto',
-    'Producto',
-    'Categoria',
-    'Transaccion'
-]
 
+def __dir__():
+    return sorted(list(globals()) + __all__)
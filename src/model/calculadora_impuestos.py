@@ -1,5 +1,8 @@
+from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.model.tasas import IndiceTasas
 
 class TipoImpuesto(Enum):
     EXENTO = "Exento"
@@ -18,7 +21,7 @@ class CategoriaProducto(Enum):
     OTROS = "Otros"
 
 class CalculadoraImpuestos:
-    def __init__(self):
+    def __init__(self, historial: Optional[IndiceTasas] = None):
         self.categorias_impuestos = {
             CategoriaProducto.ALIMENTOS_BASICOS: [TipoImpuesto.IVA_5],
             CategoriaProducto.LICORES: [TipoImpuesto.IVA_19, TipoImpuesto.LICORES],
@@ -35,8 +38,17 @@ class CalculadoraImpuestos:
             TipoImpuesto.LICORES: 0.25,
             TipoImpuesto.BOLSAS_PLASTICAS: 0.20
         }
+        # Versiones con fecha de vigencia por nombre de impuesto, para calcular en una fecha pasada
+        self.historial = historial
+    
+    def tasa_en(self, impuesto: TipoImpuesto, fecha: Optional[Union[str, datetime]] = None) -> float:
+        """Tasa del impuesto en la fecha dada según el historial; sin fecha, la tasa actual"""
+        if fecha is None or self.historial is None:
+            return self.tasas_impuestos[impuesto]
+        return self.historial.tasa(impuesto.value, fecha, self.tasas_impuestos[impuesto])
     
-    def calcular_impuestos(self, valor_base: float, categoria: CategoriaProducto) -> Dict:
+    def calcular_impuestos(self, valor_base: float, categoria: CategoriaProducto,
+                           fecha: Optional[Union[str, datetime]] = None) -> Dict:
         try:
             if not isinstance(valor_base, (int, float)):
                 raise TypeError("El valor base debe ser un número")
@@ -64,7 +76,7 @@ class CalculadoraImpuestos:
                     if impuesto not in self.tasas_impuestos:
                         raise ValueError(f"Tasa de impuesto no definida para: {impuesto}")
                     
-                    tasa = self.tasas_impuestos[impuesto]
+                    tasa = self.tasa_en(impuesto, fecha)
                     valor_impuesto = round(valor_base * tasa, 2)
                     desglose_impuestos[impuesto.value] = valor_impuesto
                     total_impuestos += valor_impuesto
@@ -85,6 +97,12 @@ class CalculadoraImpuestos:
         except Exception as e:
             raise Exception(f"Error inesperado al calcular impuestos: {str(e)}")
     
+    def desglose_iva(self, valor_base: float, tasa_iva: float) -> Dict[str, float]:
+        """Desglose de una categoría que la calculadora no conoce: sólo su tasa de IVA"""
+        if not tasa_iva:
+            return {TipoImpuesto.EXENTO.value: 0}
+        return {f"IVA {tasa_iva * 100:g}%": round(valor_base * tasa_iva, 2)}
+    
     def obtener_categorias_disponibles(self) -> List[str]:
         return [cat.value for cat in CategoriaProducto]
     
@@ -0,0 +1,61 @@
+"""
+Índice en memoria de tasas con fecha de vigencia
+"""
+
+import bisect
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+
+def normalizar_fecha(fecha: Union[str, datetime]) -> str:
+    """Fecha como texto ``AAAA-MM-DD HH:MM:SS``, el formato en que SQLite guarda las fechas"""
+    if isinstance(fecha, datetime):
+        return fecha.strftime(FORMATO_FECHA)
+    return fecha
+
+
+class IndiceTasas:
+    """Versiones de tasas por clave, ordenadas por fecha de vigencia
+
+    La clave es el id de una categoría o el nombre de un impuesto. Cada versión
+    rige desde su fecha hasta la siguiente; la consulta en una fecha es una
+    búsqueda binaria sobre las fechas de la clave, O(log versiones).
+    """
+
+    def __init__(self):
+        self._fechas: Dict[Hashable, List[str]] = {}
+        self._tasas: Dict[Hashable, List[float]] = {}
+
+    def agregar(self, clave: Hashable, vigente_desde: Union[str, datetime], tasa: float):
+        """Registra una versión; otra con la misma fecha la reemplaza"""
+        vigente_desde = normalizar_fecha(vigente_desde)
+        fechas = self._fechas.setdefault(clave, [])
+        tasas = self._tasas.setdefault(clave, [])
+        posicion = bisect.bisect_left(fechas, vigente_desde)
+        if posicion < len(fechas) and fechas[posicion] == vigente_desde:
+            tasas[posicion] = tasa
+        else:
+            fechas.insert(posicion, vigente_desde)
+            tasas.insert(posicion, tasa)
+
+    def tasa(self, clave: Hashable, fecha: Union[str, datetime], defecto: Optional[float] = None) -> Optional[float]:
+        """Tasa vigente para la clave en la fecha dada; ``defecto`` si aún no había ninguna"""
+        fechas = self._fechas.get(clave)
+        if not fechas:
+            return defecto
+        posicion = bisect.bisect_right(fechas, normalizar_fecha(fecha)) - 1
+        return self._tasas[clave][posicion] if posicion >= 0 else defecto
+
+    def versiones(self, clave: Hashable) -> List[Tuple[str, float]]:
+        return list(zip(self._fechas.get(clave, []), self._tasas.get(clave, [])))
+
+    def claves(self) -> List[Hashable]:
+        return list(self._fechas)
+
+    def __len__(self) -> int:
+        return sum(len(fechas) for fechas in self._fechas.values())
+
+    def __repr__(self) -> str:
+        return f"IndiceTasas(claves={len(self._fechas)}, versiones={len(self)})"
@@ -2,30 +2,54 @@
 Modelo de dominio para Transaccion
 """
 
-from typing import Optional
+import json
+from typing import Dict, Optional
 from datetime import datetime
 
 
+def desglose_de_venta(impuestos_unitarios: Dict[str, float], cantidad: int) -> Dict[str, float]:
+    """Desglose de impuestos de una venta a partir del desglose por unidad de la calculadora"""
+    return {impuesto: round(valor * cantidad, 2) for impuesto, valor in impuestos_unitarios.items()}
+
+
+def desglose_a_json(desglose: Optional[Dict[str, float]]) -> Optional[str]:
+    """Serializa el desglose de impuestos {impuesto: valor} para guardarlo con la transacción"""
+    if not desglose:
+        return None
+    return json.dumps(desglose, ensure_ascii=False, sort_keys=True)
+
+
+def desglose_desde_json(texto) -> Dict[str, float]:
+    """Desglose guardado; vacío en transacciones anteriores a la instantánea"""
+    if isinstance(texto, dict):
+        return texto
+    return json.loads(texto) if texto else {}
+
+
 class Transaccion:
     """Clase que representa una transacción de venta"""
     
     def __init__(self, id: Optional[int] = None, producto_id: int = 0,
                  producto_nombre: Optional[str] = None,
                  categoria_nombre: Optional[str] = None,
+                 categoria_id: Optional[int] = None,
                  cantidad: int = 0, precio_unitario: float = 0.0,
                  subtotal: float = 0.0, total_impuestos: float = 0.0,
                  total_final: float = 0.0,
-                 fecha_transaccion: Optional[str] = None):
+                 fecha_transaccion: Optional[str] = None,
+                 desglose_impuestos: Optional[Dict[str, float]] = None):
         self.id = id
         self.producto_id = producto_id
         self.producto_nombre = producto_nombre
         self.categoria_nombre = categoria_nombre
+        self.categoria_id = categoria_id
         self.cantidad = cantidad
         self.precio_unitario = precio_unitario
         self.subtotal = subtotal
         self.total_impuestos = total_impuestos
         self.total_final = total_final
         self.fecha_transaccion = fecha_transaccion
+        self.desglose_impuestos = desglose_impuestos or {}
     
     def __repr__(self) -> str:
         return f"Transaccion(id={self.id}, producto_id={self.producto_id}, total_final={self.total_final})"
@@ -42,12 +66,14 @@ class Transaccion:
             producto_id=datos.get('producto_id', 0),
             producto_nombre=datos.get('producto_nombre'),
             categoria_nombre=datos.get('categoria_nombre'),
+            categoria_id=datos.get('categoria_id'),
             cantidad=datos.get('cantidad', 0),
             precio_unitario=datos.get('precio_unitario', 0.0),
             subtotal=datos.get('subtotal', 0.0),
             total_impuestos=datos.get('total_impuestos', 0.0),
             total_final=datos.get('total_final', 0.0),
-            fecha_transaccion=datos.get('fecha_transaccion')
+            fecha_transaccion=datos.get('fecha_transaccion'),
+            desglose_impuestos=desglose_desde_json(datos.get('desglose_impuestos'))
         )
     
     def a_dict(self) -> dict:
@@ -57,12 +83,14 @@ class Transaccion:
             'producto_id': self.producto_id,
             'producto_nombre': self.producto_nombre,
             'categoria_nombre': self.categoria_nombre,
+            'categoria_id': self.categoria_id,
             'cantidad': self.cantidad,
             'precio_unitario': self.precio_unitario,
             'subtotal': self.subtotal,
             'total_impuestos': self.total_impuestos,
             'total_final': self.total_final,
-            'fecha_transaccion': self.fecha_transaccion
+            'fecha_transaccion': self.fecha_transaccion,
+            'desglose_impuestos': self.desglose_impuestos
         }
     
     def calcular_totales(self) -> None:
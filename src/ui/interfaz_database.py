@@ -2,6 +2,7 @@ from typing import List, Dict, Optional
 
 from src.db.database import BaseDatos
 from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+from src.model.transaccion import desglose_de_venta
 
 class InterfazDatabase:
     """Interfaz de consola para gestionar la base de datos de productos e impuestos"""
@@ -511,8 +512,10 @@ class InterfazDatabase:
                 
                 confirmar = input("\n¿Confirmar venta? (s/n): ").strip().lower()
                 if confirmar == 's':
+                    desglose = desglose_de_venta(resultado_impuestos['impuestos'], cantidad)
                     if self.db.insertar_transaccion(producto_id, cantidad, precio_unitario, 
-                                                  subtotal, total_impuestos, total_final):
+                                                  subtotal, total_impuestos, total_final,
+                                                  desglose_impuestos=desglose):
                         print("Venta registrada correctamente.")
                     else:
                         print("Error al registrar la venta.")
@@ -707,23 +710,15 @@ class InterfazDatabase:
         print("\nVENTAS POR CATEGORÍA")
         print("-" * 30)
         
-        transacciones = self.db.consultar_transacciones_recientes(1000)
-        if not transacciones:
+        ventas_por_categoria = self.db.consultar_ventas_por_categoria()
+        if not ventas_por_categoria:
             print("No hay transacciones registradas.")
             return
         
-        ventas_por_categoria = {}
-        for trans in transacciones:
-            categoria = trans['categoria_nombre']
-            if categoria not in ventas_por_categoria:
-                ventas_por_categoria[categoria] = {'cantidad': 0, 'total': 0}
-            ventas_por_categoria[categoria]['cantidad'] += trans['cantidad']
-            ventas_por_categoria[categoria]['total'] += trans['total_final']
-        
         print(f"{'Categoría':<20} {'Cantidad':<10} {'Total':<15}")
         print("-" * 50)
-        for categoria, datos in ventas_por_categoria.items():
-            print(f"{categoria:<20} {datos['cantidad']:<10} ${datos['total']:>12,.0f}")
+        for datos in ventas_por_categoria:
+            print(f"{datos['categoria_nombre']:<20} {datos['cantidad']:<10} ${datos['total']:>12,.0f}")
     
     def productos_por_estado(self):
         print("\nPRODUCTOS POR ESTADO")
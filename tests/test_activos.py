@@ -0,0 +1,92 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from app_web import create_app
+from app_web.activos import MANIFIESTO, MAX_AGE_INMUTABLE, construir_activos, minificar_css
+
+CSS = """/* Estilos de prueba */
+.tabla   td ,  .tabla th {
+    padding : 0.25rem ;
+    content: " ; { } ";
+}
+
+a :hover { color: red; }
+""" + "".join(f".columna-{i} {{ width: {i}%; }}\n" for i in range(20))
+
+
+class TestActivos(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.origen = os.path.join(self.temp_dir, "static")
+        os.makedirs(os.path.join(self.origen, "css"))
+        with open(os.path.join(self.origen, "css", "estilos.css"), "w", encoding="utf-8") as f:
+            f.write(CSS)
+        self.manifiesto = construir_activos(self.origen)
+        self.destino = os.path.join(self.origen, "dist")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def crear_app(self):
+        app = create_app(config={'DATABASE': os.path.join(self.temp_dir, "web.db"), 'TESTING': True,
+                                 'ACTIVOS_DIR': self.destino})
+        self.addCleanup(app.reportes.cerrar)
+        self.addCleanup(app.estampas.cerrar)
+        self.addCleanup(app.trabajos.detener)
+        return app
+
+    def test_001_minifica_sin_tocar_cadenas_ni_selectores(self):
+        minificado = minificar_css(CSS)
+        self.assertTrue(minificado.startswith('.tabla td,.tabla th{padding :0.25rem;content:" ; { } "}'))
+        self.assertIn('a :hover{color:red}', minificado)
+        self.assertNotIn('/*', minificado)
+
+    def test_002_nombre_con_hash_y_variante_comprimida(self):
+        nombre = self.manifiesto['css/estilos.css']
+        self.assertRegex(nombre, r'^css/estilos\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.destino, MANIFIESTO), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), self.manifiesto)
+        ruta = os.path.join(self.destino, *nombre.split('/'))
+        with open(ruta, 'rb') as f, open(ruta + '.gz', 'rb') as comprimido:
+            self.assertEqual(gzip.decompress(comprimido.read()), f.read())
+        # El mismo contenido produce el mismo nombre; la construcción no se anida en dist/
+        self.assertEqual(construir_activos(self.origen), self.manifiesto)
+
+    def test_003_url_y_respuesta_inmutable(self):
+        app = self.crear_app()
+        cliente = app.test_client()
+        nombre = self.manifiesto['css/estilos.css']
+        with app.test_request_context():
+            self.assertEqual(app.jinja_env.globals['url_activo']('css/estilos.css'), f'/activos/{nombre}')
+            self.assertEqual(app.jinja_env.globals['url_activo']('css/otro.css'), '/static/css/otro.css')
+
+        comprimida = cliente.get(f'/activos/{nombre}', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(comprimida.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(comprimida.mimetype, 'text/css')
+        self.assertIn('immutable', comprimida.headers['Cache-Control'])
+        self.assertIn(f'max-age={MAX_AGE_INMUTABLE}', comprimida.headers['Cache-Control'])
+        self.assertIn('Accept-Encoding', comprimida.headers['Vary'])
+        self.assertEqual(gzip.decompress(comprimida.get_data()).decode(), minificar_css(CSS))
+
+        plana = cliente.get(f'/activos/{nombre}')
+        self.assertNotIn('Content-Encoding', plana.headers)
+        self.assertEqual(plana.get_data(as_text=True), minificar_css(CSS))
+        plana.close()
+        comprimida.close()
+
+        self.assertEqual(cliente.get('/activos/manifest.json').status_code, 404)
+        self.assertEqual(cliente.get('/activos/../static/css/estilos.css').status_code, 404)
+
+    def test_004_sin_construccion_usa_static(self):
+        shutil.rmtree(self.destino)
+        app = self.crear_app()
+        pagina = app.test_client().get('/calculadora/').get_data(as_text=True)
+        self.assertIn('/static/css/style.css', pagina)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+import unittest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def modulos_cargados(codigo: str, modulos) -> list:
+    """Cuáles de ``modulos`` quedan importados tras ejecutar ``codigo`` en un intérprete nuevo"""
+    sonda = f"{codigo}\nimport sys\nprint(','.join(m for m in {list(modulos)!r} if m in sys.modules))"
+    salida = subprocess.run([sys.executable, '-c', sonda], cwd=RAIZ, capture_output=True, text=True, check=True)
+    return [modulo for modulo in salida.stdout.strip().split(',') if modulo]
+
+
+class TestArranque(unittest.TestCase):
+    def test_001_modelos_bajo_demanda(self):
+        self.assertEqual(modulos_cargados("import src.model.tasas",
+                                          ['src.model.producto', 'src.model.transaccion',
+                                           'src.model.calculadora_impuestos']), [])
+        self.assertEqual(modulos_cargados("from src.model import Producto", ['src.model.producto',
+                                                                            'src.model.tasas']),
+                         ['src.model.producto'])
+
+    def test_002_entradas_livianas(self):
+        self.assertEqual(modulos_cargados("import src.app.main", ['sqlite3', 'flask', 'src.db.database']), [])
+        self.assertEqual(modulos_cargados("import run_web", ['flask', 'app_web']), [])
+
+    def test_003_crear_app_sin_multiprocessing(self):
+        codigo = "from app_web import create_app; create_app(config={'DATABASE': ':memory:'})"
+        self.assertEqual(modulos_cargados(codigo, ['multiprocessing', 'src.db.recalculo']), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
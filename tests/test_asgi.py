@@ -0,0 +1,140 @@
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+try:
+    import quart
+    import aiosqlite
+except ImportError:  # pragma: no cover - dependencias opcionales
+    quart = None
+
+from src.db.database import BaseDatos
+
+
+@unittest.skipIf(quart is None, "quart/aiosqlite no están instalados")
+class TestAplicacionAsgi(unittest.TestCase):
+    def setUp(self):
+        from app_web import create_asgi_app
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_asgi.db")
+        db = BaseDatos(self.db_path)
+        db.crear_tablas()
+        db.inicializar_datos_ejemplo()
+        self.app = create_asgi_app(config={'DATABASE': self.db_path, 'TESTING': True})
+
+    def tearDown(self):
+        asyncio.run(self.app.db.desconectar())
+        shutil.rmtree(self.temp_dir)
+
+    def ejecutar(self, corrutina):
+        return asyncio.run(corrutina)
+
+    def test_001_calculadora_sin_base_de_datos(self):
+        async def prueba():
+            cliente = self.app.test_client()
+            respuesta = await cliente.post('/calculadora/calcular',
+                                           form={'valor_base': '1000', 'categoria': 'Licores'})
+            return respuesta.status_code, await respuesta.get_json()
+
+        estado, datos = self.ejecutar(prueba())
+        self.assertEqual(estado, 200)
+        self.assertIn('total_impuestos', datos)
+        self.assertIsNone(self.app.db.conexion)
+
+    def test_002_paginas_responden(self):
+        async def prueba():
+            cliente = self.app.test_client()
+            estados = {}
+            for ruta in ('/', '/productos/', '/productos/por_categoria', '/categorias/', '/transacciones/',
+                         '/transacciones/crear', '/estadisticas/', '/estadisticas/ventas_por_categoria',
+                         '/estadisticas/impuestos_mensuales', '/calculadora/', '/trabajos/', '/metrics'):
+                estados[ruta] = (await cliente.get(ruta)).status_code
+            return estados
+
+        for ruta, estado in self.ejecutar(prueba()).items():
+            self.assertEqual(estado, 200, ruta)
+
+    def test_003_crear_transaccion(self):
+        async def prueba():
+            cliente = self.app.test_client()
+            respuesta = await cliente.post('/transacciones/crear', form={'producto_id': '2', 'cantidad': '3'})
+            return respuesta.status_code
+
+        self.assertEqual(self.ejecutar(prueba()), 302)
+        transacciones = BaseDatos(self.db_path).consultar_transacciones_recientes()
+        self.assertEqual(len(transacciones), 1)
+        self.assertEqual(transacciones[0]['cantidad'], 3)
+
+    def test_005_clave_de_idempotencia_validada(self):
+        async def prueba():
+            cliente = self.app.test_client()
+            for clave in ('  terminal-1  ', 'terminal-1', 'x' * 200, 'x' * 200):
+                await cliente.post('/transacciones/crear', form={'producto_id': '2', 'cantidad': '1'},
+                                   headers={'Idempotency-Key': clave})
+            # La misma clave con otra venta se rechaza
+            otra = await cliente.post('/transacciones/crear', form={'producto_id': '2', 'cantidad': '4'},
+                                      headers={'Idempotency-Key': 'terminal-1'})
+            return otra.status_code
+
+        self.assertEqual(self.ejecutar(prueba()), 422)
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            claves = [fila[0] for fila in conexion.execute(
+                "SELECT clave_idempotencia FROM transacciones ORDER BY id")]
+        finally:
+            conexion.close()
+        # Igual que en WSGI: sin espacios, y una clave demasiado larga se descarta
+        self.assertEqual(claves, ['terminal-1', None, None])
+
+    def test_004_capa_de_datos_equivalente(self):
+        from src.db.database_async import BaseDatosAsync
+
+        async def prueba():
+            db = BaseDatosAsync(self.db_path)
+            try:
+                self.assertTrue(await db.insertar_categoria("Nueva", "desc", 0.1))
+                self.assertFalse(await db.insertar_categoria("Inválida", "desc", 2))
+                categorias = await db.consultar_todas_categorias()
+                nueva = next(c for c in categorias if c['nombre'] == "Nueva")
+                self.assertTrue(await db.actualizar_categoria(nueva['id'], tasa_iva=0.2))
+                self.assertFalse(await db.actualizar_categoria(99999, nombre="x"))
+                self.assertFalse(await db.eliminar_producto(99999))
+                self.assertTrue(await db.eliminar_categoria(nueva['id']))
+                self.assertIsNone(await db.consultar_producto_por_id(99999))
+                return await db.obtener_estadisticas(), await db.consultar_todos_productos()
+            finally:
+                await db.desconectar()
+
+        estadisticas, productos = self.ejecutar(prueba())
+        sincronica = BaseDatos(self.db_path)
+        self.assertEqual(estadisticas, sincronica.obtener_estadisticas())
+        self.assertEqual(productos, sincronica.consultar_todos_productos())
+
+    def test_006_lecturas_no_ven_escrituras_sin_commit(self):
+        from src.db.database_async import BaseDatosAsync
+
+        async def prueba():
+            db = BaseDatosAsync(self.db_path)
+            try:
+                antes = len(await db.consultar_todas_categorias())
+                await db._candado_escritura.acquire()
+                await db._ejecutar('categoria_insertar', ("A medias", "", 0.1))
+                lectura = asyncio.create_task(db.consultar_todas_categorias())
+                await asyncio.sleep(0.05)
+                # La lectura espera a que la escritura termine; tras el rollback no existe la fila
+                self.assertFalse(lectura.done())
+                await db.conexion.rollback()
+                db._candado_escritura.release()
+                return antes, len(await lectura)
+            finally:
+                await db.desconectar()
+
+        antes, durante = self.ejecutar(prueba())
+        self.assertEqual(durante, antes)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
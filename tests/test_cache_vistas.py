@@ -0,0 +1,179 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from app_web import create_app
+from app_web.cache_vistas import CacheVistas, fecha_estampa
+from src.db.database import BaseDatos
+from src.db.estampas import EstampasTablas
+
+
+class TestEstampas(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_estampas.db")
+        self.db = BaseDatos(self.db_path)
+        self.estampas = EstampasTablas(self.db_path)
+
+    def tearDown(self):
+        self.estampas.cerrar()
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_sin_esquema_no_hay_estampas(self):
+        self.assertEqual(self.estampas.actuales(), {})
+        self.assertFalse(os.path.exists(self.db_path))
+        self.db.crear_tablas()
+        self.assertEqual(set(self.estampas.actuales()),
+                         {'categorias', 'productos', 'impuestos_adicionales', 'transacciones'})
+
+    def test_002_cada_escritura_avanza_la_generacion_de_su_tabla(self):
+        self.db.crear_tablas()
+        antes = self.estampas.actuales()
+        self.assertIs(self.estampas.actuales(), antes)
+
+        self.assertTrue(self.db.insertar_categoria("Otros", "", 0.19))
+        self.assertTrue(self.db.actualizar_categoria(1, tasa_iva=0.05))
+        despues = self.estampas.actuales()
+        self.assertEqual(despues['categorias'][0], antes['categorias'][0] + 2)
+        self.assertGreater(despues['categorias'][1], antes['categorias'][1])
+        self.assertEqual(despues['productos'], antes['productos'])
+        self.assertIsNone(self.estampas.de(['categorias', 'no_existe']))
+
+
+class TestCacheVistas(unittest.TestCase):
+    def test_001_lru(self):
+        cache = CacheVistas(capacidad=2, version='v1')
+        cache.guardar('/a', 'e1', b'a', 'text/html')
+        cache.guardar('/b', 'e2', b'b', 'text/html')
+        self.assertEqual(cache.obtener('/a', 'e1'), (b'a', 'text/html'))
+        cache.guardar('/c', 'e3', b'c', 'text/html')
+        self.assertIsNone(cache.obtener('/b', 'e2'))
+        self.assertIsNone(cache.obtener('/a', 'otra'))
+        self.assertEqual(len(cache), 2)
+        self.assertNotEqual(cache.etag('/a', (1,)), cache.etag('/a', (2,)))
+
+
+class TestCachePaginas(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_cache.db")
+        self.db = BaseDatos(self.db_path)
+        self.db.crear_tablas()
+        self.db.inicializar_datos_ejemplo()
+        self.app = create_app(config={'DATABASE': self.db_path, 'TESTING': True})
+        self.cliente = self.app.test_client()
+        self.operaciones = []
+        self.app.instrumentacion.agregar_gancho(lambda operacion: self.operaciones.append(operacion.nombre))
+
+    def tearDown(self):
+        self.app.estampas.cerrar()
+        self.app.reportes.cerrar()
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_repetir_no_consulta_la_base(self):
+        primera = self.cliente.get('/productos/')
+        self.assertEqual(self.operaciones, ['consultar_todos_productos'])
+        segunda = self.cliente.get('/productos/')
+        self.assertEqual(self.operaciones, ['consultar_todos_productos'])
+        self.assertEqual(segunda.get_data(), primera.get_data())
+        self.assertEqual(segunda.headers['ETag'], primera.headers['ETag'])
+
+    def test_002_etag_responde_304(self):
+        etag = self.cliente.get('/categorias/').headers['ETag']
+        respuesta = self.cliente.get('/categorias/', headers={'If-None-Match': etag})
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.get_data(), b'')
+        self.assertEqual(self.cliente.get('/categorias/', headers={'If-None-Match': '"otra"'}).status_code, 200)
+
+    def test_003_una_escritura_invalida_la_pagina(self):
+        etag = self.cliente.get('/categorias/').headers['ETag']
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("UPDATE categorias SET nombre = 'Licores Importados' WHERE nombre = 'Licores'")
+        conexion.commit()
+        conexion.close()
+
+        respuesta = self.cliente.get('/categorias/', headers={'If-None-Match': etag})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('Licores Importados', respuesta.get_data(as_text=True))
+        # Otra tabla no cambió: la página de transacciones sigue en caché
+        self.cliente.get('/transacciones/')
+        self.cliente.get('/transacciones/')
+        self.assertEqual(self.operaciones.count('consultar_transacciones_recientes'), 1)
+
+    def test_004_parametros_y_mensajes_pendientes(self):
+        self.cliente.get('/transacciones/?limite=5')
+        self.cliente.get('/transacciones/?limite=20')
+        self.assertEqual(self.operaciones.count('consultar_transacciones_recientes'), 2)
+
+        self.cliente.get('/categorias/')
+        with self.cliente.session_transaction() as sesion:
+            sesion['_flashes'] = [('info', 'Aviso pendiente')]
+        self.assertIn('Aviso pendiente', self.cliente.get('/categorias/').get_data(as_text=True))
+        self.assertNotIn('Aviso pendiente', self.cliente.get('/categorias/').get_data(as_text=True))
+
+    def test_005_desactivada(self):
+        app = create_app(config={'DATABASE': self.db_path, 'TESTING': True, 'CACHE_VISTAS': False})
+        respuesta = app.test_client().get('/productos/')
+        app.reportes.cerrar()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn('ETag', respuesta.headers)
+
+
+class TestGetCondicional(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_condicional.db")
+        db = BaseDatos(self.db_path)
+        db.crear_tablas()
+        db.inicializar_datos_ejemplo()
+        self.app = create_app(config={'DATABASE': self.db_path, 'TESTING': True})
+        self.cliente = self.app.test_client()
+        self.operaciones = []
+        self.app.instrumentacion.agregar_gancho(lambda operacion: self.operaciones.append(operacion.nombre))
+
+    def tearDown(self):
+        self.app.estampas.cerrar()
+        self.app.reportes.cerrar()
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_last_modified_de_las_estampas(self):
+        respuesta = self.cliente.get('/productos/editar/1')
+        self.assertEqual(respuesta.headers['Cache-Control'], 'no-cache')
+        ultima = max(fecha for tabla, (_, fecha) in self.app.estampas.actuales().items()
+                     if tabla in ('productos', 'categorias'))
+        self.assertEqual(respuesta.last_modified, fecha_estampa(ultima).replace(microsecond=0))
+
+        self.app.cache_vistas.limpiar()
+        self.operaciones.clear()
+        condicional = self.cliente.get('/productos/editar/1',
+                                       headers={'If-Modified-Since': respuesta.headers['Last-Modified']})
+        self.assertEqual(condicional.status_code, 304)
+        self.assertEqual(condicional.headers['ETag'], respuesta.headers['ETag'])
+        self.assertEqual(self.operaciones, [])
+
+    def test_002_fecha_anterior_o_etag_distinta_responden_completo(self):
+        respuesta = self.cliente.get('/categorias/editar/1',
+                                     headers={'If-Modified-Since': 'Sat, 01 Jan 2000 00:00:00 GMT'})
+        self.assertEqual(respuesta.status_code, 200)
+        # If-None-Match tiene prioridad aunque la fecha diga que no cambió
+        respuesta = self.cliente.get('/categorias/editar/1', headers={
+            'If-None-Match': '"otra"', 'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+        self.assertEqual(respuesta.status_code, 200)
+        # Un id inexistente redirige con un mensaje; la página que lo muestra no sale de la caché
+        self.assertEqual(self.cliente.get('/categorias/editar/999').status_code, 302)
+        self.assertNotIn('ETag', self.cliente.get('/categorias/').headers)
+
+    def test_003_paginas_sin_datos_se_guardan_en_el_navegador(self):
+        respuesta = self.cliente.get('/calculadora/')
+        self.assertIn('public', respuesta.headers['Cache-Control'])
+        self.assertIn('max-age=300', respuesta.headers['Cache-Control'])
+        self.assertNotIn('Last-Modified', respuesta.headers)
+        self.assertEqual(self.cliente.get('/calculadora/', headers={
+            'If-None-Match': respuesta.headers['ETag']}).status_code, 304)
+        self.assertEqual(self.cliente.get('/').headers['Cache-Control'], 'no-cache')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from werkzeug.serving import make_server
+
+from app_web import create_app
+from benchmarks.carga import Resultados, ejecutar_carga, httpx, percentil
+from src.db.database import BaseDatos
+
+
+class TestCarga(unittest.TestCase):
+    def test_001_percentiles(self):
+        valores = [i / 100 for i in range(1, 101)]
+        self.assertEqual(percentil(valores, 50), 0.50)
+        self.assertEqual(percentil(valores, 99), 0.99)
+        self.assertEqual(percentil([], 95), 0.0)
+
+    def test_002_resumen_cuenta_errores(self):
+        resultados = Resultados()
+        resultados.duracion = 2.0
+        resultados.registrar('calcular', 0.01, 200)
+        resultados.registrar('calcular', 0.02, 500)
+        resultados.registrar('crear_transaccion', 0.03, 302)
+        resultados.registrar('crear_transaccion', 0.04, None)
+        resumen = resultados.resumen()
+        self.assertEqual(resumen['calcular']['errores'], 1)
+        self.assertEqual(resumen['crear_transaccion']['tasa_error'], 0.5)
+        self.assertEqual(resumen['total']['solicitudes'], 4)
+        self.assertEqual(resumen['total']['por_segundo'], 2.0)
+
+    @unittest.skipIf(httpx is None, "httpx no está instalado")
+    def test_003_carga_contra_servidor_local(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            db_path = os.path.join(temp_dir, "carga.db")
+            db = BaseDatos(db_path)
+            db.crear_tablas()
+            db.inicializar_datos_ejemplo()
+            app = create_app(config={'DATABASE': db_path, 'TESTING': True})
+            servidor = make_server('127.0.0.1', 0, app, threaded=True)
+            hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+            hilo.start()
+            try:
+                resultados = asyncio.run(ejecutar_carga(
+                    f"http://127.0.0.1:{servidor.server_port}", 'mixto', concurrencia=4,
+                    duracion=30, solicitudes=40))
+            finally:
+                servidor.shutdown()
+            resumen = resultados.resumen()
+            self.assertEqual(resumen['total']['solicitudes'], 40)
+            self.assertEqual(resumen['total']['errores'], 0)
+            self.assertGreater(len(BaseDatos(db_path).consultar_transacciones_recientes(100)), 0)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
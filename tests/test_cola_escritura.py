@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from app_web import create_app
+from src.db.cola_escritura import ColaEscritura, _reclamar_diario
+from src.db.database import BaseDatos
+
+
+class TestColaEscritura(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_cola.db")
+        db = BaseDatos(self.db_path)
+        db.crear_tablas()
+        db.inicializar_datos_ejemplo()
+        self.colas = []
+
+    def tearDown(self):
+        for cola in self.colas:
+            cola.detener()
+        shutil.rmtree(self.temp_dir)
+
+    def crear_cola(self, **opciones):
+        cola = ColaEscritura(self.db_path, sincronizar_diario=False, **opciones)
+        self.colas.append(cola)
+        return cola
+
+    def contar_transacciones(self) -> int:
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            return conexion.execute("SELECT COUNT(*) FROM transacciones").fetchone()[0]
+        finally:
+            conexion.close()
+
+    def test_001_commits_agrupados(self):
+        cola = self.crear_cola(intervalo=0.05, max_filas=50)
+        for _ in range(120):
+            self.assertTrue(cola.encolar(1, 2, 2500.0, 5000.0, 250.0, 5250.0))
+        self.assertTrue(cola.vaciar())
+        self.assertEqual(self.contar_transacciones(), 120)
+        estado = cola.estado()
+        self.assertEqual(estado['escritas'], 120)
+        self.assertEqual(estado['pendientes'], 0)
+        self.assertLess(estado['lotes'], 120)
+
+    def test_002_contrapresion_con_cola_llena(self):
+        cola = self.crear_cola(capacidad=2, intervalo=30, max_filas=100, espera_maxima=0.05)
+        self.assertTrue(cola.encolar(1, 1, 2500.0, 2500.0, 125.0, 2625.0))
+        self.assertTrue(cola.encolar(1, 1, 2500.0, 2500.0, 125.0, 2625.0))
+        self.assertFalse(cola.encolar(1, 1, 2500.0, 2500.0, 125.0, 2625.0))
+        self.assertEqual(cola.estado()['rechazadas'], 1)
+        cola.detener()
+        self.assertEqual(self.contar_transacciones(), 2)
+
+    def test_003_recupera_diario_de_proceso_terminado(self):
+        diario = "test_cola.db.diario.999999999"
+        with open(os.path.join(self.temp_dir, diario), 'w', encoding='utf-8') as archivo:
+            for secuencia in range(1, 4):
+                datos = [1, secuencia, 2500.0, 2500.0, 125.0, 2625.0, '2025-01-01 10:00:00', None]
+                archivo.write(json.dumps({'seq': secuencia, 'datos': datos}) + "\n")
+            archivo.write('{"seq": 4, "dat')
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("INSERT INTO cola_escritura_control VALUES (?, 1)", (diario,))
+        conexion.commit()
+        conexion.close()
+
+        cola = self.crear_cola()
+        cola.iniciar()
+        self.assertEqual(self.contar_transacciones(), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, diario)))
+
+    def test_004_fila_invalida_no_bloquea_el_lote(self):
+        cola = self.crear_cola(intervalo=0.01)
+        self.assertTrue(cola.encolar(1, 1, 2500.0, 2500.0, 125.0, 2625.0))
+        self.assertTrue(cola.encolar(9999, 1, 2500.0, 2500.0, 125.0, 2625.0))
+        self.assertTrue(cola.vaciar())
+        self.assertEqual(self.contar_transacciones(), 1)
+        self.assertEqual(cola.estado()['errores'], 1)
+
+    def test_005_controlador_con_escritura_diferida(self):
+        app = create_app(config={'DATABASE': self.db_path, 'TESTING': True, 'ESCRITURA_DIFERIDA': True})
+        self.colas.append(app.cola_escritura)
+        cliente = app.test_client()
+        respuesta = cliente.post('/transacciones/crear', data={'producto_id': '2', 'cantidad': '3'})
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertTrue(app.cola_escritura.vaciar())
+        self.assertEqual(self.contar_transacciones(), 1)
+        texto = cliente.get('/metrics').get_data(as_text=True)
+        self.assertIn('impuestos_cola_escritura_lote_filas_count', texto)
+        self.assertIn('impuestos_cola_escritura_pendientes 0', texto)
+
+        # Una clave que otro worker ya escribió se compara con la venta guardada
+        self.assertTrue(BaseDatos(self.db_path).insertar_transaccion(2, 1, 2500.0, 2500.0, 125.0, 2625.0, 'k'))
+        otra = cliente.post('/transacciones/crear', data={'producto_id': '2', 'cantidad': '5', 'clave_idempotencia': 'k'})
+        self.assertEqual(otra.status_code, 422)
+        self.assertEqual(app.cola_escritura.estado()['pendientes'], 0)
+
+    def test_006_dos_recuperaciones_del_mismo_diario(self):
+        diario = os.path.join(self.temp_dir, "test_cola.db.diario.999999998")
+        with open(diario, 'w', encoding='utf-8') as archivo:
+            for secuencia in range(1, 2001):
+                datos = [1, 1, 2500.0, 2500.0, 125.0, 2625.0, '2025-01-01 10:00:00', None]
+                archivo.write(json.dumps({'seq': secuencia, 'datos': datos}) + "\n")
+
+        # Mientras otro worker lo tiene reclamado, el diario no se toca
+        reclamado = _reclamar_diario(diario)
+        self.assertIsNotNone(reclamado)
+        self.assertEqual(self.crear_cola().recuperar(), 0)
+        self.assertTrue(os.path.exists(diario))
+        reclamado.close()
+
+        # Dos workers que arrancan a la vez: sólo uno lo aplica
+        barrera = threading.Barrier(2)
+        recuperadas = []
+
+        def recuperar(cola):
+            barrera.wait()
+            recuperadas.append(cola.recuperar())
+
+        hilos = [threading.Thread(target=recuperar, args=(self.crear_cola(),)) for _ in range(2)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(sorted(recuperadas), [0, 2000])
+        self.assertEqual(self.contar_transacciones(), 2000)
+        self.assertFalse(os.path.exists(diario))
+        self.assertEqual(self.crear_cola().recuperar(), 0)
+        self.assertEqual(self.contar_transacciones(), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
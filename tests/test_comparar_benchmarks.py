@@ -0,0 +1,39 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.comparar import cargar, comparar
+
+
+class TestCompararBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def guardar(self, nombre, medianas):
+        ruta = os.path.join(self.temp_dir, nombre)
+        datos = {'benchmarks': [{'fullname': clave, 'stats': {'median': valor}} for clave, valor in medianas.items()]}
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo)
+        return ruta
+
+    def test_001_detecta_regresion_sobre_umbral(self):
+        base = cargar(self.guardar('base.json', {'a': 1.0, 'b': 1.0}))
+        actual = cargar(self.guardar('actual.json', {'a': 1.05, 'b': 1.5}))
+        filas = {fila['nombre']: fila for fila in comparar(base, actual, umbral=10.0)}
+        self.assertFalse(filas['a']['regresion'])
+        self.assertTrue(filas['b']['regresion'])
+        self.assertAlmostEqual(filas['b']['variacion'], 50.0)
+
+    def test_002_benchmarks_nuevos_no_son_regresion(self):
+        filas = comparar({'a': {'median': 1.0}}, {'b': {'median': 2.0}})
+        self.assertEqual(len(filas), 2)
+        self.assertFalse(any(fila['regresion'] for fila in filas))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,99 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from flask import Response
+
+from app_web import create_app
+from app_web.metricas import http_bytes_total
+from src.db.database import BaseDatos
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+class TestCompresion(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_compresion.db")
+        db = BaseDatos(self.db_path)
+        db.crear_tablas()
+        db.inicializar_datos_ejemplo()
+        self.app = self.crear_app()
+        self.cliente = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def crear_app(self, **config):
+        app = create_app(config={'DATABASE': self.db_path, 'TESTING': True, **config})
+        self.addCleanup(app.reportes.cerrar)
+        self.addCleanup(app.estampas.cerrar)
+        self.addCleanup(app.trabajos.detener)
+        return app
+
+    def test_001_html_comprimido_con_etag_debil(self):
+        plana = self.cliente.get('/productos/')
+        comprimida = self.cliente.get('/productos/', headers=GZIP)
+        self.assertNotIn('Content-Encoding', plana.headers)
+        self.assertEqual(comprimida.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', comprimida.headers['Vary'])
+        self.assertEqual(gzip.decompress(comprimida.get_data()), plana.get_data())
+        self.assertLess(len(comprimida.get_data()), len(plana.get_data()) / 2)
+
+        self.assertTrue(comprimida.headers['ETag'].startswith('W/'))
+        no_modificada = self.cliente.get('/productos/', headers={**GZIP, 'If-None-Match': comprimida.headers['ETag']})
+        self.assertEqual(no_modificada.status_code, 304)
+        self.assertEqual(no_modificada.headers['ETag'], comprimida.headers['ETag'])
+
+    def test_002_umbral_tipos_y_desactivada(self):
+        json_pequeno = self.cliente.post('/calculadora/calcular', headers=GZIP,
+                                         data={'valor_base': '1000', 'categoria': 'Licores'})
+        self.assertNotIn('Content-Encoding', json_pequeno.headers)
+
+        sin_html = self.crear_app(COMPRESION_TIPOS=('application/json',)).test_client()
+        self.assertNotIn('Content-Encoding', sin_html.get('/productos/', headers=GZIP).headers)
+        desactivada = self.crear_app(COMPRESION=False).test_client()
+        self.assertNotIn('Content-Encoding', desactivada.get('/productos/', headers=GZIP).headers)
+        self.assertNotIn('Content-Encoding', self.cliente.get('/productos/',
+                                                              headers={'Accept-Encoding': 'identity'}).headers)
+
+    def test_003_flujo_comprimido_parte_por_parte(self):
+        @self.app.route('/_flujo')
+        def flujo():
+            return Response((f"<p>fila {i}</p>\n" * 50 for i in range(5)), mimetype='text/html')
+
+        respuesta = self.cliente.get('/_flujo', headers=GZIP, buffered=False)
+        self.assertEqual(respuesta.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', respuesta.headers)
+        descompresor = zlib.decompressobj(31)
+        partes = []
+        for parte in respuesta.response:
+            # Cada parte se puede descomprimir al llegar, sin esperar el final
+            partes.append(descompresor.decompress(parte))
+        respuesta.close()
+        self.assertEqual(partes[0], b"<p>fila 0</p>\n" * 50)
+        self.assertEqual(b"".join(partes), "".join(f"<p>fila {i}</p>\n" * 50 for i in range(5)).encode())
+
+    def test_004_metricas_de_bytes(self):
+        def enviados():
+            muestras = {tuple(etiquetas): valor for etiquetas, valor in http_bytes_total.exportar()['muestras']}
+            return muestras.get(('productos.listar', 'enviado'), 0)
+
+        antes = enviados()
+        respuesta = self.cliente.get('/productos/', headers=GZIP)
+        self.assertEqual(enviados() - antes, len(respuesta.get_data()))
+
+    def test_005_pagina_en_cache_se_comprime_una_vez(self):
+        primera = self.cliente.get('/productos/', headers=GZIP)
+        cache = self.app.extensions['compresion_cache']
+        etag, _ = primera.get_etag()
+        self.assertEqual(cache.obtener((etag, 'gzip')), primera.get_data())
+        self.assertEqual(self.cliente.get('/productos/', headers=GZIP).get_data(), primera.get_data())
+        self.assertNotIn('compresion_cache', self.crear_app(COMPRESION_CACHE=0).extensions)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
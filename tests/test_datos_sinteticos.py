@@ -0,0 +1,92 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from src.db.database import BaseDatos
+from src.db.datos_sinteticos import GeneradorDatosSinteticos
+from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+
+
+class TestDatosSinteticos(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def generar(self, nombre, semilla=7):
+        ruta = os.path.join(self.temp_dir, nombre)
+        GeneradorDatosSinteticos(ruta, semilla=semilla, tamano_lote=100).generar(20, 300, 1000)
+        return ruta
+
+    def volcado(self, ruta):
+        conexion = sqlite3.connect(ruta)
+        try:
+            return [conexion.execute(f"SELECT * FROM {tabla} ORDER BY id").fetchall()
+                    for tabla in ('categorias', 'productos', 'transacciones')]
+        finally:
+            conexion.close()
+
+    def test_001_cantidades(self):
+        estadisticas = BaseDatos(self.generar("a.db")).obtener_estadisticas()
+        self.assertEqual(estadisticas['total_categorias'], 20)
+        self.assertEqual(estadisticas['total_productos'], 300)
+        self.assertEqual(estadisticas['total_transacciones'], 1000)
+
+    def test_002_determinista_por_semilla(self):
+        self.assertEqual(self.volcado(self.generar("a.db")), self.volcado(self.generar("b.db")))
+        self.assertNotEqual(self.volcado(self.generar("a.db"))[2],
+                            self.volcado(self.generar("c.db", semilla=8))[2])
+
+    def test_003_impuestos_coinciden_con_la_calculadora(self):
+        conexion = sqlite3.connect(self.generar("a.db"))
+        try:
+            filas = conexion.execute("""
+                SELECT c.nombre, t.precio_unitario, t.cantidad, t.total_impuestos, t.subtotal, t.total_final
+                FROM transacciones t
+                JOIN productos p ON t.producto_id = p.id
+                JOIN categorias c ON p.categoria_id = c.id
+                WHERE c.nombre = 'Licores'
+            """).fetchall()
+        finally:
+            conexion.close()
+        self.assertTrue(filas)
+        calculadora = CalculadoraImpuestos()
+        for _, precio, cantidad, total_impuestos, subtotal, total_final in filas:
+            esperado = calculadora.calcular_impuestos(precio, CategoriaProducto.LICORES)['total_impuestos']
+            self.assertAlmostEqual(total_impuestos, round(esperado * cantidad, 2))
+            self.assertAlmostEqual(total_final, subtotal + total_impuestos, places=2)
+
+    def test_004_indices_restaurados_si_la_generacion_falla(self):
+        ruta = self.generar("a.db")
+
+        def indices():
+            conexion = sqlite3.connect(ruta)
+            try:
+                return {fila[0] for fila in conexion.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+            finally:
+                conexion.close()
+
+        antes = indices()
+        durante = []
+
+        def progreso(etapa, hechos, total):
+            durante.append(indices())
+            if etapa == 'transacciones':
+                raise RuntimeError("fallo simulado")
+
+        generador = GeneradorDatosSinteticos(ruta, semilla=9, tamano_lote=100, progreso=progreso)
+        with self.assertRaises(RuntimeError):
+            generador.generar(5, 50, 500)
+        self.assertEqual(indices(), antes)
+        # El índice UNIQUE de idempotencia nunca se elimina
+        self.assertIn('idx_transacciones_idempotencia', antes)
+        self.assertTrue(all('idx_transacciones_idempotencia' in nombres for nombres in durante))
+        self.assertLess(len(durante[0]), len(antes))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,129 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from app_web import create_app
+from app_web.idempotencia import CacheIdempotencia
+from app_web.metricas import transacciones_insertadas_total
+from src.db.database import BaseDatos
+
+
+class TestIdempotencia(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_idempotencia.db")
+        self.db = BaseDatos(self.db_path)
+        self.db.crear_tablas()
+        self.db.inicializar_datos_ejemplo()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def crear_cliente(self):
+        app = create_app(config={'DATABASE': self.db_path, 'TESTING': True})
+        return app, app.test_client()
+
+    def contar_transacciones(self) -> int:
+        return len(self.db.consultar_transacciones_recientes(100))
+
+    def test_001_reintento_respondido_desde_cache(self):
+        app, cliente = self.crear_cliente()
+        datos = {'producto_id': '2', 'cantidad': '1', 'clave_idempotencia': 'venta-1'}
+        self.assertEqual(cliente.post('/transacciones/crear', data=datos).status_code, 302)
+        operaciones = app.instrumentacion.resumen()['operaciones'].get('insertar_transaccion', {})
+        self.assertEqual(cliente.post('/transacciones/crear', data=datos).status_code, 302)
+        self.assertEqual(app.instrumentacion.resumen()['operaciones'].get('insertar_transaccion', {}), operaciones)
+        self.assertEqual(self.contar_transacciones(), 1)
+        texto = cliente.get('/metrics').get_data(as_text=True)
+        self.assertIn('impuestos_cache_aciertos_total{cache="idempotencia"}', texto)
+
+    def test_002_clave_reutilizada_con_otra_venta(self):
+        _, cliente = self.crear_cliente()
+        cliente.post('/transacciones/crear', data={'producto_id': '2', 'cantidad': '1', 'clave_idempotencia': 'k'})
+        respuesta = cliente.post('/transacciones/crear',
+                                 data={'producto_id': '2', 'cantidad': '5', 'clave_idempotencia': 'k'})
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertEqual(self.contar_transacciones(), 1)
+
+    def test_003_indice_unico_entre_procesos(self):
+        _, cliente = self.crear_cliente()
+        cabeceras = {'Idempotency-Key': 'terminal-7-0001'}
+        cliente.post('/transacciones/crear', data={'producto_id': '2', 'cantidad': '1'}, headers=cabeceras)
+        # Otra instancia (otro worker) con la caché vacía
+        _, otro_cliente = self.crear_cliente()
+        respuesta = otro_cliente.post('/transacciones/crear', data={'producto_id': '2', 'cantidad': '1'},
+                                      headers=cabeceras)
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(self.contar_transacciones(), 1)
+
+    def test_004_base_de_datos_ignora_duplicados(self):
+        self.assertTrue(self.db.insertar_transaccion(1, 1, 2500.0, 2500.0, 125.0, 2625.0, 'abc'))
+        self.assertTrue(self.db.insertar_transaccion(1, 1, 2500.0, 2500.0, 125.0, 2625.0, 'abc'))
+        self.assertTrue(self.db.insertar_transaccion(1, 1, 2500.0, 2500.0, 125.0, 2625.0))
+        self.assertTrue(self.db.insertar_transaccion(1, 1, 2500.0, 2500.0, 125.0, 2625.0))
+        self.assertEqual(self.contar_transacciones(), 3)
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            self.assertEqual(conexion.execute("SELECT COUNT(*) FROM transacciones "
+                                              "WHERE clave_idempotencia = 'abc'").fetchone()[0], 1)
+        finally:
+            conexion.close()
+
+    def test_005_crear_tablas_agrega_columna_a_bases_antiguas(self):
+        ruta = os.path.join(self.temp_dir, "antigua.db")
+        conexion = sqlite3.connect(ruta)
+        conexion.execute("""CREATE TABLE transacciones (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL, cantidad INTEGER NOT NULL, precio_unitario REAL NOT NULL,
+            subtotal REAL NOT NULL, total_impuestos REAL NOT NULL, total_final REAL NOT NULL,
+            fecha_transaccion TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+        conexion.commit()
+        conexion.close()
+        self.assertTrue(BaseDatos(ruta).crear_tablas())
+        conexion = sqlite3.connect(ruta)
+        columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(transacciones)")}
+        conexion.close()
+        self.assertIn('clave_idempotencia', columnas)
+
+    def test_006_cache_lru_con_vencimiento(self):
+        cache = CacheIdempotencia(capacidad=2, vigencia=60)
+        cache.guardar('a', 1)
+        cache.guardar('b', 2)
+        cache.obtener('a')
+        cache.guardar('c', 3)
+        self.assertIsNone(cache.obtener('b'))
+        self.assertEqual(cache.obtener('a'), 1)
+        vencida = CacheIdempotencia(vigencia=0)
+        vencida.guardar('x', 1)
+        time.sleep(0.001)
+        self.assertIsNone(vencida.obtener('x'))
+
+    def test_007_clave_reutilizada_en_otro_proceso(self):
+        self.assertTrue(self.db.insertar_transaccion(1, 1, 2500.0, 2500.0, 125.0, 2625.0, 'abc'))
+        self.assertFalse(self.db.insertar_transaccion(1, 4, 2500.0, 10000.0, 500.0, 10500.0, 'abc'))
+        self.assertEqual(self.db.consultar_transaccion_por_clave('abc')['cantidad'], 1)
+        self.assertIsNone(self.db.consultar_transaccion_por_clave('otra'))
+
+        # Otra instancia (otro worker) con la caché vacía: el reintento no cuenta como venta nueva
+        def insertadas():
+            muestras = transacciones_insertadas_total.exportar()['muestras']
+            return muestras[0][1] if muestras else 0.0
+
+        _, cliente = self.crear_cliente()
+        antes = insertadas()
+        datos = {'producto_id': '1', 'cantidad': '1', 'clave_idempotencia': 'abc'}
+        self.assertEqual(cliente.post('/transacciones/crear', data=datos).status_code, 302)
+        self.assertEqual(insertadas(), antes)
+        cliente.post('/transacciones/crear', data={'producto_id': '1', 'cantidad': '1'})
+        self.assertEqual(insertadas(), antes + 1)
+        _, otro_cliente = self.crear_cliente()
+        respuesta = otro_cliente.post('/transacciones/crear',
+                                      data={'producto_id': '1', 'cantidad': '3', 'clave_idempotencia': 'abc'})
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertEqual(self.contar_transacciones(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
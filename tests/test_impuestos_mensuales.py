@@ -0,0 +1,88 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from app_web import create_app
+from src.db.database import BaseDatos
+from src.db.migraciones import Migrador
+
+
+class TestImpuestosMensuales(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_impuestos.db")
+        self.db = BaseDatos(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def preparar(self):
+        self.db.crear_tablas()
+        self.db.inicializar_datos_ejemplo()
+
+    def ejecutar(self, sql: str, parametros: tuple = ()):
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            conexion.execute(sql, parametros)
+            conexion.commit()
+        finally:
+            conexion.close()
+
+    def mensuales(self) -> dict:
+        return {(fila['periodo'], fila['impuesto']): (fila['transacciones'], fila['base'], fila['valor'])
+                for fila in self.db.consultar_impuestos_mensuales()}
+
+    def test_001_lineas_y_totales_en_la_misma_escritura(self):
+        self.preparar()
+        desglose = {'IVA 19%': 665.0, 'Impuesto de Rentas a los Licores': 875.0}
+        self.assertTrue(self.db.insertar_transaccion(2, 1, 3500.0, 3500.0, 1540.0, 5040.0,
+                                                     desglose_impuestos=desglose))
+        self.assertTrue(self.db.insertar_transaccion(2, 2, 3500.0, 7000.0, 1330.0, 8330.0,
+                                                     desglose_impuestos={'IVA 19%': 1330.0}))
+
+        transaccion_id = self.db.consultar_transacciones_recientes(2)[-1]['id']
+        self.assertEqual(self.db.consultar_impuestos_transaccion(transaccion_id), desglose)
+        periodo = self.db.consultar_transacciones_recientes(1)[0]['fecha_transaccion'][:7]
+        self.assertEqual(self.mensuales(), {
+            (periodo, 'IVA 19%'): (2, 10500.0, 1995.0),
+            (periodo, 'Impuesto de Rentas a los Licores'): (1, 3500.0, 875.0),
+        })
+        self.assertEqual(self.db.consultar_impuestos_mensuales("1999-01", "1999-12"), [])
+
+    def test_002_cambios_y_eliminaciones_ajustan_los_totales(self):
+        self.preparar()
+        self.assertTrue(self.db.insertar_transaccion(2, 1, 3500.0, 3500.0, 665.0, 4165.0,
+                                                     desglose_impuestos={'IVA 19%': 665.0}))
+        self.ejecutar("UPDATE transacciones SET desglose_impuestos = ?, fecha_transaccion = ?",
+                      ('{"IVA 5%": 175.0}', '2024-03-10 12:00:00'))
+        self.assertEqual({clave: valor for clave, valor in self.mensuales().items() if valor[0]},
+                         {('2024-03', 'IVA 5%'): (1, 3500.0, 175.0)})
+
+        self.ejecutar("DELETE FROM transacciones")
+        self.assertEqual(self.mensuales()[('2024-03', 'IVA 5%')], (0, 0.0, 0.0))
+        self.assertEqual(self.db.consultar_impuestos_transaccion(1), {})
+
+    def test_003_migracion_rellena_ventas_con_desglose(self):
+        Migrador(self.db_path).aplicar(hasta=6)
+        self.ejecutar("INSERT INTO categorias (id, nombre) VALUES (1, 'Otros')")
+        self.ejecutar("INSERT INTO productos (id, nombre, precio_base, categoria_id) VALUES (1, 'Laptop', 1000, 1)")
+        self.ejecutar("INSERT INTO transacciones (producto_id, cantidad, precio_unitario, subtotal, total_impuestos, "
+                      "total_final, fecha_transaccion, desglose_impuestos) "
+                      "VALUES (1, 1, 1000, 1000, 190, 1190, '2024-05-01 10:00:00', '{\"IVA 19%\": 190.0}')")
+
+        self.assertTrue(self.db.crear_tablas())
+        self.assertEqual(self.mensuales(), {('2024-05', 'IVA 19%'): (1, 1000.0, 190.0)})
+
+    def test_004_reporte_web(self):
+        self.preparar()
+        cliente = create_app(config={'DATABASE': self.db_path, 'TESTING': True}).test_client()
+        self.assertEqual(cliente.post('/transacciones/crear',
+                                      data={'producto_id': '2', 'cantidad': '1'}).status_code, 302)
+        texto = cliente.get('/estadisticas/impuestos_mensuales').get_data(as_text=True)
+        self.assertIn('Impuesto de Rentas a los Licores', texto)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from app_web import create_app
+from src.db.cola_escritura import CAMPOS_FILA, _fila_diario
+from src.db.database import BaseDatos
+
+
+class TestInstantaneaTransacciones(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_instantanea.db")
+        self.db = BaseDatos(self.db_path)
+        self.db.crear_tablas()
+        self.db.inicializar_datos_ejemplo()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_conserva_categoria_y_nombres_de_la_venta(self):
+        desglose = {'IVA 19%': 665.0}
+        self.assertTrue(self.db.insertar_transaccion(2, 1, 3500.0, 3500.0, 665.0, 4165.0,
+                                                     desglose_impuestos=desglose))
+        self.assertTrue(self.db.actualizar_producto(2, nombre="Cerveza Importada", categoria_id=6))
+        self.assertTrue(self.db.actualizar_categoria(2, nombre="Bebidas"))
+
+        transaccion = self.db.consultar_transacciones_recientes(1, como_modelos=True)[0]
+        self.assertEqual(transaccion.producto_nombre, "Cerveza Nacional")
+        self.assertEqual(transaccion.categoria_nombre, "Licores")
+        self.assertEqual(transaccion.categoria_id, 2)
+        self.assertEqual(transaccion.desglose_impuestos, desglose)
+
+    def test_002_ventas_por_categoria_historicas(self):
+        self.assertTrue(self.db.insertar_transaccion(2, 2, 3500.0, 7000.0, 1330.0, 8330.0))
+        self.assertTrue(self.db.actualizar_producto(2, categoria_id=6))
+        self.assertTrue(self.db.insertar_transaccion(2, 1, 3500.0, 3500.0, 665.0, 4165.0))
+
+        ventas = {fila['categoria_nombre']: fila for fila in self.db.consultar_ventas_por_categoria()}
+        self.assertEqual(ventas['Licores']['cantidad'], 2)
+        self.assertEqual(ventas['Licores']['total'], 8330.0)
+        self.assertEqual(ventas['Otros']['transacciones'], 1)
+
+    def test_003_web_guarda_desglose_de_la_calculadora(self):
+        cliente = create_app(config={'DATABASE': self.db_path, 'TESTING': True}).test_client()
+        respuesta = cliente.post('/transacciones/crear', data={'producto_id': '2', 'cantidad': '2'})
+        self.assertEqual(respuesta.status_code, 302)
+
+        transaccion = self.db.consultar_transacciones_recientes(1)[0]
+        self.assertGreater(len(transaccion['desglose_impuestos']), 1)
+        self.assertAlmostEqual(sum(transaccion['desglose_impuestos'].values()), transaccion['total_impuestos'])
+        self.assertIn('Licores', cliente.get('/estadisticas/ventas_por_categoria').get_data(as_text=True))
+
+    def test_004_diarios_anteriores_sin_desglose(self):
+        fila = _fila_diario([2, 1, 3500.0, 3500.0, 665.0, 4165.0, '2024-01-01 00:00:00', None])
+        self.assertEqual(len(fila), CAMPOS_FILA)
+        self.assertIsNone(fila[-1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.db.database import BaseDatos
+from src.db.instrumentacion import Histograma, Instrumentacion
+
+
+class TestInstrumentacion(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_instrumentacion.db")
+        self.ruta_log = os.path.join(self.temp_dir, "lentas.jsonl")
+        self.instrumentacion = Instrumentacion(umbral_lento=10.0, ruta_log_lento=self.ruta_log)
+        self.db = BaseDatos(self.db_path, instrumentacion=self.instrumentacion)
+        self.assertTrue(self.db.crear_tablas())
+        self.assertTrue(self.db.insertar_categoria("Otros", "Varios", 0.19))
+        self.assertTrue(self.db.insertar_producto("Laptop", 1000.0, 1))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_histogramas_por_operacion_y_sentencia(self):
+        self.db.consultar_todos_productos()
+        resumen = self.instrumentacion.resumen()
+        self.assertEqual(resumen['operaciones']['consultar_todos_productos']['cantidad'], 1)
+        self.assertEqual(resumen['sentencias']['productos_todos']['cantidad'], 1)
+        self.assertGreater(resumen['conexion']['cantidad'], 0)
+
+    def test_002_gancho_recibe_filas_y_forma_sql(self):
+        operaciones = []
+        self.instrumentacion.agregar_gancho(operaciones.append)
+        self.db.consultar_todos_productos()
+        operacion = operaciones[-1]
+        self.assertEqual(operacion.nombre, 'consultar_todos_productos')
+        self.assertEqual(operacion.filas, 1)
+        self.assertGreater(operacion.tiempo_conexion, 0.0)
+        self.assertIn("FROM productos p JOIN categorias c", operacion.sentencias[0].sql)
+
+    def test_003_error_queda_registrado(self):
+        self.assertFalse(self.db.insertar_producto("Malo", -1.0, 1))
+        self.assertEqual(self.instrumentacion.resumen()['errores'].get('insertar_producto'), 1)
+
+    def test_004_log_de_consultas_lentas_con_plan(self):
+        self.instrumentacion.umbral_lento = 0.0
+        self.instrumentacion.capturar_plan = True
+        self.db.consultar_productos_por_categoria(1)
+        with open(self.ruta_log, encoding='utf-8') as archivo:
+            entradas = [json.loads(linea) for linea in archivo]
+        entrada = next(e for e in entradas if e['nombre'] == 'productos_por_categoria')
+        self.assertEqual(entrada['operacion'], 'consultar_productos_por_categoria')
+        self.assertTrue(entrada['plan'])
+
+    def test_005_operaciones_anidadas_se_acumulan(self):
+        operaciones = []
+        self.instrumentacion.agregar_gancho(operaciones.append)
+        self.db.inicializar_datos_ejemplo()
+        self.assertEqual([op.nombre for op in operaciones], ['inicializar_datos_ejemplo'])
+
+    def test_006_percentiles_histograma(self):
+        histograma = Histograma(limites=(1, 2, 3))
+        for valor in (0.5, 1.5, 2.5, 2.5):
+            histograma.observar(valor)
+        self.assertEqual(histograma.percentil(50), 2)
+        self.assertEqual(histograma.percentil(100), 3)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from app_web import create_app
+from app_web.metricas import AlmacenMultiproceso, RegistroMetricas, fusionar, texto_prometheus
+from src.db.database import BaseDatos
+
+
+class TestMetricas(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_metricas.db")
+        BaseDatos(self.db_path).crear_tablas()
+        self.app = create_app(config={'DATABASE': self.db_path, 'TESTING': True})
+        self.cliente = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_endpoint_expone_formato_prometheus(self):
+        self.cliente.get('/productos/')
+        respuesta = self.cliente.get('/metrics')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.content_type.startswith('text/plain'))
+        texto = respuesta.get_data(as_text=True)
+        self.assertIn('# TYPE impuestos_http_duracion_segundos histogram', texto)
+        self.assertIn('impuestos_http_duracion_segundos_bucket{ruta="productos.listar",metodo="GET",le="+Inf"}', texto)
+        self.assertIn('impuestos_db_llamadas_por_solicitud_count{ruta="productos.listar"}', texto)
+
+    def test_002_calculos_y_transacciones(self):
+        self.cliente.post('/calculadora/calcular', data={'valor_base': '1000', 'categoria': 'Otros'})
+        texto = self.cliente.get('/metrics').get_data(as_text=True)
+        self.assertIn('impuestos_calculos_total{categoria="Otros"}', texto)
+
+    def test_003_fusion_de_procesos(self):
+        registros = []
+        for _ in range(2):
+            registro = RegistroMetricas()
+            contador = registro.contador('c_total', 'contador', ('ruta',))
+            histograma = registro.histograma('h', 'histograma', limites=(1, 2))
+            contador.inc('a')
+            histograma.observar(1.5)
+            registros.append(registro.exportar())
+        fusion = fusionar(registros)
+        texto = texto_prometheus(fusion)
+        self.assertIn('c_total{ruta="a"} 2', texto)
+        self.assertIn('h_bucket{le="2"} 2', texto)
+        self.assertIn('h_count 2', texto)
+
+    def test_004_almacen_descarta_medidores_de_procesos_muertos(self):
+        directorio = os.path.join(self.temp_dir, "metricas")
+        almacen = AlmacenMultiproceso(directorio)
+        registro = RegistroMetricas()
+        registro.medidor('en_curso', 'medidor').inc()
+        registro.contador('total', 'contador').inc()
+        almacen.volcar(registro, forzar=True)
+        instantanea = registro.exportar()
+        with open(os.path.join(directorio, "metricas_999999999.json"), 'w', encoding='utf-8') as archivo:
+            json.dump(instantanea, archivo)
+        fusion = fusionar(almacen.leer())
+        self.assertEqual(fusion['total']['muestras'][0][1], 2.0)
+        self.assertEqual(fusion['en_curso']['muestras'][0][1], 1.0)
+
+    def test_005_procesos_terminados_se_acumulan(self):
+        directorio = os.path.join(self.temp_dir, "metricas")
+        almacen = AlmacenMultiproceso(directorio)
+        registro = RegistroMetricas()
+        registro.contador('total', 'contador').inc(cantidad=3)
+        registro.medidor('en_curso', 'medidor').inc()
+        almacen.volcar(registro, forzar=True)
+        pid, inicio = almacen._propia()
+        # Un worker muerto cuyo PID reutiliza este proceso: otro instante de arranque
+        muerto = {'total': {'tipo': 'counter', 'ayuda': 'contador', 'etiquetas': [], 'muestras': [[[], 5.0]]},
+                  'en_curso': {'tipo': 'gauge', 'ayuda': 'medidor', 'etiquetas': [], 'muestras': [[[], 1.0]]}}
+        for nombre in (f"metricas_{pid}_0.json", "metricas_999999999_7.json"):
+            with open(os.path.join(directorio, nombre), 'w', encoding='utf-8') as archivo:
+                json.dump(muerto, archivo)
+
+        fusion = fusionar(almacen.leer())
+        self.assertEqual(fusion['total']['muestras'][0][1], 13.0)
+        self.assertEqual(fusion['en_curso']['muestras'][0][1], 1.0)
+        self.assertEqual(sorted(os.listdir(directorio)),
+                         sorted([AlmacenMultiproceso.ACUMULADO, f"metricas_{pid}_{inicio}.json", "metricas.lock"]))
+        # Leer otra vez no suma dos veces lo acumulado
+        self.assertEqual(fusionar(almacen.leer())['total']['muestras'][0][1], 13.0)
+
+        almacen.limpiar()
+        self.assertEqual(almacen.leer(), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,143 @@
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from src.db.migraciones import MIGRACIONES, Migracion, Migrador, main
+
+
+class TestMigraciones(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_migraciones.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def consultar(self, sql: str):
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            return conexion.execute(sql).fetchall()
+        finally:
+            conexion.close()
+
+    def indices(self) -> set:
+        return {fila[0] for fila in self.consultar("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    def test_001_base_nueva_queda_en_la_ultima_version(self):
+        migrador = Migrador(self.db_path)
+        self.assertEqual(len(migrador.pendientes()), len(MIGRACIONES))
+        self.assertTrue(migrador.aplicar())
+        self.assertEqual(migrador.version_actual(), MIGRACIONES[-1].version)
+        self.assertEqual(migrador.pendientes(), [])
+        self.assertIn('idx_transacciones_producto_fecha', self.indices())
+        self.assertEqual(self.consultar("PRAGMA journal_mode")[0][0], 'wal')
+
+    def test_002_base_anterior_conserva_sus_datos(self):
+        Migrador(self.db_path).aplicar(hasta=1)
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("PRAGMA user_version = 0")
+        conexion.execute("INSERT INTO categorias (nombre) VALUES ('Otros')")
+        conexion.commit()
+        conexion.close()
+
+        self.assertTrue(Migrador(self.db_path).aplicar())
+        self.assertEqual(self.consultar("SELECT nombre FROM categorias"), [('Otros',)])
+        columnas = {fila[1] for fila in self.consultar("PRAGMA table_info(transacciones)")}
+        self.assertIn('clave_idempotencia', columnas)
+
+    def test_003_migracion_fallida_se_revierte(self):
+        migraciones = [
+            Migracion(1, "tabla a", ["CREATE TABLE a (x INTEGER)"]),
+            Migracion(2, "tabla b con error", ["CREATE TABLE b (x INTEGER)", "INSERT INTO no_existe VALUES (1)"]),
+        ]
+        migrador = Migrador(self.db_path, migraciones)
+        with redirect_stdout(io.StringIO()):
+            self.assertFalse(migrador.aplicar())
+        self.assertEqual(migrador.version_actual(), 1)
+        tablas = {fila[0] for fila in self.consultar("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertIn('a', tablas)
+        self.assertNotIn('b', tablas)
+
+    def test_004_indices_en_linea_se_reanudan(self):
+        migrador = Migrador(self.db_path)
+        migraciones = {migracion.version: migracion for migracion in MIGRACIONES}
+        for version, indice in ((4, 'idx_productos_estado_nombre'), (10, 'idx_transacciones_mes')):
+            with self.subTest(version=version):
+                self.assertTrue(migraciones[version].en_linea)
+                self.assertTrue(migrador.aplicar(hasta=version - 1))
+                # Un intento anterior interrumpido dejó construido el primer índice
+                conexion = sqlite3.connect(self.db_path)
+                conexion.execute(migraciones[version].pasos[0])
+                conexion.close()
+                self.assertEqual(migrador.version_actual(), version - 1)
+                self.assertTrue(migrador.aplicar(hasta=version))
+                self.assertEqual(migrador.version_actual(), version)
+                self.assertIn(indice, self.indices())
+
+    def test_005_cli_muestra_pendientes(self):
+        salida = io.StringIO()
+        with redirect_stdout(salida):
+            self.assertEqual(main([self.db_path, 'estado']), 0)
+        self.assertIn('Versión actual: 0', salida.getvalue())
+        self.assertIn('pendiente 4:', salida.getvalue())
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main([self.db_path, 'aplicar']), 0)
+        salida = io.StringIO()
+        with redirect_stdout(salida):
+            main([self.db_path])
+        self.assertIn('No hay migraciones pendientes', salida.getvalue())
+
+    def test_006_versiones_repetidas(self):
+        with self.assertRaises(ValueError):
+            Migrador(self.db_path, [Migracion(1, "a", []), Migracion(1, "b", [])])
+
+    def test_007_instantanea_de_categoria_se_rellena(self):
+        Migrador(self.db_path).aplicar(hasta=5)
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("INSERT INTO categorias (id, nombre) VALUES (1, 'Licores')")
+        conexion.execute("INSERT INTO productos (id, nombre, precio_base, categoria_id) VALUES (1, 'Ron', 50000, 1)")
+        conexion.execute("INSERT INTO transacciones (producto_id, cantidad, precio_unitario, subtotal, "
+                         "total_impuestos, total_final) VALUES (1, 1, 50000, 50000, 9500, 59500)")
+        conexion.commit()
+        conexion.close()
+
+        self.assertTrue(Migrador(self.db_path).aplicar())
+        self.assertEqual(self.consultar("SELECT categoria_id, producto_nombre, categoria_nombre FROM transacciones"),
+                         [(1, 'Ron', 'Licores')])
+        self.assertIn('idx_transacciones_categoria_totales', self.indices())
+        self.assertNotIn('idx_transacciones_categoria_fecha', self.indices())
+        # El total guardado se reparte en la proporción de los impuestos de la categoría
+        lineas = dict(self.consultar("SELECT impuesto, valor FROM transacciones_impuestos"))
+        self.assertEqual(lineas, {'IVA 19%': 4102.27, 'Impuesto de Rentas a los Licores': 5397.73})
+        self.assertEqual(self.consultar("SELECT ROUND(SUM(valor), 2) FROM impuestos_mensuales"), [(9500.0,)])
+
+    def test_008_desglose_de_bases_ya_migradas(self):
+        # Una base que pasó la migración 6 antes de que rellenara el desglose
+        Migrador(self.db_path).aplicar(hasta=12)
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("INSERT INTO categorias (id, nombre, tasa_iva) VALUES (1, 'Alimentos Básicos', 0.05), "
+                         "(2, 'Importados', 0.1), (3, 'Sin tasa', NULL)")
+        conexion.execute("INSERT INTO productos (id, nombre, precio_base, categoria_id) "
+                         "VALUES (1, 'Arroz', 2000, 1), (2, 'Queso', 1000, 2), (3, 'Otro', 1000, 3)")
+        conexion.execute("INSERT INTO transacciones (producto_id, cantidad, precio_unitario, subtotal, total_impuestos, "
+                         "total_final, fecha_transaccion, categoria_id, categoria_nombre) VALUES "
+                         "(1, 2, 2000, 4000, 200, 4200, '2024-01-05', 1, 'Alimentos Básicos'), "
+                         "(2, 1, 1000, 1000, 100, 1100, '2024-01-06', 2, 'Importados'), "
+                         "(3, 1, 1000, 1000, 0, 1000, '2024-01-07', 3, 'Sin tasa')")
+        conexion.commit()
+        conexion.close()
+
+        self.assertTrue(Migrador(self.db_path).aplicar())
+        self.assertEqual(self.consultar("SELECT id, desglose_impuestos FROM transacciones ORDER BY id"),
+                         [(1, '{"IVA 5%": 200.0}'), (2, '{"IVA 10%": 100.0}'), (3, None)])
+        self.assertEqual(self.consultar("SELECT periodo, impuesto, transacciones, valor FROM impuestos_mensuales "
+                                        "ORDER BY impuesto"),
+                         [('2024-01', 'IVA 10%', 1, 100.0), ('2024-01', 'IVA 5%', 1, 200.0)])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,48 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from app_web import create_app
+from src.db.database import BaseDatos
+
+
+class TestPerfilado(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_perfilado.db")
+        self.dir_perfiles = os.path.join(self.temp_dir, "perfiles")
+        db = BaseDatos(self.db_path)
+        db.crear_tablas()
+        db.inicializar_datos_ejemplo()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def crear_cliente(self, **config):
+        config.update({'DATABASE': self.db_path, 'PERFILADO_DIR': self.dir_perfiles})
+        return create_app(config=config).test_client()
+
+    def test_001_desactivado_no_registra_rutas(self):
+        cliente = self.crear_cliente()
+        self.assertEqual(cliente.get('/_perfiles/').status_code, 404)
+        respuesta = cliente.get('/productos/por_categoria', headers={'X-Perfilar': '1'})
+        self.assertNotIn('X-Perfil', respuesta.headers)
+        self.assertFalse(os.path.exists(self.dir_perfiles))
+
+    def test_002_perfil_por_cabecera(self):
+        cliente = self.crear_cliente(PERFILADO_CABECERA=True)
+        self.assertNotIn('X-Perfil', cliente.get('/productos/por_categoria').headers)
+        respuesta = cliente.get('/productos/por_categoria', headers={'X-Perfilar': '1'})
+        nombre = respuesta.headers['X-Perfil']
+        for extension in ('.prof', '.txt', '.json'):
+            self.assertTrue(os.path.exists(os.path.join(self.dir_perfiles, nombre + extension)))
+
+        indice = cliente.get('/_perfiles/').get_data(as_text=True)
+        self.assertIn('/productos/por_categoria', indice)
+        detalle = cliente.get(f'/_perfiles/{nombre}').get_data(as_text=True)
+        self.assertIn('consultar_productos_por_categoria', detalle)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
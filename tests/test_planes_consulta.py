@@ -0,0 +1,74 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from src.db.datos_sinteticos import GeneradorDatosSinteticos
+from src.db.sentencias import registro_sentencias, problemas_plan
+
+# Sentencias que cargan una tabla completa en memoria (historial de tasas)
+CARGAS_COMPLETAS = {'tasas_categoria_todas', 'tasas_impuesto_todas', 'estampas_todas'}
+# Recorridos por un índice que no cubre la consulta, aceptados a propósito
+RECORRIDOS_POR_INDICE = {
+    # El listado muestra todos los productos en orden de nombre: el índice evita ordenar
+    'productos_todos',
+    # ORDER BY fecha DESC LIMIT ?: sólo se leen las primeras filas del índice
+    'transacciones_recientes',
+    # Índice de expresión: la tabla se lee una vez por mes (DeferredSeek), no por venta
+    'ventas_por_mes',
+}
+
+
+class TestPlanesConsulta(unittest.TestCase):
+    """Regresión de planes: ninguna sentencia del catálogo recorre una tabla sin índice
+    ni ordena en un B-tree temporal sobre una base de tamaño realista"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.temp_dir, "planes.db")
+        GeneradorDatosSinteticos(cls.db_path, semilla=3).generar(200, 5000, 50000)
+        cls.conexion = sqlite3.connect(cls.db_path)
+        cls.conexion.execute("ANALYZE")
+        cls.planes = registro_sentencias.planes(cls.conexion)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conexion.close()
+        shutil.rmtree(cls.temp_dir)
+
+    def test_001_sin_recorridos_ni_ordenamientos_temporales(self):
+        for nombre, plan in self.planes.items():
+            with self.subTest(sentencia=nombre):
+                problemas = problemas_plan(plan)
+                if nombre in CARGAS_COMPLETAS:
+                    # Leen la tabla entera a propósito; sólo se exige el orden de la clave primaria
+                    problemas = [paso for paso in problemas if paso.startswith("USE TEMP B-TREE")]
+                if nombre in RECORRIDOS_POR_INDICE:
+                    problemas = [paso for paso in problemas if " USING INDEX " not in paso]
+                self.assertEqual(problemas, [], f"{nombre}: {plan}")
+
+    def test_002_detecta_planes_problematicos(self):
+        plan = [fila[3] for fila in self.conexion.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM transacciones ORDER BY cantidad")]
+        self.assertEqual(problemas_plan(plan), ["SCAN transacciones", "USE TEMP B-TREE FOR ORDER BY"])
+        # Recorrer una tabla grande por un índice que no la cubre busca cada fila en la tabla
+        plan = [fila[3] for fila in self.conexion.execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(cantidad) FROM transacciones INDEXED BY idx_transacciones_fecha")]
+        self.assertEqual(problemas_plan(plan), ["SCAN transacciones USING INDEX idx_transacciones_fecha"])
+        self.assertEqual(problemas_plan(["SCAN transacciones USING COVERING INDEX idx_transacciones_total"]), [])
+        self.assertEqual(problemas_plan(["SCAN categorias USING INDEX sqlite_autoindex_categorias_1"]), [])
+
+    def test_003_agregados_y_filtros_cubiertos_o_por_busqueda(self):
+        # Cada tabla se lee con una búsqueda o con un índice que cubre la consulta, sea cual sea
+        for nombre in ('productos_por_categoria', 'productos_por_estado', 'ventas_total',
+                       'ventas_por_categoria', 'transacciones_contar', 'transacciones_limites'):
+            with self.subTest(sentencia=nombre):
+                for paso in self.planes[nombre]:
+                    if paso.startswith(("SCAN ", "SEARCH ")) and paso != "SCAN CONSTANT ROW":
+                        self.assertTrue(paso.startswith("SEARCH ") or " USING COVERING INDEX " in paso,
+                                        f"{nombre}: {paso}")
+        self.assertNotIn("productos", " ".join(self.planes['transacciones_recientes']))
+        # Los extremos de la clave primaria se buscan, sin recorrer ningún índice
+        self.assertNotIn("SCAN transacciones", " ".join(self.planes['transacciones_limites']))
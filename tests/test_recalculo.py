@@ -0,0 +1,148 @@
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from src.db.database import BaseDatos, conexiones_por_hilo
+from src.db.datos_sinteticos import GeneradorDatosSinteticos
+from src.db.recalculo import CONTEXTO_PROCESOS, RecalculoImpuestos, main, recalcular_transaccion
+from src.model.calculadora_impuestos import CalculadoraImpuestos
+from src.model.tasas import IndiceTasas
+
+
+class TestRecalculo(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_recalculo.db")
+        GeneradorDatosSinteticos(self.db_path, semilla=5, tamano_lote=500).generar(20, 300, 2000)
+        self.db = BaseDatos(self.db_path)
+        # Sube el IVA general a mitad del año de datos
+        self.assertTrue(self.db.programar_tasa_impuesto('IVA 19%', 0.20, '2024-07-01 00:00:00'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def consultar(self, sql: str):
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            return conexion.execute(sql).fetchall()
+        finally:
+            conexion.close()
+
+    def recalcular(self, **opciones) -> object:
+        opciones.setdefault('procesos', 2)
+        opciones.setdefault('tamano_rango', 300)
+        return RecalculoImpuestos(self.db_path, **opciones).ejecutar()
+
+    def test_001_simular_no_escribe(self):
+        antes = self.consultar("SELECT id, total_impuestos FROM transacciones ORDER BY id")
+        resultado = self.recalcular(simular=True)
+        self.assertEqual(resultado.revisadas, 2000)
+        self.assertGreater(resultado.cambiadas, 0)
+        self.assertGreater(resultado.diferencia, 0)
+        self.assertTrue(all(nuevo > anterior for _, anterior, nuevo in resultado.ejemplos))
+        self.assertEqual(self.consultar("SELECT id, total_impuestos FROM transacciones ORDER BY id"), antes)
+
+    def test_002_aplica_cambios_y_mantiene_totales(self):
+        simulado = self.recalcular(simular=True)
+        resultado = self.recalcular(ejecucion='prueba')
+        self.assertEqual(resultado.cambiadas, simulado.cambiadas)
+        self.assertAlmostEqual(resultado.diferencia, simulado.diferencia, places=2)
+
+        self.assertEqual(self.recalcular(simular=True).cambiadas, 0)
+        total, = self.consultar("SELECT ROUND(SUM(total_impuestos), 2) FROM transacciones")[0]
+        mensual, = self.consultar("SELECT ROUND(SUM(valor), 2) FROM impuestos_mensuales")[0]
+        self.assertAlmostEqual(total, mensual, places=2)
+        self.assertEqual(self.consultar("SELECT COUNT(*) FROM transacciones "
+                                        "WHERE ABS(total_final - subtotal - total_impuestos) > 0.005")[0][0], 0)
+
+    def test_003_reanuda_una_ejecucion_interrumpida(self):
+        resultado = self.recalcular(simular=True)
+        # Una ejecución anterior alcanzó a anotar el primer rango
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("INSERT INTO recalculo_control (ejecucion, desde_id, hasta_id, cambiadas) "
+                         "VALUES ('interrumpida', 1, 300, 0)")
+        conexion.commit()
+        conexion.close()
+
+        reanudado = self.recalcular(ejecucion='interrumpida')
+        self.assertEqual(reanudado.rangos_reanudados, 1)
+        self.assertEqual(reanudado.revisadas, 2000 - 300)
+        self.assertLess(reanudado.cambiadas, resultado.cambiadas)
+        self.assertEqual(self.recalcular(ejecucion='interrumpida').revisadas, 0)
+
+    def test_004_categoria_sin_reglas_usa_su_historial(self):
+        historial = IndiceTasas()
+        historial.agregar(7, '0001-01-01 00:00:00', 0.19)
+        historial.agregar(7, '2024-01-01 00:00:00', 0.05)
+        calculadora = CalculadoraImpuestos(historial)
+        self.assertEqual(recalcular_transaccion(calculadora, 2, 1000.0, '2023-06-01 00:00:00', 7, 'Categoría 7'),
+                         (380.0, {'IVA 19%': 380.0}))
+        self.assertEqual(recalcular_transaccion(calculadora, 2, 1000.0, '2024-06-01 00:00:00', 7, 'Categoría 7'),
+                         (100.0, {'IVA 5%': 100.0}))
+        self.assertIsNone(recalcular_transaccion(calculadora, 1, 1000.0, '2024-06-01 00:00:00', 8, 'Categoría 8'))
+
+    def test_005_cli(self):
+        salida = io.StringIO()
+        with redirect_stdout(salida):
+            self.assertEqual(main([self.db_path, '--simular', '--procesos', '1', '--ejemplos', '2']), 0)
+        self.assertIn('Revisadas 2,000', salida.getvalue())
+
+    def test_006_modo_wal_y_errores(self):
+        # Salir de WAL exige que no quede otra conexión abierta
+        conexiones_por_hilo.cerrar()
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("PRAGMA journal_mode = DELETE")
+        conexion.close()
+        self.recalcular(simular=True)
+        self.assertEqual(self.consultar("PRAGMA journal_mode"), [('wal',)])
+
+        # Los errores se propagan en lugar de imprimirse
+        ruta = os.path.join(self.temp_dir, "no_existe", "base.db")
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(RuntimeError):
+                RecalculoImpuestos(ruta, procesos=1).ejecutar()
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("DROP TABLE recalculo_control")
+        conexion.commit()
+        conexion.close()
+        with self.assertRaises(sqlite3.OperationalError):
+            self.recalcular(ejecucion='sin_control')
+        salida = io.StringIO()
+        with redirect_stdout(salida):
+            self.assertEqual(main([self.db_path, '--procesos', '1']), 1)
+        self.assertIn('Error al recalcular impuestos', salida.getvalue())
+
+    def test_007_desde_un_hilo_sin_fork(self):
+        # Como en la cola de trabajos: los trabajadores no se crean con fork desde el hilo
+        self.assertNotEqual(CONTEXTO_PROCESOS.get_start_method(), 'fork')
+        resultados = []
+        hilo = threading.Thread(target=lambda: resultados.append(self.recalcular(simular=True)))
+        hilo.start()
+        hilo.join(60)
+        self.assertEqual(resultados[0].revisadas, 2000)
+
+    def test_008_desglose_faltante_o_distinto(self):
+        self.recalcular(ejecucion='inicial')
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("UPDATE transacciones SET desglose_impuestos = NULL WHERE id <= 5")
+        conexion.execute("""UPDATE transacciones SET desglose_impuestos = '{"Otro": 1.0}' WHERE id = 6""")
+        conexion.commit()
+        conexion.close()
+
+        # Los totales coinciden: sólo cambia el desglose
+        simulado = self.recalcular(simular=True)
+        self.assertEqual(simulado.cambiadas, 6)
+        self.assertEqual(simulado.ejemplos, [])
+        self.assertEqual(self.recalcular(ejecucion='desglose').cambiadas, 6)
+        self.assertEqual(self.consultar("SELECT COUNT(*) FROM transacciones WHERE desglose_impuestos IS NULL "
+                                        "OR desglose_impuestos LIKE '%Otro%'")[0][0], 0)
+        self.assertEqual(self.recalcular(simular=True).cambiadas, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
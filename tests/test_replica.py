@@ -0,0 +1,159 @@
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from app_web import create_app
+from src.db.database import BaseDatos
+from src.db.datos_sinteticos import GeneradorDatosSinteticos
+from src.db.replica import ReplicaLectura, ruta_replica
+from src.db.reportes import MotorReportes, SeccionReporte
+
+CONTAR = {'total': SeccionReporte('transacciones_contar', valor_unico=True)}
+
+
+class TestReplicaLectura(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_replica.db")
+        GeneradorDatosSinteticos(self.db_path, semilla=5, tamano_lote=200).generar(5, 50, 400)
+        self.db = BaseDatos(self.db_path)
+        self.replica = ReplicaLectura(self.db_path, antiguedad_maxima=60)
+
+    def tearDown(self):
+        self.replica.cerrar()
+        shutil.rmtree(self.temp_dir)
+
+    def envejecer(self, segundos: float):
+        """Retrasa la fecha de la copia como si se hubiera hecho hace ``segundos``"""
+        fecha = time.time() - segundos
+        os.utime(self.replica.ruta, (fecha, fecha))
+
+    def vender(self):
+        self.assertTrue(self.db.insertar_transaccion(1, 1, 100.0, 100.0, 19.0, 119.0))
+
+    def test_001_copia_de_solo_lectura(self):
+        self.assertEqual(ruta_replica(self.db_path), os.path.join(self.temp_dir, "test_replica.replica.db"))
+        self.assertIsNone(self.replica.version())
+        version = self.replica.vigente()
+        self.assertIsNotNone(version)
+        self.assertTrue(os.path.exists(self.replica.ruta))
+        self.assertEqual(os.listdir(self.temp_dir).count("test_replica.replica.db"), 1)
+        self.assertFalse([nombre for nombre in os.listdir(self.temp_dir) if nombre.endswith('.tmp')])
+
+        conexion = self.replica.conectar()
+        try:
+            self.assertEqual(conexion.execute("SELECT COUNT(*) FROM transacciones").fetchone()[0], 400)
+            with self.assertRaises(sqlite3.OperationalError):
+                conexion.execute("DELETE FROM transacciones")
+        finally:
+            conexion.close()
+
+    def test_002_antiguedad_maxima(self):
+        primera = self.replica.vigente()
+        self.vender()
+        # Dentro del límite se sigue usando la misma copia
+        self.assertEqual(self.replica.vigente(), primera)
+
+        self.envejecer(61)
+        vieja = self.replica.version()
+        nueva = self.replica.vigente()
+        self.assertGreater(nueva, vieja)
+        conexion = self.replica.conectar()
+        try:
+            self.assertEqual(conexion.execute("SELECT COUNT(*) FROM transacciones").fetchone()[0], 401)
+        finally:
+            conexion.close()
+
+    def test_003_refresco_en_segundo_plano(self):
+        self.replica.vigente()
+        self.envejecer(40)
+        vieja = self.replica.version()
+        # Pasada la mitad del límite responde con la copia actual y refresca aparte
+        self.assertEqual(self.replica.vigente(), vieja)
+        self.replica.cerrar()
+        self.assertGreater(self.replica.version(), vieja)
+
+    def test_004_motor_de_reportes_y_base_leen_la_copia(self):
+        motor = MotorReportes(self.db_path, hilos=2, replica=self.replica)
+        self.addCleanup(motor.cerrar)
+        db = BaseDatos(self.db_path, replica=self.replica)
+        self.assertEqual(motor.generar(CONTAR), {'total': 400})
+        antes = db.obtener_estadisticas()['total_transacciones']
+
+        self.vender()
+        self.assertEqual(motor.generar(CONTAR), {'total': 400})
+        self.assertEqual(db.obtener_estadisticas()['total_transacciones'], antes)
+        self.assertEqual(BaseDatos(self.db_path).obtener_estadisticas()['total_transacciones'], antes + 1)
+
+        self.envejecer(61)
+        self.assertEqual(motor.generar(CONTAR), {'total': 401})
+        self.assertEqual(db.obtener_estadisticas()['total_transacciones'], antes + 1)
+        self.assertLessEqual(len(motor._conexiones), 2)
+
+    def test_005_sin_base_principal(self):
+        replica = ReplicaLectura(os.path.join(self.temp_dir, "no_existe.db"))
+        salida = io.StringIO()
+        with redirect_stdout(salida):
+            self.assertIsNone(replica.vigente())
+        self.assertIn('Error al refrescar la réplica de lectura', salida.getvalue())
+        self.assertIsNone(replica.version())
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "no_existe.db")))
+
+
+class TestReplicaEnAplicacion(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_replica_app.db")
+        db = BaseDatos(self.db_path)
+        db.crear_tablas()
+        db.inicializar_datos_ejemplo()
+        self.db = db
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def crear_app(self, **config):
+        app = create_app(config={'DATABASE': self.db_path, 'TESTING': True, **config})
+        self.addCleanup(app.reportes.cerrar)
+        self.addCleanup(app.estampas.cerrar)
+        self.addCleanup(app.trabajos.detener)
+        if app.replica is not None:
+            self.addCleanup(app.replica.cerrar)
+        return app
+
+    def test_001_desactivada_por_defecto(self):
+        app = self.crear_app()
+        self.assertIsNone(app.replica)
+        self.assertIsNone(app.reportes.replica)
+        self.assertEqual(app.test_client().get('/estadisticas/').status_code, 200)
+        self.assertFalse(os.path.exists(ruta_replica(self.db_path)))
+
+    def test_002_etag_de_la_copia(self):
+        app = self.crear_app(REPLICA_ANALITICA=True)
+        cliente = app.test_client()
+        primera = cliente.get('/estadisticas/')
+        self.assertEqual(primera.status_code, 200)
+        self.assertTrue(os.path.exists(app.replica.ruta))
+        self.assertEqual(primera.last_modified.timestamp(), int(app.replica.version() / 1e9))
+
+        # Una venta no cambia la página mientras la copia esté vigente
+        self.assertTrue(self.db.insertar_transaccion(1, 1, 100.0, 100.0, 19.0, 119.0))
+        no_modificada = cliente.get('/estadisticas/', headers={'If-None-Match': primera.headers['ETag']})
+        self.assertEqual(no_modificada.status_code, 304)
+        # Las vistas que no son analíticas siguen la base principal
+        self.assertEqual(cliente.get('/transacciones/').status_code, 200)
+
+        fecha = time.time() - 61
+        os.utime(app.replica.ruta, (fecha, fecha))
+        refrescada = cliente.get('/estadisticas/', headers={'If-None-Match': primera.headers['ETag']})
+        self.assertEqual(refrescada.status_code, 200)
+        self.assertNotEqual(refrescada.headers['ETag'], primera.headers['ETag'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,87 @@
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from app_web import create_app
+from src.db.database import BaseDatos
+from src.db.datos_sinteticos import GeneradorDatosSinteticos
+from src.db.reportes import MotorReportes, SeccionReporte
+
+
+class TestMotorReportes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.temp_dir, "test_reportes.db")
+        GeneradorDatosSinteticos(cls.db_path, semilla=11, tamano_lote=500).generar(10, 200, 3000)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir)
+
+    def setUp(self):
+        self.motor = MotorReportes(self.db_path, hilos=3)
+
+    def tearDown(self):
+        self.motor.cerrar()
+
+    def test_001_mismos_datos_que_la_consulta_en_serie(self):
+        db = BaseDatos(self.db_path)
+        estadisticas = self.motor.obtener_estadisticas()
+        serie = db.obtener_estadisticas()
+        self.assertEqual({clave: estadisticas[clave] for clave in serie}, serie)
+        self.assertEqual(estadisticas['ventas_por_categoria'], db.consultar_ventas_por_categoria())
+        self.assertEqual(sum(fila['transacciones'] for fila in estadisticas['ventas_por_mes']), 3000)
+        self.assertAlmostEqual(sum(estadisticas['impuestos_por_tipo'].values()),
+                               sum(fila['total_impuestos'] for fila in estadisticas['ventas_por_categoria']),
+                               places=2)
+
+    def test_002_secciones_en_hilos_distintos_y_conexiones_reutilizadas(self):
+        hilos = set()
+        original = self.motor._conexion
+
+        def conexion_registrando_hilo(version):
+            hilos.add(threading.get_ident())
+            return original(version)
+
+        self.motor._conexion = conexion_registrando_hilo
+        secciones = {f'conteo_{i}': SeccionReporte('transacciones_contar', valor_unico=True) for i in range(12)}
+        for _ in range(3):
+            self.assertEqual(set(self.motor.generar(secciones).values()), {3000})
+        self.assertNotIn(threading.get_ident(), hilos)
+        self.assertLessEqual(len(self.motor._conexiones), 3)
+
+    def test_003_conexiones_de_solo_lectura(self):
+        self.motor.generar({'total': SeccionReporte('transacciones_contar', valor_unico=True)})
+        conexion = self.motor._conexiones[0]
+        with self.assertRaises(sqlite3.OperationalError):
+            conexion.execute("DELETE FROM transacciones")
+
+    def test_004_base_inexistente(self):
+        motor = MotorReportes(os.path.join(self.temp_dir, "no_existe.db"))
+        salida = io.StringIO()
+        with redirect_stdout(salida):
+            self.assertEqual(motor.obtener_estadisticas(), {})
+        motor.cerrar()
+        self.assertIn('Error al generar el reporte', salida.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "no_existe.db")))
+
+    def test_005_pagina_de_estadisticas(self):
+        app = create_app(config={'DATABASE': self.db_path, 'TESTING': True})
+        try:
+            respuesta = app.test_client().get('/estadisticas/')
+        finally:
+            app.reportes.cerrar()
+        self.assertEqual(respuesta.status_code, 200)
+        html = respuesta.get_data(as_text=True)
+        self.assertIn('Ventas de los Últimos Meses', html)
+        self.assertIn('Impuestos Recaudados', html)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
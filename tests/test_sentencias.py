@@ -0,0 +1,96 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from src.db.database import BaseDatos, conexiones_por_hilo
+from src.db.sentencias import RegistroSentencias, SENTENCIAS, normalizar_sql
+
+
+class TestRegistroSentencias(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_sentencias.db")
+        self.registro = RegistroSentencias(SENTENCIAS)
+        self.db = BaseDatos(self.db_path, sentencias=self.registro)
+        self.assertTrue(self.db.crear_tablas())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_catalogo_compila_contra_esquema(self):
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            self.assertEqual(self.registro.precompilar(conexion), [])
+        finally:
+            conexion.close()
+
+    def test_002_sql_normalizado(self):
+        self.assertEqual(self.registro.sql('producto_por_id'),
+                         normalizar_sql(SENTENCIAS['producto_por_id']))
+        self.assertNotIn("\n", self.registro.sql('productos_todos'))
+
+    def test_003_sentencia_no_registrada(self):
+        with self.assertRaises(KeyError):
+            self.registro.sql('no_existe')
+
+    def test_004_conteo_de_ejecuciones(self):
+        self.assertTrue(self.db.insertar_categoria("Otros", "Varios", 0.19))
+        self.db.consultar_todas_categorias()
+        self.db.consultar_todas_categorias()
+        estadisticas = self.registro.estadisticas()
+        self.assertEqual(estadisticas['categoria_insertar']['ejecuciones'], 1)
+        self.assertEqual(estadisticas['categorias_todas']['ejecuciones'], 2)
+        self.assertGreaterEqual(estadisticas['categorias_todas']['tiempo_total'], 0.0)
+
+    def test_005_actualizacion_parcial_usa_una_sola_forma(self):
+        self.assertTrue(self.db.insertar_categoria("Otros", "Varios", 0.19))
+        self.assertTrue(self.db.insertar_producto("Laptop", 1000.0, 1, "Portátil", "Activo"))
+        self.assertTrue(self.db.actualizar_producto(1, nombre="Laptop Pro"))
+        self.assertTrue(self.db.actualizar_producto(1, precio_base=2000.0, estado="Inactivo"))
+        producto = self.db.consultar_producto_por_id(1)
+        self.assertEqual(producto['nombre'], "Laptop Pro")
+        self.assertEqual(producto['precio_base'], 2000.0)
+        self.assertEqual(producto['descripcion'], "Portátil")
+        self.assertEqual(producto['estado'], "Inactivo")
+        self.assertEqual(self.registro.estadisticas()['producto_actualizar']['ejecuciones'], 2)
+
+    def test_006_error_se_contabiliza(self):
+        self.assertFalse(self.db.insertar_producto("Laptop", -5.0, 1))
+        self.assertEqual(self.registro.estadisticas()['producto_insertar']['errores'], 1)
+
+    def test_007_conexion_reutilizada_por_hilo(self):
+        usadas = []
+        original = conexiones_por_hilo.obtener
+
+        def registrando(nombre_db):
+            usadas.append(original(nombre_db))
+            return usadas[-1]
+
+        conexiones_por_hilo.obtener = registrando
+        try:
+            self.db.consultar_todas_categorias()
+            self.assertTrue(self.db.insertar_categoria("Otros", "Varios", 0.19))
+            self.db.consultar_todas_categorias()
+            # Otro hilo tiene la suya
+            hilo = threading.Thread(target=self.db.consultar_todas_categorias)
+            hilo.start()
+            hilo.join()
+        finally:
+            conexiones_por_hilo.obtener = original
+        self.assertIs(usadas[0], usadas[1])
+        self.assertIs(usadas[0], usadas[2])
+        self.assertIsNot(usadas[0], usadas[3])
+        self.assertFalse(usadas[0].in_transaction)
+
+        # Un archivo reemplazado se abre de nuevo
+        os.remove(self.db_path)
+        self.assertTrue(self.db.crear_tablas())
+        self.assertIsNot(conexiones_por_hilo.obtener(self.db_path), usadas[0])
+        self.assertEqual(self.db.consultar_todas_categorias(), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
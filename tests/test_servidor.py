@@ -0,0 +1,97 @@
+import gc
+import os
+import runpy
+import shutil
+import tempfile
+import threading
+import unittest
+
+from app_web import create_app
+from app_web.metricas import cache_aciertos_total
+from app_web.servidor import antes_de_fork, calentar, despues_de_fork, trabajadores_sugeridos
+from src.db.database import BaseDatos
+
+
+class TestServidor(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_servidor.db")
+        db = BaseDatos(self.db_path)
+        db.crear_tablas()
+        db.inicializar_datos_ejemplo()
+        self.app = create_app(config={'DATABASE': self.db_path, 'TESTING': True})
+
+    def tearDown(self):
+        gc.unfreeze()
+        self.app.trabajos.detener()
+        self.app.reportes.cerrar()
+        self.app.estampas.cerrar()
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_trabajadores_por_nucleos(self):
+        self.assertEqual(trabajadores_sugeridos(1), 3)
+        self.assertEqual(trabajadores_sugeridos(2), 5)
+        self.assertEqual(trabajadores_sugeridos(16), 8)
+        self.assertEqual(trabajadores_sugeridos(16, maximo=20), 20)
+        self.assertGreaterEqual(trabajadores_sugeridos(), 1)
+
+    def test_002_calentar_y_dejar_el_maestro_sin_hilos(self):
+        hilos = threading.active_count()
+        calentado = calentar(self.app)
+        self.assertGreater(calentado['plantillas'], 10)
+        self.assertEqual(calentado['paginas'], 7)
+
+        antes_de_fork(self.app)
+        self.assertEqual(threading.active_count(), hilos)
+        self.assertEqual(cache_aciertos_total.exportar()['muestras'], [])
+        self.assertEqual(self.app.reportes._conexiones, [])
+        self.assertIsNone(self.app.estampas._conexion)
+
+        operaciones = []
+        self.app.instrumentacion.agregar_gancho(lambda operacion: operaciones.append(operacion.nombre))
+        self.assertEqual(self.app.test_client().get('/productos/').status_code, 200)
+        self.assertEqual(operaciones, [])
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requiere fork")
+    def test_003_worker_hereda_la_cache(self):
+        calentar(self.app)
+        antes_de_fork(self.app)
+        lectura, escritura = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            codigo = 1
+            try:
+                despues_de_fork(self.app)
+                respuesta = self.app.test_client().get('/estadisticas/')
+                hilos_trabajos = len(self.app.trabajos._hilos)
+                os.write(escritura, f"{respuesta.status_code},{hilos_trabajos}".encode())
+                self.app.trabajos.detener()
+                codigo = 0
+            finally:
+                os._exit(codigo)
+        os.close(escritura)
+        with os.fdopen(lectura) as salida:
+            resultado = salida.read()
+        _, estado = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(estado), 0)
+        self.assertEqual(resultado, f"200,{self.app.config['TRABAJOS_HILOS']}")
+
+    def test_004_gc_reactivado_sin_precarga(self):
+        # La configuración desactiva el GC, pero la línea de comandos puede quitar la precarga
+        configuracion = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                                    'gunicorn.conf.py'))
+        try:
+            self.assertFalse(gc.isenabled())
+
+            class Servidor:
+                class cfg:
+                    preload_app = False
+
+            configuracion['when_ready'](Servidor())
+            self.assertTrue(gc.isenabled())
+        finally:
+            gc.enable()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
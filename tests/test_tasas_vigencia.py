@@ -0,0 +1,90 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from src.db.database import BaseDatos
+from src.model.calculadora_impuestos import CalculadoraImpuestos, CategoriaProducto
+from src.model.tasas import IndiceTasas
+
+
+class TestIndiceTasas(unittest.TestCase):
+    def test_001_tasa_vigente_por_fecha(self):
+        indice = IndiceTasas()
+        indice.agregar('IVA 19%', '2024-01-01 00:00:00', 0.19)
+        indice.agregar('IVA 19%', datetime(2025, 7, 1), 0.21)
+        indice.agregar('IVA 19%', '2023-01-01 00:00:00', 0.16)
+
+        self.assertIsNone(indice.tasa('IVA 19%', '2022-12-31 23:59:59'))
+        self.assertEqual(indice.tasa('IVA 19%', '2023-06-01 00:00:00'), 0.16)
+        self.assertEqual(indice.tasa('IVA 19%', '2025-07-01 00:00:00'), 0.21)
+        self.assertEqual(indice.tasa('IVA 19%', '2025-06-30 23:59:59'), 0.19)
+        self.assertEqual(indice.tasa('Otro', '2025-01-01', 0.5), 0.5)
+
+    def test_002_misma_fecha_reemplaza(self):
+        indice = IndiceTasas()
+        indice.agregar(1, '2024-01-01 00:00:00', 0.19)
+        indice.agregar(1, '2024-01-01 00:00:00', 0.05)
+        self.assertEqual(indice.versiones(1), [('2024-01-01 00:00:00', 0.05)])
+        self.assertEqual(len(indice), 1)
+
+    def test_003_calculadora_en_una_fecha(self):
+        indice = IndiceTasas()
+        indice.agregar('IVA 19%', '0001-01-01 00:00:00', 0.19)
+        indice.agregar('IVA 19%', '2025-01-01 00:00:00', 0.20)
+        calculadora = CalculadoraImpuestos(indice)
+
+        antes = calculadora.calcular_impuestos(1000, CategoriaProducto.OTROS, '2024-12-31 10:00:00')
+        despues = calculadora.calcular_impuestos(1000, CategoriaProducto.OTROS, '2025-03-01 10:00:00')
+        self.assertEqual(antes['total_impuestos'], 190.0)
+        self.assertEqual(despues['total_impuestos'], 200.0)
+        # Sin fecha se usan las tasas actuales de la calculadora
+        self.assertEqual(calculadora.calcular_impuestos(1000, CategoriaProducto.OTROS)['total_impuestos'], 190.0)
+
+
+class TestHistorialTasas(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test_tasas.db")
+        self.db = BaseDatos(self.db_path)
+        self.db.crear_tablas()
+        self.db.inicializar_datos_ejemplo()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_actualizar_categoria_conserva_la_tasa_anterior(self):
+        self.assertTrue(self.db.actualizar_categoria(1, tasa_iva=0.08))
+        versiones = self.db.cargar_historial_tasas().versiones(1)
+        self.assertEqual([tasa for _, tasa in versiones], [0.05, 0.08])
+        self.assertEqual(self.db.cargar_historial_tasas().tasa(1, versiones[0][0]), 0.05)
+
+    def test_002_tasas_programadas(self):
+        self.assertTrue(self.db.programar_tasa_impuesto('IVA 19%', 0.21, '2030-01-01 00:00:00'))
+        self.assertTrue(self.db.programar_tasa_categoria(6, 0.21, datetime(2030, 1, 1)))
+        self.assertFalse(self.db.programar_tasa_impuesto('IVA 19%', 1.5, '2030-01-01 00:00:00'))
+
+        calculadora = CalculadoraImpuestos(self.db.cargar_historial_tasas())
+        self.assertEqual(calculadora.calcular_impuestos(1000, CategoriaProducto.OTROS,
+                                                        '2029-12-31 23:59:59')['total_impuestos'], 190.0)
+        self.assertEqual(calculadora.calcular_impuestos(1000, CategoriaProducto.OTROS,
+                                                        '2030-02-01 00:00:00')['total_impuestos'], 210.0)
+        self.assertEqual(calculadora.historial.tasa(6, '2030-02-01 00:00:00'), 0.21)
+
+    def test_003_eliminar_categoria_elimina_su_historial(self):
+        self.assertTrue(self.db.insertar_categoria("Temporal", "", 0.19))
+        categoria_id = max(c['id'] for c in self.db.consultar_todas_categorias())
+        self.assertTrue(self.db.eliminar_categoria(categoria_id))
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            restantes = conexion.execute("SELECT COUNT(*) FROM tasas_categoria WHERE categoria_id = ?",
+                                         (categoria_id,)).fetchone()[0]
+        finally:
+            conexion.close()
+        self.assertEqual(restantes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -0,0 +1,153 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from app_web import create_app
+from src.db.sentencias import problemas_plan
+from src.db.trabajos import (CANCELADO, COMPLETADO, FALLIDO, PENDIENTE, GestorTrabajos,
+                             registro_sentencias_trabajos)
+
+# Recorren la clave primaria de atrás hacia adelante y se detienen en el LIMIT
+RECORRIDOS_CON_LIMITE = {'trabajos_recientes'}
+
+
+class TestGestorTrabajos(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "trabajos.db")
+        self.gestor = GestorTrabajos(self.db_path, hilos=2, intervalo=0.05)
+        self.liberar = threading.Event()
+
+        def esperar_liberacion(contexto, pasos: int = 3):
+            for paso in range(pasos):
+                self.liberar.wait(5)
+                contexto.progreso(paso + 1, pasos, f"paso {paso + 1}")
+            return {'pasos': pasos}
+
+        def fallar(contexto):
+            raise ValueError("dato inválido")
+
+        self.gestor.registrar('esperar', esperar_liberacion, "Esperar")
+        self.gestor.registrar('fallar', fallar)
+
+    def tearDown(self):
+        self.liberar.set()
+        self.gestor.detener()
+        shutil.rmtree(self.temp_dir)
+
+    def test_001_completa_con_resultado_y_avance(self):
+        self.liberar.set()
+        trabajo_id = self.gestor.encolar('esperar', pasos=4)
+        trabajo = self.gestor.esperar(trabajo_id)
+        self.assertEqual(trabajo['estado'], COMPLETADO)
+        self.assertEqual(trabajo['resultado'], {'pasos': 4})
+        self.assertEqual((trabajo['hechos'], trabajo['total'], trabajo['porcentaje']), (4, 4, 100))
+        self.assertEqual(trabajo['titulo'], "Esperar")
+        self.assertEqual(trabajo['parametros'], {'pasos': 4})
+
+    def test_002_error_marca_fallido(self):
+        trabajo = self.gestor.esperar(self.gestor.encolar('fallar'))
+        self.assertEqual(trabajo['estado'], FALLIDO)
+        self.assertIn("dato inválido", trabajo['mensaje'])
+        self.assertIsNone(self.gestor.encolar('desconocido'))
+
+    def test_003_cancelar_pendiente_y_en_curso(self):
+        en_curso = [self.gestor.encolar('esperar', pasos=50) for _ in range(2)]
+        pendiente = self.gestor.encolar('esperar')
+        self.assertTrue(self.gestor.cancelar(pendiente))
+        self.assertEqual(self.gestor.consultar(pendiente)['estado'], CANCELADO)
+
+        for trabajo_id in en_curso:
+            self.assertTrue(self.gestor.cancelar(trabajo_id))
+        self.liberar.set()
+        for trabajo_id in en_curso:
+            self.assertEqual(self.gestor.esperar(trabajo_id)['estado'], CANCELADO)
+        self.assertFalse(self.gestor.cancelar(pendiente))
+
+    def test_004_detener_devuelve_el_trabajo_a_la_cola(self):
+        trabajo_id = self.gestor.encolar('esperar', pasos=50)
+        while self.gestor.consultar(trabajo_id)['estado'] == PENDIENTE:
+            self.liberar.wait(0.01)
+        # El trabajo sigue bloqueado hasta después de pedir la detención
+        threading.Timer(0.1, self.liberar.set).start()
+        self.gestor.detener()
+        self.assertEqual(self.gestor.consultar(trabajo_id)['estado'], PENDIENTE)
+
+        self.gestor.iniciar()
+        self.assertEqual(self.gestor.esperar(trabajo_id)['estado'], COMPLETADO)
+
+    def test_005_en_curso_de_un_proceso_terminado(self):
+        self.gestor.preparar()
+        conexion = sqlite3.connect(self.db_path)
+        conexion.execute("INSERT INTO trabajos (tipo, estado, proceso) VALUES ('esperar', 'en_curso', NULL)")
+        conexion.commit()
+        conexion.close()
+        self.assertEqual(self.gestor.recuperar_interrumpidos(), 1)
+        self.assertEqual(self.gestor.consultar_recientes()[0]['estado'], FALLIDO)
+
+    def test_006_planes_sin_recorridos_completos(self):
+        self.gestor.preparar()
+        conexion = sqlite3.connect(self.db_path)
+        try:
+            planes = registro_sentencias_trabajos.planes(conexion)
+        finally:
+            conexion.close()
+        for nombre, plan in planes.items():
+            with self.subTest(sentencia=nombre):
+                problemas = problemas_plan(plan)
+                if nombre in RECORRIDOS_CON_LIMITE:
+                    problemas = [paso for paso in problemas if paso.startswith("USE TEMP B-TREE")]
+                self.assertEqual(problemas, [], f"{nombre}: {plan}")
+
+
+class TestTrabajosWeb(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "web.db")
+        self.app = create_app(config={'DATABASE': self.db_path, 'TESTING': True})
+        self.cliente = self.app.test_client()
+
+    def tearDown(self):
+        self.app.trabajos.detener()
+        self.app.reportes.cerrar()
+        shutil.rmtree(self.temp_dir)
+
+    def ultimo_trabajo(self) -> dict:
+        trabajo = self.app.trabajos.consultar_recientes(1)[0]
+        return self.app.trabajos.esperar(trabajo['id'])
+
+    def test_001_inicio_encola_y_redirige_a_trabajos(self):
+        respuesta = self.cliente.post('/crear_tablas')
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertTrue(respuesta.headers['Location'].endswith('/trabajos/'))
+        self.assertEqual(self.ultimo_trabajo()['estado'], COMPLETADO)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "web.trabajos.db")))
+
+        self.cliente.post('/inicializar_datos')
+        self.assertEqual(self.ultimo_trabajo()['resultado'], "Datos de ejemplo inicializados exitosamente")
+        self.cliente.post('/inicializar_datos')
+        self.assertIn("ya contienen datos", self.ultimo_trabajo()['resultado'])
+
+        pagina = self.cliente.get('/trabajos/').get_data(as_text=True)
+        self.assertIn('Cargar datos de ejemplo', pagina)
+        self.assertNotIn('http-equiv="refresh"', pagina)
+
+    def test_002_recalcular_y_consultar_json(self):
+        self.cliente.post('/crear_tablas')
+        self.ultimo_trabajo()
+        self.cliente.post('/trabajos/recalcular_impuestos', data={'simular': '1'})
+        trabajo = self.ultimo_trabajo()
+        self.assertEqual(trabajo['estado'], COMPLETADO)
+        self.assertTrue(trabajo['resultado']['simulado'])
+
+        datos = self.cliente.get(f"/trabajos/{trabajo['id']}").get_json()
+        self.assertEqual(datos['estado'], COMPLETADO)
+        self.assertEqual(self.cliente.get('/trabajos/9999').status_code, 404)
+        self.assertEqual(self.cliente.post(f"/trabajos/{trabajo['id']}/cancelar").status_code, 302)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)